@@ -1,27 +1,105 @@
-from .core import (
-    ping,
-    Card,
-    CardSpec,
-    CardsStatus,
-    Cardset,
-    CardsetSpec,
-    CardsetInfo,
-    CardsetInfoSpec,
-    CardsetService,
-    CardsetRepositoryABC,
-    CardsException,
-    CardsPermissionDenied,
-    CardsInvalidArguments,
-)
-
-from .sqlite_data import (
-    CardsetRepository,
-    SqliteDbHandler,
-)
-
-from .api import (
-    ApiAppBuilder,
-)
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .core import (
+        ping,
+        Card,
+        CardSpec,
+        CardsStatus,
+        CardsSort,
+        CardsetsSort,
+        SortOrder,
+        CardField,
+        CardsetInfoField,
+        Cardset,
+        CardsetSpec,
+        CardsetInfo,
+        CardsetInfoSpec,
+        ResourceVersion,
+        Changes,
+        CardsetService,
+        CardsetRepositoryABC,
+        AdmissionController,
+        AdmissionStats,
+        ChangeBroker,
+        ChangeNotification,
+        CardsException,
+        CardsPermissionDenied,
+        CardsInvalidArguments,
+        CardsNotFound,
+        CardsOverloaded,
+        CardsRateLimited,
+    )
+
+    from .sqlite_data import (
+        CardsetRepository,
+        ShardedCardsetRepository,
+        SqliteDbHandler,
+    )
+
+    from .memory_data import (
+        MemoryCardsetRepository,
+    )
+
+    from .api import (
+        ApiAppBuilder,
+        AppSettings,
+    )
+
+
+# Подпакеты импортируются при первом обращении к их объектам: импорт
+# cards.api загружает FastAPI, pydantic и starlette, которые не нужны
+# фоновым задачам и утилитам командной строки.
+_LAZY_EXPORTS = {
+    "ping": ".core",
+    "Card": ".core",
+    "CardSpec": ".core",
+    "CardsStatus": ".core",
+    "CardsSort": ".core",
+    "CardsetsSort": ".core",
+    "SortOrder": ".core",
+    "CardField": ".core",
+    "CardsetInfoField": ".core",
+    "Cardset": ".core",
+    "CardsetSpec": ".core",
+    "CardsetInfo": ".core",
+    "CardsetInfoSpec": ".core",
+    "ResourceVersion": ".core",
+    "Changes": ".core",
+    "CardsetService": ".core",
+    "CardsetRepositoryABC": ".core",
+    "AdmissionController": ".core",
+    "AdmissionStats": ".core",
+    "ChangeBroker": ".core",
+    "ChangeNotification": ".core",
+    "CardsException": ".core",
+    "CardsPermissionDenied": ".core",
+    "CardsInvalidArguments": ".core",
+    "CardsNotFound": ".core",
+    "CardsOverloaded": ".core",
+    "CardsRateLimited": ".core",
+    "CardsetRepository": ".sqlite_data",
+    "ShardedCardsetRepository": ".sqlite_data",
+    "SqliteDbHandler": ".sqlite_data",
+    "MemoryCardsetRepository": ".memory_data",
+    "ApiAppBuilder": ".api",
+    "AppSettings": ".api",
+}
+
+
+def __getattr__(name: str):
+    if name not in _LAZY_EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    module = importlib.import_module(_LAZY_EXPORTS[name], __name__)
+    value = getattr(module, name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_EXPORTS))
 
 
 __all__ = [
@@ -29,16 +107,33 @@ __all__ = [
     "Card",
     "CardSpec",
     "CardsStatus",
+    "CardsSort",
+    "CardsetsSort",
+    "SortOrder",
+    "CardField",
+    "CardsetInfoField",
     "Cardset",
     "CardsetSpec",
     "CardsetInfo",
     "CardsetInfoSpec",
+    "ResourceVersion",
+    "Changes",
     "CardsetService",
     "CardsetRepositoryABC",
+    "AdmissionController",
+    "AdmissionStats",
+    "ChangeBroker",
+    "ChangeNotification",
     "CardsException",
     "CardsPermissionDenied",
     "CardsInvalidArguments",
+    "CardsNotFound",
+    "CardsOverloaded",
+    "CardsRateLimited",
     "CardsetRepository",
+    "ShardedCardsetRepository",
     "SqliteDbHandler",
+    "MemoryCardsetRepository",
     "ApiAppBuilder",
+    "AppSettings",
 ]
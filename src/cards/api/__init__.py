@@ -1,6 +1,11 @@
-from .app_builder import ApiAppBuilder
+from .app_builder import ApiAppBuilder, create_app
+from .compression import ResponseCompressor
+from .settings import AppSettings
 
 
 __all__ = [
     "ApiAppBuilder",
+    "create_app",
+    "ResponseCompressor",
+    "AppSettings",
 ]
@@ -1,11 +1,17 @@
-from typing import Annotated
+from datetime import datetime
+from typing import Annotated, List
 
-from fastapi import Query, Body, Path
+from fastapi import Query, Body, Path, Header
 
 from .schemas import (
     CardsetSpecSchema,
     CardsetInfoSpecSchema,
     CardSpecSchema,
+    CardsSort,
+    CardsetsSort,
+    SortOrder,
+    CardField,
+    CardsetInfoField,
 )
 
 from ..core.constants import ID_LENGTH, MAX_LIMIT
@@ -59,6 +65,81 @@ OptionalMixedAnnotation = Annotated[bool | None, Query(
     description="Флаг возврата объектов в случайном порядке.",
 )]
 
+OptionalCardsSortAnnotation = Annotated[CardsSort | None, Query(
+    description="Порядок карточек: по термину, по позиции или по \
+        времени создания, изменения или обращения.",
+)]
+
+OptionalCardsetsSortAnnotation = Annotated[CardsetsSort | None, Query(
+    description="Порядок наборов карточек: по названию или по времени \
+        создания, изменения или обращения.",
+)]
+
+OptionalSortOrderAnnotation = Annotated[SortOrder | None, Query(
+    description="Направление сортировки.",
+)]
+
+OptionalModifiedAfterAnnotation = Annotated[datetime | None, Query(
+    description="Вернуть только объекты, измененные позже этого времени.",
+)]
+
+OptionalModifiedBeforeAnnotation = Annotated[datetime | None, Query(
+    description="Вернуть только объекты, измененные раньше этого \
+        времени.",
+)]
+
+OptionalCardFieldsAnnotation = Annotated[List[CardField] | None, Query(
+    description="Поля карточек, которые нужно вернуть. Если не \
+        передано, возвращаются все поля.",
+)]
+
+OptionalCardsetInfoFieldsAnnotation = Annotated[
+    List[CardsetInfoField] | None,
+    Query(
+        description="Поля наборов карточек, которые нужно вернуть. Если \
+            не передано, возвращаются все поля.",
+    ),
+]
+
+OptionalBeforeIdAnnotation = Annotated[str | None, Query(
+    description="Идентификатор карточки, перед которой нужно поместить \
+        карточку.",
+)]
+
+OptionalAfterIdAnnotation = Annotated[str | None, Query(
+    description="Идентификатор карточки, после которой нужно поместить \
+        карточку.",
+)]
+
+OptionalSinceAnnotation = Annotated[int | None, Query(
+    description="Номер последнего полученного изменения (next_since).",
+    ge=0,
+)]
+
+OptionalChangesLimitAnnotation = Annotated[int | None, Query(
+    description="Максимальное количество объектов на странице.",
+    ge=1,
+    le=MAX_LIMIT,
+)]
+
+AcceptAnnotation = Annotated[str | None, Header(
+    description="Формат ответа: application/json (по умолчанию) или \
+        application/msgpack.",
+)]
+
+AcceptEncodingAnnotation = Annotated[str | None, Header(
+    description="Допустимые кодировки ответа: gzip сжимает ответы \
+        больше порогового размера.",
+)]
+
+IfNoneMatchAnnotation = Annotated[str | None, Header(
+    description="ETag ранее полученного ответа.",
+)]
+
+IfModifiedSinceAnnotation = Annotated[str | None, Header(
+    description="Дата последнего изменения ранее полученного ответа.",
+)]
+
 CardsetSpecAnnotation = Annotated[CardsetSpecSchema, Body(
     description="Информация о параметрах набора карточек.",
 )]
@@ -1,20 +1,233 @@
+from dataclasses import asdict, replace
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 
 from .cardset_router_builder import CardsetRouterBuilder
-from ..sqlite_data import CardsetRepository, SqliteDbHandler
-from ..core import CardsetService
+from .compression import ResponseCompressor
+from .error_handlers import overloaded_handler, cards_error_handler
+from .profiling import ProfilingMiddleware
+from .settings import AppSettings
+from ..sqlite_data import (
+    CardsetRepository,
+    ShardedCardsetRepository,
+    SqliteDbHandler,
+    SnapshotRefresher,
+    MaintenanceScheduler,
+)
+from ..memory_data import MemoryCardsetRepository
+from ..core import (
+    AdmissionController,
+    ChangeBroker,
+    CardsetService,
+    CardsetRepositoryABC,
+    CardsOverloaded,
+    CardsPermissionDenied,
+    CardsInvalidArguments,
+)
 
 
 class ApiAppBuilder:
-    def __init__(self, *args, db_path: str = "test.db", **kwargs):
+    """
+    Собирает приложение FastAPI с хранилищем и режимами работы, заданными
+    настройками settings (см. AppSettings); db_path, если передан,
+    заменяет settings.db_path.
+
+    По умолчанию база данных SQLite пересоздается при создании объекта.
+    В режиме factory конструктор не обращается к базе данных: схема
+    создается или мигрируется без удаления данных при запуске приложения
+    (lifespan) под блокировкой SQLite, а соединения открываются в каждом
+    рабочем процессе после fork и закрываются при его остановке. В этом
+    режиме приложение можно создавать в мастер-процессе до fork
+    (gunicorn --preload, uvicorn --factory).
+
+    admission_controller, change_broker и compressor по умолчанию
+    создаются по настройкам; переданные объекты используются вместо них.
+    """
+
+    def __init__(
+        self,
+        *args,
+        settings: AppSettings | None = None,
+        db_path: str | None = None,
+        factory: bool = False,
+        admission_controller: AdmissionController | None = None,
+        change_broker: ChangeBroker | None = None,
+        compressor: ResponseCompressor | None = None,
+        **kwargs,
+    ):
         super().__init__(*args, **kwargs)
 
+        settings = settings or AppSettings()
+        if db_path is not None:
+            settings = replace(settings, db_path=db_path)
+        self.settings = settings
+
+        kwargs.setdefault("lifespan", self.lifespan)
         self.app = FastAPI(*args, **kwargs)
+        self.factory = factory
+
+        self.db_handler: SqliteDbHandler | None = None
+        self.snapshot_refresher: SnapshotRefresher | None = None
+        self.cardset_repository: CardsetRepositoryABC
+        if settings.backend == "sqlite":
+            self.db_handler = SqliteDbHandler(settings.db_path)
+            self.cardset_repository = CardsetRepository(
+                settings.db_path,
+                settings.pool_size,
+                group_commit=settings.group_commit,
+                snapshot_path=settings.read_snapshot_path,
+                max_staleness=settings.max_staleness,
+            )
+            if settings.read_snapshot_path is not None \
+                    and settings.read_snapshot_interval is not None:
+                self.snapshot_refresher = SnapshotRefresher(
+                    settings.db_path,
+                    settings.read_snapshot_path,
+                    settings.read_snapshot_interval,
+                )
+        elif settings.backend == "sqlite-sharded":
+            # Групповая фиксация и чтение из снимка работают с одним
+            # файлом базы данных; молча игнорировать их нельзя.
+            if settings.group_commit:
+                raise ValueError(
+                    "group_commit не поддерживается с backend "
+                    "sqlite-sharded"
+                )
+            if settings.read_snapshot_path is not None:
+                raise ValueError(
+                    "read_snapshot_path не поддерживается с backend "
+                    "sqlite-sharded"
+                )
+            self.db_handler = SqliteDbHandler(
+                settings.db_path, settings.shard_count
+            )
+            self.cardset_repository = ShardedCardsetRepository(
+                settings.db_path, settings.shard_count, settings.pool_size
+            )
+        elif settings.backend == "memory":
+            self.cardset_repository = MemoryCardsetRepository(
+                snapshot_path=settings.snapshot_path,
+                snapshot_interval=settings.snapshot_interval,
+            )
+        else:
+            raise ValueError(f"Неизвестный backend: {settings.backend}")
+
+        if self.db_handler is not None and not factory:
+            self.db_handler.initialize_db()
+            self.__reload_bucket_map()
+
+        if admission_controller is None \
+                and settings.write_concurrency is not None:
+            admission_controller = AdmissionController(
+                max_concurrency=settings.write_concurrency,
+                max_queue=settings.write_queue,
+            )
+        if change_broker is None and settings.change_stream:
+            change_broker = ChangeBroker()
+        if compressor is None:
+            compressor = ResponseCompressor(
+                minimum_size=settings.gzip_min_size,
+                level=settings.gzip_level,
+            )
+        self.admission_controller = admission_controller
+        self.change_broker = change_broker
 
-        self.db_handler = SqliteDbHandler(db_path)
-        self.db_handler.initialize_db()
-        self.cardset_repository = CardsetRepository(db_path)
-        self.cardset_service = CardsetService(self.cardset_repository)
-        self.router = CardsetRouterBuilder(self.cardset_service).router
+        self.maintenance_scheduler: MaintenanceScheduler | None = None
+        if self.db_handler is not None \
+                and settings.maintenance_interval is not None:
+            self.maintenance_scheduler = MaintenanceScheduler(
+                self.db_handler.db_paths,
+                interval=settings.maintenance_interval,
+                is_busy=(
+                    self.writes_in_progress
+                    if admission_controller is not None else None
+                ),
+            )
+        self.cardset_service = CardsetService(
+            self.cardset_repository,
+            admission_controller=admission_controller,
+            change_broker=change_broker,
+        )
+        self.router = CardsetRouterBuilder(
+            self.cardset_service, compressor=compressor
+        ).router
 
         self.app.include_router(self.router)
+        self.app.add_exception_handler(CardsOverloaded, overloaded_handler)
+        self.app.add_exception_handler(
+            CardsPermissionDenied, cards_error_handler
+        )
+        self.app.add_exception_handler(
+            CardsInvalidArguments, cards_error_handler
+        )
+        if settings.profile_dir is not None:
+            self.app.add_middleware(
+                ProfilingMiddleware,
+                profile_dir=settings.profile_dir,
+                sample_rate=settings.profile_sample_rate,
+                max_profiles=settings.profile_max_files,
+            )
+        if admission_controller is not None:
+            self.app.add_api_route(
+                "/metrics/admission/",
+                self.admission_metrics,
+                methods=["GET"],
+                tags=["metrics"],
+            )
+
+    async def admission_metrics(self) -> dict:
+        if self.admission_controller is None:
+            return {}
+        return asdict(self.admission_controller.stats())
+
+    def writes_in_progress(self) -> bool:
+        if self.admission_controller is None:
+            return False
+        stats = self.admission_controller.stats()
+        return stats.active + stats.queued > 0
+
+    def prepare_db(self) -> None:
+        """
+        Создает или мигрирует схему базы данных, не удаляя данные. Может
+        быть вызван один раз в мастер-процессе до запуска рабочих
+        процессов; при запуске приложения в режиме factory вызывается
+        повторно и ничего не меняет.
+        """
+        if self.db_handler is not None:
+            self.db_handler.ensure_db()
+            self.__reload_bucket_map()
+
+    def __reload_bucket_map(self) -> None:
+        if isinstance(self.cardset_repository, ShardedCardsetRepository):
+            self.cardset_repository.reload_bucket_map()
+
+    @asynccontextmanager
+    async def lifespan(self, app: FastAPI):
+        if self.factory:
+            self.prepare_db()
+        self.cardset_repository.open()
+        if self.snapshot_refresher is not None:
+            self.snapshot_refresher.start()
+        if self.maintenance_scheduler is not None:
+            self.maintenance_scheduler.start()
+        yield
+        self.close()
+
+    def close(self) -> None:
+        if self.change_broker is not None:
+            self.change_broker.close()
+        if self.snapshot_refresher is not None:
+            self.snapshot_refresher.close()
+        if self.maintenance_scheduler is not None:
+            self.maintenance_scheduler.close()
+        self.cardset_repository.close()
+
+
+def create_app() -> FastAPI:
+    """
+    Фабрика приложения для запуска в нескольких рабочих процессах,
+    например ``uvicorn --factory cards.api:create_app --workers 4``.
+    Настройки читаются из переменных окружения (см. AppSettings.from_env).
+    """
+    return ApiAppBuilder(settings=AppSettings.from_env(), factory=True).app
@@ -1,4 +1,11 @@
+import json
+from dataclasses import asdict
+from typing import Any, Dict, List, Optional, Sequence, Type
+
 from fastapi import APIRouter, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic_core import to_json
 
 from .annotations import (
     RequesterIdAnnotation,
@@ -10,36 +17,116 @@ from .annotations import (
     OptionalIncludeDeletedAnnotation,
     OptionalCardIdAnnotation,
     OptionalMixedAnnotation,
+    OptionalCardsSortAnnotation,
+    OptionalCardsetsSortAnnotation,
+    OptionalSortOrderAnnotation,
+    OptionalModifiedAfterAnnotation,
+    OptionalModifiedBeforeAnnotation,
+    OptionalCardFieldsAnnotation,
+    OptionalCardsetInfoFieldsAnnotation,
+    OptionalBeforeIdAnnotation,
+    OptionalAfterIdAnnotation,
     CardsetSpecAnnotation,
     CardsetIdAnnotation,
     CardsetInfoSpecAnnotation,
     CardSpecAnnotation,
     CardIdAnnotation,
+    IfNoneMatchAnnotation,
+    IfModifiedSinceAnnotation,
+    AcceptAnnotation,
+    AcceptEncodingAnnotation,
+    OptionalSinceAnnotation,
+    OptionalChangesLimitAnnotation,
+)
+
+from .http_cache import (
+    make_version_etag,
+    make_content_etag,
+    http_last_modified,
+    not_modified_etag,
+    cache_headers,
+    not_modified_response,
+    VARY,
+)
+
+from .compression import (
+    ResponseCompressor,
+    encoded_etag,
+    representation_etags,
+)
+
+from .profiling import profiled, profiled_iterator
+
+from .content_negotiation import (
+    JSON_MEDIA_TYPE,
+    MSGPACK_MEDIA_TYPE,
+    MsgpackRoute,
+    negotiate_media_type,
+    encode_msgpack,
+    table,
 )
 
 from .schemas import (
     CardsetInfoSchema,
     CardsetInfosSchema,
+    CardsetSchema,
     CardSchema,
     CardsSchema,
+    ChangesSchema,
     CardsStatus,
+    CardsSort,
+    CardsetsSort,
+    SortOrder,
+    CardField,
+    CardsetInfoField,
 )
 
 from ..core.cardset_service import CardsetService
+from ..core.change_broker import ChangeBroker
+from ..core.constants import MAX_LIMIT
 from ..core.model import (
+    Cardset,
     CardsetInfo,
     CardsetInfoSpec,
     CardsetSpec,
     CardSpec,
     CardsStatus as CoreCardsStatus,
+    CardsSort as CoreCardsSort,
+    CardsetsSort as CoreCardsetsSort,
+    SortOrder as CoreSortOrder,
+    CardField as CoreCardField,
+    CardsetInfoField as CoreCardsetInfoField,
     Card,
 )
 
 
 class CardsetRouterBuilder:
-    def __init__(self, cardset_service: CardsetService, *args, **kwargs):
+    def __init__(
+        self,
+        cardset_service: CardsetService,
+        *args,
+        compressor: ResponseCompressor | None = None,
+        **kwargs,
+    ):
+        kwargs.setdefault("route_class", MsgpackRoute)
         self.router = APIRouter(*args, **kwargs)
         self.cardset_service = cardset_service
+        self.compressor = compressor or ResponseCompressor()
+
+        change_broker = cardset_service.change_broker
+        if change_broker is not None:
+            @self.router.get("/changes/stream/", tags=["changes"])
+            async def stream_changes(
+                requester_id: RequesterIdAnnotation,
+                cardset_id: OptionalCardsetIdAnnotation = None,
+            ) -> StreamingResponse:
+                return StreamingResponse(
+                    content=stream_change_events(
+                        change_broker, requester_id, cardset_id
+                    ),
+                    media_type="text/event-stream",
+                    headers={"Cache-Control": "no-cache"},
+                )
 
         @self.router.get("/cardsets/", tags=["cardsets"])
         async def get_cardsets(
@@ -49,7 +136,44 @@ class CardsetRouterBuilder:
             offset: OptionalOffsetAnnotation = 0,
             limit: OptionalLimitAnnotation = 10,
             include_deleted: OptionalIncludeDeletedAnnotation = False,
+            fields: OptionalCardsetInfoFieldsAnnotation = None,
+            sort: OptionalCardsetsSortAnnotation = CardsetsSort.TITLE,
+            order: OptionalSortOrderAnnotation = SortOrder.ASC,
+            modified_after: OptionalModifiedAfterAnnotation = None,
+            modified_before: OptionalModifiedBeforeAnnotation = None,
+            accept: AcceptAnnotation = None,
+            accept_encoding: AcceptEncodingAnnotation = None,
+            if_none_match: IfNoneMatchAnnotation = None,
+            if_modified_since: IfModifiedSinceAnnotation = None,
         ) -> Response:
+            media_type = negotiate_media_type(accept)
+            encoding = self.compressor.negotiate("/cardsets/", accept_encoding)
+            version = self.cardset_service.get_cardset_infos_version(
+                requester_id=requester_id,
+                cardset_id=cardset_id,
+                user_id=user_id,
+            )
+
+            etag, last_modified = None, None
+            if version is not None:
+                etag = encoded_etag(make_version_etag(
+                    version, cardset_id, user_id, offset, limit,
+                    include_deleted, fields, sort, order, modified_after,
+                    modified_before, media_type,
+                ), encoding)
+                last_modified = http_last_modified(version.modified_at)
+                matched_etag = not_modified_etag(
+                    representation_etags(etag), last_modified,
+                    if_none_match, if_modified_since,
+                )
+                if matched_etag is not None:
+                    return not_modified_response(matched_etag, last_modified)
+                cached = self.compressor.cached_response(
+                    etag, media_type, cache_headers(etag, last_modified)
+                )
+                if cached is not None:
+                    return cached
+
             cardset_infos = self.cardset_service.get_cardset_infos(
                 requester_id=requester_id,
                 cardset_id=cardset_id,
@@ -57,27 +181,49 @@ class CardsetRouterBuilder:
                 offset=offset,
                 limit=limit,
                 include_deleted=include_deleted,
+                fields=core_fields(
+                    fields, CardsetInfoField.CARDSET_ID,
+                    CoreCardsetInfoField,
+                ),
+                sort=CoreCardsetsSort(sort or CardsetsSort.TITLE),
+                order=CoreSortOrder(order or SortOrder.ASC),
+                modified_after=modified_after,
+                modified_before=modified_before,
             )
 
-            cardset_infos_schema = CardsetInfosSchema(cardsets=[])
-            for cardset_info in cardset_infos:
-                cardset_infos_schema.cardsets.append(
-                    CardsetInfoSchema(
-                        title=cardset_info.title,
-                        cardset_id=cardset_info.id,
-                        description=cardset_info.description,
-                        created_at=cardset_info.created_at,
-                        modified_at=cardset_info.modified_at,
-                        addressed_at=cardset_info.addressed_at,
-                        status=CardsStatus(cardset_info.status),
-                        owner_id=cardset_info.owner_id,
-                    )
+            if media_type == MSGPACK_MEDIA_TYPE:
+                content = encode_msgpack({
+                    "cardsets": table(
+                        cardset_infos,
+                        fields or list(CardsetInfoField),
+                        CardsetInfoField.CARDSET_ID,
+                    ),
+                })
+            elif fields:
+                content = to_json({
+                    "cardsets": project(
+                        cardset_infos, fields, CardsetInfoField.CARDSET_ID
+                    ),
+                })
+            else:
+                cardset_infos_schema = CardsetInfosSchema(cardsets=[
+                    cardset_info_schema(cardset_info)
+                    for cardset_info in cardset_infos
+                ])
+                content = cardset_infos_schema.model_dump_json().encode()
+
+            if etag is None:
+                etag = encoded_etag(make_content_etag(content), encoding)
+                matched_etag = not_modified_etag(
+                    representation_etags(etag), last_modified,
+                    if_none_match, if_modified_since,
                 )
+                if matched_etag is not None:
+                    return not_modified_response(matched_etag, last_modified)
 
-            return Response(
-                content=cardset_infos_schema.model_dump_json(),
-                media_type="json",
-                status_code=200,
+            return await self.compressor.response(
+                "/cardsets/", content, media_type, encoding,
+                cache_headers(etag, last_modified), etag,
             )
 
         @self.router.get("/cards/", tags=["cards"])
@@ -89,7 +235,46 @@ class CardsetRouterBuilder:
             limit: OptionalLimitAnnotation = 10,
             include_deleted: OptionalIncludeDeletedAnnotation = False,
             mixed: OptionalMixedAnnotation = False,
+            sort: OptionalCardsSortAnnotation = CardsSort.TERM,
+            fields: OptionalCardFieldsAnnotation = None,
+            order: OptionalSortOrderAnnotation = SortOrder.ASC,
+            modified_after: OptionalModifiedAfterAnnotation = None,
+            modified_before: OptionalModifiedBeforeAnnotation = None,
+            accept: AcceptAnnotation = None,
+            accept_encoding: AcceptEncodingAnnotation = None,
+            if_none_match: IfNoneMatchAnnotation = None,
+            if_modified_since: IfModifiedSinceAnnotation = None,
         ) -> Response:
+            media_type = negotiate_media_type(accept)
+            encoding = self.compressor.negotiate("/cards/", accept_encoding)
+            version = None
+            if not mixed:
+                version = self.cardset_service.get_cards_version(
+                    requester_id=requester_id,
+                    card_id=card_id,
+                    cardset_id=cardset_id,
+                )
+
+            etag, last_modified = None, None
+            if version is not None:
+                etag = encoded_etag(make_version_etag(
+                    version, card_id, cardset_id, offset, limit,
+                    include_deleted, sort, fields, order, modified_after,
+                    modified_before, media_type,
+                ), encoding)
+                last_modified = http_last_modified(version.modified_at)
+                matched_etag = not_modified_etag(
+                    representation_etags(etag), last_modified,
+                    if_none_match, if_modified_since,
+                )
+                if matched_etag is not None:
+                    return not_modified_response(matched_etag, last_modified)
+                cached = self.compressor.cached_response(
+                    etag, media_type, cache_headers(etag, last_modified)
+                )
+                if cached is not None:
+                    return cached
+
             cards = self.cardset_service.get_cards(
                 requester_id=requester_id,
                 card_id=card_id,
@@ -98,28 +283,181 @@ class CardsetRouterBuilder:
                 limit=limit,
                 include_deleted=include_deleted,
                 mixed=mixed,
+                sort=CoreCardsSort(sort or CardsSort.TERM),
+                fields=core_fields(fields, CardField.CARD_ID, CoreCardField),
+                order=CoreSortOrder(order or SortOrder.ASC),
+                modified_after=modified_after,
+                modified_before=modified_before,
             )
 
-            cards_schema = CardsSchema(cards=[])
-            for card in cards:
-                cards_schema.cards.append(
-                    CardSchema(
-                        card_id=card.id,
-                        cardset_id=card.cardset_id,
-                        term=card.term,
-                        description=card.description,
-                        created_at=card.created_at,
-                        modified_at=card.modified_at,
-                        addressed_at=card.addressed_at,
-                        status=CardsStatus(card.status),
-                        owner_id=card.owner_id,
-                    )
+            if media_type == MSGPACK_MEDIA_TYPE:
+                content = encode_msgpack({
+                    "cards": table(
+                        cards, fields or list(CardField), CardField.CARD_ID
+                    ),
+                })
+            elif fields:
+                content = to_json({
+                    "cards": project(cards, fields, CardField.CARD_ID),
+                })
+            else:
+                content = encode_cards_json(cards)
+
+            if mixed:
+                return await self.compressor.response(
+                    "/cards/", content, media_type, encoding,
+                    {"Cache-Control": "no-store", "Vary": VARY},
                 )
 
-            return Response(
-                content=cards_schema.model_dump_json(),
-                media_type="json",
+            if etag is None:
+                etag = encoded_etag(make_content_etag(content), encoding)
+                matched_etag = not_modified_etag(
+                    representation_etags(etag), last_modified,
+                    if_none_match, if_modified_since,
+                )
+                if matched_etag is not None:
+                    return not_modified_response(matched_etag, last_modified)
+
+            return await self.compressor.response(
+                "/cards/", content, media_type, encoding,
+                cache_headers(etag, last_modified), etag,
+            )
+
+        @self.router.get(
+            "/cardset/{cardset_id}/",
+            tags=["cardset"],
+            response_model=CardsetSchema,
+        )
+        async def get_cardset(
+            requester_id: RequesterIdAnnotation,
+            cardset_id: CardsetIdAnnotation,
+            include_deleted: OptionalIncludeDeletedAnnotation = False,
+            accept: AcceptAnnotation = None,
+            accept_encoding: AcceptEncodingAnnotation = None,
+            if_none_match: IfNoneMatchAnnotation = None,
+            if_modified_since: IfModifiedSinceAnnotation = None,
+        ) -> Response:
+            media_type = negotiate_media_type(accept)
+            encoding = self.compressor.negotiate(
+                "/cardset/{cardset_id}/", accept_encoding
+            )
+            version = self.cardset_service.get_cards_version(
+                requester_id=requester_id,
+                cardset_id=cardset_id,
+            )
+
+            etag, last_modified = None, None
+            if version is not None:
+                etag = encoded_etag(make_version_etag(
+                    version, cardset_id, include_deleted, media_type
+                ), encoding)
+                last_modified = http_last_modified(version.modified_at)
+                matched_etag = not_modified_etag(
+                    representation_etags(etag), last_modified,
+                    if_none_match, if_modified_since,
+                )
+                if matched_etag is not None:
+                    return not_modified_response(matched_etag, last_modified)
+                cached = self.compressor.cached_response(
+                    etag, media_type, cache_headers(etag, last_modified)
+                )
+                if cached is not None:
+                    return cached
+
+            cardset: Cardset | None = self.cardset_service.get_cardset(
+                requester_id=requester_id,
+                cardset_id=cardset_id,
+                include_deleted=include_deleted,
+            )
+
+            if cardset is None:
+                return Response(status_code=404)
+
+            headers = {"Vary": VARY}
+            if etag is not None:
+                headers = cache_headers(etag, last_modified)
+
+            if media_type == MSGPACK_MEDIA_TYPE:
+                content = encode_msgpack({
+                    **project(
+                        [cardset], list(CardsetInfoField),
+                        CardsetInfoField.CARDSET_ID,
+                    )[0],
+                    "cards": table(
+                        cardset.cards, list(CardField), CardField.CARD_ID
+                    ),
+                })
+                return await self.compressor.response(
+                    "/cardset/{cardset_id}/", content, media_type,
+                    encoding, headers, etag,
+                )
+
+            if encoding is not None:
+                # Сжатый ответ собирается целиком: его размер и
+                # содержимое для кеша известны только после сжатия.
+                content = "".join(stream_cardset_json(cardset)).encode()
+                return await self.compressor.response(
+                    "/cardset/{cardset_id}/", content, media_type,
+                    encoding, headers, etag,
+                )
+
+            return StreamingResponse(
+                content=profiled_iterator(stream_cardset_json(cardset)),
+                media_type=JSON_MEDIA_TYPE,
                 status_code=200,
+                headers=headers,
+            )
+
+        @self.router.get("/changes/", tags=["changes"])
+        async def get_changes(
+            requester_id: RequesterIdAnnotation,
+            since: OptionalSinceAnnotation = 0,
+            limit: OptionalChangesLimitAnnotation = MAX_LIMIT,
+            accept: AcceptAnnotation = None,
+            accept_encoding: AcceptEncodingAnnotation = None,
+        ) -> Response:
+            changes = self.cardset_service.get_changes(
+                requester_id=requester_id,
+                since=since,
+                limit=limit,
+            )
+
+            media_type = negotiate_media_type(accept)
+            encoding = self.compressor.negotiate("/changes/", accept_encoding)
+            if media_type == MSGPACK_MEDIA_TYPE:
+                content = encode_msgpack({
+                    "cardsets": table(
+                        changes.cardsets, list(CardsetInfoField),
+                        CardsetInfoField.CARDSET_ID,
+                    ),
+                    "cards": table(
+                        changes.cards, list(CardField), CardField.CARD_ID
+                    ),
+                    "deleted_cardset_ids": changes.deleted_cardset_ids,
+                    "deleted_card_ids": changes.deleted_card_ids,
+                    "next_since": changes.next_since,
+                    "has_more": changes.has_more,
+                })
+                return await self.compressor.response(
+                    "/changes/", content, media_type, encoding,
+                    {"Vary": VARY},
+                )
+
+            changes_schema = ChangesSchema(
+                cardsets=[
+                    cardset_info_schema(cardset_info)
+                    for cardset_info in changes.cardsets
+                ],
+                cards=[card_schema(card) for card in changes.cards],
+                deleted_cardset_ids=changes.deleted_cardset_ids,
+                deleted_card_ids=changes.deleted_card_ids,
+                next_since=changes.next_since,
+                has_more=changes.has_more,
+            )
+
+            return await self.compressor.response(
+                "/changes/", changes_schema.model_dump_json().encode(),
+                media_type, encoding, {"Vary": VARY},
             )
 
         @self.router.post("/cardsets/", tags=["cardsets"])
@@ -146,30 +484,19 @@ class CardsetRouterBuilder:
                 cards=objects,
             )
 
-            cardset_info: CardsetInfo | None = \
-                self.cardset_service.create_cardset(
-                    requester_id=requester_id,
-                    owner_id=owner_id,
-                    spec=cardset_spec,
-                )
+            cardset_info: CardsetInfo | None = await run_in_threadpool(
+                profiled(self.cardset_service.create_cardset),
+                requester_id=requester_id,
+                owner_id=owner_id,
+                spec=cardset_spec,
+            )
 
             if cardset_info is None:
                 return Response(status_code=400)
 
-            cardset_info_schema = CardsetInfoSchema(
-                title=cardset_info.title,
-                cardset_id=cardset_info.id,
-                description=cardset_info.description,
-                created_at=cardset_info.created_at,
-                modified_at=cardset_info.modified_at,
-                addressed_at=cardset_info.addressed_at,
-                status=CardsStatus(cardset_info.status),
-                owner_id=cardset_info.owner_id,
-            )
-
             return Response(
-                content=cardset_info_schema.model_dump_json(),
-                media_type="json",
+                content=cardset_info_schema(cardset_info).model_dump_json(),
+                media_type=JSON_MEDIA_TYPE,
                 status_code=201,
             )
 
@@ -179,44 +506,70 @@ class CardsetRouterBuilder:
             cardset_id: CardsetIdAnnotation,
             spec: CardsetInfoSpecAnnotation,
         ) -> Response:
-            cardset_info: CardsetInfo | None = \
-                self.cardset_service.modify_cardset_info(
-                    requester_id=requester_id,
-                    cardset_id=cardset_id,
-                    spec=CardsetInfoSpec(
-                        title=spec.title,
-                        description=spec.description,
-                        status=CoreCardsStatus(spec.status),
-                    ),
-                )
+            cardset_info: CardsetInfo | None = await run_in_threadpool(
+                profiled(self.cardset_service.modify_cardset_info),
+                requester_id=requester_id,
+                cardset_id=cardset_id,
+                spec=CardsetInfoSpec(
+                    title=spec.title,
+                    description=spec.description,
+                    status=CoreCardsStatus(spec.status),
+                ),
+            )
 
             if cardset_info is None:
                 return Response(status_code=400)
 
-            cardset_info_schema = CardsetInfoSchema(
-                title=cardset_info.title,
-                cardset_id=cardset_info.id,
-                description=cardset_info.description,
-                created_at=cardset_info.created_at,
-                modified_at=cardset_info.modified_at,
-                addressed_at=cardset_info.addressed_at,
-                status=CardsStatus(cardset_info.status),
-                owner_id=cardset_info.owner_id,
+            return Response(
+                content=cardset_info_schema(cardset_info).model_dump_json(),
+                media_type=JSON_MEDIA_TYPE,
+                status_code=200,
+            )
+
+        @self.router.post("/cardset/{cardset_id}/clone", tags=["cardset"])
+        async def clone_cardset(
+            requester_id: RequesterIdAnnotation,
+            cardset_id: CardsetIdAnnotation,
+        ) -> Response:
+            cardset_info: CardsetInfo | None = await run_in_threadpool(
+                profiled(self.cardset_service.clone_cardset),
+                requester_id=requester_id,
+                cardset_id=cardset_id,
             )
 
+            if cardset_info is None:
+                return Response(status_code=400)
+
             return Response(
-                content=cardset_info_schema.model_dump_json(),
-                media_type="json",
-                status_code=200,
+                content=cardset_info_schema(cardset_info).model_dump_json(),
+                media_type=JSON_MEDIA_TYPE,
+                status_code=201,
+            )
+
+        @self.router.delete("/cardset/{cardset_id}/", tags=["cardset"])
+        async def delete_cardset(
+            requester_id: RequesterIdAnnotation,
+            cardset_id: CardsetIdAnnotation,
+        ) -> Response:
+            cardset_info: CardsetInfo | None = await run_in_threadpool(
+                profiled(self.cardset_service.delete_cardset),
+                requester_id=requester_id,
+                cardset_id=cardset_id,
             )
 
+            if cardset_info is None:
+                return Response(status_code=400)
+
+            return Response(status_code=204)
+
         @self.router.post("/cardset/{cardset_id}/cards/", tags=["cards"])
         async def create_card(
             requester_id: RequesterIdAnnotation,
             cardset_id: CardsetIdAnnotation,
             spec: CardSpecAnnotation,
         ) -> Response:
-            card = self.cardset_service.create_card(
+            card = await run_in_threadpool(
+                profiled(self.cardset_service.create_card),
                 requester_id=requester_id,
                 cardset_id=cardset_id,
                 spec=CardSpec(
@@ -229,20 +582,9 @@ class CardsetRouterBuilder:
             if card is None:
                 return Response(status_code=400)
 
-            card_schema = CardSchema(
-                card_id=card.id,
-                cardset_id=card.cardset_id,
-                term=card.term,
-                description=card.description,
-                created_at=card.created_at,
-                modified_at=card.modified_at,
-                addressed_at=card.addressed_at,
-                status=CardsStatus(card.status),
-                owner_id=card.owner_id,
-            )
             return Response(
-                content=card_schema.model_dump_json(),
-                media_type="json",
+                content=card_schema(card).model_dump_json(),
+                media_type=JSON_MEDIA_TYPE,
                 status_code=201,
             )
 
@@ -252,7 +594,8 @@ class CardsetRouterBuilder:
             card_id: CardIdAnnotation,
             spec: CardSpecAnnotation,
         ) -> Response:
-            card: Card | None = self.cardset_service.modify_card(
+            card: Card | None = await run_in_threadpool(
+                profiled(self.cardset_service.modify_card),
                 requester_id=requester_id,
                 card_id=card_id,
                 spec=CardSpec(
@@ -265,20 +608,164 @@ class CardsetRouterBuilder:
             if card is None:
                 return Response(status_code=400)
 
-            card_schema = CardSchema(
-                card_id=card.id,
-                cardset_id=card.cardset_id,
-                term=card.term,
-                description=card.description,
-                created_at=card.created_at,
-                modified_at=card.modified_at,
-                addressed_at=card.addressed_at,
-                status=CardsStatus(card.status),
-                owner_id=card.owner_id,
+            return Response(
+                content=card_schema(card).model_dump_json(),
+                media_type=JSON_MEDIA_TYPE,
+                status_code=200,
+            )
+
+        @self.router.delete("/card/{card_id}/", tags=["card"])
+        async def delete_card(
+            requester_id: RequesterIdAnnotation,
+            card_id: CardIdAnnotation,
+        ) -> Response:
+            card: Card | None = await run_in_threadpool(
+                profiled(self.cardset_service.delete_card),
+                requester_id=requester_id,
+                card_id=card_id,
             )
 
+            if card is None:
+                return Response(status_code=400)
+
+            return Response(status_code=204)
+
+        @self.router.post("/card/{card_id}/move", tags=["card"])
+        async def move_card(
+            requester_id: RequesterIdAnnotation,
+            card_id: CardIdAnnotation,
+            before_id: OptionalBeforeIdAnnotation = None,
+            after_id: OptionalAfterIdAnnotation = None,
+        ) -> Response:
+            card = await run_in_threadpool(
+                profiled(self.cardset_service.move_card),
+                requester_id=requester_id,
+                card_id=card_id,
+                before_id=before_id,
+                after_id=after_id,
+            )
+
+            if card is None:
+                return Response(status_code=400)
+
             return Response(
-                content=card_schema.model_dump_json(),
-                media_type="json",
+                content=card_schema(card).model_dump_json(),
+                media_type=JSON_MEDIA_TYPE,
                 status_code=200,
             )
+
+
+def card_schema(card: Card) -> CardSchema:
+    return CardSchema(
+        card_id=card.id,
+        cardset_id=card.cardset_id,
+        term=card.term,
+        description=card.description,
+        created_at=card.created_at,
+        modified_at=card.modified_at,
+        addressed_at=card.addressed_at,
+        status=CardsStatus(card.status),
+        owner_id=card.owner_id,
+        position=card.position,
+    )
+
+
+def cardset_info_schema(cardset_info: CardsetInfo) -> CardsetInfoSchema:
+    return CardsetInfoSchema(
+        title=cardset_info.title,
+        cardset_id=cardset_info.id,
+        description=cardset_info.description,
+        created_at=cardset_info.created_at,
+        modified_at=cardset_info.modified_at,
+        addressed_at=cardset_info.addressed_at,
+        status=CardsStatus(cardset_info.status),
+        owner_id=cardset_info.owner_id,
+    )
+
+
+def encode_cards_json(cards: List[Card]) -> bytes:
+    cards_schema = CardsSchema(cards=[card_schema(card) for card in cards])
+    return cards_schema.model_dump_json().encode()
+
+
+def core_fields(
+    fields: Optional[Sequence[Any]],
+    id_field: Any,
+    core_type: Type[Any],
+) -> Optional[List[Any]]:
+    """
+    Переводит поля API в атрибуты модели. Поле id_field (card_id или
+    cardset_id) соответствует атрибуту id.
+    """
+    if not fields:
+        return None
+    return [
+        core_type("id" if field == id_field else field.value)
+        for field in fields
+    ]
+
+
+def project(
+    objects: Sequence[Any],
+    fields: Sequence[Any],
+    id_field: Any,
+) -> List[Dict[str, Any]]:
+    """
+    Оставляет у объектов модели только запрошенные поля API.
+    """
+    attributes = {
+        field.value: "id" if field == id_field else field.value
+        for field in fields
+    }
+    return [
+        {
+            name: getattr(obj, attribute)
+            for name, attribute in attributes.items()
+        }
+        for obj in objects
+    ]
+
+
+async def stream_change_events(
+    change_broker: ChangeBroker,
+    requester_id: str,
+    cardset_id: str | None,
+    keepalive: float = 15.0,
+):
+    """
+    Передает уведомления об изменениях объектов пользователя в формате
+    server-sent events. Если клиент не успевает получать уведомления,
+    передается событие overflow и поток закрывается: клиент должен
+    синхронизироваться через GET /changes/ и переподключиться.
+    """
+    subscription = change_broker.subscribe(requester_id, cardset_id)
+    try:
+        yield ": connected\n\n"
+        while True:
+            notifications = await subscription.wait(keepalive)
+            for notification in notifications:
+                data = json.dumps(asdict(notification))
+                yield f"event: change\ndata: {data}\n\n"
+            if subscription.overflowed:
+                yield "event: overflow\ndata: {}\n\n"
+                return
+            if subscription.closed:
+                return
+            if not notifications:
+                yield ": keepalive\n\n"
+    finally:
+        change_broker.unsubscribe(subscription)
+
+
+def stream_cardset_json(cardset: Cardset):
+    """
+    Сериализует набор карточек по частям, чтобы не собирать в памяти
+    весь ответ для больших наборов карточек.
+    """
+    cardset_info_json = cardset_info_schema(cardset).model_dump_json()
+
+    yield cardset_info_json[:-1] + ',"cards":['
+    for index, card in enumerate(cardset.cards):
+        card_json = card_schema(card).model_dump_json()
+        yield card_json if index == 0 else "," + card_json
+    yield "]}"
@@ -0,0 +1,206 @@
+import gzip
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Mapping, Optional
+
+from fastapi import Response
+from fastapi.concurrency import run_in_threadpool
+
+from .content_negotiation import parse_accept
+
+
+GZIP_ENCODING = "gzip"
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Возвращает GZIP_ENCODING, если заголовок Accept-Encoding допускает
+    gzip (явно или через *), иначе None.
+    """
+    if accept_encoding is None:
+        return None
+    weights = parse_accept(accept_encoding)
+    weight = weights.get(GZIP_ENCODING, weights.get("*", 0.0))
+    return GZIP_ENCODING if weight > 0 else None
+
+
+def encoded_etag(etag: str, encoding: Optional[str]) -> str:
+    """
+    Возвращает ETag представления ответа в кодировке encoding: сжатое и
+    несжатое представления различаются побайтово, поэтому у них разные
+    сильные ETag.
+    """
+    if encoding is None:
+        return etag
+    return f'{etag[:-1]}-{encoding}"'
+
+
+def identity_etag(etag: str) -> str:
+    """
+    Возвращает ETag несжатого представления по ETag из encoded_etag.
+    """
+    suffix = f'-{GZIP_ENCODING}"'
+    if etag.endswith(suffix):
+        return etag[:-len(suffix)] + '"'
+    return etag
+
+
+def representation_etags(etag: str) -> List[str]:
+    """
+    Возвращает ETag представлений, которые может получить клиент,
+    принимающий кодировку ETag etag: ответы меньше minimum_size
+    отдаются несжатыми. Размер ответа неизвестен до выборки, поэтому
+    условный запрос проверяется по обоим ETag.
+    """
+    identity = identity_etag(etag)
+    return [etag] if identity == etag else [etag, identity]
+
+
+class CompressedCache:
+    """
+    Сжатые ответы, упорядоченные по давности использования. Ключ - ETag
+    представления: для неизменившейся выборки ответ сжимается один раз.
+    Суммарный размер ответов ограничен max_bytes.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, bytes] = OrderedDict()
+        self._size = 0
+
+    def get(self, etag: str) -> Optional[bytes]:
+        with self._lock:
+            content = self._entries.get(etag)
+            if content is not None:
+                self._entries.move_to_end(etag)
+            return content
+
+    def put(self, etag: str, content: bytes) -> None:
+        if len(content) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(etag, None)
+            if previous is not None:
+                self._size -= len(previous)
+            self._entries[etag] = content
+            self._size += len(content)
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+class ResponseCompressor:
+    """
+    Сжимает ответы gzip, если клиент принимает эту кодировку, а ответ
+    не меньше minimum_size байт. Сжатие выполняется в пуле потоков, чтобы
+    не занимать цикл событий; ответы с ETag сжимаются один раз и затем
+    отдаются из CompressedCache.
+
+    :param minimum_size: Минимальный размер сжимаемого ответа в байтах.
+    :type minimum_size: int
+    :param level: Уровень сжатия по умолчанию (1-9, 0 - не сжимать).
+    :type level: int
+    :param route_levels: Уровни сжатия для отдельных маршрутов, ключ -
+        путь маршрута, например ``"/cardset/{cardset_id}/"``.
+    :type route_levels: Mapping[str, int], optional
+    :param cache_bytes: Суммарный размер кешируемых сжатых ответов.
+    :type cache_bytes: int
+    """
+
+    def __init__(
+        self,
+        minimum_size: int = 1024,
+        level: int = 6,
+        route_levels: Optional[Mapping[str, int]] = None,
+        cache_bytes: int = 32 * 1024 * 1024,
+    ) -> None:
+        self.minimum_size = minimum_size
+        self.level = level
+        self.route_levels: Dict[str, int] = dict(route_levels or {})
+        self.cache = CompressedCache(cache_bytes)
+
+    def route_level(self, route: str) -> int:
+        return self.route_levels.get(route, self.level)
+
+    def negotiate(
+        self,
+        route: str,
+        accept_encoding: Optional[str],
+    ) -> Optional[str]:
+        """
+        Возвращает кодировку ответа маршрута route: GZIP_ENCODING или
+        None, если клиент не принимает gzip или сжатие маршрута
+        отключено.
+        """
+        if self.route_level(route) == 0:
+            return None
+        return negotiate_encoding(accept_encoding)
+
+    def cached_response(
+        self,
+        etag: str,
+        media_type: str,
+        headers: Dict[str, str],
+    ) -> Optional[Response]:
+        """
+        Возвращает сжатый ответ из кеша по ETag представления или None,
+        если его там нет. Позволяет не загружать и не сериализовать
+        неизменившуюся выборку повторно.
+        """
+        content = self.cache.get(etag)
+        if content is None:
+            return None
+        return Response(
+            content=content,
+            media_type=media_type,
+            status_code=200,
+            headers={**headers, "Content-Encoding": GZIP_ENCODING},
+        )
+
+    async def response(
+        self,
+        route: str,
+        content: bytes,
+        media_type: str,
+        encoding: Optional[str],
+        headers: Dict[str, str],
+        etag: Optional[str] = None,
+    ) -> Response:
+        """
+        Формирует ответ с содержимым content, сжатым, если encoding
+        равен GZIP_ENCODING и content не меньше minimum_size. Если
+        передан etag, сжатое содержимое берется из кеша или сохраняется
+        в него. Несжатый ответ получает ETag несжатого представления
+        (identity_etag).
+        """
+        if encoding != GZIP_ENCODING or len(content) < self.minimum_size:
+            if "ETag" in headers:
+                headers = {**headers, "ETag": identity_etag(headers["ETag"])}
+            return Response(
+                content=content,
+                media_type=media_type,
+                status_code=200,
+                headers=headers,
+            )
+
+        compressed = self.cache.get(etag) if etag is not None else None
+        if compressed is None:
+            # mtime=0: одинаковое содержимое сжимается в одинаковые байты
+            # во всех рабочих процессах, как требует сильный ETag.
+            compressed = await run_in_threadpool(
+                gzip.compress, content, self.route_level(route), mtime=0
+            )
+            if etag is not None:
+                self.cache.put(etag, compressed)
+
+        return Response(
+            content=compressed,
+            media_type=media_type,
+            status_code=200,
+            headers={**headers, "Content-Encoding": GZIP_ENCODING},
+        )
@@ -0,0 +1,158 @@
+from datetime import datetime
+from typing import Any, Callable, Coroutine, Dict, List, Optional, Sequence
+
+import msgpack
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+MSGPACK_MEDIA_TYPES = (MSGPACK_MEDIA_TYPE, "application/x-msgpack")
+
+TIME_ATTRIBUTES = ("created_at", "modified_at", "addressed_at")
+
+
+def parse_accept(accept: str) -> Dict[str, float]:
+    """
+    Возвращает веса (параметр q) типов содержимого из заголовка Accept.
+    """
+    weights: Dict[str, float] = {}
+    for item in accept.split(","):
+        media_type, *params = [part.strip() for part in item.split(";")]
+        if not media_type:
+            continue
+        weight = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[media_type.lower()] = weight
+    return weights
+
+
+def negotiate_media_type(accept: Optional[str]) -> str:
+    """
+    Выбирает формат ответа по заголовку Accept: MessagePack, если клиент
+    принимает его с весом не меньше, чем JSON, иначе JSON.
+
+    :param accept: Значение заголовка Accept.
+    :type accept: str, optional
+    :return: JSON_MEDIA_TYPE или MSGPACK_MEDIA_TYPE.
+    :rtype: str
+    """
+    if accept is None:
+        return JSON_MEDIA_TYPE
+
+    weights = parse_accept(accept)
+    msgpack_weight = max(
+        weights.get(name, 0.0) for name in MSGPACK_MEDIA_TYPES
+    )
+    json_weight = weights.get(
+        JSON_MEDIA_TYPE,
+        weights.get("application/*", weights.get("*/*", 0.0)),
+    )
+    if msgpack_weight > 0 and msgpack_weight >= json_weight:
+        return MSGPACK_MEDIA_TYPE
+    return JSON_MEDIA_TYPE
+
+
+def table(
+    objects: Sequence[Any],
+    fields: Sequence[Any],
+    id_field: Any,
+) -> Dict[str, Any]:
+    """
+    Представляет список объектов модели таблицей для MessagePack:
+    {"fields": [имена полей API], "rows": [[значения], ...]}. Поле
+    id_field (card_id или cardset_id) соответствует атрибуту id.
+    """
+    names = [field.value for field in fields]
+    attributes = [
+        "id" if field == id_field else field.value for field in fields
+    ]
+    if not any(attribute in TIME_ATTRIBUTES for attribute in attributes):
+        rows = [
+            [getattr(obj, attribute) for attribute in attributes]
+            for obj in objects
+        ]
+    else:
+        rows = [
+            [
+                epoch_ms(getattr(obj, attribute))
+                if attribute in TIME_ATTRIBUTES
+                else getattr(obj, attribute)
+                for attribute in attributes
+            ]
+            for obj in objects
+        ]
+    return {"fields": names, "rows": rows}
+
+
+def epoch_ms(value: Optional[datetime]) -> Optional[int]:
+    """
+    Переводит время в миллисекунды от начала эпохи Unix. Время без
+    часового пояса считается местным, как при хранении.
+    """
+    if value is None:
+        return None
+    return round(value.timestamp() * 1000)
+
+
+def encode_msgpack(content: Dict[str, Any]) -> bytes:
+    """
+    Кодирует ответ в MessagePack. Ключи совпадают с ключами JSON-схем
+    (CardsSchema, CardsetInfosSchema и т.д.), списки объектов передаются
+    таблицами (см. table), время - целым числом миллисекунд от начала
+    эпохи Unix.
+    """
+    return msgpack.packb(content, default=_encode_msgpack_value)
+
+
+def _encode_msgpack_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return epoch_ms(value)
+    raise TypeError(f"Unsupported MessagePack value: {value!r}")
+
+
+class MsgpackRoute(APIRoute):
+    """
+    Маршрут, принимающий тело запроса в MessagePack (Content-Type:
+    application/msgpack) наравне с JSON: тело декодируется до проверки
+    схемой, поэтому обработчики и схемы запросов не меняются.
+    """
+
+    def get_route_handler(
+        self,
+    ) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        handler = super().get_route_handler()
+
+        async def route_handler(request: Request) -> Response:
+            content_type = request.headers.get("content-type", "")
+            media_type = content_type.split(";")[0].strip().lower()
+            if media_type in MSGPACK_MEDIA_TYPES:
+                try:
+                    request = await _as_json_request(request)
+                except ValueError:
+                    return Response(status_code=400)
+            return await handler(request)
+
+        return route_handler
+
+
+async def _as_json_request(request: Request) -> Request:
+    body = await request.body()
+    headers: List[Any] = [
+        (name, value) for name, value in request.scope["headers"]
+        if name != b"content-type"
+    ]
+    headers.append((b"content-type", JSON_MEDIA_TYPE.encode()))
+
+    json_request = Request({**request.scope, "headers": headers})
+    # Request кеширует прочитанное и разобранное тело в этих атрибутах.
+    json_request._body = body
+    json_request._json = msgpack.unpackb(body) if body else None
+    return json_request
@@ -0,0 +1,112 @@
+"""
+Сравнение форматов ответа GET /cards/: JSON и MessagePack.
+
+Кодирует одну и ту же выборку карточек так же, как обработчик
+маршрута, и сохраняет в JSON время кодирования и размер ответа для
+каждого формата::
+
+    python -m cards.api.encoding_benchmark --cards 1000 --output bench.json
+"""
+
+import json
+import time
+import argparse
+import datetime
+import statistics
+from typing import Any, Callable, Dict, List, Optional
+
+from ..core.model import Card, CardsStatus
+from .cardset_router_builder import encode_cards_json
+from .content_negotiation import encode_msgpack, table
+from .schemas import CardField
+
+
+def make_cards(count: int) -> List[Card]:
+    now = datetime.datetime.now()
+    return [
+        Card(
+            id=f"c{index:07d}",
+            cardset_id="s0000001",
+            term=f"term {index}",
+            description="description " * 10,
+            created_at=now,
+            modified_at=now,
+            addressed_at=now,
+            status=CardsStatus.PRESENT,
+            owner_id="cuteseal",
+            position=f"a{index}",
+        )
+        for index in range(count)
+    ]
+
+
+def measure(encode: Callable[[], bytes], repeat: int) -> Dict[str, Any]:
+    timings = []
+    content = b""
+    for _ in range(repeat):
+        started = time.perf_counter()
+        content = encode()
+        timings.append((time.perf_counter() - started) * 1000)
+    return {
+        "bytes": len(content),
+        "encode_ms": {
+            "median": round(statistics.median(timings), 3),
+            "min": round(min(timings), 3),
+        },
+    }
+
+
+def run_encoding_benchmark(
+    card_count: int = 1000,
+    repeat: int = 20,
+) -> Dict[str, Any]:
+    """
+    Измеряет время кодирования и размер ответа со списком из card_count
+    карточек в JSON и в MessagePack.
+
+    :param card_count: Количество карточек в ответе.
+    :type card_count: int
+    :param repeat: Количество повторов кодирования каждого формата.
+    :type repeat: int
+    :return: Сводка: для каждого формата размер ответа в байтах и
+        медианное и минимальное время кодирования в миллисекундах.
+    :rtype: Dict[str, Any]
+    """
+    cards = make_cards(card_count)
+    formats = {
+        "json": lambda: encode_cards_json(cards),
+        "msgpack": lambda: encode_msgpack({
+            "cards": table(cards, list(CardField), CardField.CARD_ID),
+        }),
+    }
+    summary: Dict[str, Any] = {
+        "config": {"cards": card_count, "repeat": repeat},
+    }
+    for name, encode in formats.items():
+        summary[name] = measure(encode, repeat)
+    return summary
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Сравнение JSON и MessagePack для GET /cards/.",
+    )
+    parser.add_argument("--cards", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--output", default=None)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = build_parser().parse_args(argv)
+    summary = run_encoding_benchmark(args.cards, args.repeat)
+
+    report = json.dumps(summary, indent=2, sort_keys=True)
+    if args.output is not None:
+        with open(args.output, "w") as output:
+            output.write(report + "\n")
+    print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+import math
+
+from fastapi import Request
+from fastapi.responses import JSONResponse
+
+from ..core import (
+    CardsRateLimited,
+    CardsPermissionDenied,
+    CardsNotFound,
+)
+
+
+async def overloaded_handler(
+    request: Request,
+    exc: Exception,
+) -> JSONResponse:
+    """
+    Отвечает на операцию, отклоненную ограничителем записи: 429, если
+    превышен лимит пользователя, иначе 503. Заголовок Retry-After
+    сообщает клиенту, когда повторить запрос.
+    """
+    retry_after = getattr(exc, "retry_after", 1.0)
+    status_code = 429 if isinstance(exc, CardsRateLimited) else 503
+    return JSONResponse(
+        content={"detail": str(exc)},
+        status_code=status_code,
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
+
+
+async def cards_error_handler(
+    request: Request,
+    exc: Exception,
+) -> JSONResponse:
+    """
+    Отвечает на операцию, отклоненную сервисом: 404, если объекта не
+    существует, 403, если пользователь не владеет объектом, и 400 при
+    некорректных аргументах.
+    """
+    if isinstance(exc, CardsNotFound):
+        status_code = 404
+    elif isinstance(exc, CardsPermissionDenied):
+        status_code = 403
+    else:
+        status_code = 400
+    return JSONResponse(content={"detail": str(exc)}, status_code=status_code)
@@ -0,0 +1,119 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Dict, Optional, Sequence
+
+from fastapi import Response
+
+from ..core.model import ResourceVersion
+
+
+# Содержимое ответов зависит от заголовков Accept (JSON или MessagePack) и
+# Accept-Encoding (сжатие gzip).
+VARY = "Accept, Accept-Encoding"
+
+
+def make_version_etag(version: ResourceVersion, *variant) -> str:
+    """
+    Формирует сильный ETag по версии выборки и параметрам запроса, которые
+    влияют на содержимое ответа (пагинация, фильтры).
+    """
+    digest = hashlib.blake2b(
+        repr(variant).encode(),
+        digest_size=8,
+    ).hexdigest()
+    return f'"{version.version}-{digest}"'
+
+
+def make_content_etag(content: bytes) -> str:
+    """
+    Формирует сильный ETag по содержимому ответа. Используется, когда
+    версию выборки определить дешево невозможно.
+    """
+    return f'"{hashlib.blake2b(content, digest_size=16).hexdigest()}"'
+
+
+def http_last_modified(
+    modified_at: datetime,
+    now: Optional[datetime] = None,
+) -> Optional[datetime]:
+    """
+    Возвращает значение Last-Modified для выборки, измененной в момент
+    modified_at, с точностью до секунды, как в HTTP-дате. Если выборка
+    изменилась в текущую секунду, возвращает None: следующая запись в ту
+    же секунду не изменит Last-Modified, и клиент, приславший только
+    If-Modified-Since, получил бы ошибочный ответ 304.
+    """
+    if now is None:
+        now = datetime.now(timezone.utc)
+    last_modified = modified_at.replace(microsecond=0)
+    if last_modified >= now.replace(microsecond=0):
+        return None
+    return last_modified
+
+
+def is_not_modified(
+    etag: str,
+    last_modified: Optional[datetime],
+    if_none_match: Optional[str],
+    if_modified_since: Optional[str],
+) -> bool:
+    """
+    Проверяет условия If-None-Match и If-Modified-Since (RFC 9110).
+    If-Modified-Since учитывается только при отсутствии If-None-Match.
+    """
+    if if_none_match is not None:
+        candidates = [tag.strip() for tag in if_none_match.split(",")]
+        if "*" in candidates:
+            return True
+        return etag in [tag.removeprefix("W/") for tag in candidates]
+
+    if if_modified_since is None or last_modified is None:
+        return False
+
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+
+    return last_modified <= since
+
+
+def not_modified_etag(
+    etags: Sequence[str],
+    last_modified: Optional[datetime],
+    if_none_match: Optional[str],
+    if_modified_since: Optional[str],
+) -> Optional[str]:
+    """
+    Возвращает первый из ETag возможных представлений ответа, для
+    которого выполняются условия запроса (см. is_not_modified), или None.
+    """
+    for etag in etags:
+        if is_not_modified(
+            etag, last_modified, if_none_match, if_modified_since
+        ):
+            return etag
+    return None
+
+
+def cache_headers(
+    etag: str,
+    last_modified: Optional[datetime],
+) -> Dict[str, str]:
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": VARY}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+    return headers
+
+
+def not_modified_response(
+    etag: str,
+    last_modified: Optional[datetime],
+) -> Response:
+    return Response(
+        status_code=304,
+        headers=cache_headers(etag, last_modified),
+    )
@@ -0,0 +1,371 @@
+"""
+Генератор нагрузки для API пакета cards.
+
+Запускает смешанную нагрузку на приложение в текущем процессе (через
+ASGI, без сети) или на запущенный сервер и сохраняет сводку в JSON,
+которую можно сравнивать между версиями::
+
+    python -m cards.api.loadtest --duration 30 --output before.json
+    python -m cards.api.loadtest --url http://127.0.0.1:8000 \\
+        --concurrency 64 --output after.json
+
+Требует пакет httpx.
+"""
+
+import json
+import time
+import random
+import asyncio
+import argparse
+from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+from .app_builder import ApiAppBuilder
+from .settings import AppSettings
+
+
+DEFAULT_MIX = {
+    "list_cardsets": 30,
+    "open_deck": 25,
+    "mixed_study": 25,
+    "create_deck": 5,
+    "patch_card": 15,
+}
+
+
+@dataclass
+class LoadTestConfig:
+    """
+    Параметры нагрузки.
+
+    :param concurrency: Количество одновременно работающих клиентов.
+    :type concurrency: int
+    :param duration: Длительность нагрузки в секундах.
+    :type duration: float
+    :param max_requests: Общее количество запросов. Если передано,
+        нагрузка завершается после него, даже если время не истекло.
+    :type max_requests: int, optional
+    :param owners: Количество пользователей.
+    :type owners: int
+    :param zipf_s: Параметр распределения Ципфа: пользователь с рангом k
+        выбирается с весом 1 / k ** zipf_s.
+    :type zipf_s: float
+    :param mix: Относительные веса операций.
+    :type mix: Dict[str, float]
+    :param cards_per_deck: Количество карточек в создаваемом наборе.
+    :type cards_per_deck: int
+    :param seed: Начальное значение генератора случайных чисел.
+    :type seed: int
+    """
+
+    concurrency: int = 16
+    duration: float = 10.0
+    max_requests: Optional[int] = None
+    owners: int = 100
+    zipf_s: float = 1.1
+    mix: Dict[str, float] = field(default_factory=lambda: dict(DEFAULT_MIX))
+    cards_per_deck: int = 20
+    seed: int = 0
+
+
+class _Recorder:
+    def __init__(self) -> None:
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.statuses: Dict[str, Dict[str, int]] = {}
+
+    def record(self, operation: str, latency: float, status: str) -> None:
+        self.latencies.setdefault(operation, []).append(latency)
+        statuses = self.statuses.setdefault(operation, {})
+        statuses[status] = statuses.get(status, 0) + 1
+        if not status.startswith(("2", "3")):
+            self.errors[operation] = self.errors.get(operation, 0) + 1
+
+
+class _LoadTest:
+    def __init__(self, client: httpx.AsyncClient, config: LoadTestConfig):
+        self.client = client
+        self.config = config
+        self.random = random.Random(config.seed)
+        self.recorder = _Recorder()
+        self.issued = 0
+
+        self.owner_ids = [f"load{index:04}" for index in range(config.owners)]
+        weights = [
+            1 / (rank ** config.zipf_s)
+            for rank in range(1, config.owners + 1)
+        ]
+        self.owner_weights = _cumulative(weights)
+        self.operations = list(config.mix)
+        self.operation_weights = _cumulative(list(config.mix.values()))
+
+        self.decks: Dict[str, List[str]] = {}
+        self.cards: Dict[str, List[Tuple[str, str]]] = {}
+
+    async def run(self) -> float:
+        started_at = time.perf_counter()
+        deadline = started_at + self.config.duration
+        await asyncio.gather(*[
+            self.__client(deadline)
+            for _ in range(self.config.concurrency)
+        ])
+        return time.perf_counter() - started_at
+
+    async def __client(self, deadline: float) -> None:
+        while time.perf_counter() < deadline:
+            if self.config.max_requests is not None \
+                    and self.issued >= self.config.max_requests:
+                return
+            self.issued += 1
+
+            owner_id = self.random.choices(
+                self.owner_ids, cum_weights=self.owner_weights
+            )[0]
+            operation = self.random.choices(
+                self.operations, cum_weights=self.operation_weights
+            )[0]
+            if operation != "list_cardsets" and not self.decks.get(owner_id):
+                operation = "create_deck"
+            await self.__request(operation, owner_id)
+
+    async def __request(self, operation: str, owner_id: str) -> None:
+        params: Dict[str, str | int] = {"requester_id": owner_id}
+        body = None
+        if operation == "list_cardsets":
+            method, url = "GET", "/cardsets/"
+            params["user_id"] = owner_id
+        elif operation == "open_deck":
+            method = "GET"
+            url = f"/cardset/{self.random.choice(self.decks[owner_id])}/"
+        elif operation == "mixed_study":
+            method, url = "GET", "/cards/"
+            params["cardset_id"] = self.random.choice(self.decks[owner_id])
+            params["mixed"] = "true"
+            params["limit"] = 20
+        elif operation == "create_deck":
+            method, url = "POST", "/cardsets/"
+            params["owner_id"] = owner_id
+            body = {
+                "title": f"deck {self.random.randrange(10 ** 6)}",
+                "description": "load test",
+                "status": "present",
+                "cards": [
+                    {
+                        "term": f"term {index}",
+                        "description": "description",
+                        "status": "present",
+                    }
+                    for index in range(self.config.cards_per_deck)
+                ],
+            }
+        elif operation == "patch_card":
+            if not self.cards.get(owner_id):
+                operation = "open_deck"
+                return await self.__request(operation, owner_id)
+            card_id, term = self.random.choice(self.cards[owner_id])
+            method, url = "PATCH", f"/card/{card_id}/"
+            body = {
+                "term": term,
+                "description": f"revision {self.random.randrange(10 ** 6)}",
+                "status": "present",
+            }
+        else:
+            raise ValueError(f"Неизвестная операция: {operation}")
+
+        started_at = time.perf_counter()
+        try:
+            response = await self.client.request(
+                method, url, params=params, json=body
+            )
+            content = response.content
+        except httpx.HTTPError as error:
+            latency = time.perf_counter() - started_at
+            self.recorder.record(operation, latency, type(error).__name__)
+            return
+        latency = time.perf_counter() - started_at
+        self.recorder.record(operation, latency, str(response.status_code))
+
+        if response.status_code == 201 and operation == "create_deck":
+            self.decks.setdefault(owner_id, []).append(
+                json.loads(content)["cardset_id"]
+            )
+        elif response.status_code == 200 and operation == "open_deck":
+            cards = self.cards.setdefault(owner_id, [])
+            for card in json.loads(content)["cards"][:4]:
+                if len(cards) < 64:
+                    cards.append((card["card_id"], card["term"]))
+
+    def summary(self, elapsed: float) -> dict:
+        operations = {}
+        total, errors = 0, 0
+        for operation, latencies in sorted(self.recorder.latencies.items()):
+            count = len(latencies)
+            operation_errors = self.recorder.errors.get(operation, 0)
+            total += count
+            errors += operation_errors
+            latencies = sorted(latencies)
+            operations[operation] = {
+                "requests": count,
+                "throughput": count / elapsed,
+                "errors": operation_errors,
+                "error_rate": operation_errors / count,
+                "statuses": self.recorder.statuses[operation],
+                "latency_ms": {
+                    "mean": 1000 * sum(latencies) / count,
+                    "p50": 1000 * _percentile(latencies, 50),
+                    "p90": 1000 * _percentile(latencies, 90),
+                    "p99": 1000 * _percentile(latencies, 99),
+                    "max": 1000 * latencies[-1],
+                },
+            }
+
+        return {
+            "config": asdict(self.config),
+            "elapsed_seconds": elapsed,
+            "requests": total,
+            "throughput": total / elapsed if elapsed else 0.0,
+            "errors": errors,
+            "error_rate": errors / total if total else 0.0,
+            "operations": operations,
+        }
+
+
+def _cumulative(weights: List[float]) -> List[float]:
+    cumulative, total = [], 0.0
+    for weight in weights:
+        total += weight
+        cumulative.append(total)
+    return cumulative
+
+
+def _percentile(values: List[float], percent: float) -> float:
+    index = max(0, -(-len(values) * percent // 100) - 1)
+    return values[int(index)]
+
+
+async def run_load_test(
+    config: LoadTestConfig,
+    app=None,
+    base_url: Optional[str] = None,
+) -> dict:
+    """
+    Запускает нагрузку и возвращает сводку: общую и для каждой операции
+    пропускную способность (запросов в секунду), перцентили задержки в
+    миллисекундах и долю ошибок (ответы, отличные от 2xx и 3xx).
+
+    :param config: Параметры нагрузки.
+    :type config: LoadTestConfig
+    :param app: ASGI-приложение, к которому запросы выполняются в
+        текущем процессе.
+    :param base_url: Адрес запущенного сервера. Используется, если app не
+        передан.
+    :type base_url: str, optional
+    :rtype: dict
+    """
+    if app is not None:
+        client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app),
+            base_url="http://loadtest",
+        )
+    elif base_url is not None:
+        client = httpx.AsyncClient(
+            base_url=base_url,
+            limits=httpx.Limits(max_connections=config.concurrency),
+        )
+    else:
+        raise ValueError("Требуется app или base_url")
+
+    async with client:
+        load_test = _LoadTest(client, config)
+        elapsed = await load_test.run()
+    return load_test.summary(elapsed)
+
+
+def _parse_mix(value: str) -> Dict[str, float]:
+    mix = {}
+    for item in value.split(","):
+        operation, _, weight = item.partition("=")
+        if operation not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(
+                f"Неизвестная операция: {operation}"
+            )
+        mix[operation] = float(weight)
+    return mix
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m cards.api.loadtest",
+        description="Нагрузочное тестирование API пакета cards.",
+    )
+    parser.add_argument(
+        "--url",
+        default=None,
+        help="Адрес запущенного сервера. По умолчанию приложение "
+             "запускается в текущем процессе.",
+    )
+    parser.add_argument("--db-path", default="loadtest.db")
+    parser.add_argument("--backend", default="sqlite")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--max-requests", type=int, default=None)
+    parser.add_argument("--owners", type=int, default=100)
+    parser.add_argument("--zipf-s", type=float, default=1.1)
+    parser.add_argument(
+        "--mix",
+        type=_parse_mix,
+        default=dict(DEFAULT_MIX),
+        help="Веса операций, например "
+             "list_cardsets=30,open_deck=25,patch_card=15.",
+    )
+    parser.add_argument("--cards-per-deck", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--output",
+        default=None,
+        help="Файл для сводки в формате JSON.",
+    )
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = build_parser().parse_args(argv)
+    config = LoadTestConfig(
+        concurrency=args.concurrency,
+        duration=args.duration,
+        max_requests=args.max_requests,
+        owners=args.owners,
+        zipf_s=args.zipf_s,
+        mix=args.mix,
+        cards_per_deck=args.cards_per_deck,
+        seed=args.seed,
+    )
+
+    builder = None
+    if args.url is None:
+        builder = ApiAppBuilder(settings=AppSettings(
+            db_path=args.db_path, backend=args.backend
+        ))
+    try:
+        summary = asyncio.run(run_load_test(
+            config,
+            app=builder.app if builder is not None else None,
+            base_url=args.url,
+        ))
+    finally:
+        if builder is not None:
+            builder.close()
+            if builder.db_handler is not None:
+                builder.db_handler.delete_database_file()
+
+    report = json.dumps(summary, indent=2, sort_keys=True)
+    if args.output is not None:
+        with open(args.output, "w") as output:
+            output.write(report + "\n")
+    print(report)
+
+
+if __name__ == "__main__":
+    main()
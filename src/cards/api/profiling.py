@@ -0,0 +1,210 @@
+import os
+import re
+import json
+import time
+import pstats
+import random
+import cProfile
+import threading
+import functools
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional, TypeVar
+
+
+T = TypeVar("T")
+
+PROFILE_HEADER = "x-cards-profile"
+
+# Профили потоков, в которых выполняется профилируемый запрос. Значение
+# задается только на время профилируемого запроса; run_in_threadpool
+# копирует контекст в рабочий поток.
+_request_profiles: ContextVar[Optional[List[cProfile.Profile]]] = ContextVar(
+    "cards_request_profiles", default=None
+)
+
+
+def profiled(func: Callable[..., T]) -> Callable[..., T]:
+    """
+    Возвращает функцию для вызова в пуле потоков, которая профилируется
+    вместе с текущим запросом. Вне профилируемого запроса возвращает
+    func без изменений.
+    """
+    if _request_profiles.get() is None:
+        return func
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs) -> T:
+        profiles = _request_profiles.get()
+        if profiles is None:
+            return func(*args, **kwargs)
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Начиная с Python 3.12 профилировщик запроса уже учитывает
+            # вызовы во всех потоках.
+            return func(*args, **kwargs)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profile.disable()
+            profiles.append(profile)
+
+    return wrapper
+
+
+def profiled_iterator(iterator: Iterator[T]) -> Iterator[T]:
+    """
+    Профилирует получение элементов итератора, который StreamingResponse
+    обходит в пуле потоков. Вне профилируемого запроса возвращает
+    iterator без изменений.
+    """
+    if _request_profiles.get() is None:
+        return iterator
+    return _iterate_profiled(iterator)
+
+
+def _iterate_profiled(iterator: Iterator[T]) -> Iterator[T]:
+    while True:
+        try:
+            item = profiled(next)(iterator)
+        except StopIteration:
+            return
+        yield item
+
+
+def _category(key: tuple) -> str:
+    filename, _, function = key
+    if filename == "~" and "sqlite3." in function:
+        return "sql"
+    if filename.endswith(os.path.join("sqlite_data", "mappers.py")):
+        return "mapping"
+    if "pydantic" in filename or "pydantic" in function \
+            or filename.endswith(os.path.join("json", "encoder.py")) \
+            or function == "stream_cardset_json":
+        return "serialization"
+    return "other"
+
+
+def breakdown(stats: pstats.Stats) -> Dict[str, float]:
+    """
+    Распределяет собственное время функций профиля по категориям:
+    выполнение SQL (методы sqlite3), преобразование строк в объекты
+    модели (mappers) и сериализация ответа (pydantic, json).
+
+    :return: Время в миллисекундах по категориям.
+    :rtype: Dict[str, float]
+    """
+    result = {"sql": 0.0, "mapping": 0.0, "serialization": 0.0, "other": 0.0}
+    for key, (_, _, self_time, _, _) in stats.stats.items():  # type: ignore
+        result[_category(key)] += 1000 * self_time
+    return result
+
+
+class ProfilingMiddleware:
+    """
+    ASGI-промежуточный слой, который профилирует с помощью cProfile
+    выборку запросов и запросы с заголовком X-Cards-Profile. Для каждого
+    профилируемого запроса в profile_dir записываются профиль (.prof,
+    формат pstats) и сводка (.json) с разбивкой времени на SQL,
+    преобразование и сериализацию; имя файлов передается в заголовке
+    ответа X-Cards-Profile. Хранятся только max_profiles последних
+    профилей.
+
+    Одновременно профилируется один запрос; профиль может включать
+    работу других запросов, выполнявшуюся в том же цикле событий.
+    Слой добавляется в приложение, только если профилирование включено.
+
+    :param app: ASGI-приложение.
+    :param profile_dir: Каталог для профилей.
+    :type profile_dir: str
+    :param sample_rate: Доля профилируемых запросов без заголовка.
+    :type sample_rate: float
+    :param max_profiles: Количество хранимых профилей.
+    :type max_profiles: int
+    """
+
+    def __init__(
+        self,
+        app,
+        profile_dir: str,
+        sample_rate: float = 0.0,
+        max_profiles: int = 100,
+    ) -> None:
+        self.app = app
+        self.profile_dir = profile_dir
+        self.sample_rate = sample_rate
+        self.max_profiles = max_profiles
+        self._lock = threading.Lock()
+        os.makedirs(profile_dir, exist_ok=True)
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or not self.__is_selected(scope) \
+                or not self._lock.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await self.__profile(scope, receive, send)
+        finally:
+            self._lock.release()
+
+    def __is_selected(self, scope) -> bool:
+        for name, value in scope["headers"]:
+            if name == PROFILE_HEADER.encode() and value not in (b"", b"0"):
+                return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __profile(self, scope, receive, send) -> None:
+        path = re.sub(r"[^a-zA-Z0-9]+", "_", scope["path"]).strip("_")
+        name = f"{time.time_ns()}-{scope['method'].lower()}-{path[:40]}"
+        status_code = 0
+
+        async def send_with_header(message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message = dict(message)
+                message["headers"] = list(message.get("headers", [])) + [
+                    (PROFILE_HEADER.encode(), name.encode())
+                ]
+            await send(message)
+
+        profiles: List[cProfile.Profile] = []
+        token = _request_profiles.set(profiles)
+        profile = cProfile.Profile()
+        started_at = time.perf_counter()
+        profile.enable()
+        try:
+            await self.app(scope, receive, send_with_header)
+        finally:
+            profile.disable()
+            elapsed = time.perf_counter() - started_at
+            _request_profiles.reset(token)
+
+        stats = pstats.Stats(profile, *profiles)
+        summary = {
+            "method": scope["method"],
+            "path": scope["path"],
+            "query_string": scope["query_string"].decode(),
+            "status_code": status_code,
+            "total_ms": 1000 * elapsed,
+            "breakdown_ms": breakdown(stats),
+        }
+        base_path = os.path.join(self.profile_dir, name)
+        stats.dump_stats(base_path + ".prof")
+        with open(base_path + ".json", "w") as summary_file:
+            json.dump(summary, summary_file, indent=2)
+        self.__rotate()
+
+    def __rotate(self) -> None:
+        names = sorted(
+            filename[:-len(".prof")]
+            for filename in os.listdir(self.profile_dir)
+            if filename.endswith(".prof")
+        )
+        for name in names[:max(0, len(names) - self.max_profiles)]:
+            for extension in (".prof", ".json"):
+                path = os.path.join(self.profile_dir, name + extension)
+                if os.path.exists(path):
+                    os.remove(path)
@@ -19,6 +19,50 @@ class CardsStatus(str, Enum):
     ABSENT = "absent"
 
 
+class CardsSort(str, Enum):
+    TERM = "term"
+    POSITION = "position"
+    CREATED_AT = "created_at"
+    MODIFIED_AT = "modified_at"
+    ADDRESSED_AT = "addressed_at"
+
+
+class CardsetsSort(str, Enum):
+    TITLE = "title"
+    CREATED_AT = "created_at"
+    MODIFIED_AT = "modified_at"
+    ADDRESSED_AT = "addressed_at"
+
+
+class SortOrder(str, Enum):
+    ASC = "asc"
+    DESC = "desc"
+
+
+class CardField(str, Enum):
+    CARD_ID = "card_id"
+    CARDSET_ID = "cardset_id"
+    TERM = "term"
+    DESCRIPTION = "description"
+    CREATED_AT = "created_at"
+    MODIFIED_AT = "modified_at"
+    ADDRESSED_AT = "addressed_at"
+    STATUS = "status"
+    OWNER_ID = "owner_id"
+    POSITION = "position"
+
+
+class CardsetInfoField(str, Enum):
+    CARDSET_ID = "cardset_id"
+    TITLE = "title"
+    DESCRIPTION = "description"
+    CREATED_AT = "created_at"
+    MODIFIED_AT = "modified_at"
+    ADDRESSED_AT = "addressed_at"
+    STATUS = "status"
+    OWNER_ID = "owner_id"
+
+
 class CardSpecSchema(BaseModel):
     term: Optional[str] = Field(
         max_length=128,
@@ -74,6 +118,7 @@ class CardSchema(BaseModel):
     addressed_at: datetime
     status: CardsStatus
     owner_id: str
+    position: str
 
 
 class CardsSchema(BaseModel):
@@ -93,3 +138,16 @@ class CardsetInfoSchema(BaseModel):
 
 class CardsetInfosSchema(BaseModel):
     cardsets: List[CardsetInfoSchema]
+
+
+class CardsetSchema(CardsetInfoSchema):
+    cards: List[CardSchema]
+
+
+class ChangesSchema(BaseModel):
+    cardsets: List[CardsetInfoSchema]
+    cards: List[CardSchema]
+    deleted_cardset_ids: List[str]
+    deleted_card_ids: List[str]
+    next_since: int
+    has_more: bool
@@ -0,0 +1,99 @@
+import os
+from dataclasses import dataclass
+from typing import Mapping, Optional
+
+
+@dataclass
+class AppSettings:
+    """
+    Настройки приложения, которое собирает ApiAppBuilder. В скобках
+    указаны переменные окружения, из которых их читает from_env.
+    """
+
+    # Хранилище: "sqlite", "sqlite-sharded" или "memory" (CARDS_BACKEND).
+    backend: str = "sqlite"
+    db_path: str = "test.db"  # CARDS_DB_PATH
+    shard_count: int = 4  # CARDS_SHARD_COUNT
+    # Размер пула соединений, для шардов - каждого шарда (CARDS_POOL_SIZE).
+    pool_size: int = 4
+    # Групповая фиксация записи, см. GroupCommitWriter (CARDS_GROUP_COMMIT).
+    group_commit: bool = False
+
+    # Снимок данных backend="memory" и период его сохранения.
+    snapshot_path: Optional[str] = None
+    snapshot_interval: Optional[float] = None
+
+    # Чтение из снимка базы данных SQLite не старше max_staleness секунд
+    # (CARDS_READ_SNAPSHOT_PATH, CARDS_MAX_STALENESS). Если задан период
+    # read_snapshot_interval (CARDS_READ_SNAPSHOT_INTERVAL), снимок
+    # обновляет приложение, иначе - отдельный процесс ``python -m
+    # cards.sqlite_data snapshot``.
+    read_snapshot_path: Optional[str] = None
+    read_snapshot_interval: Optional[float] = None
+    max_staleness: float = 5.0
+
+    # Период обслуживания базы данных SQLite в фоновом потоке, см.
+    # MaintenanceScheduler (CARDS_MAINTENANCE_INTERVAL).
+    maintenance_interval: Optional[float] = None
+
+    # Профилирование запросов, см. ProfilingMiddleware (CARDS_PROFILE_DIR,
+    # CARDS_PROFILE_SAMPLE_RATE).
+    profile_dir: Optional[str] = None
+    profile_sample_rate: float = 0.0
+    profile_max_files: int = 100
+
+    # Ограничение одновременных операций записи, см. AdmissionController
+    # (CARDS_WRITE_CONCURRENCY, CARDS_WRITE_QUEUE).
+    write_concurrency: Optional[int] = None
+    write_queue: int = 32
+
+    # GET /changes/stream/ (CARDS_CHANGE_STREAM=1).
+    change_stream: bool = False
+
+    # Сжатие ответов, см. ResponseCompressor (CARDS_GZIP_LEVEL,
+    # CARDS_GZIP_MIN_SIZE); уровень 0 - не сжимать.
+    gzip_level: int = 6
+    gzip_min_size: int = 1024
+
+    @classmethod
+    def from_env(
+        cls,
+        environ: Optional[Mapping[str, str]] = None,
+    ) -> "AppSettings":
+        """
+        Читает настройки из переменных окружения. Если переменная не
+        задана, используется значение по умолчанию; база данных по
+        умолчанию - cards.db.
+        """
+        if environ is None:
+            environ = os.environ
+
+        def optional_float(name: str) -> Optional[float]:
+            return float(environ[name]) if name in environ else None
+
+        write_concurrency = None
+        if "CARDS_WRITE_CONCURRENCY" in environ:
+            write_concurrency = int(environ["CARDS_WRITE_CONCURRENCY"])
+
+        return cls(
+            backend=environ.get("CARDS_BACKEND", "sqlite"),
+            db_path=environ.get("CARDS_DB_PATH", "cards.db"),
+            shard_count=int(environ.get("CARDS_SHARD_COUNT", "4")),
+            pool_size=int(environ.get("CARDS_POOL_SIZE", "4")),
+            group_commit=environ.get("CARDS_GROUP_COMMIT") == "1",
+            read_snapshot_path=environ.get("CARDS_READ_SNAPSHOT_PATH"),
+            read_snapshot_interval=optional_float(
+                "CARDS_READ_SNAPSHOT_INTERVAL"
+            ),
+            max_staleness=float(environ.get("CARDS_MAX_STALENESS", "5")),
+            maintenance_interval=optional_float("CARDS_MAINTENANCE_INTERVAL"),
+            profile_dir=environ.get("CARDS_PROFILE_DIR"),
+            profile_sample_rate=float(
+                environ.get("CARDS_PROFILE_SAMPLE_RATE", "0")
+            ),
+            write_concurrency=write_concurrency,
+            write_queue=int(environ.get("CARDS_WRITE_QUEUE", "32")),
+            change_stream=environ.get("CARDS_CHANGE_STREAM") == "1",
+            gzip_level=int(environ.get("CARDS_GZIP_LEVEL", "6")),
+            gzip_min_size=int(environ.get("CARDS_GZIP_MIN_SIZE", "1024")),
+        )
@@ -1,34 +1,60 @@
 from .ping import ping
 from .model import (
     CardsStatus,
+    CardsSort,
+    CardsetsSort,
+    SortOrder,
+    CardField,
+    CardsetInfoField,
     Card,
     CardSpec,
     Cardset,
     CardsetSpec,
     CardsetInfo,
     CardsetInfoSpec,
+    ResourceVersion,
+    Changes,
 )
 from .cardset_service import CardsetService
 from .cardset_repository_abc import CardsetRepositoryABC
+from .admission import AdmissionController, AdmissionStats
+from .change_broker import ChangeBroker, ChangeNotification
 from .exceptions import (
     CardsException,
     CardsPermissionDenied,
     CardsInvalidArguments,
+    CardsNotFound,
+    CardsOverloaded,
+    CardsRateLimited,
 )
 
 
 __all__ = [
     "ping",
     "CardsStatus",
+    "CardsSort",
+    "CardsetsSort",
+    "SortOrder",
+    "CardField",
+    "CardsetInfoField",
     "Card",
     "CardSpec",
     "Cardset",
     "CardsetSpec",
     "CardsetInfo",
     "CardsetInfoSpec",
+    "ResourceVersion",
+    "Changes",
     "CardsetService",
     "CardsetRepositoryABC",
+    "AdmissionController",
+    "AdmissionStats",
+    "ChangeBroker",
+    "ChangeNotification",
     "CardsException",
     "CardsPermissionDenied",
     "CardsInvalidArguments",
+    "CardsNotFound",
+    "CardsOverloaded",
+    "CardsRateLimited",
 ]
@@ -0,0 +1,175 @@
+import time
+import threading
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Deque, Dict, Iterator
+
+from .exceptions import CardsOverloaded, CardsRateLimited
+
+
+@dataclass
+class AdmissionStats:
+    active: int
+    queued: int
+    admitted: int
+    rejected_overloaded: int
+    rejected_rate_limited: int
+    timed_out: int
+    wait_seconds_total: float
+    wait_seconds_max: float
+
+
+class _Waiter:
+    def __init__(self) -> None:
+        self.granted = threading.Event()
+
+
+class AdmissionController:
+    """
+    Ограничивает количество одновременно выполняемых операций записи.
+    Операции сверх лимита ждут в ограниченной очереди; очередь
+    обслуживается по кругу между пользователями, поэтому всплеск записи
+    одного пользователя не задерживает остальных. Если очередь
+    заполнена, операция сразу отклоняется, чтобы запросы не копились на
+    блокировке базы данных.
+
+    Ожидание выполняется в потоке вызывающего, поэтому сумма
+    max_concurrency и max_queue не должна превышать размер пула потоков,
+    в котором выполняются операции.
+
+    :param max_concurrency: Количество одновременно выполняемых операций.
+    :type max_concurrency: int
+    :param max_queue: Количество ожидающих операций всех пользователей.
+    :type max_queue: int
+    :param max_queue_per_owner: Количество ожидающих операций одного
+        пользователя.
+    :type max_queue_per_owner: int
+    :param timeout: Максимальное время ожидания в очереди в секундах.
+    :type timeout: float
+    :param retry_after: Рекомендуемая задержка перед повтором отклоненной
+        операции в секундах.
+    :type retry_after: float
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 4,
+        max_queue: int = 32,
+        max_queue_per_owner: int = 4,
+        timeout: float = 1.0,
+        retry_after: float = 1.0,
+    ) -> None:
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.max_queue_per_owner = max_queue_per_owner
+        self.timeout = timeout
+        self.retry_after = retry_after
+
+        self._lock = threading.Lock()
+        self._active = 0
+        self._queued = 0
+        self._queues: OrderedDict[str, Deque[_Waiter]] = OrderedDict()
+        self._counters: Dict[str, int] = {
+            "admitted": 0,
+            "rejected_overloaded": 0,
+            "rejected_rate_limited": 0,
+            "timed_out": 0,
+        }
+        self._wait_seconds_total = 0.0
+        self._wait_seconds_max = 0.0
+
+    @contextmanager
+    def admit(self, owner_id: str) -> Iterator[None]:
+        """
+        Выполняет блок with, когда для него освободится место.
+
+        :param owner_id: ID пользователя, от лица которого выполняется
+            операция.
+        :type owner_id: str
+
+        :raises CardsRateLimited: Если у пользователя слишком много
+            ожидающих операций.
+        :raises CardsOverloaded: Если очередь заполнена или время
+            ожидания истекло.
+        """
+        self.__acquire(owner_id)
+        try:
+            yield
+        finally:
+            self.__release()
+
+    def stats(self) -> AdmissionStats:
+        with self._lock:
+            return AdmissionStats(
+                active=self._active,
+                queued=self._queued,
+                wait_seconds_total=self._wait_seconds_total,
+                wait_seconds_max=self._wait_seconds_max,
+                **self._counters,
+            )
+
+    def __acquire(self, owner_id: str) -> None:
+        started_at = time.monotonic()
+        with self._lock:
+            if self._active < self.max_concurrency and not self._queued:
+                self._active += 1
+                self._counters["admitted"] += 1
+                return
+
+            owner_queue = self._queues.get(owner_id)
+            if owner_queue is not None \
+                    and len(owner_queue) >= self.max_queue_per_owner:
+                self._counters["rejected_rate_limited"] += 1
+                raise CardsRateLimited(
+                    "Слишком много операций пользователя в очереди",
+                    retry_after=self.retry_after,
+                )
+            if self._queued >= self.max_queue:
+                self._counters["rejected_overloaded"] += 1
+                raise CardsOverloaded(
+                    "Очередь операций записи заполнена",
+                    retry_after=self.retry_after,
+                )
+
+            waiter = _Waiter()
+            self._queues.setdefault(owner_id, deque()).append(waiter)
+            self._queued += 1
+
+        granted = waiter.granted.wait(self.timeout)
+
+        with self._lock:
+            if not granted and not waiter.granted.is_set():
+                self.__remove(owner_id, waiter)
+                self._counters["timed_out"] += 1
+                raise CardsOverloaded(
+                    "Время ожидания в очереди операций записи истекло",
+                    retry_after=self.retry_after,
+                )
+
+            waited = time.monotonic() - started_at
+            self._counters["admitted"] += 1
+            self._wait_seconds_total += waited
+            self._wait_seconds_max = max(self._wait_seconds_max, waited)
+
+    def __release(self) -> None:
+        with self._lock:
+            if not self._queues:
+                self._active -= 1
+                return
+
+            # Место передается первому ожидающему следующего по кругу
+            # пользователя, счетчик активных операций не меняется.
+            owner_id, owner_queue = self._queues.popitem(last=False)
+            waiter = owner_queue.popleft()
+            if owner_queue:
+                self._queues[owner_id] = owner_queue
+            self._queued -= 1
+            waiter.granted.set()
+
+    def __remove(self, owner_id: str, waiter: _Waiter) -> None:
+        owner_queue = self._queues[owner_id]
+        owner_queue.remove(waiter)
+        if not owner_queue:
+            del self._queues[owner_id]
+        self._queued -= 1
@@ -1,9 +1,91 @@
 from abc import ABC, abstractmethod
-from typing import Optional, List
-from .model import Card, CardsetInfo, CardsetInfoSpec, CardSpec
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Optional, List, Iterator, Callable, TypeVar
+from .model import (
+    Card,
+    Cardset,
+    CardsetInfo,
+    CardsetInfoSpec,
+    CardSpec,
+    CardsSort,
+    CardsetsSort,
+    SortOrder,
+    CardField,
+    CardsetInfoField,
+    ResourceVersion,
+    Changes,
+)
+
+
+T = TypeVar("T")
 
 
 class CardsetRepositoryABC(ABC):
+    def open(self) -> None:
+        """
+        Подготавливает репозиторий к работе в текущем процессе. Вызывается
+        при запуске приложения, в том числе в каждом рабочем процессе
+        после fork.
+        """
+
+    def close(self) -> None:
+        """
+        Освобождает ресурсы репозитория текущего процесса (соединения,
+        фоновые потоки). Вызывается при остановке приложения.
+        """
+
+    @contextmanager
+    def unit_of_work(
+        self,
+        write: bool = False,
+        requester_id: Optional[str] = None,
+    ) -> Iterator[None]:
+        """
+        Объединяет вызовы методов репозитория внутри блока with в одну
+        единицу работы: они видят согласованное состояние хранилища, а
+        изменения фиксируются целиком при выходе из блока или целиком
+        отменяются при исключении. Вложенные блоки присоединяются к
+        внешнему, режим определяется внешним блоком.
+
+        Реализация по умолчанию не дает никаких гарантий.
+
+        :param write: Единица работы будет изменять данные. Хранилище может
+            сразу захватить блокировку записи, чтобы проверка и следующая
+            за ней запись выполнялись атомарно.
+        :type write: bool
+        :param requester_id: ID пользователя, от лица которого выполняется
+            операция. Хранилище, читающее из отстающей копии, по нему
+            направляет чтение пользователя после его записи в основное
+            хранилище.
+        :type requester_id: str, optional
+        """
+        yield
+
+    def run_in_unit_of_work(
+        self,
+        operation: Callable[[], T],
+        write: bool = False,
+        requester_id: Optional[str] = None,
+    ) -> T:
+        """
+        Выполняет operation в единице работы (см. unit_of_work) и
+        возвращает ее результат. Хранилище может выполнить операцию в
+        другом потоке, например чтобы объединить фиксацию нескольких
+        одновременных операций записи.
+
+        :param operation: Функция, вызывающая методы репозитория.
+        :type operation: Callable[[], T]
+        :param write: Операция изменяет данные.
+        :type write: bool
+        :param requester_id: См. unit_of_work.
+        :type requester_id: str, optional
+        :return: Результат operation.
+        :rtype: T
+        """
+        with self.unit_of_work(write=write, requester_id=requester_id):
+            return operation()
+
     @abstractmethod
     def get_cardset_infos(
         self,
@@ -12,6 +94,11 @@ class CardsetRepositoryABC(ABC):
         offset: Optional[int] = 0,
         limit: Optional[int] = 10,
         include_deleted: Optional[bool] = False,
+        fields: Optional[List[CardsetInfoField]] = None,
+        sort: Optional[CardsetsSort] = CardsetsSort.TITLE,
+        order: Optional[SortOrder] = SortOrder.ASC,
+        modified_after: Optional[datetime] = None,
+        modified_before: Optional[datetime] = None,
     ) -> List[CardsetInfo]:
         """
         Возвращает наборы карточек в укороченном (без карточек) виде.
@@ -32,8 +119,24 @@ class CardsetRepositoryABC(ABC):
         :param include_deleted: Если True, в результирующей выборке могут
             оказаться наборы карточек, которые были отмечены как удаленные.
         :type include_deleted: bool, optional
+        :param fields: Атрибуты, которые нужно прочитать из хранилища.
+            Остальные атрибуты могут быть равны None, кроме owner_id,
+            который заполняется всегда. Если не передано, заполняются все
+            атрибуты.
+        :type fields: List[CardsetInfoField], optional
+        :param sort: Атрибут, по которому сортируется выборка. Наборы
+            карточек с одинаковым временем упорядочиваются по ID.
+        :type sort: CardsetsSort, optional
+        :param order: Направление сортировки.
+        :type order: SortOrder, optional
+        :param modified_after: Если передано, вернутся только наборы
+            карточек, измененные позже указанного времени.
+        :type modified_after: datetime, optional
+        :param modified_before: Если передано, вернутся только наборы
+            карточек, измененные раньше указанного времени.
+        :type modified_before: datetime, optional
         :return: Выборка укороченных (без карточек) представлений наборов
-            карточек, отсортированная по названию в алфавитном порядке.
+            карточек, отсортированная по атрибуту sort.
         :rtype: List[CardsetInfo]
         """
         raise NotImplementedError()
@@ -47,6 +150,11 @@ class CardsetRepositoryABC(ABC):
         limit: Optional[int] = 10,
         include_deleted: Optional[bool] = False,
         mixed: Optional[bool] = False,
+        sort: Optional[CardsSort] = CardsSort.TERM,
+        fields: Optional[List[CardField]] = None,
+        order: Optional[SortOrder] = SortOrder.ASC,
+        modified_after: Optional[datetime] = None,
+        modified_before: Optional[datetime] = None,
     ) -> List[Card]:
         """
         Метод get_cards возвращает выборку карточек.
@@ -71,13 +179,125 @@ class CardsetRepositoryABC(ABC):
             результирующей выборке карточки будут представлены в случайном
             порядке.
         :type mixed: Optional[bool], optional
-        :return: Возвращает выборку карточек. Результирующая выборка
-            отсортирована по термину в алфавитном порядке (если не выставлен
-            параметр mixed).
+        :param sort: Порядок карточек в выборке: по термину в алфавитном
+            порядке, по позиции, заданной пользователем (см. move_card),
+            или по времени создания, изменения или обращения (карточки с
+            одинаковым временем упорядочиваются по id). Не учитывается,
+            если выставлен параметр mixed.
+        :type sort: Optional[CardsSort], optional
+        :param fields: Атрибуты карточек, которые нужно прочитать из
+            хранилища. Остальные атрибуты могут быть равны None, кроме
+            owner_id, который заполняется всегда. Если не передано,
+            заполняются все атрибуты.
+        :type fields: Optional[List[CardField]], optional
+        :param order: Направление сортировки.
+        :type order: Optional[SortOrder], optional
+        :param modified_after: Если передано, в выборку попадут только
+            карточки, измененные позже указанного времени.
+        :type modified_after: Optional[datetime], optional
+        :param modified_before: Если передано, в выборку попадут только
+            карточки, измененные раньше указанного времени.
+        :type modified_before: Optional[datetime], optional
+        :return: Возвращает выборку карточек.
         :rtype: List[Card]
         """
         raise NotImplementedError()
 
+    @abstractmethod
+    def get_cardset(
+        self,
+        cardset_id: str,
+        include_deleted: Optional[bool] = False,
+    ) -> Cardset | None:
+        """
+        Метод get_cardset возвращает набор карточек вместе со всеми его
+        карточками за одно обращение к хранилищу.
+
+        :param cardset_id: ID набора карточек.
+        :type cardset_id: str
+        :param include_deleted: Если True, могут быть возвращены набор
+            карточек и карточки, которые были отмечены как удаленные.
+        :type include_deleted: bool, optional
+        :return: Набор карточек, карточки которого отсортированы в
+            пользовательском порядке (по позиции), или None, если набор
+            карточек не найден.
+        :rtype: Cardset | None
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def get_cardset_infos_version(
+        self,
+        cardset_id: Optional[str] = None,
+        user_id: Optional[str] = None,
+    ) -> ResourceVersion | None:
+        """
+        Метод get_cardset_infos_version возвращает версию выборки наборов
+        карточек, не материализуя саму выборку. Версия меняется при любом
+        изменении наборов карточек, которые могут попасть в выборку.
+
+        :param cardset_id: ID набора карточек. Если передано, возвращается
+            версия соответствующего набора карточек.
+        :type cardset_id: str, optional
+        :param user_id: ID пользователя. Если передано (и не передан
+            cardset_id), возвращается версия всех наборов карточек
+            пользователя.
+        :type user_id: str, optional
+        :return: Версия выборки или None, если версию определить дешево
+            невозможно (например, выборка не ограничена владельцем).
+        :rtype: ResourceVersion | None
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def get_cards_version(
+        self,
+        card_id: Optional[str] = None,
+        cardset_id: Optional[str] = None,
+    ) -> ResourceVersion | None:
+        """
+        Метод get_cards_version возвращает версию выборки карточек, не
+        материализуя саму выборку. Версия меняется при любом изменении
+        карточек набора, к которому относится выборка.
+
+        :param card_id: ID карточки. Если передано, возвращается версия
+            набора карточек, которому принадлежит карточка.
+        :type card_id: str, optional
+        :param cardset_id: ID набора карточек.
+        :type cardset_id: str, optional
+        :return: Версия выборки или None, если версию определить дешево
+            невозможно.
+        :rtype: ResourceVersion | None
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def get_changes(
+        self,
+        owner_id: str,
+        since: int = 0,
+        limit: int = 100,
+    ) -> Changes:
+        """
+        Метод get_changes возвращает наборы карточек и карточки
+        пользователя, измененные после изменения с номером since, в
+        порядке изменения. Каждый объект возвращается в актуальном
+        состоянии один раз, даже если он менялся несколько раз; удаленные
+        (status = absent) объекты возвращаются как обычные, а физически
+        удаленные - списками ID.
+
+        :param owner_id: ID пользователя - владельца объектов.
+        :type owner_id: str
+        :param since: Номер изменения (next_since предыдущей страницы).
+            0 - с самого начала.
+        :type since: int
+        :param limit: Максимальное количество объектов на странице.
+        :type limit: int
+        :return: Страница изменений.
+        :rtype: Changes
+        """
+        raise NotImplementedError()
+
     @abstractmethod
     def create_cardset_info(
         self,
@@ -167,3 +387,119 @@ class CardsetRepositoryABC(ABC):
         :rtype: Card | None
         """
         raise NotImplementedError()
+
+    @abstractmethod
+    def clone_cardset(
+        self,
+        cardset_id: str,
+    ) -> CardsetInfo | None:
+        """
+        Метод clone_cardset создает копию набора карточек того же
+        владельца вместе с неудаленными карточками. Копия и ее карточки
+        получают новые id и время создания.
+
+        :param cardset_id: id копируемого набора карточек.
+        :type cardset_id: str
+        :return: Укороченное (без карточек) представление копии или None,
+            если набор карточек не найден.
+        :rtype: CardsetInfo | None
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def delete_cardset_cards(
+        self,
+        cardset_id: str,
+        limit: int,
+    ) -> int:
+        """
+        Метод delete_cardset_cards безвозвратно удаляет не более limit
+        карточек набора (в том числе отмеченных как удаленные). Позволяет
+        удалять большие наборы карточек частями в отдельных единицах
+        работы.
+
+        :param cardset_id: id набора карточек.
+        :type cardset_id: str
+        :param limit: Максимальное количество удаляемых карточек.
+        :type limit: int
+        :return: Количество удаленных карточек.
+        :rtype: int
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def delete_cardset(
+        self,
+        cardset_id: str,
+    ) -> CardsetInfo | None:
+        """
+        Метод delete_cardset безвозвратно удаляет набор карточек вместе с
+        оставшимися в нем карточками. Удаление попадает в журнал
+        изменений (см. get_changes).
+
+        :param cardset_id: id набора карточек.
+        :type cardset_id: str
+        :return: Удаленный набор карточек или None, если он не найден.
+        :rtype: CardsetInfo | None
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def delete_card(
+        self,
+        card_id: str,
+    ) -> Card | None:
+        """
+        Метод delete_card безвозвратно удаляет карточку. Удаление попадает
+        в журнал изменений (см. get_changes).
+
+        :param card_id: id карточки.
+        :type card_id: str
+        :return: Удаленная карточка или None, если она не найдена.
+        :rtype: Card | None
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def move_card(
+        self,
+        card_id: str,
+        before_id: Optional[str] = None,
+        after_id: Optional[str] = None,
+    ) -> Card | None:
+        """
+        Метод move_card перемещает карточку внутри набора: карточке
+        назначается ключ позиции между соседними карточками, остальные
+        карточки не изменяются.
+
+        :param card_id: id перемещаемой карточки.
+        :type card_id: str
+        :param before_id: id карточки, перед которой нужно поместить
+            карточку.
+        :type before_id: str, optional
+        :param after_id: id карточки, после которой нужно поместить
+            карточку. Передается вместо before_id. Если не передан ни
+            before_id, ни after_id, карточка перемещается в конец набора.
+        :type after_id: str, optional
+        :return: Перемещенная карточка или None, если карточка или
+            соседняя карточка не найдены либо относятся к разным наборам.
+        :rtype: Card | None
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def rebalance_card_positions(
+        self,
+        cardset_id: str,
+    ) -> int:
+        """
+        Метод rebalance_card_positions заново назначает карточкам набора
+        короткие ключи позиций с сохранением порядка. Нужен, когда после
+        многократных вставок в одно место ключи становятся длинными.
+
+        :param cardset_id: id набора карточек.
+        :type cardset_id: str
+        :return: Количество карточек, получивших новые ключи.
+        :rtype: int
+        """
+        raise NotImplementedError()
@@ -1,10 +1,45 @@
-from typing import Optional, List
-
-from .model import Card, CardsetInfo, CardsetSpec, CardsetInfoSpec, CardSpec
+from datetime import datetime
+from typing import Optional, List, Callable, TypeVar
+
+from .model import (
+    Card,
+    Cardset,
+    CardsetInfo,
+    CardsetSpec,
+    CardsetInfoSpec,
+    CardSpec,
+    CardsSort,
+    CardsetsSort,
+    SortOrder,
+    CardField,
+    CardsetInfoField,
+    ResourceVersion,
+    Changes,
+)
 from .cardset_repository_abc import CardsetRepositoryABC
-from .exceptions import CardsPermissionDenied, CardsInvalidArguments
+from .exceptions import (
+    CardsPermissionDenied,
+    CardsInvalidArguments,
+    CardsNotFound,
+)
 from .validators import validate_id, validate_int
 from .constants import MAX_LIMIT
+from .positions import MAX_POSITION_LENGTH
+from .admission import AdmissionController
+from .change_broker import ChangeBroker, ChangeNotification
+
+
+T = TypeVar("T")
+
+
+def local_time(value: Optional[datetime]) -> Optional[datetime]:
+    """
+    Приводит время с часовым поясом к местному времени без часового
+    пояса, в котором хранятся время создания и изменения объектов.
+    """
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone().replace(tzinfo=None)
 
 
 class CardsetService:
@@ -15,10 +50,28 @@ class CardsetService:
     :param cardset_repository: Экземпляр репозитория для работы с
         наборами карточек.
     :type cardset_repository: CardsetRepositoryABC
+    :param admission_controller: Ограничитель одновременных операций
+        записи. Если не передан, операции записи не ограничиваются.
+    :type admission_controller: AdmissionController, optional
+    :param change_broker: Получатель уведомлений об изменениях. Изменения
+        публикуются после фиксации транзакции.
+    :type change_broker: ChangeBroker, optional
+    :param delete_batch_size: Максимальное количество карточек, которые
+        удаляются в одной транзакции при удалении набора карточек.
+    :type delete_batch_size: int
     """
 
-    def __init__(self, cardset_repository: CardsetRepositoryABC) -> None:
+    def __init__(
+        self,
+        cardset_repository: CardsetRepositoryABC,
+        admission_controller: Optional[AdmissionController] = None,
+        change_broker: Optional[ChangeBroker] = None,
+        delete_batch_size: int = 500,
+    ) -> None:
         self.cardset_repository = cardset_repository
+        self.admission_controller = admission_controller
+        self.change_broker = change_broker
+        self.delete_batch_size = delete_batch_size
 
     def get_cardset_infos(
         self,
@@ -28,6 +81,11 @@ class CardsetService:
         offset: Optional[int] = 0,
         limit: Optional[int] = 10,
         include_deleted: Optional[bool] = False,
+        fields: Optional[List[CardsetInfoField]] = None,
+        sort: Optional[CardsetsSort] = CardsetsSort.TITLE,
+        order: Optional[SortOrder] = SortOrder.ASC,
+        modified_after: Optional[datetime] = None,
+        modified_before: Optional[datetime] = None,
     ) -> List[CardsetInfo]:
         """
         Возвращает наборы карточек в укороченном (без карточек) виде.
@@ -49,11 +107,27 @@ class CardsetService:
         :param include_deleted: Если True, в результирующей выборке могут
             оказаться наборы карточек, которые были отмечены как удаленные.
         :type include_deleted: Optional[bool]
+        :param fields: Атрибуты наборов карточек, которые нужно прочитать.
+            Остальные атрибуты могут быть равны None. Если не передано,
+            заполняются все атрибуты.
+        :type fields: Optional[List[CardsetInfoField]]
+        :param sort: Атрибут, по которому сортируется выборка: название
+            или время создания, изменения или обращения.
+        :type sort: Optional[CardsetsSort]
+        :param order: Направление сортировки.
+        :type order: Optional[SortOrder]
+        :param modified_after: Если передано, вернутся только наборы
+            карточек, измененные позже указанного времени.
+        :type modified_after: Optional[datetime]
+        :param modified_before: Если передано, вернутся только наборы
+            карточек, измененные раньше указанного времени.
+        :type modified_before: Optional[datetime]
         :return: Выборку укороченных (без карточек) представлений наборов
-            карточек. Результирующая выборка отсортирована по названию в
-            алфавитном порядке.
+            карточек, отсортированную по атрибуту sort.
         :rtype: List[CardsetInfo]
 
+        :raises CardsInvalidArguments: Если не передан ни cardset_id, ни
+            user_id.
         :raises CardsPermissionDenied: Если доступ к информации о наборах
             карточек неправомерен.
         """
@@ -61,17 +135,29 @@ class CardsetService:
         validate_id(requester_id, required=True)
         validate_id(cardset_id)
         validate_id(user_id)
+        if not cardset_id and not user_id:
+            raise CardsInvalidArguments(
+                "Нужно передать cardset_id или user_id."
+            )
 
         validate_int(offset, min_val=0)
         validate_int(limit, min_val=0, max_val=MAX_LIMIT)
 
-        cardset_infos = self.cardset_repository.get_cardset_infos(
-            cardset_id=cardset_id,
-            user_id=user_id,
-            offset=offset,
-            limit=limit,
-            include_deleted=include_deleted,
-        )
+        with self.cardset_repository.unit_of_work(
+            requester_id=requester_id
+        ):
+            cardset_infos = self.cardset_repository.get_cardset_infos(
+                cardset_id=cardset_id,
+                user_id=user_id,
+                offset=offset,
+                limit=limit,
+                include_deleted=include_deleted,
+                fields=fields,
+                sort=sort,
+                order=order,
+                modified_after=local_time(modified_after),
+                modified_before=local_time(modified_before),
+            )
 
         for cardset_info in cardset_infos:
             if cardset_info.owner_id != requester_id:
@@ -90,6 +176,11 @@ class CardsetService:
         limit: Optional[int] = 10,
         include_deleted: Optional[bool] = False,
         mixed: Optional[bool] = False,
+        sort: Optional[CardsSort] = CardsSort.TERM,
+        fields: Optional[List[CardField]] = None,
+        order: Optional[SortOrder] = SortOrder.ASC,
+        modified_after: Optional[datetime] = None,
+        modified_before: Optional[datetime] = None,
     ) -> List[Card]:
         """
         Возвращает выборку карточек.
@@ -116,27 +207,57 @@ class CardsetService:
         :param mixed: Если True, в результирующей выборке карточки будут
             представлены в случайном порядке. Опционально.
         :type mixed: bool, optional
-        :return: Возвращает выборку карточек. Результирующая выборка
-            отсортирована по термину в алфавитном порядке
-            (если не выставлен параметр mixed).
+        :param sort: Порядок карточек: по термину в алфавитном порядке, по
+            позиции, заданной пользователем, или по времени создания,
+            изменения или обращения. Не учитывается, если выставлен
+            параметр mixed. Опционально.
+        :type sort: CardsSort, optional
+        :param fields: Атрибуты карточек, которые нужно прочитать.
+            Остальные атрибуты могут быть равны None. Если не передано,
+            заполняются все атрибуты. Опционально.
+        :type fields: List[CardField], optional
+        :param order: Направление сортировки. Опционально.
+        :type order: SortOrder, optional
+        :param modified_after: Если передано, в выборку попадут только
+            карточки, измененные позже указанного времени. Опционально.
+        :type modified_after: datetime, optional
+        :param modified_before: Если передано, в выборку попадут только
+            карточки, измененные раньше указанного времени. Опционально.
+        :type modified_before: datetime, optional
+        :return: Возвращает выборку карточек.
         :rtype: List[Card]
+
+        :raises CardsInvalidArguments: Если не передан ни card_id, ни
+            cardset_id.
         """
 
         validate_id(requester_id, required=True)
         validate_id(cardset_id)
         validate_id(card_id)
+        if not card_id and not cardset_id:
+            raise CardsInvalidArguments(
+                "Нужно передать card_id или cardset_id."
+            )
 
         validate_int(offset, min_val=0)
         validate_int(limit, min_val=0, max_val=MAX_LIMIT)
 
-        cards = self.cardset_repository.get_cards(
-            card_id=card_id,
-            cardset_id=cardset_id,
-            offset=offset,
-            limit=limit,
-            include_deleted=include_deleted,
-            mixed=mixed,
-        )
+        with self.cardset_repository.unit_of_work(
+            requester_id=requester_id
+        ):
+            cards = self.cardset_repository.get_cards(
+                card_id=card_id,
+                cardset_id=cardset_id,
+                offset=offset,
+                limit=limit,
+                include_deleted=include_deleted,
+                mixed=mixed,
+                sort=sort,
+                fields=fields,
+                order=order,
+                modified_after=local_time(modified_after),
+                modified_before=local_time(modified_before),
+            )
 
         for card in cards:
             if card.owner_id != requester_id:
@@ -146,6 +267,166 @@ class CardsetService:
 
         return cards
 
+    def get_cardset(
+        self,
+        requester_id: str,
+        cardset_id: str,
+        include_deleted: Optional[bool] = False,
+    ) -> Cardset | None:
+        """
+        Возвращает набор карточек вместе со всеми его карточками.
+
+        :param requester_id: ID пользователя, от лица которого выполняется
+            операция.
+        :type requester_id: str
+        :param cardset_id: ID набора карточек.
+        :type cardset_id: str
+        :param include_deleted: Если True, могут быть возвращены набор
+            карточек и карточки, которые были отмечены как удаленные.
+        :type include_deleted: Optional[bool]
+        :return: Набор карточек или None, если он не найден.
+        :rtype: Cardset | None
+
+        :raises CardsPermissionDenied: Если доступ к набору карточек
+            неправомерен.
+        """
+
+        validate_id(requester_id, required=True)
+        validate_id(cardset_id, required=True)
+
+        with self.cardset_repository.unit_of_work(
+            requester_id=requester_id
+        ):
+            cardset = self.cardset_repository.get_cardset(
+                cardset_id=cardset_id,
+                include_deleted=include_deleted,
+            )
+
+        if cardset is not None and cardset.owner_id != requester_id:
+            raise CardsPermissionDenied(
+                "Неправомерный доступ к информации о наборах карточек"
+            )
+
+        return cardset
+
+    def get_cardset_infos_version(
+        self,
+        requester_id: str,
+        cardset_id: Optional[str] = None,
+        user_id: Optional[str] = None,
+    ) -> ResourceVersion | None:
+        """
+        Возвращает версию выборки наборов карточек без выполнения самой
+        выборки. Используется для ответа на условные запросы.
+
+        :param requester_id: ID пользователя, от лица которого выполняется
+            операция.
+        :type requester_id: str
+        :param cardset_id: ID набора карточек.
+        :type cardset_id: Optional[str]
+        :param user_id: ID пользователя - владельца наборов карточек.
+        :type user_id: Optional[str]
+        :return: Версия выборки или None, если версия неизвестна или
+            принадлежит другому пользователю. В последнем случае решение о
+            доступе принимается при выполнении самой выборки.
+        :rtype: ResourceVersion | None
+        """
+
+        validate_id(requester_id, required=True)
+        validate_id(cardset_id)
+        validate_id(user_id)
+
+        with self.cardset_repository.unit_of_work(
+            requester_id=requester_id
+        ):
+            version = self.cardset_repository.get_cardset_infos_version(
+                cardset_id=cardset_id,
+                user_id=user_id,
+            )
+
+        if version is None or version.owner_id != requester_id:
+            return None
+
+        return version
+
+    def get_cards_version(
+        self,
+        requester_id: str,
+        card_id: Optional[str] = None,
+        cardset_id: Optional[str] = None,
+    ) -> ResourceVersion | None:
+        """
+        Возвращает версию выборки карточек без выполнения самой выборки.
+        Используется для ответа на условные запросы.
+
+        :param requester_id: ID пользователя, от лица которого выполняется
+            операция.
+        :type requester_id: str
+        :param card_id: ID карточки.
+        :type card_id: Optional[str]
+        :param cardset_id: ID набора карточек.
+        :type cardset_id: Optional[str]
+        :return: Версия выборки или None, если версия неизвестна или
+            принадлежит другому пользователю.
+        :rtype: ResourceVersion | None
+        """
+
+        validate_id(requester_id, required=True)
+        validate_id(card_id)
+        validate_id(cardset_id)
+
+        with self.cardset_repository.unit_of_work(
+            requester_id=requester_id
+        ):
+            version = self.cardset_repository.get_cards_version(
+                card_id=card_id,
+                cardset_id=cardset_id,
+            )
+
+        if version is None or version.owner_id != requester_id:
+            return None
+
+        return version
+
+    def get_changes(
+        self,
+        requester_id: str,
+        since: Optional[int] = 0,
+        limit: Optional[int] = MAX_LIMIT,
+    ) -> Changes:
+        """
+        Возвращает наборы карточек и карточки пользователя, измененные
+        после изменения с номером since. Клиент синхронизируется, передавая
+        next_since каждой страницы в следующий запрос, пока has_more
+        истинно, поэтому объем синхронизации пропорционален количеству
+        изменений, а не размеру наборов карточек.
+
+        :param requester_id: ID пользователя, от лица которого выполняется
+            операция. Возвращаются только его объекты.
+        :type requester_id: str
+        :param since: Номер последнего полученного изменения. 0 - с самого
+            начала.
+        :type since: int, optional
+        :param limit: Максимальное количество объектов на странице.
+        :type limit: int, optional
+        :return: Страница изменений.
+        :rtype: Changes
+        """
+
+        validate_id(requester_id, required=True)
+
+        validate_int(since, min_val=0)
+        validate_int(limit, min_val=1, max_val=MAX_LIMIT)
+
+        with self.cardset_repository.unit_of_work(
+            requester_id=requester_id
+        ):
+            return self.cardset_repository.get_changes(
+                owner_id=requester_id,
+                since=since or 0,
+                limit=limit or MAX_LIMIT,
+            )
+
     def create_cardset(
         self,
         requester_id: str,
@@ -173,29 +454,32 @@ class CardsetService:
         validate_id(requester_id, required=True)
         validate_id(owner_id, required=True)
 
-        cardset_info = self.cardset_repository.create_cardset_info(
-            owner_id=owner_id,
-            spec=CardsetInfoSpec(
-                title=spec.title,
-                description=spec.description,
-                status=spec.status,
-            ),
-        )
+        def operation() -> CardsetInfo | None:
+            cardset_info = self.cardset_repository.create_cardset_info(
+                owner_id=owner_id,
+                spec=CardsetInfoSpec(
+                    title=spec.title,
+                    description=spec.description,
+                    status=spec.status,
+                ),
+            )
 
-        if cardset_info is None:
-            return cardset_info
+            if cardset_info is None:
+                return cardset_info
 
-        if spec.cards is not None:
-            for card_spec in spec.cards:
-                card = self.cardset_repository.create_card(
-                    cardset_id=cardset_info.id,
-                    spec=card_spec,
-                )
+            if spec.cards is not None:
+                for card_spec in spec.cards:
+                    card = self.cardset_repository.create_card(
+                        cardset_id=cardset_info.id,
+                        spec=card_spec,
+                    )
+
+                    if card is None:
+                        return None
 
-                if card is None:
-                    return None
+            return cardset_info
 
-        return cardset_info
+        return self.__run_write(requester_id, operation)
 
     def modify_cardset_info(
         self,
@@ -224,24 +508,14 @@ class CardsetService:
         validate_id(requester_id, required=True)
         validate_id(cardset_id, required=True)
 
-        cardset_infos = self.cardset_repository.get_cardset_infos(
-            cardset_id=cardset_id
-        )
-        if len(cardset_infos) < 1:
-            raise CardsInvalidArguments(
-                f"Набора карточек {cardset_id} не обнаружено."
-            )
-        if cardset_infos[0].owner_id != requester_id:
-            raise CardsPermissionDenied(
-                "Неправомерный доступ к информации о наборах карточек"
+        def operation() -> CardsetInfo | None:
+            self.__check_cardset_owner(requester_id, cardset_id)
+            return self.cardset_repository.modify_cardset_info(
+                cardset_id=cardset_id,
+                spec=spec,
             )
 
-        cardset_info = self.cardset_repository.modify_cardset_info(
-            cardset_id=cardset_id,
-            spec=spec,
-        )
-
-        return cardset_info
+        return self.__run_write(requester_id, operation)
 
     def create_card(
         self,
@@ -268,24 +542,14 @@ class CardsetService:
         validate_id(requester_id, required=True)
         validate_id(cardset_id, required=True)
 
-        cardset_infos = self.cardset_repository.get_cardset_infos(
-            cardset_id=cardset_id
-        )
-        if len(cardset_infos) < 1:
-            raise CardsInvalidArguments(
-                f"Набора карточек {cardset_id} не обнаружено."
+        def operation() -> Card | None:
+            self.__check_cardset_owner(requester_id, cardset_id)
+            return self.cardset_repository.create_card(
+                cardset_id=cardset_id,
+                spec=spec,
             )
-        if cardset_infos[0].owner_id != requester_id:
-            raise CardsPermissionDenied(
-                "Неправомерный доступ к информации о наборах карточек"
-            )
-
-        card = self.cardset_repository.create_card(
-            cardset_id=cardset_id,
-            spec=spec,
-        )
 
-        return card
+        return self.__run_write(requester_id, operation)
 
     def modify_card(
         self,
@@ -314,17 +578,279 @@ class CardsetService:
         validate_id(requester_id, required=True)
         validate_id(card_id, required=True)
 
-        cards = self.cardset_repository.get_cards(card_id=card_id)
-        if len(cards) < 1:
-            raise CardsInvalidArguments(f"Карточки {cards} не обнаружено.")
-        if cards[0].owner_id != requester_id:
-            raise CardsPermissionDenied(
-                "Неправомерный доступ к информации о карточках"
+        def operation() -> Card | None:
+            cards = self.cardset_repository.get_cards(card_id=card_id)
+            if len(cards) < 1:
+                raise CardsNotFound(f"Карточки {card_id} не обнаружено.")
+            if cards[0].owner_id != requester_id:
+                raise CardsPermissionDenied(
+                    "Неправомерный доступ к информации о карточках"
+                )
+
+            return self.cardset_repository.modify_card(
+                card_id=card_id,
+                spec=spec,
             )
 
-        card = self.cardset_repository.modify_card(
-            card_id=card_id,
-            spec=spec,
-        )
+        return self.__run_write(requester_id, operation)
+
+    def move_card(
+        self,
+        requester_id: str,
+        card_id: str,
+        before_id: Optional[str] = None,
+        after_id: Optional[str] = None,
+    ) -> Card | None:
+        """
+        Перемещает карточку внутри набора перед или после другой карточки
+        того же набора (порядок CardsSort.POSITION). Изменяется только
+        перемещаемая карточка. Если ключ позиции стал слишком длинным,
+        после фиксации перемещения ключи набора перенумеровываются в
+        отдельной транзакции.
+
+        :param requester_id: ID пользователя, от лица которого выполняется
+            операция.
+        :type requester_id: str
+        :param card_id: ID перемещаемой карточки.
+        :type card_id: str
+        :param before_id: ID карточки, перед которой нужно поместить
+            карточку.
+        :type before_id: str, optional
+        :param after_id: ID карточки, после которой нужно поместить
+            карточку. Если не передан ни before_id, ни after_id, карточка
+            перемещается в конец набора.
+        :type after_id: str, optional
+        :return: Перемещенная карточка в случае успешного выполнения, иначе
+            None.
+        :rtype: Card | None
 
+        :raises CardsInvalidArguments: Если переданы и before_id, и
+            after_id.
+        """
+
+        validate_id(requester_id, required=True)
+        validate_id(card_id, required=True)
+        validate_id(before_id)
+        validate_id(after_id)
+        if before_id and after_id:
+            raise CardsInvalidArguments(
+                "Можно передать только одно из значений before_id и after_id."
+            )
+
+        def operation() -> Card | None:
+            cards = self.cardset_repository.get_cards(
+                card_id=card_id, include_deleted=True
+            )
+            if len(cards) < 1:
+                raise CardsNotFound(
+                    f"Карточки {card_id} не обнаружено."
+                )
+            if cards[0].owner_id != requester_id:
+                raise CardsPermissionDenied(
+                    "Неправомерный доступ к информации о карточках"
+                )
+
+            return self.cardset_repository.move_card(
+                card_id=card_id,
+                before_id=before_id,
+                after_id=after_id,
+            )
+
+        card = self.__run_write(requester_id, operation)
+        if card is not None and len(card.position) > MAX_POSITION_LENGTH:
+            cardset_id = card.cardset_id
+            self.__run_write(
+                requester_id,
+                lambda: self.cardset_repository.rebalance_card_positions(
+                    cardset_id=cardset_id,
+                ),
+            )
+            with self.cardset_repository.unit_of_work(
+                requester_id=requester_id
+            ):
+                card = self.cardset_repository.get_cards(
+                    card_id=card_id, include_deleted=True
+                )[0]
         return card
+
+    def clone_cardset(
+        self,
+        requester_id: str,
+        cardset_id: str,
+    ) -> CardsetInfo | None:
+        """
+        Создает копию набора карточек вместе с его неудаленными
+        карточками. Копирование выполняется в хранилище одной операцией,
+        без передачи карточек клиенту и обратно.
+
+        :param requester_id: ID пользователя, от лица которого выполняется
+            операция. Пользователь должен быть владельцем набора карточек.
+        :type requester_id: str
+        :param cardset_id: ID копируемого набора карточек.
+        :type cardset_id: str
+        :return: Укороченное (без карточек) представление копии набора
+            карточек в случае успешного выполнения, иначе None.
+        :rtype: CardsetInfo | None
+        """
+
+        validate_id(requester_id, required=True)
+        validate_id(cardset_id, required=True)
+
+        def operation() -> CardsetInfo | None:
+            self.__check_cardset_owner(requester_id, cardset_id)
+            return self.cardset_repository.clone_cardset(
+                cardset_id=cardset_id,
+            )
+
+        return self.__run_write(requester_id, operation)
+
+    def delete_cardset(
+        self,
+        requester_id: str,
+        cardset_id: str,
+    ) -> CardsetInfo | None:
+        """
+        Безвозвратно удаляет набор карточек вместе с карточками. Карточки
+        удаляются частями по delete_batch_size в отдельных транзакциях,
+        поэтому удаление большого набора не удерживает блокировку записи
+        надолго; набор карточек удаляется последним.
+
+        :param requester_id: ID пользователя, от лица которого выполняется
+            операция. Пользователь должен быть владельцем набора карточек.
+        :type requester_id: str
+        :param cardset_id: ID удаляемого набора карточек.
+        :type cardset_id: str
+        :return: Удаленный набор карточек в случае успешного выполнения,
+            иначе None.
+        :rtype: CardsetInfo | None
+
+        :raises CardsNotFound: Если набора карточек не существует.
+        :raises CardsPermissionDenied: Если пользователь не владеет
+            набором карточек.
+        """
+
+        validate_id(requester_id, required=True)
+        validate_id(cardset_id, required=True)
+
+        def delete_cards() -> int:
+            # Владелец перепроверяется в каждой транзакции.
+            self.__check_cardset_owner(
+                requester_id, cardset_id, include_deleted=True
+            )
+            return self.cardset_repository.delete_cardset_cards(
+                cardset_id=cardset_id,
+                limit=self.delete_batch_size,
+            )
+
+        deleted = self.delete_batch_size
+        while deleted >= self.delete_batch_size:
+            deleted = self.__run_write(requester_id, delete_cards)
+
+        def operation() -> CardsetInfo | None:
+            self.__check_cardset_owner(
+                requester_id, cardset_id, include_deleted=True
+            )
+            return self.cardset_repository.delete_cardset(
+                cardset_id=cardset_id,
+            )
+
+        return self.__run_write(requester_id, operation, deleted=True)
+
+    def delete_card(
+        self,
+        requester_id: str,
+        card_id: str,
+    ) -> Card | None:
+        """
+        Безвозвратно удаляет карточку.
+
+        :param requester_id: ID пользователя, от лица которого выполняется
+            операция.
+        :type requester_id: str
+        :param card_id: ID удаляемой карточки.
+        :type card_id: str
+        :return: Удаленная карточка в случае успешного выполнения, иначе
+            None.
+        :rtype: Card | None
+
+        :raises CardsNotFound: Если карточки не существует.
+        :raises CardsPermissionDenied: Если пользователь не владеет
+            карточкой.
+        """
+
+        validate_id(requester_id, required=True)
+        validate_id(card_id, required=True)
+
+        def operation() -> Card | None:
+            cards = self.cardset_repository.get_cards(
+                card_id=card_id, include_deleted=True
+            )
+            if len(cards) < 1:
+                raise CardsNotFound(
+                    f"Карточки {card_id} не обнаружено."
+                )
+            if cards[0].owner_id != requester_id:
+                raise CardsPermissionDenied(
+                    "Неправомерный доступ к информации о карточках"
+                )
+
+            return self.cardset_repository.delete_card(card_id=card_id)
+
+        return self.__run_write(requester_id, operation, deleted=True)
+
+    def __run_write(
+        self,
+        requester_id: str,
+        operation: Callable[[], T],
+        deleted: bool = False,
+    ) -> T:
+        if self.admission_controller is None:
+            result = self.cardset_repository.run_in_unit_of_work(
+                operation, write=True, requester_id=requester_id
+            )
+        else:
+            with self.admission_controller.admit(requester_id):
+                result = self.cardset_repository.run_in_unit_of_work(
+                    operation, write=True, requester_id=requester_id
+                )
+        self.__publish(result, deleted)
+        return result
+
+    def __publish(self, changed: object, deleted: bool = False) -> None:
+        if self.change_broker is None:
+            return
+        if isinstance(changed, Card):
+            self.change_broker.publish(ChangeNotification(
+                kind="card",
+                id=changed.id,
+                cardset_id=changed.cardset_id,
+                owner_id=changed.owner_id,
+                deleted=deleted,
+            ))
+        elif isinstance(changed, CardsetInfo):
+            self.change_broker.publish(ChangeNotification(
+                kind="cardset",
+                id=changed.id,
+                cardset_id=changed.id,
+                owner_id=changed.owner_id,
+                deleted=deleted,
+            ))
+
+    def __check_cardset_owner(
+        self,
+        requester_id: str,
+        cardset_id: str,
+        include_deleted: bool = False,
+    ) -> None:
+        cardset_infos = self.cardset_repository.get_cardset_infos(
+            cardset_id=cardset_id,
+            include_deleted=include_deleted,
+        )
+        if len(cardset_infos) < 1:
+            raise CardsNotFound(
+                f"Набора карточек {cardset_id} не обнаружено."
+            )
+        if cardset_infos[0].owner_id != requester_id:
+            raise CardsPermissionDenied(
+                "Неправомерный доступ к информации о наборах карточек"
+            )
@@ -0,0 +1,162 @@
+import asyncio
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, List, Optional, Set
+
+
+@dataclass
+class ChangeNotification:
+    kind: str
+    id: str
+    cardset_id: str
+    owner_id: str
+    deleted: bool = False
+
+
+class ChangeSubscription:
+    """
+    Подписка на изменения объектов пользователя. Уведомления копятся в
+    ограниченном буфере; если подписчик не успевает их забирать, подписка
+    помечается переполненной и больше не получает уведомлений.
+
+    Подписка создается в цикле событий и не держит ни задач, ни потоков:
+    ожидающий подписчик стоит только буфера и события asyncio.
+    """
+
+    __slots__ = (
+        "owner_id", "cardset_id", "max_buffer", "overflowed", "closed",
+        "_loop", "_event", "_buffer",
+    )
+
+    def __init__(
+        self,
+        owner_id: str,
+        cardset_id: Optional[str],
+        max_buffer: int,
+    ) -> None:
+        self.owner_id = owner_id
+        self.cardset_id = cardset_id
+        self.max_buffer = max_buffer
+        self.overflowed = False
+        self.closed = False
+        self._loop = asyncio.get_running_loop()
+        self._event = asyncio.Event()
+        self._buffer: Deque[ChangeNotification] = deque()
+
+    def push(self, notification: ChangeNotification) -> None:
+        """
+        Добавляет уведомление в буфер. Может вызываться из любого потока.
+        """
+        if self.cardset_id is not None \
+                and notification.cardset_id != self.cardset_id:
+            return
+        if self.overflowed or self.closed:
+            return
+        if len(self._buffer) >= self.max_buffer:
+            self.overflowed = True
+        else:
+            self._buffer.append(notification)
+        self.__wake()
+
+    def close(self) -> None:
+        self.closed = True
+        self.__wake()
+
+    async def wait(self, timeout: float) -> List[ChangeNotification]:
+        """
+        Ждет уведомлений не дольше timeout секунд и возвращает все
+        накопленные уведомления (пустой список, если их не было).
+        """
+        if not self._buffer and not self.overflowed and not self.closed:
+            try:
+                await asyncio.wait_for(self._event.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        self._event.clear()
+
+        notifications = []
+        while self._buffer:
+            notifications.append(self._buffer.popleft())
+        return notifications
+
+    def __wake(self) -> None:
+        try:
+            self._loop.call_soon_threadsafe(self._event.set)
+        except RuntimeError:
+            # Цикл событий подписчика уже остановлен.
+            self.closed = True
+
+
+class ChangeBroker:
+    """
+    Рассылает уведомления об изменениях наборов карточек и карточек
+    подписчикам текущего процесса. CardsetService публикует уведомления
+    после фиксации транзакции, в которой выполнено изменение.
+
+    :param max_buffer: Размер буфера уведомлений одной подписки.
+    :type max_buffer: int
+    """
+
+    def __init__(self, max_buffer: int = 64) -> None:
+        self.max_buffer = max_buffer
+        self._lock = threading.Lock()
+        self._subscriptions: Dict[str, Set[ChangeSubscription]] = {}
+
+    def subscribe(
+        self,
+        owner_id: str,
+        cardset_id: Optional[str] = None,
+    ) -> ChangeSubscription:
+        """
+        Создает подписку на изменения объектов пользователя. Вызывается
+        из цикла событий, в котором подписка будет ожидать уведомлений.
+
+        :param owner_id: ID пользователя - владельца объектов.
+        :type owner_id: str
+        :param cardset_id: Если передано, подписка получает только
+            изменения этого набора карточек и его карточек.
+        :type cardset_id: str, optional
+        :rtype: ChangeSubscription
+        """
+        subscription = ChangeSubscription(
+            owner_id, cardset_id, self.max_buffer
+        )
+        with self._lock:
+            self._subscriptions.setdefault(owner_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: ChangeSubscription) -> None:
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.owner_id)
+            if subscriptions is None:
+                return
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscriptions[subscription.owner_id]
+
+    def publish(self, notification: ChangeNotification) -> None:
+        with self._lock:
+            subscriptions = list(
+                self._subscriptions.get(notification.owner_id, ())
+            )
+        for subscription in subscriptions:
+            subscription.push(notification)
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return sum(len(subs) for subs in self._subscriptions.values())
+
+    def close(self) -> None:
+        """
+        Завершает все подписки, например при остановке приложения.
+        """
+        with self._lock:
+            subscriptions = [
+                subscription
+                for subs in self._subscriptions.values()
+                for subscription in subs
+            ]
+            self._subscriptions = {}
+        for subscription in subscriptions:
+            subscription.close()
@@ -14,3 +14,29 @@ class CardsInvalidArguments(CardsException):
     Исключение модуля cards связанное с попыткой передачи
     некорректных данных при вызове методов модуля.
     """
+
+
+class CardsNotFound(CardsInvalidArguments):
+    """
+    Исключение модуля cards, означающее, что объект, к которому
+    обращается операция, не существует.
+    """
+
+
+class CardsOverloaded(CardsException):
+    """
+    Исключение модуля cards, означающее, что операция отклонена из-за
+    перегрузки хранилища. Операцию можно повторить через retry_after
+    секунд.
+    """
+
+    def __init__(self, message: str, retry_after: float = 1.0) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CardsRateLimited(CardsOverloaded):
+    """
+    Исключение модуля cards, означающее, что пользователь превысил
+    допустимое количество одновременно ожидающих операций.
+    """
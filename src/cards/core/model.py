@@ -9,6 +9,50 @@ class CardsStatus(str, Enum):
     ABSENT = "absent"
 
 
+class CardsSort(str, Enum):
+    TERM = "term"
+    POSITION = "position"
+    CREATED_AT = "created_at"
+    MODIFIED_AT = "modified_at"
+    ADDRESSED_AT = "addressed_at"
+
+
+class CardsetsSort(str, Enum):
+    TITLE = "title"
+    CREATED_AT = "created_at"
+    MODIFIED_AT = "modified_at"
+    ADDRESSED_AT = "addressed_at"
+
+
+class SortOrder(str, Enum):
+    ASC = "asc"
+    DESC = "desc"
+
+
+class CardField(str, Enum):
+    ID = "id"
+    CARDSET_ID = "cardset_id"
+    TERM = "term"
+    DESCRIPTION = "description"
+    CREATED_AT = "created_at"
+    MODIFIED_AT = "modified_at"
+    ADDRESSED_AT = "addressed_at"
+    STATUS = "status"
+    OWNER_ID = "owner_id"
+    POSITION = "position"
+
+
+class CardsetInfoField(str, Enum):
+    ID = "id"
+    TITLE = "title"
+    DESCRIPTION = "description"
+    CREATED_AT = "created_at"
+    MODIFIED_AT = "modified_at"
+    ADDRESSED_AT = "addressed_at"
+    STATUS = "status"
+    OWNER_ID = "owner_id"
+
+
 @dataclass
 class Card:
     id: str
@@ -20,6 +64,7 @@ class Card:
     addressed_at: datetime
     status: CardsStatus
     owner_id: str
+    position: str = ""
 
 
 @dataclass
@@ -56,3 +101,20 @@ class Cardset(CardsetInfo):
 @dataclass
 class CardsetSpec(CardsetInfoSpec):
     cards: Optional[List[CardSpec]]
+
+
+@dataclass
+class ResourceVersion:
+    version: int
+    modified_at: datetime
+    owner_id: str
+
+
+@dataclass
+class Changes:
+    cardsets: List[CardsetInfo]
+    cards: List[Card]
+    deleted_cardset_ids: List[str]
+    deleted_card_ids: List[str]
+    next_since: int
+    has_more: bool
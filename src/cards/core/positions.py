@@ -0,0 +1,158 @@
+from typing import List, Optional, Tuple
+
+
+# Ключи позиций сравниваются как строки (побайтово), поэтому цифры
+# расположены в порядке кодов ASCII.
+POSITION_DIGITS = (
+    "0123456789"
+    "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+    "abcdefghijklmnopqrstuvwxyz"
+)
+
+# Ключи длиннее этого значения появляются после многократных вставок в
+# одно и то же место набора; такие наборы перенумеровываются.
+MAX_POSITION_LENGTH = 24
+
+_SMALLEST_INTEGER = "A" + POSITION_DIGITS[0] * 26
+
+
+def key_between(before: Optional[str], after: Optional[str]) -> str:
+    """
+    Возвращает ключ позиции, который при строковом сравнении больше
+    before и меньше after. Ключ состоит из целой части переменной длины
+    (первый символ задает ее длину) и дробной части без завершающих
+    нулей, поэтому между любыми двумя ключами есть еще один, а вставка
+    в конец набора увеличивает длину ключа лишь логарифмически.
+
+    :param before: Ключ предыдущей карточки или None для начала набора.
+    :type before: str, optional
+    :param after: Ключ следующей карточки или None для конца набора.
+    :type after: str, optional
+    :rtype: str
+
+    :raises ValueError: Если before не меньше after.
+    """
+    if before is not None and after is not None and before >= after:
+        raise ValueError(f"Ключ {before!r} не меньше {after!r}")
+
+    if before is None and after is None:
+        return "a" + POSITION_DIGITS[0]
+
+    if before is None:
+        assert after is not None
+        integer, fraction = _split(after)
+        if integer == _SMALLEST_INTEGER:
+            return integer + _midpoint("", fraction)
+        if integer < after:
+            return integer
+        decremented = _decrement_integer(integer)
+        if decremented is None:
+            raise ValueError(f"Нельзя вставить ключ перед {after!r}")
+        return decremented
+
+    integer, fraction = _split(before)
+    if after is None:
+        incremented = _increment_integer(integer)
+        if incremented is None:
+            return integer + _midpoint(fraction, None)
+        return incremented
+
+    after_integer, after_fraction = _split(after)
+    if integer == after_integer:
+        return integer + _midpoint(fraction, after_fraction)
+    incremented = _increment_integer(integer)
+    if incremented is not None and incremented < after:
+        return incremented
+    return integer + _midpoint(fraction, None)
+
+
+def spaced_keys(count: int) -> List[str]:
+    """
+    Возвращает count возрастающих коротких ключей, например для
+    перенумерации карточек набора.
+    """
+    keys: List[str] = []
+    key = None
+    for _ in range(count):
+        key = key_between(key, None)
+        keys.append(key)
+    return keys
+
+
+def _integer_length(head: str) -> int:
+    if "a" <= head <= "z":
+        return ord(head) - ord("a") + 2
+    if "A" <= head <= "Z":
+        return ord("Z") - ord(head) + 2
+    raise ValueError(f"Некорректный ключ позиции: {head!r}")
+
+
+def _split(key: str) -> Tuple[str, str]:
+    length = _integer_length(key[0])
+    if len(key) < length:
+        raise ValueError(f"Некорректный ключ позиции: {key!r}")
+    return key[:length], key[length:]
+
+
+def _midpoint(low: str, high: Optional[str]) -> str:
+    """
+    Возвращает дробную часть между low и high (None - единица).
+    """
+    zero = POSITION_DIGITS[0]
+    if high is not None:
+        common = 0
+        while (low[common] if common < len(low) else zero) == high[common]:
+            common += 1
+        if common > 0:
+            return high[:common] + _midpoint(low[common:], high[common:])
+
+    low_digit = POSITION_DIGITS.index(low[0]) if low else 0
+    high_digit = POSITION_DIGITS.index(high[0]) if high is not None \
+        else len(POSITION_DIGITS)
+    if high_digit - low_digit > 1:
+        return POSITION_DIGITS[(low_digit + high_digit + 1) // 2]
+    if high is not None and len(high) > 1:
+        return high[:1]
+    return POSITION_DIGITS[low_digit] + _midpoint(low[1:], None)
+
+
+def _increment_integer(integer: str) -> Optional[str]:
+    head, digits = integer[0], list(integer[1:])
+    for index in reversed(range(len(digits))):
+        digit = POSITION_DIGITS.index(digits[index]) + 1
+        if digit < len(POSITION_DIGITS):
+            digits[index] = POSITION_DIGITS[digit]
+            return head + "".join(digits)
+        digits[index] = POSITION_DIGITS[0]
+
+    if head == "Z":
+        return "a" + POSITION_DIGITS[0]
+    if head == "z":
+        return None
+    head = chr(ord(head) + 1)
+    if head > "a":
+        digits.append(POSITION_DIGITS[0])
+    else:
+        digits.pop()
+    return head + "".join(digits)
+
+
+def _decrement_integer(integer: str) -> Optional[str]:
+    head, digits = integer[0], list(integer[1:])
+    for index in reversed(range(len(digits))):
+        digit = POSITION_DIGITS.index(digits[index]) - 1
+        if digit >= 0:
+            digits[index] = POSITION_DIGITS[digit]
+            return head + "".join(digits)
+        digits[index] = POSITION_DIGITS[-1]
+
+    if head == "a":
+        return "Z" + POSITION_DIGITS[-1]
+    if head == "A":
+        return None
+    head = chr(ord(head) - 1)
+    if head < "Z":
+        digits.append(POSITION_DIGITS[-1])
+    else:
+        digits.pop()
+    return head + "".join(digits)
@@ -0,0 +1,5 @@
+from .cardset_repository import MemoryCardsetRepository
+
+__all__ = [
+    "MemoryCardsetRepository",
+]
@@ -0,0 +1,943 @@
+import os
+import copy
+import json
+import random
+import string
+import bisect
+import dataclasses
+import datetime
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Optional, List, Dict, Tuple, Iterator, TypeVar
+
+from ..core import CardsetRepositoryABC
+from ..core import (
+    Card,
+    Cardset,
+    CardSpec,
+    CardsetInfo,
+    CardsetInfoSpec,
+    CardsStatus,
+    CardsSort,
+    CardsetsSort,
+    SortOrder,
+    CardField,
+    CardsetInfoField,
+    ResourceVersion,
+    Changes,
+)
+from ..core.constants import ID_LENGTH
+from ..core.positions import key_between, spaced_keys
+
+
+T = TypeVar("T", Card, CardsetInfo)
+
+
+class OrderedIndex:
+    """
+    Упорядоченный индекс: отсортированные списки пар (ключ, id) для всех
+    объектов и отдельно для неудаленных. Вставка и удаление выполняются
+    бинарным поиском, выборка страницы - срезом.
+    """
+
+    def __init__(self) -> None:
+        self.all: List[Tuple[str, str]] = []
+        self.live: List[Tuple[str, str]] = []
+
+    def add(self, key: str, id: str, live: bool) -> None:
+        bisect.insort(self.all, (key, id))
+        if live:
+            bisect.insort(self.live, (key, id))
+
+    def remove(self, key: str, id: str, live: bool) -> None:
+        self.__remove(self.all, (key, id))
+        if live:
+            self.__remove(self.live, (key, id))
+
+    def page(
+        self,
+        offset: int,
+        limit: int,
+        include_deleted: bool,
+    ) -> List[str]:
+        entries = self.all if include_deleted else self.live
+        return [id for _, id in entries[offset:offset + limit]]
+
+    def ids(self, include_deleted: bool) -> List[str]:
+        entries = self.all if include_deleted else self.live
+        return [id for _, id in entries]
+
+    @staticmethod
+    def __remove(entries, entry) -> None:
+        position = bisect.bisect_left(entries, entry)
+        if position < len(entries) and entries[position] == entry:
+            del entries[position]
+
+
+class MemoryCardsetRepository(CardsetRepositoryABC):
+    """
+    Реализация репозитория наборов карточек в оперативной памяти.
+
+    Объекты хранятся в хеш-таблицах по id, для пагинации используются
+    упорядоченные индексы по владельцу (название набора) и по набору
+    карточек (термин и позиция). Все операции выполняются под общей
+    блокировкой.
+
+    :param snapshot_path: Путь к файлу снимка. Если файл существует,
+        состояние восстанавливается из него при создании репозитория.
+    :type snapshot_path: str, optional
+    :param snapshot_interval: Период сохранения снимка в секундах. Если
+        не передан, снимок сохраняется только при вызове save_snapshot
+        или close.
+    :type snapshot_interval: float, optional
+    """
+
+    def __init__(
+        self,
+        snapshot_path: Optional[str] = None,
+        snapshot_interval: Optional[float] = None,
+    ) -> None:
+        self.snapshot_path = snapshot_path
+        self.snapshot_interval = snapshot_interval
+
+        self._lock = threading.RLock()
+        self.__reset()
+
+        if snapshot_path is not None and os.path.exists(snapshot_path):
+            self.load_snapshot(snapshot_path)
+
+        self._stop_snapshots = threading.Event()
+        self._snapshot_thread: Optional[threading.Thread] = None
+        self.open()
+
+    def open(self) -> None:
+        """
+        Запускает периодическое сохранение снимка, если оно настроено и
+        еще не выполняется в текущем процессе (поток не переживает fork).
+        """
+        if self.snapshot_path is None or self.snapshot_interval is None:
+            return
+        if self._snapshot_thread is not None \
+                and self._snapshot_thread.is_alive():
+            return
+
+        self._stop_snapshots.clear()
+        self._snapshot_thread = threading.Thread(
+            target=self.__snapshot_loop,
+            name="cards-memory-snapshot",
+            daemon=True,
+        )
+        self._snapshot_thread.start()
+
+    @contextmanager
+    def unit_of_work(
+        self,
+        write: bool = False,
+        requester_id: Optional[str] = None,
+    ) -> Iterator[None]:
+        """
+        Удерживает блокировку хранилища на время блока with, поэтому
+        проверка и следующая за ней запись выполняются атомарно.
+        Изменения, сделанные до исключения, не отменяются.
+        """
+        with self._lock:
+            yield
+
+    def __reset(self) -> None:
+        self._cardsets: Dict[str, CardsetInfo] = {}
+        self._cards: Dict[str, Card] = {}
+        self._cardsets_by_title = OrderedIndex()
+        self._cardsets_by_owner: Dict[str, OrderedIndex] = {}
+        self._cards_by_term = OrderedIndex()
+        self._cards_by_cardset: Dict[str, OrderedIndex] = {}
+        self._cards_by_position = OrderedIndex()
+        self._cards_by_cardset_position: Dict[str, OrderedIndex] = {}
+        self._versions: Dict[Tuple[str, str], ResourceVersion] = {}
+        # Журнал изменений: для каждого пользователя объекты в порядке
+        # последнего изменения с номером этого изменения.
+        self._change_seq = 0
+        self._changes: Dict[str, OrderedDict[Tuple[str, str], int]] = {}
+
+    def get_cardset_infos(
+        self,
+        cardset_id: Optional[str] = None,
+        user_id: Optional[str] = None,
+        offset: Optional[int] = 0,
+        limit: Optional[int] = 10,
+        include_deleted: Optional[bool] = False,
+        fields: Optional[List[CardsetInfoField]] = None,
+        sort: Optional[CardsetsSort] = CardsetsSort.TITLE,
+        order: Optional[SortOrder] = SortOrder.ASC,
+        modified_after: Optional[datetime.datetime] = None,
+        modified_before: Optional[datetime.datetime] = None,
+    ) -> List[CardsetInfo]:
+        """
+            Метод get_cardset_infos возвращает наборы карточек в укороченном
+            (без карточек) виде. Проекция fields не уменьшает объем работы
+            в памяти, поэтому всегда заполняются все атрибуты. Сортировка
+            по времени и фильтры по времени изменения выполняются перебором
+            наборов карточек пользователя.
+        """
+        offset, limit = offset or 0, limit or 0
+
+        with self._lock:
+            if cardset_id:
+                cardset_info = self._cardsets.get(cardset_id)
+                if cardset_info is None:
+                    return []
+                if user_id and cardset_info.owner_id != user_id:
+                    return []
+                if not include_deleted and not self.__is_live(cardset_info):
+                    return []
+                return [copy.copy(cardset_info)][offset:offset + limit]
+
+            index = self._cardsets_by_title
+            if user_id:
+                index = self._cardsets_by_owner.get(user_id, OrderedIndex())
+
+            if sort in (None, CardsetsSort.TITLE) \
+                    and order != SortOrder.DESC \
+                    and modified_after is None and modified_before is None:
+                ids = index.page(offset, limit, bool(include_deleted))
+                return [copy.copy(self._cardsets[id]) for id in ids]
+
+            ids = index.ids(bool(include_deleted))
+            cardset_infos = _select(
+                [self._cardsets[id] for id in ids],
+                (sort or CardsetsSort.TITLE).value,
+                order,
+                modified_after,
+                modified_before,
+            )
+            return [
+                copy.copy(cardset_info)
+                for cardset_info in cardset_infos[offset:offset + limit]
+            ]
+
+    def get_cards(
+        self,
+        card_id: Optional[str] = None,
+        cardset_id: Optional[str] = None,
+        offset: Optional[int] = 0,
+        limit: Optional[int] = 10,
+        include_deleted: Optional[bool] = False,
+        mixed: Optional[bool] = False,
+        sort: Optional[CardsSort] = CardsSort.TERM,
+        fields: Optional[List[CardField]] = None,
+        order: Optional[SortOrder] = SortOrder.ASC,
+        modified_after: Optional[datetime.datetime] = None,
+        modified_before: Optional[datetime.datetime] = None,
+    ) -> List[Card]:
+        """
+            Метод get_cards возвращает выборку карточек. Проекция fields
+            не учитывается, всегда заполняются все атрибуты. Сортировка по
+            времени и фильтры по времени изменения выполняются перебором
+            карточек набора.
+        """
+        offset, limit = offset or 0, limit or 0
+
+        with self._lock:
+            if card_id:
+                card = self._cards.get(card_id)
+                if card is None:
+                    return []
+                if not include_deleted and not self.__is_live(card):
+                    return []
+                return [copy.copy(card)][offset:offset + limit]
+
+            if sort == CardsSort.POSITION:
+                index = self._cards_by_position
+                by_cardset = self._cards_by_cardset_position
+            else:
+                index = self._cards_by_term
+                by_cardset = self._cards_by_cardset
+            if cardset_id:
+                index = by_cardset.get(cardset_id, OrderedIndex())
+
+            if mixed:
+                ids = index.ids(bool(include_deleted))
+                random.shuffle(ids)
+                ids = ids[offset:offset + limit]
+            elif sort in (None, CardsSort.TERM, CardsSort.POSITION) \
+                    and order != SortOrder.DESC \
+                    and modified_after is None and modified_before is None:
+                ids = index.page(offset, limit, bool(include_deleted))
+            else:
+                ids = index.ids(bool(include_deleted))
+                cards = _select(
+                    [self._cards[id] for id in ids],
+                    (sort or CardsSort.TERM).value,
+                    order,
+                    modified_after,
+                    modified_before,
+                )
+                ids = [card.id for card in cards[offset:offset + limit]]
+
+            return [copy.copy(self._cards[id]) for id in ids]
+
+    def get_cardset(
+        self,
+        cardset_id: str,
+        include_deleted: Optional[bool] = False,
+    ) -> Cardset | None:
+        """
+            Метод get_cardset возвращает набор карточек вместе с
+            карточками.
+        """
+        with self._lock:
+            cardset_info = self._cardsets.get(cardset_id)
+            if cardset_info is None:
+                return None
+            if not include_deleted and not self.__is_live(cardset_info):
+                return None
+
+            index = self._cards_by_cardset_position.get(
+                cardset_id, OrderedIndex()
+            )
+            cards = [
+                copy.copy(self._cards[id])
+                for id in index.ids(bool(include_deleted))
+            ]
+            return Cardset(**vars(cardset_info), cards=cards)
+
+    def get_cardset_infos_version(
+        self,
+        cardset_id: Optional[str] = None,
+        user_id: Optional[str] = None,
+    ) -> ResourceVersion | None:
+        with self._lock:
+            if cardset_id:
+                return copy.copy(self._versions.get(("cardset", cardset_id)))
+            if user_id:
+                return copy.copy(self._versions.get(("owner", user_id)))
+            return None
+
+    def get_cards_version(
+        self,
+        card_id: Optional[str] = None,
+        cardset_id: Optional[str] = None,
+    ) -> ResourceVersion | None:
+        with self._lock:
+            if card_id:
+                card = self._cards.get(card_id)
+                if card is None:
+                    return None
+                cardset_id = card.cardset_id
+            if cardset_id:
+                return copy.copy(self._versions.get(("cardset", cardset_id)))
+            return None
+
+    def get_changes(
+        self,
+        owner_id: str,
+        since: int = 0,
+        limit: int = 100,
+    ) -> Changes:
+        """
+            Метод get_changes возвращает изменения пользователя, обходя
+            его журнал изменений с конца до номера since.
+        """
+        with self._lock:
+            entries = []
+            log = self._changes.get(owner_id, OrderedDict())
+            for key, seq in reversed(log.items()):
+                if seq <= since:
+                    break
+                entries.append((seq, key))
+            entries.reverse()
+
+            changes = Changes(
+                cardsets=[],
+                cards=[],
+                deleted_cardset_ids=[],
+                deleted_card_ids=[],
+                next_since=since,
+                has_more=len(entries) > limit,
+            )
+            for seq, (kind, object_id) in entries[:limit]:
+                if kind == "cardset" and object_id in self._cardsets:
+                    changes.cardsets.append(
+                        copy.copy(self._cardsets[object_id])
+                    )
+                elif kind == "cardset":
+                    changes.deleted_cardset_ids.append(object_id)
+                elif object_id in self._cards:
+                    changes.cards.append(copy.copy(self._cards[object_id]))
+                else:
+                    changes.deleted_card_ids.append(object_id)
+                changes.next_since = seq
+            return changes
+
+    def create_cardset_info(
+        self,
+        owner_id: str,
+        spec: CardsetInfoSpec,
+    ) -> CardsetInfo | None:
+        """
+            Метод create_cardset_info создает набор карточек (без карточек)
+            с учетом переданных данных.
+        """
+        now = datetime.datetime.now()
+
+        with self._lock:
+            cardset_info = CardsetInfo(
+                id=self.__generate_unique_id(self._cardsets),
+                title=spec.title if spec.title else "",
+                description=spec.description if spec.description else "",
+                created_at=now,
+                modified_at=now,
+                addressed_at=now,
+                status=CardsStatus(spec.status or CardsStatus.PRESENT),
+                owner_id=owner_id,
+            )
+            self.__insert_cardset(cardset_info)
+            self.__bump_cardset_version(cardset_info)
+            self.__record_change(owner_id, "cardset", cardset_info.id)
+            return copy.copy(cardset_info)
+
+    def modify_cardset_info(
+        self,
+        cardset_id: str,
+        spec: CardsetInfoSpec,
+    ) -> CardsetInfo | None:
+        """
+            Метод modify_cardset изменяет набор карточек
+            (карточки при этом не изменяются).
+        """
+        with self._lock:
+            old_info = self._cardsets.get(cardset_id)
+            if old_info is None:
+                return None
+
+            cardset_info = copy.copy(old_info)
+            if spec.title:
+                cardset_info.title = spec.title
+            if spec.description:
+                cardset_info.description = spec.description
+            if spec.status:
+                cardset_info.status = CardsStatus(spec.status)
+            cardset_info.modified_at = datetime.datetime.now()
+
+            self.__delete_cardset(old_info)
+            self.__insert_cardset(cardset_info)
+            self.__bump_cardset_version(cardset_info)
+            self.__record_change(
+                cardset_info.owner_id, "cardset", cardset_info.id
+            )
+            return copy.copy(cardset_info)
+
+    def create_card(
+        self,
+        cardset_id: str,
+        spec: CardSpec,
+    ) -> Card | None:
+        """
+            Метод create_card создает карточку.
+        """
+        now = datetime.datetime.now()
+
+        with self._lock:
+            cardset_info = self._cardsets.get(cardset_id)
+            if cardset_info is None or not self.__is_live(cardset_info):
+                return None
+
+            card = Card(
+                id=self.__generate_unique_id(self._cards),
+                cardset_id=cardset_id,
+                position=key_between(self.__last_position(cardset_id), None),
+                term=spec.term if spec.term else "",
+                description=spec.description if spec.description else "",
+                created_at=now,
+                modified_at=now,
+                addressed_at=now,
+                status=CardsStatus(spec.status or CardsStatus.PRESENT),
+                owner_id=cardset_info.owner_id,
+            )
+            self.__insert_card(card)
+            self.__bump_card_version(card)
+            self.__record_change(card.owner_id, "card", card.id)
+            return copy.copy(card)
+
+    def modify_card(
+        self,
+        card_id: str,
+        spec: CardSpec,
+    ) -> Card | None:
+        """
+            Метод modify_card изменяет карточку.
+        """
+        with self._lock:
+            old_card = self._cards.get(card_id)
+            if old_card is None:
+                return None
+
+            card = copy.copy(old_card)
+            if spec.term:
+                card.term = spec.term
+            if spec.description:
+                card.description = spec.description
+            if spec.status:
+                card.status = CardsStatus(spec.status)
+            card.modified_at = datetime.datetime.now()
+
+            self.__delete_card(old_card)
+            self.__insert_card(card)
+            self.__bump_card_version(card)
+            self.__record_change(card.owner_id, "card", card.id)
+            return copy.copy(card)
+
+    def move_card(
+        self,
+        card_id: str,
+        before_id: Optional[str] = None,
+        after_id: Optional[str] = None,
+    ) -> Card | None:
+        """
+            Метод move_card перемещает карточку внутри набора.
+        """
+        with self._lock:
+            old_card = self._cards.get(card_id)
+            if old_card is None:
+                return None
+
+            anchor_id = before_id or after_id
+            if anchor_id is None:
+                position = key_between(
+                    self.__last_position(old_card.cardset_id, card_id), None
+                )
+            else:
+                anchor = self._cards.get(anchor_id)
+                if anchor is None or anchor.cardset_id != old_card.cardset_id:
+                    return None
+                if anchor.id == card_id:
+                    return copy.copy(old_card)
+                entries = [
+                    entry for entry in self._cards_by_cardset_position[
+                        old_card.cardset_id
+                    ].all
+                    if entry[1] != card_id
+                ]
+                index = entries.index((anchor.position, anchor.id))
+                if before_id:
+                    before = entries[index - 1][0] if index > 0 else None
+                    position = key_between(before, anchor.position)
+                else:
+                    after = entries[index + 1][0] \
+                        if index + 1 < len(entries) else None
+                    position = key_between(anchor.position, after)
+
+            card = dataclasses.replace(
+                old_card,
+                position=position,
+                modified_at=datetime.datetime.now(),
+            )
+            self.__delete_card(old_card)
+            self.__insert_card(card)
+            self.__bump_card_version(card)
+            self.__record_change(card.owner_id, "card", card.id)
+            return copy.copy(card)
+
+    def rebalance_card_positions(
+        self,
+        cardset_id: str,
+    ) -> int:
+        """
+            Метод rebalance_card_positions назначает карточкам набора
+            короткие ключи позиций в текущем порядке.
+        """
+        with self._lock:
+            index = self._cards_by_cardset_position.get(cardset_id)
+            if index is None:
+                return 0
+            card_ids = [card_id for _, card_id in index.all]
+            for card_id, position in zip(
+                card_ids, spaced_keys(len(card_ids))
+            ):
+                old_card = self._cards[card_id]
+                self.__delete_card(old_card)
+                self.__insert_card(
+                    dataclasses.replace(old_card, position=position)
+                )
+                self.__record_change(old_card.owner_id, "card", card_id)
+            if card_ids:
+                self.__bump_card_version(self._cards[card_ids[0]])
+            return len(card_ids)
+
+    def clone_cardset(
+        self,
+        cardset_id: str,
+    ) -> CardsetInfo | None:
+        """
+            Метод clone_cardset копирует набор карточек вместе с
+            неудаленными карточками.
+        """
+        now = datetime.datetime.now()
+
+        with self._lock:
+            old_info = self._cardsets.get(cardset_id)
+            if old_info is None or not self.__is_live(old_info):
+                return None
+
+            cardset_info = dataclasses.replace(
+                old_info,
+                id=self.__generate_unique_id(self._cardsets),
+                created_at=now,
+                modified_at=now,
+                addressed_at=now,
+            )
+            self.__insert_cardset(cardset_info)
+            self.__bump_cardset_version(cardset_info)
+            self.__record_change(
+                cardset_info.owner_id, "cardset", cardset_info.id
+            )
+
+            old_cards = self._cards_by_cardset.get(cardset_id)
+            card_ids = old_cards.ids(include_deleted=False) \
+                if old_cards is not None else []
+            for card_id in card_ids:
+                card = dataclasses.replace(
+                    self._cards[card_id],
+                    id=self.__generate_unique_id(self._cards),
+                    cardset_id=cardset_info.id,
+                    created_at=now,
+                    modified_at=now,
+                    addressed_at=now,
+                )
+                self.__insert_card(card)
+                self.__record_change(card.owner_id, "card", card.id)
+                self.__bump_card_version(card)
+            return copy.copy(cardset_info)
+
+    def delete_cardset_cards(
+        self,
+        cardset_id: str,
+        limit: int,
+    ) -> int:
+        """
+            Метод delete_cardset_cards удаляет не более limit карточек
+            набора.
+        """
+        with self._lock:
+            cards = self._cards_by_cardset.get(cardset_id)
+            if cards is None:
+                return 0
+            card_ids = cards.ids(include_deleted=True)[:limit]
+            for card_id in card_ids:
+                self.__remove_card(self._cards[card_id])
+            return len(card_ids)
+
+    def delete_cardset(
+        self,
+        cardset_id: str,
+    ) -> CardsetInfo | None:
+        """
+            Метод delete_cardset удаляет набор карточек вместе с
+            оставшимися в нем карточками.
+        """
+        with self._lock:
+            cardset_info = self._cardsets.get(cardset_id)
+            if cardset_info is None:
+                return None
+            cards = self._cards_by_cardset.pop(cardset_id, None)
+            self._cards_by_cardset_position.pop(cardset_id, None)
+            if cards is not None:
+                for card_id in cards.ids(include_deleted=True):
+                    card = self._cards.pop(card_id)
+                    live = self.__is_live(card)
+                    self._cards_by_term.remove(card.term, card.id, live)
+                    self._cards_by_position.remove(
+                        card.position, card.id, live
+                    )
+                    self.__record_change(card.owner_id, "card", card.id)
+            self.__delete_cardset(cardset_info)
+            self.__bump_cardset_version(cardset_info)
+            self.__record_change(
+                cardset_info.owner_id, "cardset", cardset_info.id
+            )
+            return copy.copy(cardset_info)
+
+    def delete_card(
+        self,
+        card_id: str,
+    ) -> Card | None:
+        """
+            Метод delete_card удаляет карточку.
+        """
+        with self._lock:
+            card = self._cards.get(card_id)
+            if card is None:
+                return None
+            self.__remove_card(card)
+            return copy.copy(card)
+
+    def save_snapshot(self, path: Optional[str] = None) -> None:
+        """
+        Сохраняет состояние репозитория в JSON файл. Файл заменяется
+        атомарно, поэтому при сбое во время записи остается предыдущий
+        снимок.
+        """
+        path = path or self.snapshot_path
+        if path is None:
+            raise ValueError("Не указан путь к файлу снимка.")
+
+        with self._lock:
+            cardsets = [vars(info).copy() for info in self._cardsets.values()]
+            cards = [vars(card).copy() for card in self._cards.values()]
+            versions = [
+                [scope, scope_id, vars(version).copy()]
+                for (scope, scope_id), version in self._versions.items()
+            ]
+            changes = [
+                [owner_id, kind, object_id, seq]
+                for owner_id, log in self._changes.items()
+                for (kind, object_id), seq in log.items()
+            ]
+            change_seq = self._change_seq
+
+        snapshot = {
+            "cardsets": cardsets,
+            "cards": cards,
+            "versions": versions,
+            "changes": changes,
+            "change_seq": change_seq,
+        }
+        temporary_path = f"{path}.tmp"
+        with open(temporary_path, "w", encoding="utf-8") as snapshot_file:
+            json.dump(snapshot, snapshot_file, default=_encode_value)
+        os.replace(temporary_path, path)
+
+    def load_snapshot(self, path: Optional[str] = None) -> None:
+        """
+        Заменяет состояние репозитория состоянием из JSON файла.
+        """
+        path = path or self.snapshot_path
+        if path is None:
+            raise ValueError("Не указан путь к файлу снимка.")
+
+        with open(path, encoding="utf-8") as snapshot_file:
+            snapshot = json.load(snapshot_file)
+
+        with self._lock:
+            self.__reset()
+            for fields in snapshot["cardsets"]:
+                self.__insert_cardset(CardsetInfo(**_decode_fields(fields)))
+            cards = [
+                Card(**_decode_fields(fields)) for fields in snapshot["cards"]
+            ]
+            _fill_missing_positions(cards)
+            for card in cards:
+                self.__insert_card(card)
+            for scope, scope_id, fields in snapshot["versions"]:
+                self._versions[(scope, scope_id)] = ResourceVersion(
+                    **_decode_fields(fields)
+                )
+            if "changes" in snapshot:
+                for owner_id, kind, object_id, seq in sorted(
+                    snapshot["changes"], key=lambda change: change[3]
+                ):
+                    self._changes.setdefault(owner_id, OrderedDict())[
+                        (kind, object_id)
+                    ] = seq
+                self._change_seq = snapshot["change_seq"]
+            else:
+                self.__rebuild_changes()
+
+    def close(self) -> None:
+        """
+        Останавливает периодическое сохранение и сохраняет итоговый
+        снимок, если указан snapshot_path.
+        """
+        self._stop_snapshots.set()
+        if self._snapshot_thread is not None:
+            self._snapshot_thread.join()
+            self._snapshot_thread = None
+        if self.snapshot_path is not None:
+            self.save_snapshot()
+
+    def __snapshot_loop(self) -> None:
+        while not self._stop_snapshots.wait(self.snapshot_interval):
+            self.save_snapshot()
+
+    def __insert_cardset(self, cardset_info: CardsetInfo) -> None:
+        live = self.__is_live(cardset_info)
+        self._cardsets[cardset_info.id] = cardset_info
+        self._cardsets_by_title.add(cardset_info.title, cardset_info.id, live)
+        self._cardsets_by_owner.setdefault(
+            cardset_info.owner_id, OrderedIndex()
+        ).add(cardset_info.title, cardset_info.id, live)
+
+    def __delete_cardset(self, cardset_info: CardsetInfo) -> None:
+        live = self.__is_live(cardset_info)
+        del self._cardsets[cardset_info.id]
+        self._cardsets_by_title.remove(
+            cardset_info.title, cardset_info.id, live
+        )
+        self._cardsets_by_owner[cardset_info.owner_id].remove(
+            cardset_info.title, cardset_info.id, live
+        )
+
+    def __insert_card(self, card: Card) -> None:
+        live = self.__is_live(card)
+        self._cards[card.id] = card
+        self._cards_by_term.add(card.term, card.id, live)
+        self._cards_by_cardset.setdefault(
+            card.cardset_id, OrderedIndex()
+        ).add(card.term, card.id, live)
+        self._cards_by_position.add(card.position, card.id, live)
+        self._cards_by_cardset_position.setdefault(
+            card.cardset_id, OrderedIndex()
+        ).add(card.position, card.id, live)
+
+    def __delete_card(self, card: Card) -> None:
+        live = self.__is_live(card)
+        del self._cards[card.id]
+        self._cards_by_term.remove(card.term, card.id, live)
+        self._cards_by_cardset[card.cardset_id].remove(
+            card.term, card.id, live
+        )
+        self._cards_by_position.remove(card.position, card.id, live)
+        self._cards_by_cardset_position[card.cardset_id].remove(
+            card.position, card.id, live
+        )
+
+    def __last_position(
+        self,
+        cardset_id: str,
+        exclude_id: Optional[str] = None,
+    ) -> Optional[str]:
+        index = self._cards_by_cardset_position.get(cardset_id)
+        if index is None:
+            return None
+        for position, card_id in reversed(index.all):
+            if card_id != exclude_id:
+                return position
+        return None
+
+    def __remove_card(self, card: Card) -> None:
+        self.__delete_card(card)
+        self.__bump_card_version(card)
+        self.__record_change(card.owner_id, "card", card.id)
+
+    def __record_change(
+        self,
+        owner_id: str,
+        kind: str,
+        object_id: str,
+    ) -> None:
+        self._change_seq += 1
+        log = self._changes.setdefault(owner_id, OrderedDict())
+        log.pop((kind, object_id), None)
+        log[(kind, object_id)] = self._change_seq
+
+    def __rebuild_changes(self) -> None:
+        objects: List[Tuple[datetime.datetime, str, CardsetInfo | Card]] = [
+            (cardset_info.modified_at, "cardset", cardset_info)
+            for cardset_info in self._cardsets.values()
+        ]
+        objects.extend(
+            (card.modified_at, "card", card) for card in self._cards.values()
+        )
+        objects.sort(key=lambda entry: (entry[0], entry[1] == "card"))
+        for _, kind, obj in objects:
+            self.__record_change(obj.owner_id, kind, obj.id)
+
+    def __bump_cardset_version(self, cardset_info: CardsetInfo) -> None:
+        self.__bump_version(
+            ("cardset", cardset_info.id), cardset_info.owner_id
+        )
+        self.__bump_version(
+            ("owner", cardset_info.owner_id), cardset_info.owner_id
+        )
+
+    def __bump_card_version(self, card: Card) -> None:
+        self.__bump_version(("cardset", card.cardset_id), card.owner_id)
+
+    def __bump_version(self, key: Tuple[str, str], owner_id: str) -> None:
+        modified_at = datetime.datetime.now(datetime.timezone.utc)
+        version = self._versions.get(key)
+        self._versions[key] = ResourceVersion(
+            version=version.version + 1 if version else 1,
+            modified_at=modified_at,
+            owner_id=owner_id,
+        )
+
+    @staticmethod
+    def __is_live(obj: CardsetInfo | Card) -> bool:
+        return obj.status == CardsStatus.PRESENT
+
+    @staticmethod
+    def __generate_unique_id(existing: Dict) -> str:
+        while True:
+            new_id = ''.join(random.choices(
+                string.ascii_letters + string.digits, k=ID_LENGTH
+            ))
+            if new_id not in existing:
+                return new_id
+
+
+def _fill_missing_positions(cards: List[Card]) -> None:
+    """
+    Назначает ключи позиций карточкам из снимков, сохраненных до появления
+    пользовательского порядка: порядок совпадает с порядком по термину.
+    """
+    by_cardset: Dict[str, List[Card]] = {}
+    for card in cards:
+        by_cardset.setdefault(card.cardset_id, []).append(card)
+    for cardset_cards in by_cardset.values():
+        if all(card.position for card in cardset_cards):
+            continue
+        cardset_cards.sort(key=lambda card: (card.term, card.id))
+        for card, position in zip(
+            cardset_cards, spaced_keys(len(cardset_cards))
+        ):
+            card.position = position
+
+
+def _select(
+    objects: List[T],
+    attribute: str,
+    order: Optional[SortOrder],
+    modified_after: Optional[datetime.datetime],
+    modified_before: Optional[datetime.datetime],
+) -> List[T]:
+    """
+    Фильтрует объекты по времени изменения и сортирует по атрибуту так
+    же, как репозиторий SQLite: None меньше любого значения, объекты с
+    одинаковым временем упорядочиваются по id.
+    """
+    selected = list(objects)
+    if modified_after is not None:
+        selected = [
+            obj for obj in selected if obj.modified_at > modified_after
+        ]
+    if modified_before is not None:
+        selected = [
+            obj for obj in selected if obj.modified_at < modified_before
+        ]
+    time_sort = attribute in ("created_at", "modified_at", "addressed_at")
+
+    def key(obj):
+        value = getattr(obj, attribute)
+        if time_sort:
+            return value is not None, value, obj.id
+        return value is not None, value
+
+    selected.sort(key=key, reverse=order == SortOrder.DESC)
+    return selected
+
+
+def _encode_value(value):
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    raise TypeError(f"Unsupported snapshot value: {value!r}")
+
+
+def _decode_fields(fields: Dict) -> Dict:
+    decoded = dict(fields)
+    for name in ("created_at", "modified_at", "addressed_at"):
+        if decoded.get(name) is not None:
+            decoded[name] = datetime.datetime.fromisoformat(decoded[name])
+    if "status" in decoded:
+        decoded["status"] = CardsStatus(decoded["status"])
+    return decoded
@@ -1,7 +1,22 @@
 from .cardset_repository import CardsetRepository
+from .sharded_cardset_repository import ShardedCardsetRepository
 from .db_handler import SqliteDbHandler
+from .snapshots import SnapshotRefresher, SnapshotReader
+from .maintenance import (
+    SqliteMaintainer,
+    MaintenanceScheduler,
+    MaintenanceResult,
+    CheckpointResult,
+)
 
 __all__ = [
     "CardsetRepository",
-    "SqliteDbHandler"
+    "ShardedCardsetRepository",
+    "SqliteDbHandler",
+    "SnapshotRefresher",
+    "SnapshotReader",
+    "SqliteMaintainer",
+    "MaintenanceScheduler",
+    "MaintenanceResult",
+    "CheckpointResult",
 ]
@@ -1,40 +1,238 @@
 import sqlite3
 import datetime
-from typing import Optional, List
+import threading
+from contextlib import contextmanager
+from typing import (
+    Optional, List, Iterator, Callable, TypeVar, Sequence,
+)
 from ..core import CardsetRepositoryABC
 from ..core import (
     Card,
+    Cardset,
     CardSpec,
     CardsetInfo,
-    CardsetInfoSpec
+    CardsetInfoSpec,
+    CardsSort,
+    CardsetsSort,
+    SortOrder,
+    CardField,
+    CardsetInfoField,
+    ResourceVersion,
+    Changes,
+)
+from ..core.positions import key_between, spaced_keys
+from .utils import (
+    generate_unique_id,
+    random_id_expression,
+    ID_ALPHABET,
+    STATUS_PRESENT,
 )
-from .utils import generate_unique_id
+from .connection_pool import SqliteConnectionPool
+from .group_commit import GroupCommitWriter
+from .snapshots import SnapshotReader
 from .mappers import (
     CardMapper,
+    CardsetMapper,
     CardsetInfoMapper,
-    CardsStatusMapper
+    CardsStatusMapper,
+    ResourceVersionMapper,
+    TimestampMapper,
 )
 
 
+T = TypeVar("T")
+
+CARD_COLUMNS = """
+    id, term, description, created_at, modified_at,
+    addressed_at, status, owner_id, cardset_id, position
+"""
+
+
+def selected_columns(fields: Sequence[str]) -> List[str]:
+    """
+    Возвращает столбцы для выборки с проекцией fields (имена атрибутов
+    совпадают с именами столбцов). Столбец owner_id выбирается всегда:
+    по нему сервис проверяет права доступа.
+    """
+    return list(dict.fromkeys([*fields, CardField.OWNER_ID.value]))
+
+
+# Столбцы времени, значения которых могут совпадать у разных объектов.
+TIME_COLUMNS = ("created_at", "modified_at", "addressed_at")
+
+
+def order_clause(column: str, order: Optional[SortOrder]) -> str:
+    """
+    Формирует ORDER BY по столбцу column. При сортировке по времени
+    порядок уточняется по id: строки индекса (..., column) таблицы
+    WITHOUT ROWID уже упорядочены по id внутри одного значения, поэтому
+    временная сортировка не нужна.
+    """
+    direction = "DESC" if order == SortOrder.DESC else "ASC"
+    if column in TIME_COLUMNS:
+        return f"ORDER BY {column} {direction}, id {direction}"
+    return f"ORDER BY {column} {direction}"
+
+
 class CardsetRepository(CardsetRepositoryABC):
-    def __init__(self, db_path: str):
+    """
+    Репозиторий наборов карточек в базе данных SQLite.
+
+    :param db_path: Путь к файлу базы данных.
+    :type db_path: str
+    :param pool_size: Размер пула соединений.
+    :type pool_size: int
+    :param group_commit: Выполнять операции записи, переданные в
+        run_in_unit_of_work, в потоке-писателе с групповой фиксацией
+        (см. GroupCommitWriter).
+    :type group_commit: bool
+    :param snapshot_path: Путь к снимку базы данных (см.
+        SnapshotRefresher). Если передан, чтение выполняется из снимка,
+        пока он не старше max_staleness. Пользователь, чьи объекты
+        изменились после создания снимка, читает из основной базы
+        данных, даже если запись выполнил другой рабочий процесс.
+    :type snapshot_path: str, optional
+    :param max_staleness: Максимальный возраст снимка в секундах.
+    :type max_staleness: float
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        pool_size: int = 4,
+        group_commit: bool = False,
+        snapshot_path: Optional[str] = None,
+        max_staleness: float = 5.0,
+    ):
         self.db_path = db_path
+        self.pool = SqliteConnectionPool(db_path, size=pool_size)
+        self.writer = GroupCommitWriter(db_path) if group_commit else None
+        self.snapshot = None
+        if snapshot_path is not None:
+            self.snapshot = SnapshotReader(
+                snapshot_path, max_staleness, pool_size
+            )
+        self._local = threading.local()
+
+    def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+        if self.snapshot is not None:
+            self.snapshot.close()
+        self.pool.close()
+
+    def run_in_unit_of_work(
+        self,
+        operation: Callable[[], T],
+        write: bool = False,
+        requester_id: Optional[str] = None,
+    ) -> T:
+        if not write or self.writer is None \
+                or getattr(self._local, "connection", None) is not None:
+            return super().run_in_unit_of_work(
+                operation, write=write, requester_id=requester_id
+            )
+        return self.writer.run(
+            lambda connection: self.__run_on(connection, operation)
+        )
+
+    def __run_on(self, connection, operation: Callable[[], T]) -> T:
+        self._local.connection = connection
+        try:
+            return operation()
+        finally:
+            self._local.connection = None
+
+    @contextmanager
+    def unit_of_work(
+        self,
+        write: bool = False,
+        requester_id: Optional[str] = None,
+    ) -> Iterator[None]:
+        """
+        Выполняет запросы блока with на одном соединении из пула в одной
+        транзакции. Для записи транзакция начинается с BEGIN IMMEDIATE,
+        поэтому блокировка записи захватывается до первой проверки.
+        Чтение может выполняться из снимка (см. snapshot_path).
+        """
+        if getattr(self._local, "connection", None) is not None:
+            yield
+            return
+
+        pool = self.pool if write else self.__read_pool(requester_id)
+        with pool.connection() as connection:
+            connection.execute("BEGIN IMMEDIATE" if write else "BEGIN")
+            self._local.connection = connection
+            try:
+                yield
+            except BaseException:
+                connection.rollback()
+                raise
+            else:
+                connection.commit()
+            finally:
+                self._local.connection = None
+
+    def __read_pool(
+        self,
+        requester_id: Optional[str] = None,
+    ) -> SqliteConnectionPool:
+        if self.snapshot is None:
+            return self.pool
+        snapshot_pool = self.snapshot.pool()
+        if snapshot_pool is None:
+            return self.pool
+        # Любая запись объекта пользователя добавляет в журнал Change
+        # строку с новым seq. Если последние seq пользователя в снимке и
+        # в основной базе данных различаются, снимок не содержит его
+        # записи, в том числе выполненные другим рабочим процессом.
+        if requester_id is not None and self.__last_change_seq(
+            snapshot_pool, requester_id
+        ) != self.__last_change_seq(self.pool, requester_id):
+            return self.pool
+        return snapshot_pool
+
+    @staticmethod
+    def __last_change_seq(
+        pool: SqliteConnectionPool,
+        owner_id: str,
+    ) -> Optional[int]:
+        with pool.connection() as connection:
+            return connection.execute(
+                "SELECT max(seq) FROM Change WHERE owner_id = ?",
+                [owner_id],
+            ).fetchone()[0]
+
+    @contextmanager
+    def _connection(self) -> Iterator[sqlite3.Connection]:
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            yield connection
+            return
+
+        with self.__read_pool().connection() as connection:
+            yield connection
 
     def __execute_select_query(self, query, params=[]):
-        connection = sqlite3.connect(self.db_path)
-        cursor = connection.cursor()
-        print(query, params)
-        cursor.execute(query, params)
-        rows = cursor.fetchall()
-        connection.close()
-        return rows
+        with self._connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute(query, params)
+            return cursor.fetchall()
 
     def __execute_insert_query(self, query, params=[]):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute(query, params)
-        conn.commit()
-        conn.close()
+        with self.unit_of_work(write=True), \
+                self._connection() as connection:
+            connection.execute(query, params)
+
+    def _cardset_id_prefix(self, owner_id: str) -> str:
+        return ""
+
+    def _card_id_prefix(self, cardset_id: str) -> str:
+        return ""
+
+    def __generate_id(self, table_name: str, prefix: str) -> str:
+        with self._connection() as connection:
+            return generate_unique_id(connection, table_name, "id", prefix)
 
     def get_cardset_infos(
         self,
@@ -43,10 +241,17 @@ class CardsetRepository(CardsetRepositoryABC):
         offset: Optional[int] = 0,
         limit: Optional[int] = 10,
         include_deleted: Optional[bool] = False,
+        fields: Optional[List[CardsetInfoField]] = None,
+        sort: Optional[CardsetsSort] = CardsetsSort.TITLE,
+        order: Optional[SortOrder] = SortOrder.ASC,
+        modified_after: Optional[datetime.datetime] = None,
+        modified_before: Optional[datetime.datetime] = None,
     ) -> List[CardsetInfo]:
         """
             Метод get_cardset_infos возвращает наборы карточек в укороченном
-            (без карточек) виде.
+            (без карточек) виде. С проекцией fields читаются только
+            нужные столбцы, что позволяет обойтись индексом
+            (owner_id, title) без обращения к таблице.
         """
         params = []
 
@@ -58,21 +263,36 @@ class CardsetRepository(CardsetRepositoryABC):
             where_causes += " AND owner_id = ?"
             params.append(user_id)
         if not include_deleted:
-            where_causes += " AND status != ?"
-            params.append('absent')
+            where_causes += f" AND status = {STATUS_PRESENT}"
+        if modified_after is not None:
+            where_causes += " AND modified_at > ?"
+            params.append(TimestampMapper.reverse_map(modified_after))
+        if modified_before is not None:
+            where_causes += " AND modified_at < ?"
+            params.append(TimestampMapper.reverse_map(modified_before))
+
+        columns = """
+            id, title, description, created_at, modified_at,
+            addressed_at, status, owner_id
+        """
+        if fields is not None:
+            selected = selected_columns([field.value for field in fields])
+            columns = ", ".join(selected)
 
         query = f"""
-            SELECT
-                id, title, description, created_at, modified_at,
-                addressed_at, status, owner_id
+            SELECT {columns}
             FROM Cardset
             WHERE 1=1 {where_causes}
-            ORDER BY title ASC
+            {order_clause((sort or CardsetsSort.TITLE).value, order)}
             LIMIT ? OFFSET ?
         """
         params.extend([str(limit), str(offset)])
 
         rows = self.__execute_select_query(query, params)
+        if fields is not None:
+            return [
+                CardsetInfoMapper.map_columns(row, selected) for row in rows
+            ]
         return [CardsetInfoMapper.map(row) for row in rows]
 
     def get_cards(
@@ -83,11 +303,24 @@ class CardsetRepository(CardsetRepositoryABC):
         limit: Optional[int] = 10,
         include_deleted: Optional[bool] = False,
         mixed: Optional[bool] = False,
+        sort: Optional[CardsSort] = CardsSort.TERM,
+        fields: Optional[List[CardField]] = None,
+        order: Optional[SortOrder] = SortOrder.ASC,
+        modified_after: Optional[datetime.datetime] = None,
+        modified_before: Optional[datetime.datetime] = None,
     ) -> List[Card]:
         """
-            Метод get_cards возвращает выборку карточек.
+            Метод get_cards возвращает выборку карточек. С проекцией
+            fields читаются только нужные столбцы: выборка id и ключа
+            сортировки по набору карточек обходится индексом без
+            обращения к таблице.
         """
-        query_parts = ["SELECT * FROM Card WHERE 1=1"]
+        columns = CARD_COLUMNS
+        if fields is not None:
+            selected = selected_columns([field.value for field in fields])
+            columns = ", ".join(selected)
+
+        query_parts = [f"SELECT {columns} FROM Card WHERE 1=1"]
         params = []
 
         if card_id:
@@ -97,19 +330,170 @@ class CardsetRepository(CardsetRepositoryABC):
             query_parts.append("AND cardset_id = ?")
             params.append(cardset_id)
         if not include_deleted:
-            query_parts.append("AND status != ?")
-            params.append("absent")
+            query_parts.append(f"AND status = {STATUS_PRESENT}")
+        if modified_after is not None:
+            query_parts.append("AND modified_at > ?")
+            params.append(TimestampMapper.reverse_map(modified_after))
+        if modified_before is not None:
+            query_parts.append("AND modified_at < ?")
+            params.append(TimestampMapper.reverse_map(modified_before))
 
-        order_clause = " ORDER BY term ASC"
-        if not mixed:
-            order_clause = " ORDER BY RANDOM()"
+        if mixed:
+            query_parts.append("ORDER BY RANDOM()")
+        else:
+            query_parts.append(
+                order_clause((sort or CardsSort.TERM).value, order)
+            )
 
-        query_parts.append(f"{order_clause} LIMIT ? OFFSET ?")
+        query_parts.append("LIMIT ? OFFSET ?")
         params.extend([str(limit), str(offset)])
         query = ' '.join(query_parts)
         rows = self.__execute_select_query(query, params)
+        if fields is not None:
+            return [CardMapper.map_columns(row, selected) for row in rows]
         return [CardMapper.map(row) for row in rows]
 
+    def get_cardset(
+        self,
+        cardset_id: str,
+        include_deleted: Optional[bool] = False,
+    ) -> Cardset | None:
+        """
+            Метод get_cardset возвращает набор карточек вместе с
+            карточками. Оба запроса выполняются в рамках одного соединения
+            и одной читающей транзакции.
+        """
+        status_clause = ""
+        if not include_deleted:
+            status_clause = f"AND status = {STATUS_PRESENT}"
+
+        with self.unit_of_work(), self._connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute(
+                f"""
+                SELECT
+                    id, title, description, created_at, modified_at,
+                    addressed_at, status, owner_id
+                FROM Cardset
+                WHERE id = ? {status_clause}
+                """,
+                [cardset_id],
+            )
+            row = cursor.fetchone()
+            if row is None:
+                return None
+
+            cursor.execute(
+                f"""
+                SELECT {CARD_COLUMNS}
+                FROM Card
+                WHERE cardset_id = ? {status_clause}
+                ORDER BY position, id
+                """,
+                [cardset_id],
+            )
+            cards = [CardMapper.map(card_row) for card_row in cursor]
+            return CardsetMapper.map(row, cards)
+
+    def get_cardset_infos_version(
+        self,
+        cardset_id: Optional[str] = None,
+        user_id: Optional[str] = None,
+    ) -> ResourceVersion | None:
+        """
+            Метод get_cardset_infos_version возвращает версию выборки
+            наборов карточек по таблице ResourceVersion.
+        """
+        if cardset_id:
+            return self.__get_version("cardset", cardset_id)
+        if user_id:
+            return self.__get_version("owner", user_id)
+        return None
+
+    def get_cards_version(
+        self,
+        card_id: Optional[str] = None,
+        cardset_id: Optional[str] = None,
+    ) -> ResourceVersion | None:
+        """
+            Метод get_cards_version возвращает версию набора карточек,
+            к которому относится выборка карточек.
+        """
+        if card_id:
+            query = """
+                SELECT v.version, v.modified_at, v.owner_id
+                FROM Card c
+                JOIN ResourceVersion v
+                    ON v.scope = 'cardset' AND v.scope_id = c.cardset_id
+                WHERE c.id = ?
+            """
+            rows = self.__execute_select_query(query, [card_id])
+            return ResourceVersionMapper.map(rows[0]) if rows else None
+        if cardset_id:
+            return self.__get_version("cardset", cardset_id)
+        return None
+
+    def __get_version(self, scope, scope_id):
+        query = """
+            SELECT version, modified_at, owner_id
+            FROM ResourceVersion
+            WHERE scope = ? AND scope_id = ?
+        """
+        rows = self.__execute_select_query(query, [scope, scope_id])
+        return ResourceVersionMapper.map(rows[0]) if rows else None
+
+    def get_changes(
+        self,
+        owner_id: str,
+        since: int = 0,
+        limit: int = 100,
+    ) -> Changes:
+        """
+            Метод get_changes возвращает страницу журнала изменений Change
+            вместе с актуальным состоянием измененных объектов.
+        """
+        query = """
+            SELECT
+                ch.seq, ch.kind, ch.object_id,
+                cs.id, cs.title, cs.description, cs.created_at,
+                cs.modified_at, cs.addressed_at, cs.status, cs.owner_id,
+                c.id, c.term, c.description, c.created_at, c.modified_at,
+                c.addressed_at, c.status, c.owner_id, c.cardset_id,
+                c.position
+            FROM Change ch
+            LEFT JOIN Cardset cs
+                ON ch.kind = 'cardset' AND cs.id = ch.object_id
+            LEFT JOIN Card c
+                ON ch.kind = 'card' AND c.id = ch.object_id
+            WHERE ch.owner_id = ? AND ch.seq > ?
+            ORDER BY ch.seq
+            LIMIT ?
+        """
+        rows = self.__execute_select_query(
+            query, [owner_id, since, limit + 1]
+        )
+
+        changes = Changes(
+            cardsets=[],
+            cards=[],
+            deleted_cardset_ids=[],
+            deleted_card_ids=[],
+            next_since=since,
+            has_more=len(rows) > limit,
+        )
+        for row in rows[:limit]:
+            seq, kind, object_id = row[:3]
+            if kind == "cardset" and row[3] is not None:
+                changes.cardsets.append(CardsetInfoMapper.map(row[3:11]))
+            elif kind == "cardset":
+                changes.deleted_cardset_ids.append(object_id)
+            elif row[11] is not None:
+                changes.cards.append(CardMapper.map(row[11:]))
+            else:
+                changes.deleted_card_ids.append(object_id)
+            changes.next_since = seq
+        return changes
+
     def create_cardset_info(
         self,
         owner_id: str,
@@ -119,44 +503,48 @@ class CardsetRepository(CardsetRepositoryABC):
             Метод create_cardset_info создает набор карточек (без карточек)
             с учетом переданных данных.
         """
-        id = generate_unique_id(self.db_path, "Cardset", "id")
-        inserted_datetime = datetime.datetime.now()
-        title = spec.title if spec.title else ""
-        description = spec.description if spec.description else ""
-        status = "active"
-        if spec.status:
-            status = CardsStatusMapper.reverse_map(spec.status)
+        with self.unit_of_work(write=True):
+            id = self.__generate_id(
+                "Cardset", self._cardset_id_prefix(owner_id)
+            )
+            timestamp = TimestampMapper.reverse_map(datetime.datetime.now())
+            inserted_datetime = TimestampMapper.map(timestamp)
+            title = spec.title if spec.title else ""
+            description = spec.description if spec.description else ""
+            status = STATUS_PRESENT
+            if spec.status:
+                status = CardsStatusMapper.reverse_map(spec.status)
 
-        query = """
-            INSERT INTO Cardset (
-                id, title, description, created_at, modified_at,
-                addressed_at, status, owner_id
-            ) VALUES (
-                ?, ?, ?, ?, ?, ?, ?, ?
+            query = """
+                INSERT INTO Cardset (
+                    id, title, description, created_at, modified_at,
+                    addressed_at, status, owner_id
+                ) VALUES (
+                    ?, ?, ?, ?, ?, ?, ?, ?
+                )
+            """
+            parameters = (
+                id,
+                title,
+                description,
+                timestamp,
+                timestamp,
+                timestamp,
+                status,
+                owner_id
+            )
+            self.__execute_insert_query(query, parameters)
+
+            return CardsetInfo(
+                id=id,
+                title=title,
+                description=description,
+                created_at=inserted_datetime,
+                modified_at=inserted_datetime,
+                addressed_at=inserted_datetime,
+                status=CardsStatusMapper.map(status),
+                owner_id=owner_id
             )
-        """
-        parameters = (
-            id,
-            title,
-            description,
-            inserted_datetime.strftime("%Y-%m-%d %H:%M:%S"),
-            inserted_datetime.strftime("%Y-%m-%d %H:%M:%S"),
-            inserted_datetime.strftime("%Y-%m-%d %H:%M:%S"),
-            status,
-            owner_id
-        )
-        self.__execute_insert_query(query, parameters)
-
-        return CardsetInfo(
-            id=id,
-            title=title,
-            description=description,
-            created_at=inserted_datetime,
-            modified_at=inserted_datetime,
-            addressed_at=inserted_datetime,
-            status=CardsStatusMapper.map(status),
-            owner_id=owner_id
-        )
 
     def modify_cardset_info(
         self,
@@ -167,30 +555,39 @@ class CardsetRepository(CardsetRepositoryABC):
             Метод modify_cardset изменяет набор карточек
             (карточки при этом не изменяются).
         """
-        updated_datetime = datetime.datetime.now()
+        with self.unit_of_work(write=True):
+            updated_at = TimestampMapper.reverse_map(datetime.datetime.now())
 
-        old_infos = self.get_cardset_infos(cardset_id, include_deleted=True)
-        if old_infos == []:
-            return None
-        old_info = old_infos[0]
+            old_infos = self.get_cardset_infos(
+                cardset_id, include_deleted=True
+            )
+            if old_infos == []:
+                return None
+            old_info = old_infos[0]
 
-        title = spec.title if spec.title else old_info.title
-        description = old_info.description
-        if spec.description:
-            description = spec.description
-        status = spec.status if spec.status else old_info.status
+            title = spec.title if spec.title else old_info.title
+            description = old_info.description
+            if spec.description:
+                description = spec.description
+            status = spec.status if spec.status else old_info.status
 
-        query = """
-            UPDATE Cardset SET
-                title=?,
-                description=?,
-                status=?,
-                modified_at=?
-            WHERE id=?
-        """
-        params = [title, description, status, updated_datetime, cardset_id]
-        self.__execute_insert_query(query, params)
-        return self.get_cardset_infos(cardset_id, include_deleted=True)[0]
+            query = """
+                UPDATE Cardset SET
+                    title=?,
+                    description=?,
+                    status=?,
+                    modified_at=?
+                WHERE id=?
+            """
+            params = [
+                title,
+                description,
+                CardsStatusMapper.reverse_map(status),
+                updated_at,
+                cardset_id,
+            ]
+            self.__execute_insert_query(query, params)
+            return self.get_cardset_infos(cardset_id, include_deleted=True)[0]
 
     def create_card(
         self,
@@ -200,49 +597,50 @@ class CardsetRepository(CardsetRepositoryABC):
         """
             Метод create_card создает карточку.
         """
-        cardset = self.get_cardset_infos(cardset_id)[0]
-        if not cardset:
-            # TODO: сделать нормальное исключение
-            raise Exception("Not valid cardset_id")
+        with self.unit_of_work(write=True):
+            cardset = self.get_cardset_infos(cardset_id)[0]
+            if not cardset:
+                # TODO: сделать нормальное исключение
+                raise Exception("Not valid cardset_id")
 
-        new_card_id = generate_unique_id(self.db_path, "Card", "id")
-        current_time = datetime.datetime.now()
+            new_card_id = self.__generate_id(
+                "Card", self._card_id_prefix(cardset_id)
+            )
+            position = key_between(self.__last_position(cardset_id), None)
+            timestamp = TimestampMapper.reverse_map(datetime.datetime.now())
+            current_time = TimestampMapper.map(timestamp)
 
-        term = spec.term if spec.term else ""
-        description = spec.description if spec.description else ""
-        status = "active"
-        if spec.status:
-            status = CardsStatusMapper.reverse_map(spec.status)
+            term = spec.term if spec.term else ""
+            description = spec.description if spec.description else ""
+            status = STATUS_PRESENT
+            if spec.status:
+                status = CardsStatusMapper.reverse_map(spec.status)
 
-        query = """
-        INSERT INTO Card (
-            id, term, description, created_at, modified_at,
-            addressed_at, status, owner_id, cardset_id
-        )
-        VALUES (
-            ?, ?, ?, ?, ?, ?, ?, ?, ?
-        )
-        """
-        params = (
-            new_card_id, term, description,
-            current_time.strftime("%Y-%m-%d %H:%M:%S"),
-            current_time.strftime("%Y-%m-%d %H:%M:%S"),
-            current_time.strftime("%Y-%m-%d %H:%M:%S"),
-            status, cardset.owner_id, cardset_id
-        )
+            query = f"""
+            INSERT INTO Card ({CARD_COLUMNS})
+            VALUES (
+                ?, ?, ?, ?, ?, ?, ?, ?, ?, ?
+            )
+            """
+            params = (
+                new_card_id, term, description,
+                timestamp, timestamp, timestamp,
+                status, cardset.owner_id, cardset_id, position
+            )
 
-        self.__execute_insert_query(query, params)
-        return Card(
-            id=new_card_id,
-            term=term,
-            description=description,
-            created_at=current_time,
-            modified_at=current_time,
-            addressed_at=current_time,
-            status=CardsStatusMapper.map(status),
-            owner_id=cardset.owner_id,
-            cardset_id=cardset.id,
-        )
+            self.__execute_insert_query(query, params)
+            return Card(
+                id=new_card_id,
+                term=term,
+                description=description,
+                created_at=current_time,
+                modified_at=current_time,
+                addressed_at=current_time,
+                status=CardsStatusMapper.map(status),
+                owner_id=cardset.owner_id,
+                cardset_id=cardset.id,
+                position=position,
+            )
 
     def modify_card(
         self,
@@ -252,25 +650,293 @@ class CardsetRepository(CardsetRepositoryABC):
         """
         Метод modify_card изменяет карточку.
         """
-        old_cards = self.get_cards(card_id, include_deleted=True)
-        if old_cards == []:
-            return None
-        old_card = old_cards[0]
-
-        params = [
-            spec.term if spec.term else old_card.term,
-            spec.description if spec.description else old_card.description,
-            spec.status if spec.status else old_card.status,
-            datetime.datetime.now(),
-            card_id
-        ]
-        query = """
-            UPDATE Card SET
-                term = ?,
-                description = ?,
-                status = ?,
-                modified_at = ?
-            WHERE id = ?
-        """
-        self.__execute_insert_query(query, params)
-        return self.get_cards(card_id, include_deleted=True)[0]
+        with self.unit_of_work(write=True):
+            old_cards = self.get_cards(card_id, include_deleted=True)
+            if old_cards == []:
+                return None
+            old_card = old_cards[0]
+
+            params = [
+                spec.term if spec.term else old_card.term,
+                spec.description if spec.description else old_card.description,
+                CardsStatusMapper.reverse_map(
+                    spec.status if spec.status else old_card.status
+                ),
+                TimestampMapper.reverse_map(datetime.datetime.now()),
+                card_id
+            ]
+            query = """
+                UPDATE Card SET
+                    term = ?,
+                    description = ?,
+                    status = ?,
+                    modified_at = ?
+                WHERE id = ?
+            """
+            self.__execute_insert_query(query, params)
+            return self.get_cards(card_id, include_deleted=True)[0]
+
+    def move_card(
+        self,
+        card_id: str,
+        before_id: Optional[str] = None,
+        after_id: Optional[str] = None,
+    ) -> Card | None:
+        """
+        Метод move_card перемещает карточку: соседние ключи позиций
+        находятся по индексу (cardset_id, position), изменяется одна
+        строка.
+        """
+        with self.unit_of_work(write=True):
+            cards = self.get_cards(card_id, include_deleted=True)
+            if cards == []:
+                return None
+            card = cards[0]
+
+            anchor_id = before_id or after_id
+            if anchor_id is None:
+                position = key_between(
+                    self.__last_position(card.cardset_id, card.id), None
+                )
+            else:
+                anchors = self.get_cards(anchor_id, include_deleted=True)
+                if anchors == [] or anchors[0].cardset_id != card.cardset_id:
+                    return None
+                anchor = anchors[0]
+                if anchor.id == card.id:
+                    return card
+                if before_id:
+                    position = key_between(
+                        self.__neighbour_position(card, anchor, "<"),
+                        anchor.position,
+                    )
+                else:
+                    position = key_between(
+                        anchor.position,
+                        self.__neighbour_position(card, anchor, ">"),
+                    )
+
+            self.__execute_insert_query(
+                "UPDATE Card SET position = ?, modified_at = ? WHERE id = ?",
+                [
+                    position,
+                    TimestampMapper.reverse_map(datetime.datetime.now()),
+                    card_id,
+                ],
+            )
+            return self.get_cards(card_id, include_deleted=True)[0]
+
+    def rebalance_card_positions(
+        self,
+        cardset_id: str,
+    ) -> int:
+        """
+        Метод rebalance_card_positions назначает карточкам набора короткие
+        ключи позиций в текущем порядке.
+        """
+        with self.unit_of_work(write=True), \
+                self._connection() as connection:
+            card_ids = [
+                row[0] for row in connection.execute(
+                    """
+                    SELECT id FROM Card WHERE cardset_id = ?
+                    ORDER BY position, id
+                    """,
+                    (cardset_id,),
+                )
+            ]
+            connection.executemany(
+                "UPDATE Card SET position = ? WHERE id = ?",
+                zip(spaced_keys(len(card_ids)), card_ids),
+            )
+            return len(card_ids)
+
+    def __last_position(
+        self,
+        cardset_id: str,
+        exclude_id: Optional[str] = None,
+    ) -> Optional[str]:
+        rows = self.__execute_select_query(
+            """
+            SELECT position FROM Card
+            WHERE cardset_id = ? AND id != ?
+            ORDER BY position DESC
+            LIMIT 1
+            """,
+            [cardset_id, exclude_id or ""],
+        )
+        return rows[0][0] if rows else None
+
+    def __neighbour_position(
+        self,
+        card: Card,
+        anchor: Card,
+        direction: str,
+    ) -> Optional[str]:
+        order = "DESC" if direction == "<" else "ASC"
+        rows = self.__execute_select_query(
+            f"""
+            SELECT position FROM Card
+            WHERE cardset_id = ? AND position {direction} ? AND id != ?
+            ORDER BY position {order}
+            LIMIT 1
+            """,
+            [card.cardset_id, anchor.position, card.id],
+        )
+        return rows[0][0] if rows else None
+
+    def clone_cardset(
+        self,
+        cardset_id: str,
+    ) -> CardsetInfo | None:
+        """
+        Метод clone_cardset копирует набор карточек и его неудаленные
+        карточки запросами INSERT ... SELECT в одной транзакции. Новые id
+        карточек генерируются пакетом и записываются во временную таблицу
+        соответствия старых и новых id, поэтому строки карточек не
+        проходят через Python.
+        """
+        with self.unit_of_work(write=True), \
+                self._connection() as connection:
+            old_infos = self.get_cardset_infos(cardset_id)
+            if old_infos == []:
+                return None
+            old_info = old_infos[0]
+
+            new_id = self.__generate_id(
+                "Cardset", self._cardset_id_prefix(old_info.owner_id)
+            )
+            timestamp = TimestampMapper.reverse_map(datetime.datetime.now())
+            connection.execute(
+                """
+                INSERT INTO Cardset (
+                    id, title, description, created_at, modified_at,
+                    addressed_at, status, owner_id
+                )
+                SELECT ?, title, description, ?, ?, ?, status, owner_id
+                FROM Cardset WHERE id = ?
+                """,
+                (new_id, timestamp, timestamp, timestamp, cardset_id),
+            )
+
+            connection.execute("""
+                CREATE TEMP TABLE IF NOT EXISTS CloneCardId (
+                    old_id TEXT PRIMARY KEY,
+                    new_id TEXT NOT NULL UNIQUE
+                ) WITHOUT ROWID
+            """)
+            try:
+                self.__fill_clone_card_ids(
+                    connection, cardset_id, self._card_id_prefix(new_id)
+                )
+                connection.execute(
+                    f"""
+                    INSERT INTO Card ({CARD_COLUMNS})
+                    SELECT
+                        CloneCardId.new_id, Card.term, Card.description,
+                        ?, ?, ?, Card.status, Card.owner_id, ?,
+                        Card.position
+                    FROM temp.CloneCardId
+                    JOIN Card ON Card.id = CloneCardId.old_id
+                    """,
+                    (timestamp, timestamp, timestamp, new_id),
+                )
+            finally:
+                connection.execute("DELETE FROM temp.CloneCardId")
+
+            return self.get_cardset_infos(new_id)[0]
+
+    def __fill_clone_card_ids(
+        self,
+        connection: sqlite3.Connection,
+        cardset_id: str,
+        prefix: str,
+    ) -> None:
+        params = {
+            "alphabet": ID_ALPHABET,
+            "prefix": prefix,
+            "cardset_id": cardset_id,
+            "status": STATUS_PRESENT,
+        }
+        remaining = connection.execute(
+            """
+            SELECT COUNT(*) FROM Card
+            WHERE cardset_id = :cardset_id AND status = :status
+            """,
+            params,
+        ).fetchone()[0]
+
+        # Совпавшие между собой или с существующими карточками id
+        # маловероятны: такие строки пропускаются или удаляются и
+        # генерируются заново на следующем проходе.
+        while remaining > 0:
+            inserted = connection.execute(
+                f"""
+                INSERT OR IGNORE INTO temp.CloneCardId (old_id, new_id)
+                SELECT id, :prefix || {random_id_expression(len(prefix))}
+                FROM Card
+                WHERE cardset_id = :cardset_id AND status = :status
+                    AND id NOT IN (SELECT old_id FROM temp.CloneCardId)
+                """,
+                params,
+            ).rowcount
+            collided = connection.execute("""
+                DELETE FROM temp.CloneCardId
+                WHERE new_id IN (SELECT id FROM Card)
+            """).rowcount
+            remaining -= inserted - collided
+
+    def delete_cardset_cards(
+        self,
+        cardset_id: str,
+        limit: int,
+    ) -> int:
+        """
+        Метод delete_cardset_cards удаляет не более limit карточек набора.
+        """
+        with self.unit_of_work(write=True), \
+                self._connection() as connection:
+            cursor = connection.execute(
+                """
+                DELETE FROM Card WHERE id IN (
+                    SELECT id FROM Card WHERE cardset_id = ? LIMIT ?
+                )
+                """,
+                (cardset_id, limit),
+            )
+            return cursor.rowcount
+
+    def delete_cardset(
+        self,
+        cardset_id: str,
+    ) -> CardsetInfo | None:
+        """
+        Метод delete_cardset удаляет набор карточек; оставшиеся карточки
+        удаляются каскадно (ON DELETE CASCADE).
+        """
+        with self.unit_of_work(write=True):
+            cardset_infos = self.get_cardset_infos(
+                cardset_id, include_deleted=True
+            )
+            if cardset_infos == []:
+                return None
+            self.__execute_insert_query(
+                "DELETE FROM Cardset WHERE id = ?", (cardset_id,)
+            )
+            return cardset_infos[0]
+
+    def delete_card(
+        self,
+        card_id: str,
+    ) -> Card | None:
+        """
+        Метод delete_card удаляет карточку.
+        """
+        with self.unit_of_work(write=True):
+            cards = self.get_cards(card_id, include_deleted=True)
+            if cards == []:
+                return None
+            self.__execute_insert_query(
+                "DELETE FROM Card WHERE id = ?", (card_id,)
+            )
+            return cards[0]
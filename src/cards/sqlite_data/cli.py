@@ -0,0 +1,230 @@
+import time
+import argparse
+import datetime
+from typing import List, Optional
+
+from .db_handler import SqliteDbHandler
+from .sharding import rebalance_shards
+from .snapshots import SnapshotRefresher
+from .maintenance import MaintenanceScheduler
+
+
+def purge(args: argparse.Namespace) -> None:
+    handler = SqliteDbHandler(args.db_path, shard_count=args.shard_count)
+    result = handler.purge_absent(
+        older_than=datetime.timedelta(days=args.older_than_days),
+        archive=not args.hard_delete,
+        batch_size=args.batch_size,
+    )
+    print(f"purged cards: {result.cards}, cardsets: {result.cardsets}")
+
+
+def migrate(args: argparse.Namespace) -> None:
+    handler = SqliteDbHandler(args.db_path, shard_count=args.shard_count)
+    print(f"schema version: {handler.migrate_db()}")
+
+
+def rebalance(args: argparse.Namespace) -> None:
+    if not args.shard_count:
+        raise SystemExit("rebalance: требуется --shard-count")
+    moved = rebalance_shards(
+        args.db_path,
+        shard_count=args.shard_count,
+        target_shard_count=args.target_shard_count,
+    )
+    for shard, buckets in sorted(moved.items()):
+        print(f"shard {shard}: moved buckets: {buckets}")
+
+
+def snapshot(args: argparse.Namespace) -> None:
+    refresher = SnapshotRefresher(
+        args.db_path, args.snapshot_path, args.interval or 1.0
+    )
+    if args.interval is None:
+        refresher.refresh()
+        return
+    refresher.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        refresher.close()
+
+
+def analyze(args: argparse.Namespace) -> None:
+    handler = SqliteDbHandler(args.db_path, shard_count=args.shard_count)
+    handler.analyze(full=args.full)
+
+
+def vacuum(args: argparse.Namespace) -> None:
+    handler = SqliteDbHandler(args.db_path, shard_count=args.shard_count)
+    if args.enable:
+        handler.enable_incremental_vacuum()
+    pages = handler.incremental_vacuum(max_pages=args.max_pages)
+    print(f"vacuumed pages: {pages}")
+
+
+def checkpoint(args: argparse.Namespace) -> None:
+    handler = SqliteDbHandler(args.db_path, shard_count=args.shard_count)
+    results = handler.checkpoint(args.mode)
+    for db_path, result in zip(handler.db_paths, results):
+        print(
+            f"{db_path}: busy: {result.busy}, wal pages: {result.log_pages}, "
+            f"checkpointed: {result.checkpointed_pages}"
+        )
+
+
+def integrity_check(args: argparse.Namespace) -> None:
+    handler = SqliteDbHandler(args.db_path, shard_count=args.shard_count)
+    problems = handler.integrity_check(quick=args.quick)
+    for db_path, db_problems in problems.items():
+        for problem in db_problems:
+            print(f"{db_path}: {problem}")
+    if problems:
+        raise SystemExit(1)
+    print("ok")
+
+
+def maintain(args: argparse.Namespace) -> None:
+    handler = SqliteDbHandler(args.db_path, shard_count=args.shard_count)
+    if args.interval is None:
+        for result in handler.maintain(max_vacuum_pages=args.max_pages):
+            print(
+                f"{result.db_path}: vacuumed pages: {result.vacuumed_pages}, "
+                f"skipped: {', '.join(result.skipped) or '-'}"
+            )
+        return
+    scheduler = MaintenanceScheduler(
+        handler.db_paths,
+        interval=args.interval,
+        max_vacuum_pages=args.max_pages,
+    )
+    scheduler.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        scheduler.close()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m cards.sqlite_data",
+        description="Обслуживание базы данных SQLite пакета cards.",
+    )
+    parser.add_argument("--db-path", default="test.db")
+    parser.add_argument(
+        "--shard-count",
+        type=int,
+        default=None,
+        help="Количество шардов, если база данных разделена на шарды.",
+    )
+    subparsers = parser.add_subparsers(required=True)
+
+    purge_parser = subparsers.add_parser(
+        "purge",
+        help="Архивировать или удалить давно удаленные объекты.",
+    )
+    purge_parser.add_argument("--older-than-days", type=float, default=30)
+    purge_parser.add_argument("--batch-size", type=int, default=500)
+    purge_parser.add_argument(
+        "--hard-delete",
+        action="store_true",
+        help="Удалить строки без переноса в архивные таблицы.",
+    )
+    purge_parser.set_defaults(handler=purge)
+
+    migrate_parser = subparsers.add_parser(
+        "migrate",
+        help="Привести схему базы данных к актуальной версии.",
+    )
+    migrate_parser.set_defaults(handler=migrate)
+
+    rebalance_parser = subparsers.add_parser(
+        "rebalance",
+        help="Перераспределить бакеты при изменении количества шардов.",
+    )
+    rebalance_parser.add_argument(
+        "--target-shard-count", type=int, required=True
+    )
+    rebalance_parser.set_defaults(handler=rebalance)
+
+    snapshot_parser = subparsers.add_parser(
+        "snapshot",
+        help="Обновить снимок базы данных для чтения.",
+    )
+    snapshot_parser.add_argument("--snapshot-path", required=True)
+    snapshot_parser.add_argument(
+        "--interval",
+        type=float,
+        default=None,
+        help="Обновлять снимок с указанным периодом в секундах.",
+    )
+    snapshot_parser.set_defaults(handler=snapshot)
+
+    analyze_parser = subparsers.add_parser(
+        "analyze",
+        help="Обновить статистику планировщика запросов (PRAGMA optimize).",
+    )
+    analyze_parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Выполнить полный ANALYZE всех таблиц.",
+    )
+    analyze_parser.set_defaults(handler=analyze)
+
+    vacuum_parser = subparsers.add_parser(
+        "vacuum",
+        help="Вернуть свободные страницы (PRAGMA incremental_vacuum).",
+    )
+    vacuum_parser.add_argument("--max-pages", type=int, default=None)
+    vacuum_parser.add_argument(
+        "--enable",
+        action="store_true",
+        help="Перевести базу данных в режим auto_vacuum = INCREMENTAL "
+        "полным VACUUM.",
+    )
+    vacuum_parser.set_defaults(handler=vacuum)
+
+    checkpoint_parser = subparsers.add_parser(
+        "checkpoint",
+        help="Перенести изменения из журнала WAL в файл базы данных.",
+    )
+    checkpoint_parser.add_argument(
+        "--mode",
+        choices=["passive", "full", "restart", "truncate"],
+        default="passive",
+    )
+    checkpoint_parser.set_defaults(handler=checkpoint)
+
+    integrity_check_parser = subparsers.add_parser(
+        "integrity-check",
+        help="Проверить целостность базы данных.",
+    )
+    integrity_check_parser.add_argument(
+        "--quick",
+        action="store_true",
+        help="PRAGMA quick_check без сверки индексов с таблицами.",
+    )
+    integrity_check_parser.set_defaults(handler=integrity_check)
+
+    maintain_parser = subparsers.add_parser(
+        "maintain",
+        help="Выполнить плановое обслуживание: PRAGMA optimize, возврат "
+        "свободных страниц и контрольную точку WAL.",
+    )
+    maintain_parser.add_argument("--max-pages", type=int, default=4096)
+    maintain_parser.add_argument(
+        "--interval",
+        type=float,
+        default=None,
+        help="Выполнять обслуживание с указанным периодом в секундах.",
+    )
+    maintain_parser.set_defaults(handler=maintain)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = build_parser().parse_args(argv)
+    args.handler(args)
@@ -0,0 +1,131 @@
+import os
+import sqlite3
+import pathlib
+import threading
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, Optional
+
+
+class SqliteConnectionPool:
+    """
+    Пул соединений SQLite одного процесса. Соединения открываются при
+    первом запросе, поэтому пул можно создать до fork: каждый рабочий
+    процесс откроет собственные соединения. Соединения, унаследованные
+    от родительского процесса, не используются и не закрываются
+    в дочернем.
+
+    :param db_path: Путь к файлу базы данных.
+    :type db_path: str
+    :param size: Максимальное количество простаивающих соединений.
+    :type size: int
+    :param busy_timeout: Время ожидания блокировки базы данных в секундах.
+    :type busy_timeout: float
+    :param read_only: Открывать соединения только для чтения.
+    :type read_only: bool
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        size: int = 4,
+        busy_timeout: float = 5.0,
+        read_only: bool = False,
+    ) -> None:
+        self.db_path = db_path
+        self.size = size
+        self.busy_timeout = busy_timeout
+        self.read_only = read_only
+        self.trace_callback: Optional[Callable[[str], None]] = None
+        self.__reset()
+
+    def __reset(self) -> None:
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._idle: List[sqlite3.Connection] = []
+
+    def __check_pid(self) -> None:
+        if self._pid != os.getpid():
+            # Ссылки на соединения родителя сохраняются, чтобы сборщик
+            # мусора не закрыл их из дочернего процесса.
+            self._forked_connections = self._idle
+            self.__reset()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self.read_only:
+            uri = pathlib.Path(self.db_path).absolute().as_uri() + "?mode=ro"
+            connection = sqlite3.connect(
+                uri,
+                timeout=self.busy_timeout,
+                check_same_thread=False,
+                uri=True,
+            )
+        else:
+            connection = sqlite3.connect(
+                self.db_path,
+                timeout=self.busy_timeout,
+                check_same_thread=False,
+            )
+        # Каскадное удаление карточек набора (ON DELETE CASCADE) работает
+        # только при включенной проверке внешних ключей.
+        connection.execute("PRAGMA foreign_keys = ON")
+        connection.set_trace_callback(self.trace_callback)
+        return connection
+
+    def set_trace_callback(
+        self,
+        callback: Optional[Callable[[str], None]],
+    ) -> None:
+        """
+        Передает callback текст каждого запроса, выполняемого через
+        соединения пула (см. sqlite3.Connection.set_trace_callback).
+        Соединения, выданные из пула в момент вызова, не затрагиваются.
+
+        :param callback: Функция, принимающая текст запроса, или None.
+        """
+        self.__check_pid()
+        self.trace_callback = callback
+        with self._lock:
+            for connection in self._idle:
+                connection.set_trace_callback(callback)
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """
+        Выдает соединение из пула на время блока with. Незавершенная
+        транзакция откатывается при возврате соединения в пул.
+        """
+        self.__check_pid()
+        with self._lock:
+            connection = self._idle.pop() if self._idle else None
+        if connection is None:
+            connection = self._connect()
+
+        try:
+            yield connection
+        finally:
+            if connection.in_transaction:
+                connection.rollback()
+            with self._lock:
+                if len(self._idle) < self.size:
+                    self._idle.append(connection)
+                    connection = None
+            if connection is not None:
+                connection.close()
+
+    def close(self) -> None:
+        """
+        Закрывает простаивающие соединения текущего процесса. Перед
+        закрытием выполняется PRAGMA optimize: SQLite обновляет
+        статистику таблиц, запросы к которым выполнялись через
+        соединение и выиграют от ANALYZE.
+        """
+        self.__check_pid()
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            if not self.read_only:
+                try:
+                    connection.execute("PRAGMA optimize")
+                except sqlite3.Error:
+                    pass
+            connection.close()
@@ -1,24 +1,71 @@
 import os
 import sqlite3
-from .utils import CREATE_DB_QUERY
+import datetime
+from typing import Dict, List, Optional
+from .utils import AUTO_VACUUM_QUERY, CREATE_DB_QUERY
+from .purge import SqlitePurger, PurgeResult
+from .maintenance import (
+    CheckpointResult,
+    MaintenanceResult,
+    SqliteMaintainer,
+)
+from .migrations import migrate
+from .sharding import shard_paths, initialize_shard_buckets
 
 
 class SqliteDbHandler:
-    def __init__(self, db_path):
+    def __init__(self, db_path, shard_count=None):
         self.db_path = db_path
+        self.shard_count = shard_count
+        self.db_paths = (
+            shard_paths(db_path, shard_count) if shard_count else [db_path]
+        )
 
     def initialize_db(self, init_db_query=CREATE_DB_QUERY):
-        if os.path.exists(self.db_path):
-            self.delete_database_file()
-
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.executescript(init_db_query)
-        conn.commit()
-        conn.close()
+        for db_path in self.db_paths:
+            self.__remove_files(db_path)
+
+            conn = sqlite3.connect(db_path)
+            cursor = conn.cursor()
+            cursor.executescript(init_db_query)
+            conn.commit()
+            conn.close()
+
+        if self.shard_count:
+            initialize_shard_buckets(self.db_paths)
+
+    def ensure_db(self, journal_mode: str = "wal") -> int:
+        """
+        Создает схему базы данных, если ее нет, или приводит к актуальной
+        версии, не удаляя данные. Безопасно вызывать одновременно из
+        нескольких процессов: изменения схемы выполняются под блокировкой
+        записи SQLite.
+
+        :param journal_mode: Режим журнала. В режиме WAL чтение из
+            рабочих процессов не блокируется записью.
+        :type journal_mode: str
+        :return: Версия схемы.
+        :rtype: int
+        """
+        versions = []
+        for db_path in self.db_paths:
+            conn = sqlite3.connect(db_path, timeout=30)
+            conn.execute(AUTO_VACUUM_QUERY)
+            conn.execute(f"PRAGMA journal_mode = {journal_mode}")
+            conn.close()
+            versions.append(migrate(db_path, vacuum=False))
+
+        if self.shard_count:
+            initialize_shard_buckets(self.db_paths, reset=False)
+
+        return min(versions)
+
+    def migrate_db(self) -> int:
+        versions = [migrate(db_path) for db_path in self.db_paths]
+        return min(versions)
 
     def list_tables(self):
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite3.connect(self.db_paths[0])
         cursor = conn.cursor()
 
         cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
@@ -29,7 +76,11 @@ class SqliteDbHandler:
         return [table[0] for table in tables]
 
     def clear_database_data(self):
-        conn = sqlite3.connect(self.db_path)
+        for db_path in self.db_paths:
+            self.__clear_database_data(db_path)
+
+    def __clear_database_data(self, db_path):
+        conn = sqlite3.connect(db_path)
         cursor = conn.cursor()
 
         cursor.execute("PRAGMA foreign_keys = OFF;")
@@ -45,7 +96,11 @@ class SqliteDbHandler:
         conn.close()
 
     def delete_all_tables(self):
-        conn = sqlite3.connect(self.db_path)
+        for db_path in self.db_paths:
+            self.__delete_all_tables(db_path)
+
+    def __delete_all_tables(self, db_path):
+        conn = sqlite3.connect(db_path)
         cursor = conn.cursor()
 
         cursor.execute("PRAGMA foreign_keys = OFF;")
@@ -60,5 +115,73 @@ class SqliteDbHandler:
         conn.commit()
         conn.close()
 
+    def purge_absent(
+        self,
+        older_than: datetime.timedelta,
+        archive: bool = True,
+        batch_size: int = 500,
+    ) -> PurgeResult:
+        result = PurgeResult(cards=0, cardsets=0)
+        for db_path in self.db_paths:
+            purger = SqlitePurger(db_path, batch_size=batch_size)
+            shard_result = purger.purge(older_than=older_than, archive=archive)
+            result.cards += shard_result.cards
+            result.cardsets += shard_result.cardsets
+        return result
+
+    def analyze(self, full: bool = False) -> None:
+        for db_path in self.db_paths:
+            SqliteMaintainer(db_path).analyze(full=full)
+
+    def incremental_vacuum(self, max_pages: Optional[int] = None) -> int:
+        return sum(
+            SqliteMaintainer(db_path).incremental_vacuum(max_pages)
+            for db_path in self.db_paths
+        )
+
+    def enable_incremental_vacuum(self) -> bool:
+        changed = [
+            SqliteMaintainer(db_path).enable_incremental_vacuum()
+            for db_path in self.db_paths
+        ]
+        return any(changed)
+
+    def checkpoint(self, mode: str = "PASSIVE") -> List[CheckpointResult]:
+        return [
+            SqliteMaintainer(db_path).checkpoint(mode)
+            for db_path in self.db_paths
+        ]
+
+    def integrity_check(self, quick: bool = False) -> Dict[str, List[str]]:
+        """
+        Проверяет целостность файлов базы данных.
+
+        :return: Ошибки по путям файлов, в которых они найдены.
+        :rtype: Dict[str, List[str]]
+        """
+        problems = {}
+        for db_path in self.db_paths:
+            db_problems = SqliteMaintainer(db_path).integrity_check(quick)
+            if db_problems:
+                problems[db_path] = db_problems
+        return problems
+
+    def maintain(
+        self,
+        max_vacuum_pages: Optional[int] = None,
+    ) -> List[MaintenanceResult]:
+        return [
+            SqliteMaintainer(db_path).run(max_vacuum_pages)
+            for db_path in self.db_paths
+        ]
+
     def delete_database_file(self):
-        os.remove(self.db_path)
+        for db_path in self.db_paths:
+            os.remove(db_path)
+            self.__remove_files(db_path)
+
+    @staticmethod
+    def __remove_files(db_path):
+        for path in (db_path, db_path + "-wal", db_path + "-shm"):
+            if os.path.exists(path):
+                os.remove(path)
@@ -0,0 +1,165 @@
+import os
+import time
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, List, Optional, Tuple, TypeVar
+
+
+T = TypeVar("T")
+
+WriteOperation = Callable[[sqlite3.Connection], Any]
+
+
+class GroupCommitWriter:
+    """
+    Выполняет операции записи нескольких потоков в одном потоке-писателе.
+    Операции, поступившие почти одновременно, объединяются в одну
+    транзакцию: каждая выполняется в собственной точке сохранения
+    (SAVEPOINT), а фиксация (и fsync) выполняется один раз на группу.
+    Ошибка одной операции откатывает только ее точку сохранения.
+    Результат операции становится доступен вызывающему только после
+    фиксации всей группы.
+
+    Поток-писатель запускается при первой операции в текущем процессе,
+    поэтому объект можно создать до fork.
+
+    :param db_path: Путь к файлу базы данных.
+    :type db_path: str
+    :param max_batch: Максимальное количество операций в группе.
+    :type max_batch: int
+    :param max_delay: Время в секундах, в течение которого писатель
+        ожидает новые операции, прежде чем зафиксировать группу.
+    :type max_delay: float
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        max_batch: int = 64,
+        max_delay: float = 0.002,
+    ) -> None:
+        self.db_path = db_path
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.__reset()
+
+    def __reset(self) -> None:
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+
+    def __ensure_started(self) -> None:
+        if self._pid != os.getpid():
+            self.__reset()
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self.__run,
+                    name="cards-group-commit",
+                    daemon=True,
+                )
+                self._thread.start()
+
+    def submit(self, operation: WriteOperation) -> Future:
+        """
+        Ставит операцию в очередь писателя.
+
+        :param operation: Функция, выполняющая запись на переданном
+            соединении. Не должна управлять транзакцией самостоятельно.
+        :type operation: Callable[[sqlite3.Connection], T]
+        :return: Future с результатом или исключением операции.
+        :rtype: Future
+        """
+        self.__ensure_started()
+        future: Future = Future()
+        self._queue.put((operation, future))
+        return future
+
+    def run(self, operation: Callable[[sqlite3.Connection], T]) -> T:
+        """
+        Выполняет операцию в группе и возвращает ее результат.
+        """
+        return self.submit(operation).result()
+
+    def close(self) -> None:
+        """
+        Дожидается выполнения поставленных операций и останавливает
+        поток-писатель текущего процесса.
+        """
+        if self._pid != os.getpid():
+            self.__reset()
+            return
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join()
+
+    def __run(self) -> None:
+        connection = sqlite3.connect(self.db_path, isolation_level=None)
+        connection.execute("PRAGMA foreign_keys = ON")
+        try:
+            while True:
+                batch, stop = self.__collect()
+                if batch:
+                    self.__execute(connection, batch)
+                if stop:
+                    return
+        finally:
+            connection.close()
+
+    def __collect(self) -> Tuple[List[Tuple[WriteOperation, Future]], bool]:
+        item = self._queue.get()
+        if item is None:
+            return [], True
+
+        batch = [item]
+        deadline = time.monotonic() + self.max_delay
+        while len(batch) < self.max_batch:
+            timeout = deadline - time.monotonic()
+            try:
+                if timeout > 0:
+                    item = self._queue.get(timeout=timeout)
+                else:
+                    item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def __execute(self, connection, batch) -> None:
+        results: List[Tuple[Future, Any, Optional[BaseException]]] = []
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+            for operation, future in batch:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                connection.execute("SAVEPOINT operation")
+                try:
+                    result = operation(connection)
+                except BaseException as operation_error:
+                    connection.execute("ROLLBACK TO operation")
+                    connection.execute("RELEASE operation")
+                    results.append((future, None, operation_error))
+                else:
+                    connection.execute("RELEASE operation")
+                    results.append((future, result, None))
+            connection.execute("COMMIT")
+        except BaseException as batch_error:
+            if connection.in_transaction:
+                connection.execute("ROLLBACK")
+            for operation, future in batch:
+                if not future.done():
+                    future.set_exception(batch_error)
+            return
+
+        for future, result, error in results:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
@@ -0,0 +1,348 @@
+import time
+import logging
+import sqlite3
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional, Sequence
+
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_MODES = ("PASSIVE", "FULL", "RESTART", "TRUNCATE")
+
+# Количество строк индекса, которое ANALYZE просматривает в фоновом
+# режиме (PRAGMA analysis_limit): статистика приблизительная, зато
+# анализ большой таблицы не удерживает блокировку надолго.
+ANALYSIS_LIMIT = 1000
+
+
+@dataclass
+class CheckpointResult:
+    busy: bool
+    log_pages: int
+    checkpointed_pages: int
+
+
+@dataclass
+class MaintenanceResult:
+    db_path: str
+    analyzed: bool = False
+    vacuumed_pages: int = 0
+    checkpoint: Optional[CheckpointResult] = None
+    # Шаги, пропущенные из-за блокировки базы данных другими
+    # соединениями; они будут выполнены в следующий раз.
+    skipped: List[str] = field(default_factory=list)
+    # Ошибка, прервавшая обслуживание в MaintenanceScheduler.
+    error: Optional[str] = None
+
+
+def is_busy_error(error: sqlite3.OperationalError) -> bool:
+    return "locked" in str(error) or "busy" in str(error)
+
+
+class SqliteMaintainer:
+    """
+    Обслуживание файла базы данных: обновление статистики планировщика
+    запросов, возврат свободных страниц, контрольная точка журнала WAL и
+    проверка целостности.
+
+    Возврат страниц выполняется пачками по vacuum_batch_pages страниц,
+    каждая пачка - в отдельной короткой транзакции с паузой pause между
+    ними, поэтому блокировка записи не удерживается надолго. Соединение
+    ждет блокировку не дольше busy_timeout: занятая база данных не
+    обслуживается, а не задерживает запросы.
+
+    :param db_path: Путь к файлу базы данных.
+    :type db_path: str
+    :param vacuum_batch_pages: Количество страниц, возвращаемых за одну
+        транзакцию.
+    :type vacuum_batch_pages: int
+    :param pause: Пауза в секундах между транзакциями.
+    :type pause: float
+    :param busy_timeout: Время ожидания блокировки в секундах.
+    :type busy_timeout: float
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        vacuum_batch_pages: int = 256,
+        pause: float = 0.01,
+        busy_timeout: float = 0.1,
+    ) -> None:
+        self.db_path = db_path
+        self.vacuum_batch_pages = vacuum_batch_pages
+        self.pause = pause
+        self.busy_timeout = busy_timeout
+
+    def analyze(self, full: bool = False) -> None:
+        """
+        Обновляет статистику планировщика запросов. По умолчанию
+        выполняет PRAGMA optimize, который анализирует только таблицы с
+        устаревшей статистикой, с ограничением ANALYSIS_LIMIT; при
+        full=True - полный ANALYZE всех таблиц.
+        """
+        connection = self.__connect()
+        try:
+            if full:
+                connection.execute("ANALYZE")
+            else:
+                connection.execute(f"PRAGMA analysis_limit = {ANALYSIS_LIMIT}")
+                # 0x10002: проверить все таблицы, а не только те, к которым
+                # обращалось это соединение.
+                connection.execute("PRAGMA optimize = 0x10002")
+        finally:
+            connection.close()
+
+    def incremental_vacuum(self, max_pages: Optional[int] = None) -> int:
+        """
+        Возвращает файловой системе свободные страницы базы данных в
+        режиме auto_vacuum = INCREMENTAL. В другом режиме ничего не
+        делает (см. enable_incremental_vacuum).
+
+        :param max_pages: Максимальное количество возвращаемых страниц;
+            None - все свободные страницы.
+        :type max_pages: int, optional
+        :return: Количество возвращенных страниц.
+        :rtype: int
+        """
+        connection = self.__connect()
+        try:
+            if connection.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                return 0
+
+            vacuumed = 0
+            while max_pages is None or vacuumed < max_pages:
+                free_pages = self.__free_pages(connection)
+                if free_pages == 0:
+                    break
+                pages = min(free_pages, self.vacuum_batch_pages)
+                if max_pages is not None:
+                    pages = min(pages, max_pages - vacuumed)
+                # Каждый шаг PRAGMA incremental_vacuum возвращает одну
+                # страницу; executescript выполняет его до конца.
+                connection.executescript(
+                    f"PRAGMA incremental_vacuum({pages})"
+                )
+                freed = free_pages - self.__free_pages(connection)
+                if freed <= 0:
+                    break
+                vacuumed += freed
+                time.sleep(self.pause)
+            return vacuumed
+        finally:
+            connection.close()
+
+    def enable_incremental_vacuum(self) -> bool:
+        """
+        Переводит базу данных в режим auto_vacuum = INCREMENTAL. Режим
+        существующей базы данных меняется только полным VACUUM, который
+        переписывает файл целиком и блокирует запись на все время
+        выполнения.
+
+        :return: True, если режим был изменен.
+        :rtype: bool
+        """
+        connection = sqlite3.connect(self.db_path, isolation_level=None)
+        try:
+            if connection.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+                return False
+            connection.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            connection.execute("VACUUM")
+            return True
+        finally:
+            connection.close()
+
+    def checkpoint(self, mode: str = "PASSIVE") -> CheckpointResult:
+        """
+        Переносит изменения из журнала WAL в файл базы данных.
+
+        :param mode: Режим контрольной точки: PASSIVE не ждет читателей
+            и писателей, FULL и RESTART ждут завершения записи, TRUNCATE
+            дополнительно обрезает файл журнала.
+        :type mode: str
+        :rtype: CheckpointResult
+
+        :raises ValueError: Если режим неизвестен.
+        """
+        mode = mode.upper()
+        if mode not in CHECKPOINT_MODES:
+            raise ValueError(f"Неизвестный режим контрольной точки: {mode}")
+
+        connection = self.__connect()
+        try:
+            busy, log_pages, checkpointed_pages = connection.execute(
+                f"PRAGMA wal_checkpoint({mode})"
+            ).fetchone()
+        finally:
+            connection.close()
+        return CheckpointResult(
+            busy=bool(busy),
+            log_pages=log_pages,
+            checkpointed_pages=checkpointed_pages,
+        )
+
+    def integrity_check(
+        self,
+        quick: bool = False,
+        max_errors: int = 100,
+    ) -> List[str]:
+        """
+        Проверяет целостность базы данных (PRAGMA integrity_check или
+        более быстрый PRAGMA quick_check без сверки индексов с таблицами)
+        и внешние ключи.
+
+        :return: Описания найденных ошибок; пустой список, если ошибок
+            нет.
+        :rtype: List[str]
+        """
+        pragma = "quick_check" if quick else "integrity_check"
+        connection = sqlite3.connect(self.db_path, isolation_level=None)
+        try:
+            problems = [
+                row[0]
+                for row in connection.execute(
+                    f"PRAGMA {pragma}({max_errors})"
+                )
+                if row[0] != "ok"
+            ]
+            problems.extend(
+                f"foreign key violation: {table} rowid {rowid} -> {parent}"
+                for table, rowid, parent, _ in connection.execute(
+                    "PRAGMA foreign_key_check"
+                )
+            )
+            return problems[:max_errors]
+        finally:
+            connection.close()
+
+    def run(self, max_vacuum_pages: Optional[int] = None) -> MaintenanceResult:
+        """
+        Выполняет плановое обслуживание: PRAGMA optimize, возврат
+        свободных страниц и пассивную контрольную точку. Шаг, которому
+        помешала блокировка базы данных, пропускается.
+        """
+        result = MaintenanceResult(db_path=self.db_path)
+        try:
+            self.analyze()
+            result.analyzed = True
+        except sqlite3.OperationalError as error:
+            if not is_busy_error(error):
+                raise
+            result.skipped.append("analyze")
+
+        try:
+            result.vacuumed_pages = self.incremental_vacuum(max_vacuum_pages)
+        except sqlite3.OperationalError as error:
+            if not is_busy_error(error):
+                raise
+            result.skipped.append("incremental_vacuum")
+
+        try:
+            result.checkpoint = self.checkpoint()
+        except sqlite3.OperationalError as error:
+            if not is_busy_error(error):
+                raise
+            result.skipped.append("checkpoint")
+
+        return result
+
+    def __connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(
+            self.db_path,
+            isolation_level=None,
+            timeout=self.busy_timeout,
+        )
+
+    @staticmethod
+    def __free_pages(connection: sqlite3.Connection) -> int:
+        return connection.execute("PRAGMA freelist_count").fetchone()[0]
+
+
+class MaintenanceScheduler:
+    """
+    Периодически выполняет SqliteMaintainer.run для файлов базы данных в
+    фоновом потоке текущего процесса. Обслуживание уступает основной
+    нагрузке: пока is_busy возвращает True, очередной запуск
+    откладывается, а шаги, которым мешает блокировка, пропускаются до
+    следующего запуска.
+
+    :param db_paths: Пути к файлам базы данных (шардов).
+    :type db_paths: Sequence[str]
+    :param interval: Период обслуживания в секундах.
+    :type interval: float
+    :param is_busy: Функция, сообщающая о выполнении запросов, например
+        по статистике AdmissionController.
+    :type is_busy: Callable[[], bool], optional
+    :param max_vacuum_pages: Максимальное количество страниц,
+        возвращаемых за один запуск.
+    :type max_vacuum_pages: int
+    :param retry_delay: Пауза в секундах перед повторной проверкой
+        is_busy.
+    :type retry_delay: float
+    """
+
+    def __init__(
+        self,
+        db_paths: Sequence[str],
+        interval: float = 3600.0,
+        is_busy: Optional[Callable[[], bool]] = None,
+        max_vacuum_pages: int = 4096,
+        retry_delay: float = 1.0,
+    ) -> None:
+        self.maintainers = [SqliteMaintainer(path) for path in db_paths]
+        self.interval = interval
+        self.is_busy = is_busy
+        self.max_vacuum_pages = max_vacuum_pages
+        self.retry_delay = retry_delay
+        self.last_results: List[MaintenanceResult] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def run(self) -> List[MaintenanceResult]:
+        """
+        Обслуживает все файлы базы данных, не дожидаясь периода. Ошибка
+        обслуживания одного файла записывается в журнал и в его
+        результат и не мешает обслуживанию остальных файлов и следующим
+        запускам.
+        """
+        results = []
+        for maintainer in self.maintainers:
+            try:
+                result = maintainer.run(self.max_vacuum_pages)
+            except Exception as error:
+                logger.exception(
+                    "Обслуживание %s завершилось ошибкой",
+                    maintainer.db_path,
+                )
+                result = MaintenanceResult(
+                    db_path=maintainer.db_path, error=repr(error)
+                )
+            results.append(result)
+        self.last_results = results
+        return results
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self.__run,
+            name="cards-maintenance",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __run(self) -> None:
+        while not self._stop.wait(self.interval):
+            while self.is_busy is not None and self.is_busy():
+                if self._stop.wait(self.retry_delay):
+                    return
+            self.run()
@@ -1,8 +1,12 @@
 from abc import ABC, abstractmethod
+from dataclasses import fields
+from datetime import datetime, timedelta, timezone
 from ..core import (
     Card,
+    Cardset,
     CardsetInfo,
-    CardsStatus
+    CardsStatus,
+    ResourceVersion,
 )
 
 
@@ -16,25 +20,59 @@ class BaseMapper(ABC):
 
 
 class CardsStatusMapper(BaseMapper):
+    STATUSES = (CardsStatus.PRESENT, CardsStatus.ABSENT)
+    CODES = {status: code for code, status in enumerate(STATUSES)}
+
     @staticmethod
     def map(row):
-        if row == 'present':
-            return CardsStatus.PRESENT
-        if row == 'absent':
-            return CardsStatus.ABSENT
-
-        # TODO: завести исключение под неправильный статус
-        raise Exception()
+        """
+        Преобразует код статуса (0 - present, 1 - absent) в CardsStatus.
+        """
+        return CardsStatusMapper.STATUSES[row]
 
     @staticmethod
     def reverse_map(card_status):
-        if card_status == CardsStatus.ABSENT:
-            return 'absent'
-        if card_status == CardsStatus.PRESENT:
-            return 'present'
+        return CardsStatusMapper.CODES[CardsStatus(card_status)]
+
 
-        # TODO: завести исключение под неправильный статус
-        raise Exception()
+class TimestampMapper(BaseMapper):
+    EPOCH = datetime(1970, 1, 1)
+
+    @staticmethod
+    def map(row):
+        """
+        Преобразует количество миллисекунд от 1970-01-01 в datetime.
+        Время хранится без часового пояса, как и в модели.
+        """
+        if row is None:
+            return None
+        return TimestampMapper.EPOCH + timedelta(milliseconds=row)
+
+    @staticmethod
+    def reverse_map(value):
+        if value is None:
+            return None
+        return (value - TimestampMapper.EPOCH) // timedelta(milliseconds=1)
+
+
+def map_selected_columns(row, columns, model):
+    """
+    Преобразует строку, содержащую только столбцы columns, в объект
+    model. Атрибуты, для которых нет столбцов, равны None.
+    """
+    values = dict.fromkeys(field.name for field in fields(model))
+    for column, value in zip(columns, row):
+        mapper = COLUMN_MAPPERS.get(column)
+        values[column] = value if mapper is None else mapper(value)
+    return model(**values)
+
+
+COLUMN_MAPPERS = {
+    "created_at": TimestampMapper.map,
+    "modified_at": TimestampMapper.map,
+    "addressed_at": TimestampMapper.map,
+    "status": CardsStatusMapper.map,
+}
 
 
 class CardsetInfoMapper(BaseMapper):
@@ -44,13 +82,33 @@ class CardsetInfoMapper(BaseMapper):
             id=row[0],
             title=row[1],
             description=row[2],
-            created_at=row[3],
-            modified_at=row[4],
-            addressed_at=row[5],
+            created_at=TimestampMapper.map(row[3]),
+            modified_at=TimestampMapper.map(row[4]),
+            addressed_at=TimestampMapper.map(row[5]),
             status=CardsStatusMapper.map(row[6]),
             owner_id=row[7]
         )
 
+    @staticmethod
+    def map_columns(row, columns):
+        return map_selected_columns(row, columns, CardsetInfo)
+
+
+class CardsetMapper(BaseMapper):
+    @staticmethod
+    def map(row, cards=None):
+        return Cardset(
+            id=row[0],
+            title=row[1],
+            description=row[2],
+            created_at=TimestampMapper.map(row[3]),
+            modified_at=TimestampMapper.map(row[4]),
+            addressed_at=TimestampMapper.map(row[5]),
+            status=CardsStatusMapper.map(row[6]),
+            owner_id=row[7],
+            cards=cards if cards is not None else [],
+        )
+
 
 class CardMapper(BaseMapper):
     @staticmethod
@@ -59,10 +117,27 @@ class CardMapper(BaseMapper):
             id=row[0],
             term=row[1],
             description=row[2],
-            created_at=row[3],
-            modified_at=row[4],
-            addressed_at=row[5],
+            created_at=TimestampMapper.map(row[3]),
+            modified_at=TimestampMapper.map(row[4]),
+            addressed_at=TimestampMapper.map(row[5]),
             status=CardsStatusMapper.map(row[6]),
             owner_id=row[7],
             cardset_id=row[8],
+            position=row[9],
+        )
+
+    @staticmethod
+    def map_columns(row, columns):
+        return map_selected_columns(row, columns, Card)
+
+
+class ResourceVersionMapper(BaseMapper):
+    @staticmethod
+    def map(row):
+        return ResourceVersion(
+            version=row[0],
+            modified_at=datetime.fromtimestamp(
+                row[1] / 1000, tz=timezone.utc
+            ),
+            owner_id=row[2],
         )
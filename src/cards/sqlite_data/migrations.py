@@ -0,0 +1,378 @@
+import sqlite3
+from typing import Callable, Dict, List
+
+from .utils import (
+    AUTO_VACUUM_QUERY,
+    CREATE_DB_QUERY,
+    CREATE_SCHEMA_OBJECTS_QUERY,
+    SCHEMA_VERSION,
+    execute_statements,
+    STATUS_PRESENT,
+    STATUS_ABSENT,
+)
+from ..core.positions import POSITION_DIGITS
+
+
+# Схемы таблиц фиксируются на момент соответствующей версии, чтобы
+# последующие изменения CREATE_TABLES_QUERY не влияли на старые шаги.
+V1_TABLES_QUERY = """
+    CREATE TABLE CardsStatus (
+        code INTEGER PRIMARY KEY,
+        status TEXT NOT NULL UNIQUE
+    );
+
+    INSERT INTO CardsStatus (code, status)
+    VALUES (0, 'present'), (1, 'absent');
+
+    CREATE TABLE Cardset (
+        id TEXT PRIMARY KEY,
+        title TEXT NOT NULL,
+        description TEXT,
+        created_at INTEGER NOT NULL,
+        modified_at INTEGER NOT NULL,
+        addressed_at INTEGER,
+        status INTEGER NOT NULL CHECK (status IN (0, 1)),
+        owner_id TEXT NOT NULL
+    ) WITHOUT ROWID;
+
+    CREATE TABLE Card (
+        id TEXT PRIMARY KEY,
+        term TEXT NOT NULL,
+        description TEXT,
+        created_at INTEGER NOT NULL,
+        modified_at INTEGER NOT NULL,
+        addressed_at INTEGER,
+        status INTEGER NOT NULL CHECK (status IN (0, 1)),
+        owner_id TEXT NOT NULL,
+        cardset_id TEXT NOT NULL,
+        FOREIGN KEY (cardset_id) REFERENCES Cardset(id) ON DELETE CASCADE
+    ) WITHOUT ROWID;
+
+    CREATE TABLE IF NOT EXISTS ResourceVersion (
+        scope TEXT NOT NULL,
+        scope_id TEXT NOT NULL,
+        owner_id TEXT NOT NULL,
+        version INTEGER NOT NULL,
+        modified_at INTEGER NOT NULL,
+        PRIMARY KEY (scope, scope_id)
+    );
+"""
+
+V1_ARCHIVE_TABLES_QUERY = """
+    CREATE TABLE CardsetArchive (
+        id TEXT PRIMARY KEY,
+        title TEXT NOT NULL,
+        description TEXT,
+        created_at INTEGER NOT NULL,
+        modified_at INTEGER NOT NULL,
+        addressed_at INTEGER,
+        status INTEGER NOT NULL,
+        owner_id TEXT NOT NULL,
+        archived_at INTEGER NOT NULL
+    ) WITHOUT ROWID;
+
+    CREATE TABLE CardArchive (
+        id TEXT PRIMARY KEY,
+        term TEXT NOT NULL,
+        description TEXT,
+        created_at INTEGER NOT NULL,
+        modified_at INTEGER NOT NULL,
+        addressed_at INTEGER,
+        status INTEGER NOT NULL,
+        owner_id TEXT NOT NULL,
+        cardset_id TEXT NOT NULL,
+        archived_at INTEGER NOT NULL
+    ) WITHOUT ROWID;
+"""
+
+
+V3_CHANGE_TABLE_QUERY = """
+    CREATE TABLE Change (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        owner_id TEXT NOT NULL,
+        kind TEXT NOT NULL CHECK (kind IN ('cardset', 'card')),
+        object_id TEXT NOT NULL,
+        UNIQUE (kind, object_id)
+    );
+"""
+
+
+def get_schema_version(connection) -> int:
+    return connection.execute("PRAGMA user_version").fetchone()[0]
+
+
+def list_tables(connection) -> List[str]:
+    rows = connection.execute(
+        "SELECT name FROM sqlite_master WHERE type='table'"
+    )
+    return [row[0] for row in rows]
+
+
+def epoch_ms(column: str) -> str:
+    """
+    SQL-выражение, переводящее строковую дату в миллисекунды от
+    1970-01-01 без учета часового пояса (см. TimestampMapper).
+    """
+    return (
+        f"CAST(ROUND((julianday({column}) - 2440587.5) * 86400000) "
+        f"AS INTEGER)"
+    )
+
+
+def status_code(column: str) -> str:
+    return (
+        f"CASE {column} WHEN 'absent' THEN {STATUS_ABSENT} "
+        f"ELSE {STATUS_PRESENT} END"
+    )
+
+
+def migrate_text_to_compact(connection) -> str:
+    """
+    Версия 0 -> 1: статусы хранятся как TEXT со ссылкой на CardsStatus,
+    даты - как строки. Таблицы пересоздаются в компактном виде
+    (целочисленные статусы, миллисекунды, WITHOUT ROWID).
+    """
+    tables = list_tables(connection)
+    archived = "CardArchive" in tables and "CardsetArchive" in tables
+
+    script = """
+        DROP TRIGGER IF EXISTS cardset_version_on_insert;
+        DROP TRIGGER IF EXISTS cardset_version_on_update;
+        DROP TRIGGER IF EXISTS cardset_version_on_delete;
+        DROP TRIGGER IF EXISTS card_version_on_insert;
+        DROP TRIGGER IF EXISTS card_version_on_update;
+        DROP TRIGGER IF EXISTS card_version_on_delete;
+
+        DROP INDEX IF EXISTS Cardset_owner_title_live;
+        DROP INDEX IF EXISTS Cardset_absent_modified;
+        DROP INDEX IF EXISTS Card_cardset;
+        DROP INDEX IF EXISTS Card_cardset_term_live;
+        DROP INDEX IF EXISTS Card_absent_modified;
+
+        ALTER TABLE Card RENAME TO Card_v0;
+        ALTER TABLE Cardset RENAME TO Cardset_v0;
+        DROP TABLE IF EXISTS CardsStatus;
+    """
+    if archived:
+        script += """
+            ALTER TABLE CardArchive RENAME TO CardArchive_v0;
+            ALTER TABLE CardsetArchive RENAME TO CardsetArchive_v0;
+        """
+        script += V1_ARCHIVE_TABLES_QUERY
+
+    script += V1_TABLES_QUERY
+    script += f"""
+        INSERT INTO Cardset (
+            id, title, description, created_at, modified_at,
+            addressed_at, status, owner_id
+        )
+        SELECT
+            id, title, description, {epoch_ms('created_at')},
+            {epoch_ms('modified_at')}, {epoch_ms('addressed_at')},
+            {status_code('status')}, owner_id
+        FROM Cardset_v0;
+
+        INSERT INTO Card (
+            id, term, description, created_at, modified_at,
+            addressed_at, status, owner_id, cardset_id
+        )
+        SELECT
+            id, term, description, {epoch_ms('created_at')},
+            {epoch_ms('modified_at')}, {epoch_ms('addressed_at')},
+            {status_code('status')}, owner_id, cardset_id
+        FROM Card_v0;
+
+        DROP TABLE Card_v0;
+        DROP TABLE Cardset_v0;
+    """
+    if archived:
+        script += f"""
+            INSERT INTO CardsetArchive (
+                id, title, description, created_at, modified_at,
+                addressed_at, status, owner_id, archived_at
+            )
+            SELECT
+                id, title, description, {epoch_ms('created_at')},
+                {epoch_ms('modified_at')}, {epoch_ms('addressed_at')},
+                {status_code('status')}, owner_id, {epoch_ms('archived_at')}
+            FROM CardsetArchive_v0;
+
+            INSERT INTO CardArchive (
+                id, term, description, created_at, modified_at,
+                addressed_at, status, owner_id, cardset_id, archived_at
+            )
+            SELECT
+                id, term, description, {epoch_ms('created_at')},
+                {epoch_ms('modified_at')}, {epoch_ms('addressed_at')},
+                {status_code('status')}, owner_id, cardset_id,
+                {epoch_ms('archived_at')}
+            FROM CardArchive_v0;
+
+            DROP TABLE CardArchive_v0;
+            DROP TABLE CardsetArchive_v0;
+        """
+
+    return script
+
+
+def index_sorted_listings(connection) -> str:
+    """
+    Версия 1 -> 2: выборки с удаленными объектами сортируются по
+    индексам (owner_id, title) и (cardset_id, term), которые создаются
+    вместе с остальными объектами схемы. Индекс Card (cardset_id)
+    становится префиксом нового индекса и удаляется.
+    """
+    return "DROP INDEX IF EXISTS Card_cardset;"
+
+
+def add_change_feed(connection) -> str:
+    """
+    Версия 2 -> 3: журнал изменений Change для синхронизации клиентов.
+    Существующие объекты попадают в журнал в порядке изменения, поэтому
+    первая синхронизация с since = 0 вернет их все.
+    """
+    return V3_CHANGE_TABLE_QUERY + """
+        INSERT INTO Change (owner_id, kind, object_id)
+        SELECT owner_id, kind, id FROM (
+            SELECT owner_id, 'cardset' AS kind, id, modified_at
+            FROM Cardset
+            UNION ALL
+            SELECT owner_id, 'card' AS kind, id, modified_at
+            FROM Card
+        )
+        ORDER BY modified_at, kind DESC, id;
+    """
+
+
+def position_key(number: str, width: int = 4) -> str:
+    """
+    SQL-выражение, переводящее неотрицательное число меньше 62^width в
+    ключ позиции с целой частью фиксированной длины (см. key_between).
+    """
+    base = len(POSITION_DIGITS)
+    head = chr(ord("a") + width - 1)
+    digits = [
+        f"substr('{POSITION_DIGITS}', 1 + ({number} / {base ** power}) "
+        f"% {base}, 1)"
+        for power in reversed(range(width))
+    ]
+    return " || ".join([f"'{head}'"] + digits)
+
+
+def add_card_positions(connection) -> str:
+    """
+    Версия 3 -> 4: ключи позиций карточек для пользовательского порядка.
+    Начальный порядок карточек в наборе совпадает с порядком по термину.
+    """
+    return f"""
+        ALTER TABLE Card ADD COLUMN position TEXT NOT NULL DEFAULT '';
+
+        UPDATE Card SET position = ranked.position
+        FROM (
+            SELECT id, {position_key('number')} AS position
+            FROM (
+                SELECT id, ROW_NUMBER() OVER (
+                    PARTITION BY cardset_id ORDER BY term, id
+                ) - 1 AS number
+                FROM Card
+            )
+        ) AS ranked
+        WHERE Card.id = ranked.id;
+    """
+
+
+def cover_live_listings(connection) -> str:
+    """
+    Версия 4 -> 5: в индексы живых объектов добавляются owner_id и
+    status, чтобы выборки с проекцией обходились без обращения к таблице.
+    Индексы пересоздаются вместе с остальными объектами схемы.
+    """
+    return """
+        DROP INDEX IF EXISTS Cardset_owner_title_live;
+        DROP INDEX IF EXISTS Card_cardset_term_live;
+        DROP INDEX IF EXISTS Card_cardset_position_live;
+    """
+
+
+def version_times_in_milliseconds(connection) -> str:
+    """
+    Версия 5 -> 6: время изменения версий выборок хранится в
+    миллисекундах, а не в секундах, чтобы отличать запись, сделанную в
+    ту же секунду, что и предыдущее чтение. Триггеры версий
+    пересоздаются вместе с остальными объектами схемы.
+    """
+    return """
+        DROP TRIGGER IF EXISTS cardset_version_on_insert;
+        DROP TRIGGER IF EXISTS cardset_version_on_update;
+        DROP TRIGGER IF EXISTS cardset_version_on_delete;
+        DROP TRIGGER IF EXISTS card_version_on_insert;
+        DROP TRIGGER IF EXISTS card_version_on_update;
+        DROP TRIGGER IF EXISTS card_version_on_delete;
+
+        UPDATE ResourceVersion SET modified_at = modified_at * 1000;
+    """
+
+
+# Ключ - версия схемы, из которой выполняется переход на следующую.
+MIGRATIONS: Dict[int, Callable[[sqlite3.Connection], str]] = {
+    0: migrate_text_to_compact,
+    1: index_sorted_listings,
+    2: add_change_feed,
+    3: add_card_positions,
+    4: cover_live_listings,
+    5: version_times_in_milliseconds,
+}
+
+
+def migrate(db_path: str, vacuum: bool = True) -> int:
+    """
+    Приводит базу данных к актуальной версии схемы (SCHEMA_VERSION).
+    Пустая база данных создается сразу в актуальной версии. Проверка
+    версии, все шаги миграции и пересоздание индексов и триггеров
+    выполняются в одной транзакции BEGIN IMMEDIATE, поэтому несколько
+    процессов могут вызвать migrate одновременно: схему подготовит
+    первый из них, остальные дождутся блокировки и ничего не изменят.
+
+    :param db_path: Путь к файлу базы данных.
+    :type db_path: str
+    :param vacuum: Выполнить VACUUM после миграции, чтобы освободить
+        страницы, занятые данными в старом формате.
+    :type vacuum: bool
+    :return: Версия схемы после миграции.
+    :rtype: int
+    """
+    connection = sqlite3.connect(db_path, isolation_level=None, timeout=30)
+    try:
+        # Для пустой базы данных - до первой записи; для существующей
+        # режим вступит в силу при VACUUM после миграции.
+        connection.execute(AUTO_VACUUM_QUERY)
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            if "Cardset" not in list_tables(connection):
+                execute_statements(connection, CREATE_DB_QUERY)
+                connection.execute("COMMIT")
+                return get_schema_version(connection)
+
+            version = get_schema_version(connection)
+            migrated = version < SCHEMA_VERSION
+            while version < SCHEMA_VERSION:
+                script = MIGRATIONS[version](connection)
+                execute_statements(
+                    connection,
+                    f"{script}PRAGMA user_version = {version + 1};",
+                )
+                version += 1
+
+            execute_statements(connection, CREATE_SCHEMA_OBJECTS_QUERY)
+            connection.execute("COMMIT")
+        except BaseException:
+            if connection.in_transaction:
+                connection.execute("ROLLBACK")
+            raise
+
+        if migrated and vacuum:
+            connection.execute("VACUUM")
+
+        return version
+    finally:
+        connection.close()
@@ -0,0 +1,203 @@
+import sqlite3
+import time
+import datetime
+from dataclasses import dataclass
+from typing import List
+
+from .mappers import TimestampMapper
+from .utils import (
+    ARCHIVE_TABLES_QUERY,
+    STATUS_ABSENT,
+    immediate_transaction,
+)
+
+
+CARD_COLUMNS = """
+    id, term, description, created_at, modified_at,
+    addressed_at, status, owner_id, cardset_id
+"""
+
+CARDSET_COLUMNS = """
+    id, title, description, created_at, modified_at,
+    addressed_at, status, owner_id
+"""
+
+
+@dataclass
+class PurgeResult:
+    cards: int
+    cardsets: int
+
+
+class SqlitePurger:
+    """
+    Удаляет из основных таблиц карточки и наборы карточек, которые были
+    отмечены как удаленные (статус absent) дольше заданного срока.
+
+    Строки обрабатываются пачками, каждая пачка - в отдельной короткой
+    транзакции, поэтому блокировка записи не удерживается надолго.
+
+    :param db_path: Путь к файлу базы данных.
+    :type db_path: str
+    :param batch_size: Максимальное количество строк в одной транзакции.
+    :type batch_size: int
+    :param pause: Пауза в секундах между транзакциями, за время которой
+        блокировку могут получить другие писатели.
+    :type pause: float
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        batch_size: int = 500,
+        pause: float = 0.01,
+    ) -> None:
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.pause = pause
+
+    def purge(
+        self,
+        older_than: datetime.timedelta,
+        archive: bool = True,
+    ) -> PurgeResult:
+        """
+        Выполняет очистку.
+
+        :param older_than: Минимальное время с момента последнего изменения
+            удаленной строки, после которого строка подлежит очистке.
+        :type older_than: datetime.timedelta
+        :param archive: Если True, строки переносятся в таблицы
+            CardArchive и CardsetArchive, иначе удаляются безвозвратно.
+        :type archive: bool
+        :return: Количество очищенных карточек и наборов карточек.
+        :rtype: PurgeResult
+        """
+        cutoff = TimestampMapper.reverse_map(
+            datetime.datetime.now() - older_than
+        )
+
+        connection = sqlite3.connect(self.db_path, isolation_level=None)
+        try:
+            if archive:
+                connection.executescript(ARCHIVE_TABLES_QUERY)
+
+            result = PurgeResult(cards=0, cardsets=0)
+            result.cards += self.__purge_absent_cards(
+                connection, cutoff, archive
+            )
+
+            cardset_ids = self.__select_absent_cardsets(connection, cutoff)
+            for cardset_id in cardset_ids:
+                result.cards += self.__purge_cardset_cards(
+                    connection, cardset_id, cutoff, archive
+                )
+                result.cardsets += self.__purge_cardset(
+                    connection, cardset_id, cutoff, archive
+                )
+
+            return result
+        finally:
+            connection.close()
+
+    def __purge_absent_cards(self, connection, cutoff, archive):
+        purged = 0
+        while True:
+            with immediate_transaction(connection):
+                ids = self.__select_ids(
+                    connection,
+                    f"""
+                    SELECT id FROM Card
+                    WHERE status = {STATUS_ABSENT} AND modified_at < ?
+                    LIMIT ?
+                    """,
+                    [cutoff, self.batch_size],
+                )
+                self.__move_rows(connection, "Card", CARD_COLUMNS, ids,
+                                 archive)
+
+            purged += len(ids)
+            if len(ids) < self.batch_size:
+                return purged
+            time.sleep(self.pause)
+
+    def __select_absent_cardsets(self, connection, cutoff):
+        return self.__select_ids(
+            connection,
+            f"""
+            SELECT id FROM Cardset
+            WHERE status = {STATUS_ABSENT} AND modified_at < ?
+            """,
+            [cutoff],
+        )
+
+    def __purge_cardset_cards(self, connection, cardset_id, cutoff, archive):
+        purged = 0
+        while True:
+            # Статус набора перепроверяется в каждой транзакции: набор мог
+            # быть восстановлен, пока обрабатывались предыдущие пачки.
+            with immediate_transaction(connection):
+                ids = self.__select_ids(
+                    connection,
+                    f"""
+                    SELECT c.id FROM Card c
+                    JOIN Cardset s ON s.id = c.cardset_id
+                    WHERE c.cardset_id = ?
+                        AND s.status = {STATUS_ABSENT} AND s.modified_at < ?
+                    LIMIT ?
+                    """,
+                    [cardset_id, cutoff, self.batch_size],
+                )
+                self.__move_rows(connection, "Card", CARD_COLUMNS, ids,
+                                 archive)
+
+            purged += len(ids)
+            if len(ids) < self.batch_size:
+                return purged
+            time.sleep(self.pause)
+
+    def __purge_cardset(self, connection, cardset_id, cutoff, archive):
+        with immediate_transaction(connection):
+            ids = self.__select_ids(
+                connection,
+                f"""
+                SELECT id FROM Cardset
+                WHERE id = ? AND status = {STATUS_ABSENT} AND modified_at < ?
+                    AND NOT EXISTS (
+                        SELECT 1 FROM Card WHERE cardset_id = ?
+                    )
+                """,
+                [cardset_id, cutoff, cardset_id],
+            )
+            self.__move_rows(connection, "Cardset", CARDSET_COLUMNS, ids,
+                             archive)
+
+        time.sleep(self.pause)
+        return len(ids)
+
+    @staticmethod
+    def __select_ids(connection, query, params) -> List[str]:
+        return [row[0] for row in connection.execute(query, params)]
+
+    @staticmethod
+    def __move_rows(connection, table, columns, ids, archive):
+        if not ids:
+            return
+
+        placeholders = ", ".join("?" for _ in ids)
+        if archive:
+            connection.execute(
+                f"""
+                INSERT OR REPLACE INTO {table}Archive ({columns}, archived_at)
+                SELECT {columns}, ? FROM {table}
+                WHERE id IN ({placeholders})
+                """,
+                [
+                    TimestampMapper.reverse_map(datetime.datetime.now()),
+                    *ids,
+                ],
+            )
+        connection.execute(
+            f"DELETE FROM {table} WHERE id IN ({placeholders})",
+            ids,
+        )
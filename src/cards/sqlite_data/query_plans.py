@@ -0,0 +1,92 @@
+import re
+import sqlite3
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterator, List
+
+from .connection_pool import SqliteConnectionPool
+
+
+# Служебные запросы и строки, которыми SQLite сообщает о запросах
+# триггеров, не имеют плана выполнения.
+NO_PLAN_PREFIXES = (
+    "BEGIN", "COMMIT", "ROLLBACK", "SAVEPOINT", "RELEASE", "PRAGMA", "--",
+)
+
+# Начала проблемных шагов плана (см. find_plan_problems).
+PROBLEM_STEPS = ("SCAN ", "USE TEMP B-TREE")
+
+
+@dataclass
+class QueryPlan:
+    query: str
+    details: List[str]
+    problems: List[str]
+
+
+def normalize_query(query: str) -> str:
+    """
+    Приводит текст запроса к форме, не зависящей от значений параметров:
+    строковые и числовые литералы заменяются на ?, пробелы схлопываются.
+    """
+    query = re.sub(r"'(?:[^']|'')*'", "?", query)
+    query = re.sub(r"\b\d+\b", "?", query)
+    return " ".join(query.split())
+
+
+def explain_query_plan(
+    connection: sqlite3.Connection,
+    query: str,
+) -> List[str]:
+    rows = connection.execute(f"EXPLAIN QUERY PLAN {query}")
+    return [row[3] for row in rows]
+
+
+def find_plan_problems(details: List[str]) -> List[str]:
+    """
+    Возвращает шаги плана, которые читают всю таблицу или индекс (SCAN)
+    или сортируют результат во временном B-дереве.
+    """
+    return [
+        detail for detail in details
+        if detail != "SCAN CONSTANT ROW" and detail.startswith(PROBLEM_STEPS)
+    ]
+
+
+@contextmanager
+def record_query_plans(
+    pool: SqliteConnectionPool,
+) -> Iterator[Dict[str, QueryPlan]]:
+    """
+    Записывает запросы, выполненные через соединения пула внутри блока
+    with, и после выхода из блока заполняет словарь планами их
+    выполнения (EXPLAIN QUERY PLAN). Ключ словаря - нормализованный текст
+    запроса (см. normalize_query), поэтому каждая форма запроса
+    встречается один раз.
+
+    :param pool: Пул соединений репозитория.
+    :type pool: SqliteConnectionPool
+    :rtype: Dict[str, QueryPlan]
+    """
+    queries: List[str] = []
+    plans: Dict[str, QueryPlan] = {}
+    pool.set_trace_callback(queries.append)
+    try:
+        yield plans
+    finally:
+        pool.set_trace_callback(None)
+
+    connection = sqlite3.connect(pool.db_path)
+    try:
+        for query in queries:
+            shape = normalize_query(query)
+            if shape in plans or shape.startswith(NO_PLAN_PREFIXES):
+                continue
+            details = explain_query_plan(connection, query)
+            plans[shape] = QueryPlan(
+                query=shape,
+                details=details,
+                problems=find_plan_problems(details),
+            )
+    finally:
+        connection.close()
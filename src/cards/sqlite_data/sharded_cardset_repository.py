@@ -0,0 +1,430 @@
+import heapq
+import random
+import threading
+import datetime
+from contextlib import contextmanager, ExitStack
+from typing import Any, Optional, List, Iterator, Sequence
+
+from ..core import CardsetRepositoryABC
+from ..core import (
+    Card,
+    Cardset,
+    CardSpec,
+    CardsetInfo,
+    CardsetInfoSpec,
+    CardsSort,
+    CardsetsSort,
+    SortOrder,
+    CardField,
+    CardsetInfoField,
+    ResourceVersion,
+    Changes,
+)
+from .cardset_repository import CardsetRepository, TIME_COLUMNS
+from .sharding import (
+    bucket_for_owner,
+    bucket_for_id,
+    bucket_prefix,
+    shard_paths,
+    load_bucket_map,
+)
+
+
+def merge_pages(
+    pages: Sequence[List[Any]],
+    attribute: str,
+    order: Optional[SortOrder],
+) -> List[Any]:
+    """
+    Объединяет страницы, отсортированные на шардах по атрибуту attribute,
+    в том же порядке, что и SQLite: None меньше любого значения, объекты
+    с одинаковым временем упорядочиваются по id.
+    """
+    def key(obj):
+        value = getattr(obj, attribute)
+        if attribute in TIME_COLUMNS:
+            return value is not None, value, obj.id
+        return value is not None, value
+
+    return list(heapq.merge(*pages, key=key, reverse=order == SortOrder.DESC))
+
+
+class ShardCardsetRepository(CardsetRepository):
+    """
+    Репозиторий одного шарда: id новых объектов начинаются с символа
+    бакета, к которому относится владелец.
+    """
+
+    def _cardset_id_prefix(self, owner_id: str) -> str:
+        return bucket_prefix(bucket_for_owner(owner_id))
+
+    def _card_id_prefix(self, cardset_id: str) -> str:
+        return cardset_id[0]
+
+
+class ShardedCardsetRepository(CardsetRepositoryABC):
+    """
+    Репозиторий наборов карточек, распределяющий владельцев по нескольким
+    файлам SQLite. Владелец относится к виртуальному бакету по
+    стабильному хешу owner_id, бакет - к файлу шарда. Символ бакета
+    хранится первым символом id, поэтому запросы по cardset_id и card_id
+    обращаются ровно к одному шарду. Запись разных пользователей в разные
+    шарды не конкурирует за одну блокировку SQLite.
+
+    :param db_path: Базовый путь к файлу базы данных, пути шардов
+        строятся функцией shard_paths.
+    :type db_path: str
+    :param shard_count: Количество шардов.
+    :type shard_count: int
+    :param pool_size: Размер пула соединений каждого шарда.
+    :type pool_size: int
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        shard_count: int,
+        pool_size: int = 4,
+    ) -> None:
+        self.db_path = db_path
+        self.shard_count = shard_count
+        self.shards = [
+            ShardCardsetRepository(path, pool_size)
+            for path in shard_paths(db_path, shard_count)
+        ]
+        self._local = threading.local()
+        self.reload_bucket_map()
+
+    def reload_bucket_map(self) -> None:
+        """
+        Перечитывает распределение бакетов по шардам, например после
+        rebalance_shards.
+        """
+        self.bucket_map = load_bucket_map(
+            [shard.db_path for shard in self.shards]
+        )
+
+    def close(self) -> None:
+        for shard in self.shards:
+            shard.close()
+
+    @contextmanager
+    def unit_of_work(
+        self,
+        write: bool = False,
+        requester_id: Optional[str] = None,
+    ) -> Iterator[None]:
+        """
+        Единица работы открывается на шарде при первом обращении к нему
+        внутри блока with. Операции одного владельца выполняются на одном
+        шарде в одной транзакции; при обращении к нескольким шардам
+        транзакции фиксируются по отдельности.
+        """
+        if getattr(self._local, "stack", None) is not None:
+            yield
+            return
+
+        with ExitStack() as stack:
+            self._local.stack = stack
+            self._local.write = write
+            self._local.requester_id = requester_id
+            self._local.entered = set()
+            try:
+                yield
+            finally:
+                self._local.stack = None
+
+    def __use(self, shard: CardsetRepository) -> CardsetRepository:
+        stack = getattr(self._local, "stack", None)
+        if stack is not None and id(shard) not in self._local.entered:
+            stack.enter_context(shard.unit_of_work(
+                self._local.write, self._local.requester_id
+            ))
+            self._local.entered.add(id(shard))
+        return shard
+
+    def __all_shards(self) -> List[CardsetRepository]:
+        return [self.__use(shard) for shard in self.shards]
+
+    def shard_for_owner(self, owner_id: str) -> CardsetRepository:
+        bucket = bucket_for_owner(owner_id)
+        return self.__use(self.shards[self.bucket_map[bucket]])
+
+    def shard_for_id(self, id: str) -> CardsetRepository:
+        bucket = bucket_for_id(id)
+        if bucket is None:
+            # Объекта с таким id нет ни в одном шарде: запрос к любому
+            # из них вернет пустой результат, как и для несуществующего
+            # id с допустимым префиксом.
+            bucket = 0
+        return self.__use(self.shards[self.bucket_map[bucket]])
+
+    def get_cardset_infos(
+        self,
+        cardset_id: Optional[str] = None,
+        user_id: Optional[str] = None,
+        offset: Optional[int] = 0,
+        limit: Optional[int] = 10,
+        include_deleted: Optional[bool] = False,
+        fields: Optional[List[CardsetInfoField]] = None,
+        sort: Optional[CardsetsSort] = CardsetsSort.TITLE,
+        order: Optional[SortOrder] = SortOrder.ASC,
+        modified_after: Optional[datetime.datetime] = None,
+        modified_before: Optional[datetime.datetime] = None,
+    ) -> List[CardsetInfo]:
+        """
+            Метод get_cardset_infos возвращает наборы карточек в укороченном
+            (без карточек) виде. Без cardset_id и user_id запрос
+            выполняется на всех шардах, результаты объединяются (для
+            объединения к проекции fields добавляются ключ сортировки и
+            id).
+        """
+        sort = sort or CardsetsSort.TITLE
+        shard = None
+        if cardset_id:
+            shard = self.shard_for_id(cardset_id)
+        elif user_id:
+            shard = self.shard_for_owner(user_id)
+
+        if shard is not None:
+            return shard.get_cardset_infos(
+                cardset_id=cardset_id,
+                user_id=user_id,
+                offset=offset,
+                limit=limit,
+                include_deleted=include_deleted,
+                fields=fields,
+                sort=sort,
+                order=order,
+                modified_after=modified_after,
+                modified_before=modified_before,
+            )
+
+        if fields is not None:
+            fields = [
+                *fields, CardsetInfoField(sort.value), CardsetInfoField.ID,
+            ]
+        offset, limit = offset or 0, limit or 0
+        pages = [
+            shard.get_cardset_infos(
+                offset=0,
+                limit=offset + limit,
+                include_deleted=include_deleted,
+                fields=fields,
+                sort=sort,
+                order=order,
+                modified_after=modified_after,
+                modified_before=modified_before,
+            )
+            for shard in self.__all_shards()
+        ]
+        merged = merge_pages(pages, sort.value, order)
+        return merged[offset:offset + limit]
+
+    def get_cards(
+        self,
+        card_id: Optional[str] = None,
+        cardset_id: Optional[str] = None,
+        offset: Optional[int] = 0,
+        limit: Optional[int] = 10,
+        include_deleted: Optional[bool] = False,
+        mixed: Optional[bool] = False,
+        sort: Optional[CardsSort] = CardsSort.TERM,
+        fields: Optional[List[CardField]] = None,
+        order: Optional[SortOrder] = SortOrder.ASC,
+        modified_after: Optional[datetime.datetime] = None,
+        modified_before: Optional[datetime.datetime] = None,
+    ) -> List[Card]:
+        """
+            Метод get_cards возвращает выборку карточек. Без card_id и
+            cardset_id запрос выполняется на всех шардах (для объединения
+            к проекции fields добавляются ключ сортировки и id).
+        """
+        sort = sort or CardsSort.TERM
+        routing_id = card_id or cardset_id
+        if routing_id:
+            return self.shard_for_id(routing_id).get_cards(
+                card_id=card_id,
+                cardset_id=cardset_id,
+                offset=offset,
+                limit=limit,
+                include_deleted=include_deleted,
+                mixed=mixed,
+                sort=sort,
+                fields=fields,
+                order=order,
+                modified_after=modified_after,
+                modified_before=modified_before,
+            )
+
+        if fields is not None:
+            fields = [*fields, CardField(sort.value), CardField.ID]
+        offset, limit = offset or 0, limit or 0
+        pages = [
+            shard.get_cards(
+                offset=0,
+                limit=offset + limit,
+                include_deleted=include_deleted,
+                mixed=mixed,
+                sort=sort,
+                fields=fields,
+                order=order,
+                modified_after=modified_after,
+                modified_before=modified_before,
+            )
+            for shard in self.__all_shards()
+        ]
+        if mixed:
+            cards = [card for page in pages for card in page]
+            random.shuffle(cards)
+        else:
+            cards = merge_pages(pages, sort.value, order)
+        return cards[offset:offset + limit]
+
+    def get_cardset(
+        self,
+        cardset_id: str,
+        include_deleted: Optional[bool] = False,
+    ) -> Cardset | None:
+        return self.shard_for_id(cardset_id).get_cardset(
+            cardset_id=cardset_id,
+            include_deleted=include_deleted,
+        )
+
+    def get_cardset_infos_version(
+        self,
+        cardset_id: Optional[str] = None,
+        user_id: Optional[str] = None,
+    ) -> ResourceVersion | None:
+        if cardset_id:
+            shard = self.shard_for_id(cardset_id)
+        elif user_id:
+            shard = self.shard_for_owner(user_id)
+        else:
+            return None
+        return shard.get_cardset_infos_version(
+            cardset_id=cardset_id,
+            user_id=user_id,
+        )
+
+    def get_cards_version(
+        self,
+        card_id: Optional[str] = None,
+        cardset_id: Optional[str] = None,
+    ) -> ResourceVersion | None:
+        routing_id = card_id or cardset_id
+        if not routing_id:
+            return None
+        return self.shard_for_id(routing_id).get_cards_version(
+            card_id=card_id,
+            cardset_id=cardset_id,
+        )
+
+    def get_changes(
+        self,
+        owner_id: str,
+        since: int = 0,
+        limit: int = 100,
+    ) -> Changes:
+        # Все объекты пользователя хранятся в шарде его бакета.
+        return self.shard_for_owner(owner_id).get_changes(
+            owner_id=owner_id,
+            since=since,
+            limit=limit,
+        )
+
+    def create_cardset_info(
+        self,
+        owner_id: str,
+        spec: CardsetInfoSpec,
+    ) -> CardsetInfo | None:
+        return self.shard_for_owner(owner_id).create_cardset_info(
+            owner_id=owner_id,
+            spec=spec,
+        )
+
+    def modify_cardset_info(
+        self,
+        cardset_id: str,
+        spec: CardsetInfoSpec,
+    ) -> CardsetInfo | None:
+        return self.shard_for_id(cardset_id).modify_cardset_info(
+            cardset_id=cardset_id,
+            spec=spec,
+        )
+
+    def create_card(
+        self,
+        cardset_id: str,
+        spec: CardSpec,
+    ) -> Card | None:
+        return self.shard_for_id(cardset_id).create_card(
+            cardset_id=cardset_id,
+            spec=spec,
+        )
+
+    def modify_card(
+        self,
+        card_id: str,
+        spec: CardSpec,
+    ) -> Card | None:
+        return self.shard_for_id(card_id).modify_card(
+            card_id=card_id,
+            spec=spec,
+        )
+
+    def clone_cardset(
+        self,
+        cardset_id: str,
+    ) -> CardsetInfo | None:
+        # Копия принадлежит тому же владельцу, поэтому остается в шарде
+        # исходного набора карточек.
+        return self.shard_for_id(cardset_id).clone_cardset(
+            cardset_id=cardset_id,
+        )
+
+    def delete_cardset_cards(
+        self,
+        cardset_id: str,
+        limit: int,
+    ) -> int:
+        return self.shard_for_id(cardset_id).delete_cardset_cards(
+            cardset_id=cardset_id,
+            limit=limit,
+        )
+
+    def delete_cardset(
+        self,
+        cardset_id: str,
+    ) -> CardsetInfo | None:
+        return self.shard_for_id(cardset_id).delete_cardset(
+            cardset_id=cardset_id,
+        )
+
+    def delete_card(
+        self,
+        card_id: str,
+    ) -> Card | None:
+        return self.shard_for_id(card_id).delete_card(
+            card_id=card_id,
+        )
+
+    def move_card(
+        self,
+        card_id: str,
+        before_id: Optional[str] = None,
+        after_id: Optional[str] = None,
+    ) -> Card | None:
+        return self.shard_for_id(card_id).move_card(
+            card_id=card_id,
+            before_id=before_id,
+            after_id=after_id,
+        )
+
+    def rebalance_card_positions(
+        self,
+        cardset_id: str,
+    ) -> int:
+        return self.shard_for_id(cardset_id).rebalance_card_positions(
+            cardset_id=cardset_id,
+        )
@@ -0,0 +1,254 @@
+import os
+import zlib
+import sqlite3
+from typing import Dict, List, Optional
+
+from .migrations import migrate
+from .utils import ID_ALPHABET, immediate_transaction
+
+
+# Каждый владелец относится к одному из BUCKET_COUNT виртуальных бакетов,
+# номер бакета кодируется первым символом id наборов карточек и карточек.
+# Между файлами шардов перемещаются бакеты целиком, поэтому id объектов
+# при перебалансировке не меняются.
+BUCKET_COUNT = len(ID_ALPHABET)
+
+SHARD_BUCKETS_QUERY = """
+    CREATE TABLE IF NOT EXISTS ShardBucket (
+        bucket INTEGER PRIMARY KEY
+    );
+"""
+
+
+def bucket_for_owner(owner_id: str) -> int:
+    return zlib.crc32(owner_id.encode()) % BUCKET_COUNT
+
+
+def bucket_for_id(id: str) -> Optional[int]:
+    """
+    Возвращает бакет объекта по первому символу id или None, если символ
+    не входит в ID_ALPHABET: объекта с таким id нет ни в одном шарде.
+    """
+    bucket = ID_ALPHABET.find(id[:1])
+    return bucket if bucket >= 0 else None
+
+
+def bucket_prefix(bucket: int) -> str:
+    return ID_ALPHABET[bucket]
+
+
+def shard_paths(db_path: str, shard_count: int) -> List[str]:
+    root, extension = os.path.splitext(db_path)
+    return [f"{root}.shard{index}{extension}" for index in range(shard_count)]
+
+
+def default_bucket_map(shard_count: int) -> Dict[int, int]:
+    return {bucket: bucket % shard_count for bucket in range(BUCKET_COUNT)}
+
+
+def initialize_shard_buckets(paths: List[str], reset: bool = True) -> None:
+    """
+    Записывает в файлы шардов распределение бакетов по умолчанию.
+
+    :param paths: Пути к файлам шардов.
+    :type paths: List[str]
+    :param reset: Если False, существующее распределение сохраняется,
+        а бакеты записываются только в шарды без закрепленных бакетов.
+    :type reset: bool
+    """
+    bucket_map = default_bucket_map(len(paths))
+    for index, path in enumerate(paths):
+        connection = sqlite3.connect(path, isolation_level=None)
+        try:
+            connection.executescript(SHARD_BUCKETS_QUERY)
+            with immediate_transaction(connection):
+                if reset:
+                    connection.execute("DELETE FROM ShardBucket")
+                elif connection.execute(
+                    "SELECT EXISTS(SELECT 1 FROM ShardBucket)"
+                ).fetchone()[0]:
+                    continue
+                connection.executemany(
+                    "INSERT INTO ShardBucket (bucket) VALUES (?)",
+                    [
+                        (bucket,)
+                        for bucket, shard in bucket_map.items()
+                        if shard == index
+                    ],
+                )
+        finally:
+            connection.close()
+
+
+def load_bucket_map(paths: List[str]) -> Dict[int, int]:
+    """
+    Читает распределение бакетов из файлов шардов. Бакеты, которые не
+    закреплены ни за одним шардом, распределяются по умолчанию.
+    """
+    bucket_map = default_bucket_map(len(paths))
+    for index, path in enumerate(paths):
+        if not os.path.exists(path):
+            continue
+        connection = sqlite3.connect(path)
+        try:
+            connection.executescript(SHARD_BUCKETS_QUERY)
+            for (bucket,) in connection.execute(
+                "SELECT bucket FROM ShardBucket"
+            ):
+                bucket_map[bucket] = index
+        finally:
+            connection.close()
+    return bucket_map
+
+
+def rebalance_shards(
+    db_path: str,
+    shard_count: int,
+    target_shard_count: int,
+) -> Dict[int, int]:
+    """
+    Перераспределяет бакеты между файлами шардов при изменении их
+    количества. Каждый бакет переносится в отдельной транзакции, которая
+    удерживает блокировку записи исходного шарда.
+
+    Операция предназначена для выполнения в окне обслуживания: запросы,
+    которые в момент переноса пишут в переносимые бакеты, могут
+    завершиться ошибкой. Работающие экземпляры ShardedCardsetRepository
+    должны после перебалансировки вызвать reload_bucket_map.
+
+    :param db_path: Базовый путь к файлу базы данных.
+    :type db_path: str
+    :param shard_count: Текущее количество шардов.
+    :type shard_count: int
+    :param target_shard_count: Требуемое количество шардов.
+    :type target_shard_count: int
+    :return: Количество перенесенных бакетов для каждого шарда-получателя.
+    :rtype: Dict[int, int]
+    """
+    paths = shard_paths(db_path, max(shard_count, target_shard_count))
+    for path in paths:
+        migrate(path, vacuum=False)
+
+    current_map = load_bucket_map(paths[:shard_count])
+    target_map = default_bucket_map(target_shard_count)
+
+    moved: Dict[int, int] = {}
+    for bucket in range(BUCKET_COUNT):
+        source, target = current_map[bucket], target_map[bucket]
+        if source == target:
+            continue
+        _move_bucket(paths[source], paths[target], bucket)
+        moved[target] = moved.get(target, 0) + 1
+
+    return moved
+
+
+def _move_bucket(source_path: str, target_path: str, bucket: int) -> None:
+    connection = sqlite3.connect(source_path, isolation_level=None)
+    connection.create_function(
+        "owner_bucket", 1, bucket_for_owner, deterministic=True
+    )
+    try:
+        connection.executescript(SHARD_BUCKETS_QUERY)
+        connection.execute("ATTACH DATABASE ? AS target", [target_path])
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS target.ShardBucket "
+            "(bucket INTEGER PRIMARY KEY)"
+        )
+
+        prefix = bucket_prefix(bucket)
+        with immediate_transaction(connection):
+            # Номера изменений пользователя должны расти и после переноса:
+            # счетчик журнала в целевом шарде догоняет исходный, а
+            # перенесенные объекты попадают в журнал как измененные.
+            connection.execute(
+                """
+                UPDATE target.sqlite_sequence
+                SET seq = MAX(seq, (
+                    SELECT COALESCE(MAX(seq), 0) FROM main.sqlite_sequence
+                    WHERE name = 'Change'
+                ))
+                WHERE name = 'Change'
+                """
+            )
+            connection.execute(
+                """
+                INSERT INTO target.sqlite_sequence (name, seq)
+                SELECT name, seq FROM main.sqlite_sequence
+                WHERE name = 'Change' AND NOT EXISTS (
+                    SELECT 1 FROM target.sqlite_sequence
+                    WHERE name = 'Change'
+                )
+                """
+            )
+            # Записи журнала об удаленных объектах (tombstones) не
+            # восстанавливаются триггерами целевого шарда, поэтому
+            # переносятся отдельно, с новыми номерами: клиенты, получившие
+            # since до перебалансировки, должны узнать об удалении.
+            connection.execute(
+                """
+                INSERT OR REPLACE INTO target.Change
+                    (owner_id, kind, object_id)
+                SELECT c.owner_id, c.kind, c.object_id
+                FROM main.Change AS c
+                LEFT JOIN main.Cardset AS s
+                    ON c.kind = 'cardset' AND s.id = c.object_id
+                LEFT JOIN main.Card AS k
+                    ON c.kind = 'card' AND k.id = c.object_id
+                WHERE substr(c.object_id, 1, 1) = ?
+                    AND s.id IS NULL AND k.id IS NULL
+                ORDER BY c.seq
+                """,
+                [prefix],
+            )
+            # Версии переносятся до строк: триггеры на вставку в целевом
+            # шарде увеличат их, и ETag не повторится.
+            connection.execute(
+                """
+                INSERT OR REPLACE INTO target.ResourceVersion
+                SELECT * FROM main.ResourceVersion
+                WHERE (scope = 'cardset' AND substr(scope_id, 1, 1) = ?)
+                    OR (scope = 'owner' AND owner_bucket(scope_id) = ?)
+                """,
+                [prefix, bucket],
+            )
+            for table in ("Cardset", "Card"):
+                connection.execute(
+                    f"""
+                    INSERT INTO target.{table}
+                    SELECT * FROM main.{table}
+                    WHERE substr(id, 1, 1) = ?
+                    """,
+                    [prefix],
+                )
+            connection.execute(
+                "DELETE FROM main.Card WHERE substr(id, 1, 1) = ?",
+                [prefix],
+            )
+            connection.execute(
+                "DELETE FROM main.Cardset WHERE substr(id, 1, 1) = ?",
+                [prefix],
+            )
+            connection.execute(
+                "DELETE FROM main.Change WHERE substr(object_id, 1, 1) = ?",
+                [prefix],
+            )
+            connection.execute(
+                """
+                DELETE FROM main.ResourceVersion
+                WHERE (scope = 'cardset' AND substr(scope_id, 1, 1) = ?)
+                    OR (scope = 'owner' AND owner_bucket(scope_id) = ?)
+                """,
+                [prefix, bucket],
+            )
+            connection.execute(
+                "DELETE FROM main.ShardBucket WHERE bucket = ?", [bucket]
+            )
+            connection.execute(
+                "INSERT OR IGNORE INTO target.ShardBucket (bucket) "
+                "VALUES (?)",
+                [bucket],
+            )
+        connection.execute("DETACH DATABASE target")
+    finally:
+        connection.close()
@@ -0,0 +1,183 @@
+import os
+import time
+import sqlite3
+import threading
+from typing import Optional, Tuple
+
+from .connection_pool import SqliteConnectionPool
+
+
+class SnapshotRefresher:
+    """
+    Периодически копирует основную базу данных в файл снимка для чтения
+    с помощью backup API SQLite. Снимок сначала записывается во
+    временный файл, который затем атомарно заменяет предыдущий снимок,
+    поэтому читатели никогда не видят частично записанный файл. Время
+    изменения файла снимка равно моменту начала копирования: данные,
+    зафиксированные до этого момента, в снимок попали.
+
+    Если несколько процессов (например, рабочие процессы приложения)
+    запускают обновление одного снимка, его выполняет только процесс,
+    удерживающий блокировку SQLite файла ``<snapshot_path>.lock``.
+    Остальные проверяют блокировку каждый период и продолжают
+    обновление, если процесс-владелец завершился.
+
+    :param db_path: Путь к основной базе данных.
+    :type db_path: str
+    :param snapshot_path: Путь к файлу снимка.
+    :type snapshot_path: str
+    :param interval: Период обновления снимка в секундах.
+    :type interval: float
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        snapshot_path: str,
+        interval: float = 1.0,
+    ) -> None:
+        self.db_path = db_path
+        self.snapshot_path = snapshot_path
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock_connection: Optional[sqlite3.Connection] = None
+
+    def refresh(self) -> float:
+        """
+        Обновляет снимок.
+
+        :return: Время начала копирования (time.time()).
+        :rtype: float
+        """
+        # Снимок может обновляться из нескольких рабочих процессов.
+        temporary_path = f"{self.snapshot_path}.{os.getpid()}.tmp"
+        taken_at = time.time()
+
+        source = sqlite3.connect(self.db_path)
+        target = sqlite3.connect(temporary_path)
+        try:
+            source.backup(target)
+            # Снимок открывается только для чтения, поэтому он не должен
+            # требовать файлов журнала WAL.
+            target.execute("PRAGMA journal_mode = DELETE")
+        finally:
+            target.close()
+            source.close()
+
+        os.utime(temporary_path, (taken_at, taken_at))
+        os.replace(temporary_path, self.snapshot_path)
+        return taken_at
+
+    def start(self) -> None:
+        """
+        Создает снимок и запускает его периодическое обновление в
+        фоновом потоке текущего процесса.
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        if self.__acquire_lock():
+            self.refresh()
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self.__run,
+            name="cards-snapshot-refresher",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._lock_connection is not None:
+            self._lock_connection.close()
+            self._lock_connection = None
+
+    def __acquire_lock(self) -> bool:
+        if self._lock_connection is not None:
+            return True
+        connection = sqlite3.connect(
+            f"{self.snapshot_path}.lock",
+            timeout=0,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        try:
+            # Транзакция остается открытой, пока процесс обновляет снимок;
+            # при завершении процесса блокировка снимается.
+            connection.execute("BEGIN EXCLUSIVE")
+        except sqlite3.OperationalError:
+            connection.close()
+            return False
+        self._lock_connection = connection
+        return True
+
+    def __run(self) -> None:
+        while not self._stop.wait(self.interval):
+            if self.__acquire_lock():
+                self.refresh()
+
+
+class SnapshotReader:
+    """
+    Выдает пул соединений только для чтения к актуальному файлу снимка.
+    При замене файла снимка пул пересоздается, так как открытые
+    соединения продолжают читать замененный файл.
+
+    :param snapshot_path: Путь к файлу снимка.
+    :type snapshot_path: str
+    :param max_staleness: Максимальный возраст снимка в секундах, при
+        котором из него допускается чтение.
+    :type max_staleness: float
+    :param pool_size: Размер пула соединений.
+    :type pool_size: int
+    """
+
+    def __init__(
+        self,
+        snapshot_path: str,
+        max_staleness: float = 5.0,
+        pool_size: int = 4,
+    ) -> None:
+        self.snapshot_path = snapshot_path
+        self.max_staleness = max_staleness
+        self.pool_size = pool_size
+        self._lock = threading.Lock()
+        self._generation: Optional[Tuple[int, int]] = None
+        self._pool: Optional[SqliteConnectionPool] = None
+
+    def pool(self) -> Optional[SqliteConnectionPool]:
+        """
+        Возвращает пул соединений к снимку или None, если снимка нет или
+        он старше max_staleness.
+        """
+        try:
+            stat = os.stat(self.snapshot_path)
+        except FileNotFoundError:
+            return None
+
+        if time.time() - stat.st_mtime > self.max_staleness:
+            return None
+
+        generation = (stat.st_ino, stat.st_mtime_ns)
+        with self._lock:
+            if generation != self._generation:
+                if self._pool is not None:
+                    self._pool.close()
+                self._pool = SqliteConnectionPool(
+                    self.snapshot_path,
+                    size=self.pool_size,
+                    read_only=True,
+                )
+                self._generation = generation
+            return self._pool
+
+    def close(self) -> None:
+        with self._lock:
+            if self._pool is not None:
+                self._pool.close()
+            self._pool = None
+            self._generation = None
@@ -1,15 +1,18 @@
 import sqlite3
 import random
 import string
+from contextlib import contextmanager
 
 
-def generate_unique_id(db_path, table_name, column_name):
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
+ID_ALPHABET = string.ascii_letters + string.digits
+
+
+def generate_unique_id(connection, table_name, column_name, prefix=""):
+    cursor = connection.cursor()
 
     while True:
-        new_id = ''.join(
-            random.choices(string.ascii_letters + string.digits, k=8)
+        new_id = prefix + ''.join(
+            random.choices(ID_ALPHABET, k=8 - len(prefix))
         )
         query = f"""
             SELECT EXISTS(SELECT 1 FROM {table_name} WHERE {column_name}=?)
@@ -19,41 +22,349 @@ def generate_unique_id(db_path, table_name, column_name):
         if not exists:
             break
 
-    conn.close()
     return new_id
 
 
-CREATE_DB_QUERY = """
+def random_id_expression(prefix_length=0):
+    """
+    Возвращает SQL-выражение, которое для каждой строки выборки строит
+    случайный id из символов ID_ALPHABET длиной 8 - prefix_length.
+    Выражение принимает алфавит именованным параметром :alphabet.
+    """
+    character = f"substr(:alphabet, 1 + abs(random() % {len(ID_ALPHABET)}), 1)"
+    return " || ".join([character] * (8 - prefix_length))
+
+
+@contextmanager
+def immediate_transaction(connection):
+    """
+    Выполняет блок в транзакции BEGIN IMMEDIATE на соединении в режиме
+    autocommit (isolation_level=None).
+    """
+    connection.execute("BEGIN IMMEDIATE")
+    try:
+        yield connection
+    except BaseException:
+        connection.execute("ROLLBACK")
+        raise
+    connection.execute("COMMIT")
+
+
+def execute_statements(connection, script):
+    """
+    Выполняет SQL-скрипт по одной инструкции. В отличие от executescript
+    не завершает текущую транзакцию перед выполнением.
+    """
+    statement = ""
+    for part in script.split(";"):
+        statement += part + ";"
+        if sqlite3.complete_statement(statement):
+            if statement.strip(" \t\n;"):
+                connection.execute(statement)
+            statement = ""
+
+
+SCHEMA_VERSION = 6
+
+STATUS_PRESENT = 0
+STATUS_ABSENT = 1
+
+# Режим auto_vacuum применяется только к пустому файлу базы данных (или
+# при полном VACUUM), поэтому задается до создания таблиц и до перехода
+# в режим WAL. Свободные страницы возвращает SqliteMaintainer.
+AUTO_VACUUM_QUERY = "PRAGMA auto_vacuum = INCREMENTAL;"
+
+CREATE_TABLES_QUERY = """
     CREATE TABLE IF NOT EXISTS CardsStatus (
-        status TEXT,
-        CONSTRAINT status_check CHECK (status IN ('present', 'absent'))
+        code INTEGER PRIMARY KEY,
+        status TEXT NOT NULL UNIQUE
     );
 
-    INSERT INTO CardsStatus (status) VALUES ('present'), ('absent');
+    INSERT OR IGNORE INTO CardsStatus (code, status)
+    VALUES (0, 'present'), (1, 'absent');
 
     CREATE TABLE IF NOT EXISTS Cardset (
         id TEXT PRIMARY KEY,
         title TEXT NOT NULL,
         description TEXT,
-        created_at DATETIME NOT NULL,
-        modified_at DATETIME NOT NULL,
-        addressed_at DATETIME,
-        status TEXT NOT NULL,
-        owner_id TEXT NOT NULL,
-        FOREIGN KEY (status) REFERENCES CardsStatus(status)
-    );
+        created_at INTEGER NOT NULL,
+        modified_at INTEGER NOT NULL,
+        addressed_at INTEGER,
+        status INTEGER NOT NULL CHECK (status IN (0, 1)),
+        owner_id TEXT NOT NULL
+    ) WITHOUT ROWID;
 
     CREATE TABLE IF NOT EXISTS Card (
         id TEXT PRIMARY KEY,
         term TEXT NOT NULL,
         description TEXT,
-        created_at DATETIME NOT NULL,
-        modified_at DATETIME NOT NULL,
-        addressed_at DATETIME,
-        status TEXT NOT NULL,
+        created_at INTEGER NOT NULL,
+        modified_at INTEGER NOT NULL,
+        addressed_at INTEGER,
+        status INTEGER NOT NULL CHECK (status IN (0, 1)),
         owner_id TEXT NOT NULL,
         cardset_id TEXT NOT NULL,
-        FOREIGN KEY (status) REFERENCES CardsStatus(status),
+        position TEXT NOT NULL DEFAULT '',
         FOREIGN KEY (cardset_id) REFERENCES Cardset(id) ON DELETE CASCADE
+    ) WITHOUT ROWID;
+
+    CREATE TABLE IF NOT EXISTS ResourceVersion (
+        scope TEXT NOT NULL,
+        scope_id TEXT NOT NULL,
+        owner_id TEXT NOT NULL,
+        version INTEGER NOT NULL,
+        modified_at INTEGER NOT NULL,
+        PRIMARY KEY (scope, scope_id)
     );
+
+    CREATE TABLE IF NOT EXISTS Change (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        owner_id TEXT NOT NULL,
+        kind TEXT NOT NULL CHECK (kind IN ('cardset', 'card')),
+        object_id TEXT NOT NULL,
+        UNIQUE (kind, object_id)
+    );
+"""
+
+# Индексы и триггеры создаются идемпотентно и пересоздаются после
+# миграций, которые пересобирают таблицы.
+CREATE_SCHEMA_OBJECTS_QUERY = """
+    -- Индексы живых объектов содержат столбцы, по которым проверяются
+    -- права (owner_id) и условие индекса (status): без них SQLite не
+    -- считает индекс покрывающим, и выборки с проекцией (id и ключ
+    -- сортировки) обращаются к таблице.
+    CREATE INDEX IF NOT EXISTS Cardset_owner_title_live
+        ON Cardset (owner_id, title, status) WHERE status = 0;
+
+    CREATE INDEX IF NOT EXISTS Cardset_owner_title
+        ON Cardset (owner_id, title);
+
+    CREATE INDEX IF NOT EXISTS Cardset_absent_modified
+        ON Cardset (modified_at) WHERE status = 1;
+
+    -- Индекс также используется для поиска карточек при каскадном
+    -- удалении набора карточек.
+    CREATE INDEX IF NOT EXISTS Card_cardset_term
+        ON Card (cardset_id, term);
+
+    CREATE INDEX IF NOT EXISTS Card_cardset_term_live
+        ON Card (cardset_id, term, owner_id, status) WHERE status = 0;
+
+    CREATE INDEX IF NOT EXISTS Card_cardset_position
+        ON Card (cardset_id, position);
+
+    CREATE INDEX IF NOT EXISTS Card_cardset_position_live
+        ON Card (cardset_id, position, owner_id, status) WHERE status = 0;
+
+    -- Сортировки и фильтры по времени. Удаленных объектов немного,
+    -- поэтому отдельные индексы живых объектов не создаются: условие
+    -- status проверяется по строкам таблицы.
+    CREATE INDEX IF NOT EXISTS Cardset_owner_created
+        ON Cardset (owner_id, created_at);
+
+    CREATE INDEX IF NOT EXISTS Cardset_owner_modified
+        ON Cardset (owner_id, modified_at);
+
+    CREATE INDEX IF NOT EXISTS Cardset_owner_addressed
+        ON Cardset (owner_id, addressed_at);
+
+    CREATE INDEX IF NOT EXISTS Card_cardset_created
+        ON Card (cardset_id, created_at);
+
+    CREATE INDEX IF NOT EXISTS Card_cardset_modified
+        ON Card (cardset_id, modified_at);
+
+    CREATE INDEX IF NOT EXISTS Card_cardset_addressed
+        ON Card (cardset_id, addressed_at);
+
+    CREATE INDEX IF NOT EXISTS Card_absent_modified
+        ON Card (modified_at) WHERE status = 1;
+
+    CREATE INDEX IF NOT EXISTS Change_owner_seq
+        ON Change (owner_id, seq);
+
+    CREATE TRIGGER IF NOT EXISTS cardset_change_on_insert
+    AFTER INSERT ON Cardset
+    BEGIN
+        DELETE FROM Change WHERE kind = 'cardset' AND object_id = NEW.id;
+        INSERT INTO Change (owner_id, kind, object_id)
+        VALUES (NEW.owner_id, 'cardset', NEW.id);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS cardset_change_on_update
+    AFTER UPDATE ON Cardset
+    BEGIN
+        DELETE FROM Change WHERE kind = 'cardset' AND object_id = NEW.id;
+        INSERT INTO Change (owner_id, kind, object_id)
+        VALUES (NEW.owner_id, 'cardset', NEW.id);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS cardset_change_on_delete
+    AFTER DELETE ON Cardset
+    BEGIN
+        DELETE FROM Change WHERE kind = 'cardset' AND object_id = OLD.id;
+        INSERT INTO Change (owner_id, kind, object_id)
+        VALUES (OLD.owner_id, 'cardset', OLD.id);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS card_change_on_insert
+    AFTER INSERT ON Card
+    BEGIN
+        DELETE FROM Change WHERE kind = 'card' AND object_id = NEW.id;
+        INSERT INTO Change (owner_id, kind, object_id)
+        VALUES (NEW.owner_id, 'card', NEW.id);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS card_change_on_update
+    AFTER UPDATE ON Card
+    BEGIN
+        DELETE FROM Change WHERE kind = 'card' AND object_id = NEW.id;
+        INSERT INTO Change (owner_id, kind, object_id)
+        VALUES (NEW.owner_id, 'card', NEW.id);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS card_change_on_delete
+    AFTER DELETE ON Card
+    BEGIN
+        DELETE FROM Change WHERE kind = 'card' AND object_id = OLD.id;
+        INSERT INTO Change (owner_id, kind, object_id)
+        VALUES (OLD.owner_id, 'card', OLD.id);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS cardset_version_on_insert
+    AFTER INSERT ON Cardset
+    BEGIN
+        INSERT INTO ResourceVersion (
+            scope, scope_id, owner_id, version, modified_at
+        ) VALUES
+            (
+                'cardset', NEW.id, NEW.owner_id, 1,
+                CAST((julianday('now') - 2440587.5) * 86400000 AS INTEGER)
+            ),
+            (
+                'owner', NEW.owner_id, NEW.owner_id, 1,
+                CAST((julianday('now') - 2440587.5) * 86400000 AS INTEGER)
+            )
+        ON CONFLICT (scope, scope_id) DO UPDATE SET
+            version = version + 1,
+            modified_at = excluded.modified_at;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS cardset_version_on_update
+    AFTER UPDATE ON Cardset
+    BEGIN
+        INSERT INTO ResourceVersion (
+            scope, scope_id, owner_id, version, modified_at
+        ) VALUES
+            (
+                'cardset', NEW.id, NEW.owner_id, 1,
+                CAST((julianday('now') - 2440587.5) * 86400000 AS INTEGER)
+            ),
+            (
+                'owner', NEW.owner_id, NEW.owner_id, 1,
+                CAST((julianday('now') - 2440587.5) * 86400000 AS INTEGER)
+            )
+        ON CONFLICT (scope, scope_id) DO UPDATE SET
+            version = version + 1,
+            modified_at = excluded.modified_at;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS card_version_on_insert
+    AFTER INSERT ON Card
+    BEGIN
+        INSERT INTO ResourceVersion (
+            scope, scope_id, owner_id, version, modified_at
+        ) VALUES
+            (
+                'cardset', NEW.cardset_id, NEW.owner_id, 1,
+                CAST((julianday('now') - 2440587.5) * 86400000 AS INTEGER)
+            )
+        ON CONFLICT (scope, scope_id) DO UPDATE SET
+            version = version + 1,
+            modified_at = excluded.modified_at;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS card_version_on_update
+    AFTER UPDATE ON Card
+    BEGIN
+        INSERT INTO ResourceVersion (
+            scope, scope_id, owner_id, version, modified_at
+        ) VALUES
+            (
+                'cardset', NEW.cardset_id, NEW.owner_id, 1,
+                CAST((julianday('now') - 2440587.5) * 86400000 AS INTEGER)
+            )
+        ON CONFLICT (scope, scope_id) DO UPDATE SET
+            version = version + 1,
+            modified_at = excluded.modified_at;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS cardset_version_on_delete
+    AFTER DELETE ON Cardset
+    BEGIN
+        INSERT INTO ResourceVersion (
+            scope, scope_id, owner_id, version, modified_at
+        ) VALUES
+            (
+                'cardset', OLD.id, OLD.owner_id, 1,
+                CAST((julianday('now') - 2440587.5) * 86400000 AS INTEGER)
+            ),
+            (
+                'owner', OLD.owner_id, OLD.owner_id, 1,
+                CAST((julianday('now') - 2440587.5) * 86400000 AS INTEGER)
+            )
+        ON CONFLICT (scope, scope_id) DO UPDATE SET
+            version = version + 1,
+            modified_at = excluded.modified_at;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS card_version_on_delete
+    AFTER DELETE ON Card
+    BEGIN
+        INSERT INTO ResourceVersion (
+            scope, scope_id, owner_id, version, modified_at
+        ) VALUES
+            (
+                'cardset', OLD.cardset_id, OLD.owner_id, 1,
+                CAST((julianday('now') - 2440587.5) * 86400000 AS INTEGER)
+            )
+        ON CONFLICT (scope, scope_id) DO UPDATE SET
+            version = version + 1,
+            modified_at = excluded.modified_at;
+    END;
+"""
+
+CREATE_DB_QUERY = "".join((
+    AUTO_VACUUM_QUERY,
+    CREATE_TABLES_QUERY,
+    CREATE_SCHEMA_OBJECTS_QUERY,
+    f"PRAGMA user_version = {SCHEMA_VERSION};",
+))
+
+
+ARCHIVE_TABLES_QUERY = """
+    CREATE TABLE IF NOT EXISTS CardsetArchive (
+        id TEXT PRIMARY KEY,
+        title TEXT NOT NULL,
+        description TEXT,
+        created_at INTEGER NOT NULL,
+        modified_at INTEGER NOT NULL,
+        addressed_at INTEGER,
+        status INTEGER NOT NULL,
+        owner_id TEXT NOT NULL,
+        archived_at INTEGER NOT NULL
+    ) WITHOUT ROWID;
+
+    CREATE TABLE IF NOT EXISTS CardArchive (
+        id TEXT PRIMARY KEY,
+        term TEXT NOT NULL,
+        description TEXT,
+        created_at INTEGER NOT NULL,
+        modified_at INTEGER NOT NULL,
+        addressed_at INTEGER,
+        status INTEGER NOT NULL,
+        owner_id TEXT NOT NULL,
+        cardset_id TEXT NOT NULL,
+        archived_at INTEGER NOT NULL
+    ) WITHOUT ROWID;
 """
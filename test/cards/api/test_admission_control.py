@@ -0,0 +1,37 @@
+from fastapi.testclient import TestClient
+
+from cards import ApiAppBuilder, AdmissionController
+
+db_path = 'test_admission_control.db'
+owner_id = 'cuteseal'
+
+
+def test_rejected_writes_return_retry_after():
+    controller = AdmissionController(max_concurrency=0, max_queue=0)
+    builder = ApiAppBuilder(db_path=db_path, admission_controller=controller)
+    client = TestClient(builder.app)
+
+    response = client.post(
+        "/cardsets/",
+        params={"requester_id": owner_id, "owner_id": owner_id},
+        json={
+            "title": "title",
+            "description": "description",
+            "status": "present",
+            "cards": [],
+        },
+    )
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+    response = client.get(
+        "/cardsets/",
+        params={"requester_id": owner_id, "user_id": owner_id},
+    )
+    assert response.status_code == 200
+
+    metrics = client.get("/metrics/admission/").json()
+    assert metrics["rejected_overloaded"] == 1
+    assert metrics["queued"] == 0
+
+    builder.db_handler.delete_database_file()
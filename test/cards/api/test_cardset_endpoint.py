@@ -0,0 +1,473 @@
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+
+from cards import ApiAppBuilder, AppSettings
+
+db_path = 'test_cardset_endpoint.db'
+owner_id = 'cuteseal'
+
+
+def test_get_cardset_returns_cards():
+    builder = ApiAppBuilder(db_path=db_path)
+    client = TestClient(builder.app)
+
+    created = client.post(
+        "/cardsets/",
+        params={"requester_id": owner_id, "owner_id": owner_id},
+        json={
+            "title": "title",
+            "description": "description",
+            "status": "present",
+            "cards": [
+                {"term": "b", "description": "d", "status": "present"},
+                {"term": "a", "description": "d", "status": "present"},
+            ],
+        },
+    ).json()
+
+    response = client.get(
+        f"/cardset/{created['cardset_id']}/",
+        params={"requester_id": owner_id},
+    )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["cardset_id"] == created["cardset_id"]
+    assert body["title"] == "title"
+    assert [card["term"] for card in body["cards"]] == ["b", "a"]
+
+    not_modified = client.get(
+        f"/cardset/{created['cardset_id']}/",
+        params={"requester_id": owner_id},
+        headers={"If-None-Match": response.headers["etag"]},
+    )
+    assert not_modified.status_code == 304
+
+    builder.db_handler.delete_database_file()
+
+
+def test_unfiltered_lists_are_rejected():
+    builder = ApiAppBuilder(db_path=db_path)
+    client = TestClient(builder.app)
+
+    params = {"requester_id": owner_id}
+    assert client.get("/cardsets/", params=params).status_code == 400
+    assert client.get("/cards/", params=params).status_code == 400
+
+    builder.db_handler.delete_database_file()
+
+
+def test_get_cardset_missing_returns_404():
+    builder = ApiAppBuilder(db_path=db_path)
+    client = TestClient(builder.app)
+
+    response = client.get(
+        "/cardset/missing0/",
+        params={"requester_id": owner_id},
+    )
+
+    assert response.status_code == 404
+
+    builder.db_handler.delete_database_file()
+
+
+def test_factory_mode_keeps_data_between_starts():
+    factory_db_path = 'test_factory_mode.db'
+    builder = ApiAppBuilder(db_path=factory_db_path, factory=True)
+    assert not os.path.exists(factory_db_path)
+
+    with TestClient(builder.app) as client:
+        client.post(
+            "/cardsets/",
+            params={"requester_id": owner_id, "owner_id": owner_id},
+            json={
+                "title": "title",
+                "description": "description",
+                "status": "present",
+                "cards": [],
+            },
+        )
+
+    builder = ApiAppBuilder(db_path=factory_db_path, factory=True)
+    with TestClient(builder.app) as client:
+        response = client.get(
+            "/cardsets/",
+            params={"requester_id": owner_id, "user_id": owner_id},
+        )
+        assert len(response.json()) == 1
+
+    builder.db_handler.delete_database_file()
+
+
+def test_settings_from_env():
+    settings = AppSettings.from_env({
+        "CARDS_BACKEND": "sqlite-sharded",
+        "CARDS_POOL_SIZE": "2",
+        "CARDS_GROUP_COMMIT": "1",
+        "CARDS_WRITE_CONCURRENCY": "8",
+        "CARDS_MAINTENANCE_INTERVAL": "60",
+        "CARDS_GZIP_LEVEL": "0",
+    })
+    assert settings == AppSettings(
+        backend="sqlite-sharded",
+        db_path="cards.db",
+        pool_size=2,
+        group_commit=True,
+        write_concurrency=8,
+        maintenance_interval=60.0,
+        gzip_level=0,
+    )
+    assert AppSettings.from_env({}) == AppSettings(db_path="cards.db")
+
+
+def test_get_changes_pages_through_feed():
+    builder = ApiAppBuilder(db_path=db_path)
+    client = TestClient(builder.app)
+
+    created = client.post(
+        "/cardsets/",
+        params={"requester_id": owner_id, "owner_id": owner_id},
+        json={
+            "title": "title",
+            "description": "description",
+            "status": "present",
+            "cards": [
+                {"term": "a", "description": "d", "status": "present"},
+                {"term": "b", "description": "d", "status": "present"},
+            ],
+        },
+    ).json()
+
+    response = client.get(
+        "/changes/",
+        params={"requester_id": owner_id, "limit": 2},
+    )
+    assert response.status_code == 200
+    page = response.json()
+    assert [info["cardset_id"] for info in page["cardsets"]] \
+        == [created["cardset_id"]]
+    assert len(page["cards"]) == 1
+    assert page["has_more"]
+
+    response = client.get(
+        "/changes/",
+        params={"requester_id": owner_id, "since": page["next_since"]},
+    )
+    page = response.json()
+    assert len(page["cards"]) == 1
+    assert not page["has_more"]
+
+    response = client.get(
+        "/changes/",
+        params={"requester_id": owner_id, "since": page["next_since"]},
+    )
+    assert response.json()["cards"] == []
+
+    builder.db_handler.delete_database_file()
+
+
+def test_clone_cardset():
+    builder = ApiAppBuilder(db_path=db_path)
+    client = TestClient(builder.app)
+
+    created = client.post(
+        "/cardsets/",
+        params={"requester_id": owner_id, "owner_id": owner_id},
+        json={
+            "title": "title",
+            "description": "description",
+            "status": "present",
+            "cards": [
+                {"term": "b", "description": "d", "status": "present"},
+                {"term": "a", "description": "d", "status": "present"},
+            ],
+        },
+    ).json()
+
+    response = client.post(
+        f"/cardset/{created['cardset_id']}/clone",
+        params={"requester_id": owner_id},
+    )
+    assert response.status_code == 201
+    clone = response.json()
+    assert clone["cardset_id"] != created["cardset_id"]
+    assert clone["title"] == "title"
+
+    cardset = client.get(
+        f"/cardset/{clone['cardset_id']}/",
+        params={"requester_id": owner_id},
+    ).json()
+    assert [card["term"] for card in cardset["cards"]] == ["b", "a"]
+
+    builder.db_handler.delete_database_file()
+
+
+def test_delete_card_and_cardset():
+    builder = ApiAppBuilder(db_path=db_path)
+    client = TestClient(builder.app)
+
+    created = client.post(
+        "/cardsets/",
+        params={"requester_id": owner_id, "owner_id": owner_id},
+        json={
+            "title": "title",
+            "description": "description",
+            "status": "present",
+            "cards": [
+                {"term": "b", "description": "d", "status": "present"},
+                {"term": "a", "description": "d", "status": "present"},
+            ],
+        },
+    ).json()
+    cardset_url = f"/cardset/{created['cardset_id']}/"
+    cards = client.get(cardset_url, params={"requester_id": owner_id}) \
+        .json()["cards"]
+
+    card_url = f"/card/{cards[0]['card_id']}/"
+    response = client.delete(card_url, params={"requester_id": owner_id})
+    assert response.status_code == 204
+    cardset = client.get(cardset_url, params={"requester_id": owner_id})
+    assert [card["term"] for card in cardset.json()["cards"]] == ["a"]
+    response = client.delete(card_url, params={"requester_id": owner_id})
+    assert response.status_code == 404
+
+    response = client.delete(cardset_url, params={"requester_id": owner_id})
+    assert response.status_code == 204
+    response = client.get(cardset_url, params={"requester_id": owner_id})
+    assert response.status_code == 404
+    response = client.delete(cardset_url, params={"requester_id": owner_id})
+    assert response.status_code == 404
+
+    builder.db_handler.delete_database_file()
+
+
+def test_delete_foreign_cardset_is_forbidden():
+    builder = ApiAppBuilder(db_path=db_path)
+    client = TestClient(builder.app)
+
+    created = client.post(
+        "/cardsets/",
+        params={"requester_id": owner_id, "owner_id": owner_id},
+        json={
+            "title": "title",
+            "description": "description",
+            "status": "present",
+            "cards": [
+                {"term": "a", "description": "d", "status": "present"},
+            ],
+        },
+    ).json()
+    cardset_url = f"/cardset/{created['cardset_id']}/"
+    [card] = client.get(cardset_url, params={"requester_id": owner_id}) \
+        .json()["cards"]
+
+    other = {"requester_id": "coolfrog"}
+    response = client.delete(cardset_url, params=other)
+    assert response.status_code == 403
+    response = client.delete(f"/card/{card['card_id']}/", params=other)
+    assert response.status_code == 403
+
+    cardset = client.get(cardset_url, params={"requester_id": owner_id})
+    assert [card["term"] for card in cardset.json()["cards"]] == ["a"]
+
+    builder.db_handler.delete_database_file()
+
+
+def test_move_card():
+    builder = ApiAppBuilder(db_path=db_path)
+    client = TestClient(builder.app)
+
+    created = client.post(
+        "/cardsets/",
+        params={"requester_id": owner_id, "owner_id": owner_id},
+        json={
+            "title": "title",
+            "description": "description",
+            "status": "present",
+            "cards": [
+                {"term": "b", "description": "d", "status": "present"},
+                {"term": "a", "description": "d", "status": "present"},
+                {"term": "c", "description": "d", "status": "present"},
+            ],
+        },
+    ).json()
+    params = {
+        "requester_id": owner_id,
+        "cardset_id": created["cardset_id"],
+        "sort": "position",
+    }
+    cards = client.get("/cards/", params=params).json()["cards"]
+    assert [card["term"] for card in cards] == ["b", "a", "c"]
+
+    response = client.post(
+        f"/card/{cards[2]['card_id']}/move",
+        params={"requester_id": owner_id, "before_id": cards[0]["card_id"]},
+    )
+    assert response.status_code == 200
+    assert response.json()["position"] < cards[0]["position"]
+
+    cards = client.get("/cards/", params=params).json()["cards"]
+    assert [card["term"] for card in cards] == ["c", "b", "a"]
+
+    cardset = client.get(
+        f"/cardset/{created['cardset_id']}/",
+        params={"requester_id": owner_id},
+    ).json()
+    assert [card["term"] for card in cardset["cards"]] == ["c", "b", "a"]
+
+    builder.db_handler.delete_database_file()
+
+
+def test_list_endpoints_return_requested_fields():
+    builder = ApiAppBuilder(db_path=db_path)
+    client = TestClient(builder.app)
+
+    created = client.post(
+        "/cardsets/",
+        params={"requester_id": owner_id, "owner_id": owner_id},
+        json={
+            "title": "title",
+            "description": "description",
+            "status": "present",
+            "cards": [
+                {"term": "b", "description": "d", "status": "present"},
+                {"term": "a", "description": "d", "status": "present"},
+            ],
+        },
+    ).json()
+
+    response = client.get(
+        "/cards/",
+        params={
+            "requester_id": owner_id,
+            "cardset_id": created["cardset_id"],
+            "fields": ["card_id", "term", "status"],
+        },
+    )
+    assert response.status_code == 200
+    cards = response.json()["cards"]
+    assert [card["term"] for card in cards] == ["a", "b"]
+    assert all(
+        set(card) == {"card_id", "term", "status"} for card in cards
+    )
+    assert cards[0]["status"] == "present"
+
+    full_etag = client.get(
+        "/cards/",
+        params={"requester_id": owner_id, "cardset_id": created["cardset_id"]},
+    ).headers["ETag"]
+    assert response.headers["ETag"] != full_etag
+
+    response = client.get(
+        "/cardsets/",
+        params={
+            "requester_id": owner_id,
+            "user_id": owner_id,
+            "fields": ["cardset_id", "title"],
+        },
+    )
+    assert response.json() == {
+        "cardsets": [{"cardset_id": created["cardset_id"], "title": "title"}]
+    }
+
+    response = client.get(
+        "/cards/",
+        params={"requester_id": owner_id, "fields": ["unknown"]},
+    )
+    assert response.status_code == 422
+
+    builder.db_handler.delete_database_file()
+
+
+def test_list_endpoints_sort_and_filter_by_time():
+    builder = ApiAppBuilder(db_path=db_path)
+    client = TestClient(builder.app)
+
+    for title in ["b", "a"]:
+        created = client.post(
+            "/cardsets/",
+            params={"requester_id": owner_id, "owner_id": owner_id},
+            json={
+                "title": title,
+                "description": "description",
+                "status": "present",
+                "cards": [
+                    {"term": "b", "description": "d", "status": "present"},
+                    {"term": "a", "description": "d", "status": "present"},
+                ],
+            },
+        ).json()
+        time.sleep(0.01)
+
+    response = client.get(
+        "/cardsets/",
+        params={
+            "requester_id": owner_id,
+            "user_id": owner_id,
+            "sort": "created_at",
+            "order": "desc",
+        },
+    )
+    assert [info["title"] for info in response.json()["cardsets"]] \
+        == ["a", "b"]
+
+    future = datetime.now(timezone.utc) + timedelta(hours=1)
+    for name, expected in [("modified_after", 0), ("modified_before", 2)]:
+        response = client.get(
+            "/cards/",
+            params={
+                "requester_id": owner_id,
+                "cardset_id": created["cardset_id"],
+                "sort": "modified_at",
+                name: future.isoformat(),
+            },
+        )
+        assert response.status_code == 200
+        assert len(response.json()["cards"]) == expected
+
+    builder.db_handler.delete_database_file()
+
+
+def test_sharded_backend_unknown_id_prefix():
+    builder = ApiAppBuilder(
+        settings=AppSettings(db_path=db_path, backend="sqlite-sharded")
+    )
+    client = TestClient(builder.app)
+    params = {"requester_id": owner_id}
+
+    response = client.get(
+        "/cards/", params={**params, "cardset_id": "!" * 8}
+    )
+    assert response.status_code == 200
+    assert response.json() == {"cards": []}
+
+    response = client.get(f"/cardset/{'!' * 8}/", params=params)
+    assert response.status_code == 404
+
+    builder.db_handler.delete_database_file()
+
+
+def test_sharded_backend_rejects_single_file_options():
+    with pytest.raises(ValueError):
+        ApiAppBuilder(settings=AppSettings(
+            db_path=db_path, backend="sqlite-sharded", group_commit=True
+        ))
+    with pytest.raises(ValueError):
+        ApiAppBuilder(settings=AppSettings(
+            db_path=db_path,
+            backend="sqlite-sharded",
+            read_snapshot_path="test_cardset_endpoint_read.db",
+        ))
+
+    builder = ApiAppBuilder(settings=AppSettings(
+        db_path=db_path, backend="sqlite-sharded", pool_size=2
+    ))
+    assert all(
+        shard.pool.size == 2
+        for shard in builder.cardset_repository.shards
+    )
+    builder.db_handler.delete_database_file()
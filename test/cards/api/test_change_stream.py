@@ -0,0 +1,42 @@
+import threading
+
+from fastapi.testclient import TestClient
+
+from cards import ApiAppBuilder, ChangeBroker, CardsetSpec, CardsStatus
+
+db_path = 'test_change_stream.db'
+owner_id = 'cuteseal'
+
+
+def test_change_stream_pushes_modifications():
+    broker = ChangeBroker()
+    builder = ApiAppBuilder(db_path=db_path, change_broker=broker)
+    client = TestClient(builder.app)
+    created = []
+
+    def modify():
+        for _ in range(5000):
+            if broker.subscriber_count() > 0:
+                break
+            threading.Event().wait(0.001)
+        created.append(builder.cardset_service.create_cardset(
+            owner_id,
+            owner_id,
+            CardsetSpec("title", "description", CardsStatus.PRESENT, []),
+        ))
+        broker.close()
+
+    thread = threading.Thread(target=modify)
+    thread.start()
+    response = client.get(
+        "/changes/stream/", params={"requester_id": owner_id}
+    )
+    thread.join()
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert "event: change" in response.text
+    assert f'"id": "{created[0].id}"' in response.text
+
+    builder.close()
+    builder.db_handler.delete_database_file()
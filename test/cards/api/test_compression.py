@@ -0,0 +1,114 @@
+from fastapi.testclient import TestClient
+
+from cards import ApiAppBuilder
+from cards.api import ResponseCompressor
+from cards.api.compression import CompressedCache, negotiate_encoding
+
+db_path = 'test_compression.db'
+owner_id = 'cuteseal'
+gzip_headers = {"Accept-Encoding": "gzip"}
+
+
+def test_negotiate_encoding():
+    assert negotiate_encoding(None) is None
+    assert negotiate_encoding("gzip, deflate") == "gzip"
+    assert negotiate_encoding("*") == "gzip"
+    assert negotiate_encoding("br") is None
+    assert negotiate_encoding("gzip;q=0, *") is None
+    assert negotiate_encoding("identity") is None
+
+
+def test_compressed_cache_evicts_least_recently_used():
+    cache = CompressedCache(max_bytes=10)
+    cache.put('"a"', b"aaaa")
+    cache.put('"b"', b"bbbb")
+    assert cache.get('"a"') == b"aaaa"
+    cache.put('"c"', b"cccc")
+
+    assert cache.get('"b"') is None
+    assert cache.get('"a"') == b"aaaa"
+    assert cache.get('"c"') == b"cccc"
+    cache.put('"d"', b"d" * 11)
+    assert len(cache) == 2
+
+
+def test_read_endpoints_compress_large_responses():
+    compressor = ResponseCompressor(
+        minimum_size=500, route_levels={"/changes/": 0}
+    )
+    builder = ApiAppBuilder(db_path=db_path, compressor=compressor)
+    client = TestClient(builder.app)
+
+    cardset_id = client.post(
+        "/cardsets/",
+        params={"requester_id": owner_id, "owner_id": owner_id},
+        json={
+            "title": "title",
+            "description": "description",
+            "status": "present",
+            "cards": [
+                {
+                    "term": f"term {index}",
+                    "description": "description " * 10,
+                    "status": "present",
+                }
+                for index in range(20)
+            ],
+        },
+    ).json()["cardset_id"]
+    path = f"/cardset/{cardset_id}/"
+    params = {"requester_id": owner_id}
+
+    identity = client.get(
+        path, params=params, headers={"Accept-Encoding": "identity"}
+    )
+    assert "Content-Encoding" not in identity.headers
+
+    response = client.get(path, params=params, headers=gzip_headers)
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["Vary"] == "Accept, Accept-Encoding"
+    assert response.headers["ETag"].endswith('-gzip"')
+    assert response.headers["ETag"] != identity.headers["ETag"]
+    assert response.json() == identity.json()
+    assert len(compressor.cache) == 1
+
+    # Неизменившийся набор отдается из кеша без обращения к хранилищу.
+    def get_cardset(**kwargs):
+        raise AssertionError("cached response expected")
+
+    get_cardset_from_service = builder.cardset_service.get_cardset
+    builder.cardset_service.get_cardset = get_cardset
+    cached = client.get(path, params=params, headers=gzip_headers)
+    assert cached.headers["ETag"] == response.headers["ETag"]
+    assert cached.json() == identity.json()
+    builder.cardset_service.get_cardset = get_cardset_from_service
+
+    not_modified = client.get(
+        path,
+        params=params,
+        headers={
+            **gzip_headers,
+            "If-None-Match": response.headers["ETag"],
+        },
+    )
+    assert not_modified.status_code == 304
+    assert not_modified.headers["ETag"] == response.headers["ETag"]
+
+    small_params = {**params, "cardset_id": cardset_id, "limit": 1}
+    small = client.get("/cards/", params=small_params, headers=gzip_headers)
+    assert "Content-Encoding" not in small.headers
+    assert not small.headers["ETag"].endswith('-gzip"')
+
+    not_modified = client.get(
+        "/cards/",
+        params=small_params,
+        headers={**gzip_headers, "If-None-Match": small.headers["ETag"]},
+    )
+    assert not_modified.status_code == 304
+    assert not_modified.headers["ETag"] == small.headers["ETag"]
+
+    changes = client.get("/changes/", params=params, headers=gzip_headers)
+    assert "Content-Encoding" not in changes.headers
+    assert len(changes.json()["cards"]) == 20
+
+    builder.db_handler.delete_database_file()
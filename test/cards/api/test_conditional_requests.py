@@ -0,0 +1,138 @@
+import time
+from datetime import datetime, timezone
+
+from fastapi.testclient import TestClient
+
+from cards import ApiAppBuilder
+from cards.api.http_cache import http_last_modified
+
+db_path = 'test_conditional.db'
+owner_id = 'cuteseal'
+
+
+def create_client():
+    builder = ApiAppBuilder(db_path=db_path)
+    return builder, TestClient(builder.app)
+
+
+def create_cardset(client):
+    response = client.post(
+        "/cardsets/",
+        params={"requester_id": owner_id, "owner_id": owner_id},
+        json={
+            "title": "title",
+            "description": "description",
+            "status": "present",
+            "cards": [
+                {"term": "term", "description": "d", "status": "present"},
+            ],
+        },
+    )
+    assert response.status_code == 201
+    return response.json()["cardset_id"]
+
+
+def wait_next_second():
+    time.sleep(1 - time.time() % 1 + 0.01)
+
+
+def test_get_cardsets_returns_304_for_matching_etag():
+    builder, client = create_client()
+    create_cardset(client)
+    wait_next_second()
+    params = {"requester_id": owner_id, "user_id": owner_id}
+
+    first = client.get("/cardsets/", params=params)
+    assert first.status_code == 200
+    assert "last-modified" in first.headers
+
+    second = client.get(
+        "/cardsets/",
+        params=params,
+        headers={"If-None-Match": first.headers["etag"]},
+    )
+    assert second.status_code == 304
+    assert second.headers["etag"] == first.headers["etag"]
+    assert second.content == b""
+
+    builder.db_handler.delete_database_file()
+
+
+def test_get_cards_etag_changes_after_card_creation():
+    builder, client = create_client()
+    cardset_id = create_cardset(client)
+    params = {"requester_id": owner_id, "cardset_id": cardset_id}
+
+    first = client.get("/cards/", params=params)
+    assert first.status_code == 200
+
+    client.post(
+        f"/cardset/{cardset_id}/cards/",
+        params={"requester_id": owner_id},
+        json={"term": "other", "description": "d", "status": "present"},
+    )
+
+    second = client.get(
+        "/cards/",
+        params=params,
+        headers={"If-None-Match": first.headers["etag"]},
+    )
+    assert second.status_code == 200
+    assert second.headers["etag"] != first.headers["etag"]
+    assert len(second.json()["cards"]) == 2
+
+    builder.db_handler.delete_database_file()
+
+
+def test_get_cards_returns_304_for_if_modified_since():
+    builder, client = create_client()
+    cardset_id = create_cardset(client)
+    wait_next_second()
+    params = {"requester_id": owner_id, "cardset_id": cardset_id}
+
+    first = client.get("/cards/", params=params)
+    second = client.get(
+        "/cards/",
+        params=params,
+        headers={"If-Modified-Since": first.headers["last-modified"]},
+    )
+    assert second.status_code == 304
+
+    builder.db_handler.delete_database_file()
+
+
+def test_http_last_modified_skips_current_second():
+    now = datetime(2024, 1, 1, 12, 0, 5, 300000, tzinfo=timezone.utc)
+
+    assert http_last_modified(now.replace(microsecond=100000), now) is None
+    assert http_last_modified(now.replace(second=4), now) == now.replace(
+        second=4, microsecond=0
+    )
+
+
+def test_write_in_same_second_is_not_hidden_by_if_modified_since():
+    builder, client = create_client()
+    cardset_id = create_cardset(client)
+    params = {"requester_id": owner_id, "cardset_id": cardset_id}
+
+    # Пока идет секунда последней записи, Last-Modified не отдается:
+    # следующая запись в ту же секунду его бы не изменила.
+    first = client.get("/cards/", params=params)
+    assert "last-modified" not in first.headers
+
+    wait_next_second()
+    first = client.get("/cards/", params=params)
+    client.post(
+        f"/cardset/{cardset_id}/cards/",
+        params={"requester_id": owner_id},
+        json={"term": "other", "description": "d", "status": "present"},
+    )
+    second = client.get(
+        "/cards/",
+        params=params,
+        headers={"If-Modified-Since": first.headers["last-modified"]},
+    )
+    assert second.status_code == 200
+    assert len(second.json()["cards"]) == 2
+
+    builder.db_handler.delete_database_file()
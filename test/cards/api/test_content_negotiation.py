@@ -0,0 +1,118 @@
+import msgpack
+from fastapi.testclient import TestClient
+
+from cards import ApiAppBuilder
+from cards.api.content_negotiation import (
+    JSON_MEDIA_TYPE,
+    MSGPACK_MEDIA_TYPE,
+    negotiate_media_type,
+)
+from cards.api.encoding_benchmark import run_encoding_benchmark
+
+db_path = 'test_content_negotiation.db'
+owner_id = 'cuteseal'
+msgpack_headers = {"Accept": MSGPACK_MEDIA_TYPE}
+
+
+def test_negotiate_media_type():
+    assert negotiate_media_type(None) == JSON_MEDIA_TYPE
+    assert negotiate_media_type("*/*") == JSON_MEDIA_TYPE
+    assert negotiate_media_type(MSGPACK_MEDIA_TYPE) == MSGPACK_MEDIA_TYPE
+    assert negotiate_media_type(
+        "application/json;q=0.5, application/msgpack"
+    ) == MSGPACK_MEDIA_TYPE
+    assert negotiate_media_type(
+        "application/json, application/x-msgpack;q=0.9"
+    ) == JSON_MEDIA_TYPE
+    assert negotiate_media_type("application/msgpack;q=0") \
+        == JSON_MEDIA_TYPE
+
+
+def test_read_endpoints_return_msgpack_tables():
+    builder = ApiAppBuilder(db_path=db_path)
+    client = TestClient(builder.app)
+
+    response = client.post(
+        "/cardsets/",
+        params={"requester_id": owner_id, "owner_id": owner_id},
+        content=msgpack.packb({
+            "title": "title",
+            "description": "description",
+            "status": "present",
+            "cards": [
+                {"term": "b", "description": "d", "status": "present"},
+                {"term": "a", "description": "d", "status": "present"},
+            ],
+        }),
+        headers={"Content-Type": MSGPACK_MEDIA_TYPE},
+    )
+    assert response.status_code == 201
+    cardset_id = response.json()["cardset_id"]
+
+    response = client.get(
+        "/cards/",
+        params={"requester_id": owner_id, "cardset_id": cardset_id},
+        headers=msgpack_headers,
+    )
+    assert response.headers["Content-Type"] == MSGPACK_MEDIA_TYPE
+    assert response.headers["Vary"] == "Accept, Accept-Encoding"
+    cards = msgpack.unpackb(response.content)["cards"]
+    assert cards["fields"][:3] == ["card_id", "cardset_id", "term"]
+    assert [row[2] for row in cards["rows"]] == ["a", "b"]
+    json_etag = client.get(
+        "/cards/",
+        params={"requester_id": owner_id, "cardset_id": cardset_id},
+    ).headers["ETag"]
+    assert response.headers["ETag"] != json_etag
+
+    response = client.get(
+        "/cardsets/",
+        params={
+            "requester_id": owner_id,
+            "user_id": owner_id,
+            "fields": ["cardset_id", "title", "created_at"],
+        },
+        headers=msgpack_headers,
+    )
+    cardsets = msgpack.unpackb(response.content)["cardsets"]
+    assert cardsets["fields"] == ["cardset_id", "title", "created_at"]
+    [[row_id, title, created_at]] = cardsets["rows"]
+    assert (row_id, title) == (cardset_id, "title")
+    assert isinstance(created_at, int)
+
+    response = client.get(
+        f"/cardset/{cardset_id}/",
+        params={"requester_id": owner_id},
+        headers=msgpack_headers,
+    )
+    cardset = msgpack.unpackb(response.content)
+    assert cardset["cardset_id"] == cardset_id
+    assert len(cardset["cards"]["rows"]) == 2
+
+    response = client.get(
+        "/changes/",
+        params={"requester_id": owner_id},
+        headers=msgpack_headers,
+    )
+    changes = msgpack.unpackb(response.content)
+    assert len(changes["cards"]["rows"]) == 2
+    assert changes["has_more"] is False
+
+    response = client.post(
+        "/cardsets/",
+        params={"requester_id": owner_id, "owner_id": owner_id},
+        content=b"\xc1",
+        headers={"Content-Type": MSGPACK_MEDIA_TYPE},
+    )
+    assert response.status_code == 400
+
+    builder.db_handler.delete_database_file()
+
+
+def test_encoding_benchmark_reports_both_formats():
+    summary = run_encoding_benchmark(card_count=50, repeat=2)
+
+    assert summary["config"] == {"cards": 50, "repeat": 2}
+    assert summary["msgpack"]["bytes"] < summary["json"]["bytes"]
+    for name in ["json", "msgpack"]:
+        assert summary[name]["encode_ms"]["min"] >= 0
@@ -0,0 +1,47 @@
+import json
+import asyncio
+
+from cards import ApiAppBuilder
+from cards.api.loadtest import LoadTestConfig, run_load_test, main
+
+db_path = 'test_loadtest.db'
+
+
+def test_load_test_reports_every_operation():
+    builder = ApiAppBuilder(db_path=db_path)
+    config = LoadTestConfig(
+        concurrency=4,
+        duration=30,
+        max_requests=200,
+        owners=5,
+        cards_per_deck=3,
+    )
+
+    summary = asyncio.run(run_load_test(config, app=builder.app))
+
+    assert summary["requests"] == 200
+    assert summary["errors"] == 0
+    assert set(summary["operations"]) == set(config.mix)
+    for operation in summary["operations"].values():
+        latency = operation["latency_ms"]
+        assert latency["p50"] <= latency["p90"] <= latency["p99"]
+        assert latency["p99"] <= latency["max"]
+
+    builder.close()
+    builder.db_handler.delete_database_file()
+
+
+def test_load_test_cli_writes_summary(tmp_path):
+    output = tmp_path / "summary.json"
+    main([
+        "--db-path", db_path,
+        "--max-requests", "20",
+        "--mix", "list_cardsets=1,create_deck=1",
+        "--output", str(output),
+    ])
+
+    summary = json.loads(output.read_text())
+    assert summary["requests"] == 20
+    assert summary["config"]["mix"] == {
+        "list_cardsets": 1.0, "create_deck": 1.0,
+    }
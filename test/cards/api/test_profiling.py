@@ -0,0 +1,76 @@
+import json
+
+from fastapi.testclient import TestClient
+
+from cards import ApiAppBuilder, AppSettings
+from cards.api.profiling import ProfilingMiddleware
+
+db_path = 'test_profiling.db'
+owner_id = 'cuteseal'
+
+
+def create_cardset(client):
+    return client.post(
+        "/cardsets/",
+        params={"requester_id": owner_id, "owner_id": owner_id},
+        json={
+            "title": "title",
+            "description": "description",
+            "status": "present",
+            "cards": [
+                {"term": "a", "description": "d", "status": "present"},
+            ],
+        },
+    ).json()
+
+
+def test_requests_with_header_are_profiled(tmp_path):
+    builder = ApiAppBuilder(settings=AppSettings(
+        db_path=db_path,
+        profile_dir=str(tmp_path),
+        profile_max_files=2,
+    ))
+    client = TestClient(builder.app)
+
+    created = create_cardset(client)
+    assert list(tmp_path.iterdir()) == []
+
+    for _ in range(3):
+        response = client.get(
+            f"/cardset/{created['cardset_id']}/",
+            params={"requester_id": owner_id},
+            headers={"X-Cards-Profile": "1"},
+        )
+        assert response.status_code == 200
+
+    name = response.headers["x-cards-profile"]
+    assert len(list(tmp_path.glob("*.prof"))) == 2
+    assert (tmp_path / f"{name}.prof").exists()
+
+    summary = json.loads((tmp_path / f"{name}.json").read_text())
+    assert summary["status_code"] == 200
+    assert summary["breakdown_ms"]["sql"] > 0
+    assert summary["breakdown_ms"]["mapping"] > 0
+    assert summary["breakdown_ms"]["serialization"] > 0
+
+    builder.db_handler.delete_database_file()
+
+
+def test_middleware_is_installed_only_when_enabled():
+    builder = ApiAppBuilder(db_path=db_path)
+    client = TestClient(builder.app)
+
+    created = create_cardset(client)
+    response = client.get(
+        f"/cardset/{created['cardset_id']}/",
+        params={"requester_id": owner_id},
+        headers={"X-Cards-Profile": "1"},
+    )
+
+    assert "x-cards-profile" not in response.headers
+    assert all(
+        middleware.cls is not ProfilingMiddleware
+        for middleware in builder.app.user_middleware
+    )
+
+    builder.db_handler.delete_database_file()
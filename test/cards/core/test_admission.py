@@ -0,0 +1,102 @@
+import threading
+
+import pytest
+
+from cards import (
+    AdmissionController,
+    CardsOverloaded,
+    CardsRateLimited,
+)
+
+
+def wait_for_queued(controller, queued):
+    for _ in range(1000):
+        if controller.stats().queued == queued:
+            return
+        threading.Event().wait(0.001)
+    assert False, f"expected {queued} queued operations"
+
+
+def test_admission_rejects_when_queue_is_full():
+    controller = AdmissionController(
+        max_concurrency=1, max_queue=1, max_queue_per_owner=1, timeout=5
+    )
+    release = threading.Event()
+    order = []
+
+    def hold():
+        with controller.admit("cuteseal"):
+            release.wait()
+
+    def queued(owner_id):
+        with controller.admit(owner_id):
+            order.append(owner_id)
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    wait_for_queued(controller, 0)
+    waiter = threading.Thread(target=queued, args=["cutewalr"])
+    waiter.start()
+    wait_for_queued(controller, 1)
+
+    with pytest.raises(CardsRateLimited):
+        with controller.admit("cutewalr"):
+            pass
+    with pytest.raises(CardsOverloaded) as error:
+        with controller.admit("cuteotte"):
+            pass
+    assert not isinstance(error.value, CardsRateLimited)
+    assert error.value.retry_after == 1.0
+
+    release.set()
+    holder.join()
+    waiter.join()
+
+    stats = controller.stats()
+    assert order == ["cutewalr"]
+    assert stats.active == 0 and stats.queued == 0
+    assert stats.admitted == 2
+    assert stats.rejected_rate_limited == 1
+    assert stats.rejected_overloaded == 1
+
+
+def test_admission_serves_owners_in_turn():
+    controller = AdmissionController(
+        max_concurrency=1, max_queue=10, max_queue_per_owner=5, timeout=5
+    )
+    release = threading.Event()
+    order = []
+
+    def hold():
+        with controller.admit("holder01"):
+            release.wait()
+
+    def queued(owner_id):
+        with controller.admit(owner_id):
+            order.append(owner_id)
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    wait_for_queued(controller, 0)
+
+    threads = []
+    for index, owner_id in enumerate(["noisy001"] * 3 + ["quiet001"]):
+        thread = threading.Thread(target=queued, args=[owner_id])
+        thread.start()
+        threads.append(thread)
+        wait_for_queued(controller, index + 1)
+
+    release.set()
+    for thread in [holder] + threads:
+        thread.join()
+
+    assert order == ["noisy001", "quiet001", "noisy001", "noisy001"]
+
+
+def test_admission_times_out():
+    controller = AdmissionController(max_concurrency=0, timeout=0.01)
+    with pytest.raises(CardsOverloaded):
+        with controller.admit("cuteseal"):
+            pass
+    assert controller.stats().timed_out == 1
+    assert controller.stats().queued == 0
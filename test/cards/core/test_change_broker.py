@@ -0,0 +1,54 @@
+import asyncio
+import threading
+
+from cards import ChangeBroker, ChangeNotification
+
+
+def notification(cardset_id, owner_id="cuteseal", kind="card"):
+    return ChangeNotification(kind, f"{cardset_id}-id", cardset_id, owner_id)
+
+
+def test_broker_delivers_notifications_from_other_threads():
+    broker = ChangeBroker()
+
+    async def receive():
+        subscription = broker.subscribe("cuteseal")
+        publisher = threading.Thread(
+            target=broker.publish, args=(notification("set1"),)
+        )
+        publisher.start()
+        received = await subscription.wait(timeout=5)
+        publisher.join()
+        broker.unsubscribe(subscription)
+        return received
+
+    assert asyncio.run(receive()) == [notification("set1")]
+    assert broker.subscriber_count() == 0
+
+
+def test_broker_filters_by_owner_and_cardset():
+    broker = ChangeBroker()
+
+    async def receive():
+        subscription = broker.subscribe("cuteseal", cardset_id="set1")
+        broker.publish(notification("set1", owner_id="walrus01"))
+        broker.publish(notification("set2"))
+        broker.publish(notification("set1"))
+        return await subscription.wait(timeout=5)
+
+    assert asyncio.run(receive()) == [notification("set1")]
+
+
+def test_slow_subscriber_overflows():
+    broker = ChangeBroker(max_buffer=2)
+
+    async def receive():
+        subscription = broker.subscribe("cuteseal")
+        for _ in range(3):
+            broker.publish(notification("set1"))
+        received = await subscription.wait(timeout=5)
+        return subscription, received
+
+    subscription, received = asyncio.run(receive())
+    assert subscription.overflowed
+    assert len(received) == 2
@@ -0,0 +1,35 @@
+import random
+
+import pytest
+
+from cards.core.positions import key_between, spaced_keys
+
+
+def test_key_between_keeps_order_under_random_inserts():
+    random.seed(7)
+    keys = []
+    for _ in range(2000):
+        index = random.randint(0, len(keys))
+        before = keys[index - 1] if index > 0 else None
+        after = keys[index] if index < len(keys) else None
+        key = key_between(before, after)
+        assert before is None or before < key
+        assert after is None or key < after
+        keys.insert(index, key)
+
+    assert keys == sorted(keys)
+    assert len(set(keys)) == len(keys)
+
+
+def test_appending_keeps_keys_short():
+    key = None
+    for _ in range(10000):
+        key = key_between(key, None)
+    assert len(key) <= 4
+
+    assert spaced_keys(3) == ["a0", "a1", "a2"]
+
+
+def test_key_between_rejects_unordered_keys():
+    with pytest.raises(ValueError):
+        key_between("a1", "a0")
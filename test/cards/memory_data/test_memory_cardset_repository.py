@@ -0,0 +1,267 @@
+import os
+import time
+import datetime
+
+from cards import (
+    MemoryCardsetRepository,
+    CardsetInfoSpec,
+    CardsStatus,
+    CardSpec,
+    CardsSort,
+    CardsetsSort,
+    SortOrder,
+)
+
+snapshot_path = 'test_snapshot.json'
+
+
+def test_get_cardset_infos_paginates_by_title():
+    repo = MemoryCardsetRepository()
+    for title in ["c", "a", "d", "b"]:
+        repo.create_cardset_info(
+            "cuteseal",
+            CardsetInfoSpec(title, "description", CardsStatus.PRESENT)
+        )
+    repo.create_cardset_info(
+        "cuteseal",
+        CardsetInfoSpec("aa", "description", CardsStatus.ABSENT)
+    )
+    repo.create_cardset_info(
+        "otherusr",
+        CardsetInfoSpec("a", "description", CardsStatus.PRESENT)
+    )
+
+    page = repo.get_cardset_infos(user_id="cuteseal", offset=1, limit=2)
+    assert [info.title for info in page] == ["b", "c"]
+
+    page = repo.get_cardset_infos(
+        user_id="cuteseal", limit=10, include_deleted=True
+    )
+    assert [info.title for info in page] == ["a", "aa", "b", "c", "d"]
+
+
+def test_modify_card_reorders_index():
+    repo = MemoryCardsetRepository()
+    cardset = repo.create_cardset_info(
+        "cuteseal",
+        CardsetInfoSpec("title", "description", CardsStatus.PRESENT)
+    )
+    first = repo.create_card(
+        cardset.id, CardSpec("a", "description", CardsStatus.PRESENT)
+    )
+    repo.create_card(
+        cardset.id, CardSpec("b", "description", CardsStatus.PRESENT)
+    )
+
+    modified = repo.modify_card(first.id, CardSpec("c", None, None))
+    assert modified.term == "c"
+    assert modified.description == "description"
+
+    cards = repo.get_cards(cardset_id=cardset.id)
+    assert [card.term for card in cards] == ["b", "c"]
+
+    repo.modify_card(first.id, CardSpec(None, None, CardsStatus.ABSENT))
+    assert [card.term for card in repo.get_cards(cardset_id=cardset.id)] \
+        == ["b"]
+    assert repo.get_cardset(cardset.id).cards[0].term == "b"
+
+
+def test_clone_cardset_copies_live_cards():
+    repo = MemoryCardsetRepository()
+    cardset = repo.create_cardset_info(
+        "cuteseal",
+        CardsetInfoSpec("title", "description", CardsStatus.PRESENT)
+    )
+    for term, status in [("b", CardsStatus.PRESENT),
+                         ("a", CardsStatus.PRESENT),
+                         ("c", CardsStatus.ABSENT)]:
+        repo.create_card(cardset.id, CardSpec(term, "description", status))
+
+    clone = repo.clone_cardset(cardset.id)
+
+    assert clone.id != cardset.id
+    assert clone.title == "title"
+    cards = repo.get_cards(cardset_id=clone.id, include_deleted=True)
+    assert [card.term for card in cards] == ["a", "b"]
+    assert len(repo.get_cards(cardset_id=cardset.id)) == 2
+    assert repo.clone_cardset("missing0") is None
+
+
+def test_delete_cardset_reports_tombstones():
+    repo = MemoryCardsetRepository()
+    cardset = repo.create_cardset_info(
+        "cuteseal",
+        CardsetInfoSpec("title", "description", CardsStatus.PRESENT)
+    )
+    cards = [
+        repo.create_card(
+            cardset.id, CardSpec(term, "description", CardsStatus.PRESENT)
+        )
+        for term in ["a", "b", "c"]
+    ]
+
+    assert repo.delete_card(cards[0].id).id == cards[0].id
+    assert repo.delete_cardset_cards(cardset.id, limit=1) == 1
+    assert repo.delete_cardset(cardset.id).id == cardset.id
+    assert repo.get_cards(cardset_id=cardset.id, include_deleted=True) == []
+
+    changes = repo.get_changes("cuteseal")
+    assert changes.cardsets == [] and changes.cards == []
+    assert changes.deleted_cardset_ids == [cardset.id]
+    assert set(changes.deleted_card_ids) == {card.id for card in cards}
+
+
+def test_move_card_changes_position_order():
+    repo = MemoryCardsetRepository()
+    cardset = repo.create_cardset_info(
+        "cuteseal",
+        CardsetInfoSpec("title", "description", CardsStatus.PRESENT)
+    )
+    cards = [
+        repo.create_card(
+            cardset.id, CardSpec(term, "description", CardsStatus.PRESENT)
+        )
+        for term in ["c", "a", "b"]
+    ]
+
+    def order():
+        return [
+            card.term for card in repo.get_cards(
+                cardset_id=cardset.id, sort=CardsSort.POSITION
+            )
+        ]
+
+    assert order() == ["c", "a", "b"]
+    moved = repo.move_card(cards[2].id, before_id=cards[0].id)
+    assert moved.position < cards[0].position
+    assert order() == ["b", "c", "a"]
+    repo.move_card(cards[0].id)
+    assert order() == ["b", "a", "c"]
+    cardset = repo.get_cardset(cardset.id)
+    assert [card.term for card in cardset.cards] == order()
+    assert [card.term for card in repo.get_cards(cardset_id=cardset.id)] \
+        == ["a", "b", "c"]
+
+    assert repo.rebalance_card_positions(cardset.id) == 3
+    assert order() == ["b", "a", "c"]
+    assert repo.move_card("missing0") is None
+
+
+def test_sort_by_time_and_filter_by_modification():
+    repo = MemoryCardsetRepository()
+    cardset = repo.create_cardset_info(
+        "cuteseal",
+        CardsetInfoSpec("b", "description", CardsStatus.PRESENT)
+    )
+    other = repo.create_cardset_info(
+        "cuteseal",
+        CardsetInfoSpec("a", "description", CardsStatus.PRESENT)
+    )
+    cards = [
+        repo.create_card(
+            cardset.id, CardSpec(term, "description", CardsStatus.PRESENT)
+        )
+        for term in ["b", "a", "c"]
+    ]
+    time.sleep(0.01)
+    modified_after = datetime.datetime.now()
+    repo.modify_card(cards[0].id, CardSpec("d", None, None))
+    repo.modify_cardset_info(other.id, CardsetInfoSpec("c", None, None))
+
+    page = repo.get_cards(
+        cardset_id=cardset.id,
+        sort=CardsSort.MODIFIED_AT,
+        order=SortOrder.DESC,
+    )
+    assert page[0].term == "d"
+    page = repo.get_cards(cardset_id=cardset.id, order=SortOrder.DESC)
+    assert [card.term for card in page] == ["d", "c", "a"]
+    page = repo.get_cards(
+        cardset_id=cardset.id, modified_before=modified_after
+    )
+    assert [card.term for card in page] == ["a", "c"]
+
+    page = repo.get_cardset_infos(
+        user_id="cuteseal",
+        sort=CardsetsSort.MODIFIED_AT,
+        order=SortOrder.DESC,
+    )
+    assert [info.title for info in page] == ["c", "b"]
+    page = repo.get_cardset_infos(
+        user_id="cuteseal", modified_after=modified_after
+    )
+    assert [info.title for info in page] == ["c"]
+
+
+def test_snapshot_roundtrip():
+    repo = MemoryCardsetRepository(snapshot_path=snapshot_path)
+    cardset = repo.create_cardset_info(
+        "cuteseal",
+        CardsetInfoSpec("title", "description", CardsStatus.PRESENT)
+    )
+    card = repo.create_card(
+        cardset.id, CardSpec("term", "description", CardsStatus.PRESENT)
+    )
+    version = repo.get_cards_version(cardset_id=cardset.id)
+    repo.close()
+
+    restored = MemoryCardsetRepository(snapshot_path=snapshot_path)
+
+    assert restored.get_cardset_infos(cardset.id) == [cardset]
+    assert restored.get_cards(card.id) == [card]
+    assert restored.get_cards_version(cardset_id=cardset.id) == version
+
+    os.remove(snapshot_path)
+
+
+def test_changes_follow_modification_order():
+    repo = MemoryCardsetRepository(snapshot_path=snapshot_path)
+    cardset = repo.create_cardset_info(
+        "cuteseal",
+        CardsetInfoSpec("title", "description", CardsStatus.PRESENT)
+    )
+    first = repo.create_card(
+        cardset.id, CardSpec("a", "description", CardsStatus.PRESENT)
+    )
+    second = repo.create_card(
+        cardset.id, CardSpec("b", "description", CardsStatus.PRESENT)
+    )
+    since = repo.get_changes("cuteseal").next_since
+
+    repo.modify_card(first.id, CardSpec("c", None, None))
+    changes = repo.get_changes("cuteseal", since=since)
+    assert [card.term for card in changes.cards] == ["c"]
+
+    repo.close()
+    restored = MemoryCardsetRepository(snapshot_path=snapshot_path)
+    changes = restored.get_changes("cuteseal", limit=2)
+    assert [info.id for info in changes.cardsets] == [cardset.id]
+    assert [card.id for card in changes.cards] == [second.id]
+    assert changes.has_more
+    assert restored.get_changes("cuteseal", since=since).next_since \
+        == changes.next_since + 1
+
+    os.remove(snapshot_path)
+
+
+def test_api_app_builder_memory_backend():
+    from fastapi.testclient import TestClient
+    from cards import ApiAppBuilder, AppSettings
+
+    builder = ApiAppBuilder(settings=AppSettings(backend="memory"))
+    client = TestClient(builder.app)
+
+    created = client.post(
+        "/cardsets/",
+        params={"requester_id": "cuteseal", "owner_id": "cuteseal"},
+        json={"title": "title", "description": "d", "status": "present"},
+    )
+    assert created.status_code == 201
+
+    response = client.get(
+        "/cardsets/",
+        params={"requester_id": "cuteseal", "user_id": "cuteseal"},
+    )
+    assert [info["title"] for info in response.json()["cardsets"]] \
+        == ["title"]
+    assert builder.db_handler is None
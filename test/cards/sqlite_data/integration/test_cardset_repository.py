@@ -1,11 +1,22 @@
+import time
+import datetime
+
 from cards import (
     SqliteDbHandler,
     CardsetRepository,
     CardsetInfoSpec,
     CardsStatus,
-    CardSpec
+    CardSpec,
+    CardsetService,
+    CardsSort,
+    CardsetsSort,
+    SortOrder,
+    CardField,
+    CardsetInfoField,
 )
 
+from cards.sqlite_data.query_plans import record_query_plans
+
 db_path = 'test_database.db'
 
 
@@ -13,7 +24,10 @@ def test_create_all_tables():
     db_hander = SqliteDbHandler(db_path)
     db_hander.initialize_db()
 
-    expected_tables = ['CardsStatus', 'Cardset', 'Card']
+    expected_tables = [
+        'CardsStatus', 'Cardset', 'Card', 'ResourceVersion', 'Change',
+        'sqlite_sequence',
+    ]
     real_tables = db_hander.list_tables()
 
     assert set(expected_tables) == set(real_tables)
@@ -152,3 +166,355 @@ def test_modify_card():
     assert card_that_was_get.owner_id == "cuteseal"
 
     db_hander.delete_database_file()
+
+
+def test_get_cardset():
+    db_hander = SqliteDbHandler(db_path)
+    db_hander.initialize_db()
+
+    repo = CardsetRepository(db_path)
+    cardset_info = repo.create_cardset_info(
+        "cuteseal",
+        CardsetInfoSpec("title", "description", CardsStatus.PRESENT)
+    )
+    repo.create_card(
+        cardset_info.id,
+        CardSpec("b", "description", CardsStatus.PRESENT)
+    )
+    repo.create_card(
+        cardset_info.id,
+        CardSpec("a", "description", CardsStatus.PRESENT)
+    )
+    repo.create_card(
+        cardset_info.id,
+        CardSpec("c", "description", CardsStatus.ABSENT)
+    )
+
+    cardset = repo.get_cardset(cardset_info.id)
+
+    assert cardset.id == cardset_info.id
+    assert cardset.title == "title"
+    assert [card.term for card in cardset.cards] == ["b", "a"]
+    assert repo.get_cardset("missing0") is None
+
+    db_hander.delete_database_file()
+
+
+def test_clone_cardset():
+    db_hander = SqliteDbHandler(db_path)
+    db_hander.initialize_db()
+
+    repo = CardsetRepository(db_path)
+    cardset_info = repo.create_cardset_info(
+        "cuteseal",
+        CardsetInfoSpec("title", "description", CardsStatus.PRESENT)
+    )
+    with repo.unit_of_work(write=True):
+        for index in range(1000):
+            repo.create_card(
+                cardset_info.id,
+                CardSpec(f"term{index:04}", "description", CardsStatus.PRESENT)
+            )
+    repo.create_card(
+        cardset_info.id,
+        CardSpec("deleted", "description", CardsStatus.ABSENT)
+    )
+
+    clone_info = repo.clone_cardset(cardset_info.id)
+
+    assert clone_info.id != cardset_info.id
+    assert clone_info.title == "title"
+    assert clone_info.owner_id == "cuteseal"
+    clone = repo.get_cardset(clone_info.id, include_deleted=True)
+    original = repo.get_cardset(cardset_info.id)
+    assert [card.term for card in clone.cards] == \
+        [card.term for card in original.cards]
+    assert {card.cardset_id for card in clone.cards} == {clone_info.id}
+    assert not {card.id for card in clone.cards} & \
+        {card.id for card in original.cards}
+    assert repo.clone_cardset("missing0") is None
+
+    repo.close()
+    db_hander.delete_database_file()
+
+
+def test_delete_cardset_in_batches():
+    db_hander = SqliteDbHandler(db_path)
+    db_hander.initialize_db()
+
+    repo = CardsetRepository(db_path)
+    service = CardsetService(repo, delete_batch_size=10)
+    cardset_info = repo.create_cardset_info(
+        "cuteseal",
+        CardsetInfoSpec("title", "description", CardsStatus.PRESENT)
+    )
+    card_ids = [
+        repo.create_card(
+            cardset_info.id,
+            CardSpec(f"term{index}", "description", CardsStatus.PRESENT)
+        ).id
+        for index in range(25)
+    ]
+    since = repo.get_changes("cuteseal").next_since
+
+    batches = []
+    delete_cardset_cards = repo.delete_cardset_cards
+
+    def counting_delete_cardset_cards(cardset_id, limit):
+        batches.append(delete_cardset_cards(cardset_id, limit))
+        return batches[-1]
+
+    repo.delete_cardset_cards = counting_delete_cardset_cards
+    deleted = service.delete_cardset("cuteseal", cardset_info.id)
+
+    assert deleted.id == cardset_info.id
+    assert batches == [10, 10, 5]
+    assert repo.get_cardset(cardset_info.id, include_deleted=True) is None
+    assert repo.get_cards(cardset_id=cardset_info.id) == []
+
+    changes = repo.get_changes("cuteseal", since=since)
+    assert set(changes.deleted_card_ids) == set(card_ids)
+    assert changes.deleted_cardset_ids == [cardset_info.id]
+
+    repo.close()
+    db_hander.delete_database_file()
+
+
+def test_delete_cardset_cascades_to_cards():
+    db_hander = SqliteDbHandler(db_path)
+    db_hander.initialize_db()
+
+    repo = CardsetRepository(db_path)
+    cardset_info = repo.create_cardset_info(
+        "cuteseal",
+        CardsetInfoSpec("title", "description", CardsStatus.PRESENT)
+    )
+    card = repo.create_card(
+        cardset_info.id,
+        CardSpec("term", "description", CardsStatus.PRESENT)
+    )
+
+    assert repo.delete_cardset(cardset_info.id).id == cardset_info.id
+    assert repo.get_cards(card_id=card.id, include_deleted=True) == []
+    assert repo.delete_cardset(cardset_info.id) is None
+    assert repo.get_changes("cuteseal").deleted_card_ids == [card.id]
+
+    repo.close()
+    db_hander.delete_database_file()
+
+
+def test_move_card_and_rebalance():
+    db_hander = SqliteDbHandler(db_path)
+    db_hander.initialize_db()
+
+    repo = CardsetRepository(db_path)
+    cardset_info = repo.create_cardset_info(
+        "cuteseal",
+        CardsetInfoSpec("title", "description", CardsStatus.PRESENT)
+    )
+    cards = [
+        repo.create_card(
+            cardset_info.id,
+            CardSpec(term, "description", CardsStatus.PRESENT)
+        )
+        for term in ["c", "a", "b"]
+    ]
+
+    def order():
+        return [
+            card.term for card in repo.get_cards(
+                cardset_id=cardset_info.id, sort=CardsSort.POSITION
+            )
+        ]
+
+    assert order() == ["c", "a", "b"]
+    repo.move_card(cards[2].id, before_id=cards[0].id)
+    assert order() == ["b", "c", "a"]
+    repo.move_card(cards[2].id, after_id=cards[1].id)
+    assert order() == ["c", "a", "b"]
+    repo.move_card(cards[0].id)
+    assert order() == ["a", "b", "c"]
+    cardset = repo.get_cardset(cardset_info.id)
+    assert [card.term for card in cardset.cards] == order()
+
+    for _ in range(40):
+        moved = repo.move_card(cards[0].id, after_id=cards[1].id)
+        moved = repo.move_card(cards[2].id, after_id=cards[1].id)
+    assert len(moved.position) > 2
+    assert repo.rebalance_card_positions(cardset_info.id) == 3
+    assert order() == ["a", "b", "c"]
+    positions = [card.position for card in repo.get_cards(
+        cardset_id=cardset_info.id, sort=CardsSort.POSITION
+    )]
+    assert positions == ["a0", "a1", "a2"]
+
+    other = repo.create_cardset_info(
+        "cuteseal",
+        CardsetInfoSpec("other", "description", CardsStatus.PRESENT)
+    )
+    other_card = repo.create_card(
+        other.id, CardSpec("term", "description", CardsStatus.PRESENT)
+    )
+    assert repo.move_card(cards[0].id, before_id=other_card.id) is None
+
+    repo.close()
+    db_hander.delete_database_file()
+
+
+def test_get_cards_selects_only_requested_fields():
+    db_hander = SqliteDbHandler(db_path)
+    db_hander.initialize_db()
+
+    repo = CardsetRepository(db_path)
+    cardset_info = repo.create_cardset_info(
+        "cuteseal",
+        CardsetInfoSpec("title", "description", CardsStatus.PRESENT)
+    )
+    for term in ["b", "a"]:
+        repo.create_card(
+            cardset_info.id,
+            CardSpec(term, "description", CardsStatus.PRESENT)
+        )
+
+    cards = repo.get_cards(
+        cardset_id=cardset_info.id,
+        fields=[CardField.ID, CardField.TERM, CardField.STATUS],
+    )
+    assert [card.term for card in cards] == ["a", "b"]
+    assert all(card.status == CardsStatus.PRESENT for card in cards)
+    assert all(card.owner_id == "cuteseal" for card in cards)
+    assert all(card.description is None for card in cards)
+    assert all(card.created_at is None for card in cards)
+
+    with record_query_plans(repo.pool) as plans:
+        repo.get_cards(
+            cardset_id=cardset_info.id,
+            fields=[CardField.ID, CardField.TERM],
+        )
+        repo.get_cards(
+            cardset_id=cardset_info.id,
+            sort=CardsSort.POSITION,
+            fields=[CardField.ID, CardField.POSITION],
+        )
+        repo.get_cardset_infos(
+            user_id="cuteseal",
+            fields=[CardsetInfoField.ID, CardsetInfoField.TITLE],
+        )
+    for plan in plans.values():
+        assert any("COVERING INDEX" in detail for detail in plan.details)
+
+    cardset_infos = repo.get_cardset_infos(
+        user_id="cuteseal", fields=[CardsetInfoField.TITLE]
+    )
+    assert cardset_infos[0].title == "title"
+    assert cardset_infos[0].id is None
+    assert cardset_infos[0].owner_id == "cuteseal"
+
+    repo.close()
+    db_hander.delete_database_file()
+
+
+def test_sort_by_time_and_filter_by_modification():
+    db_hander = SqliteDbHandler(db_path)
+    db_hander.initialize_db()
+
+    repo = CardsetRepository(db_path)
+    cardset_infos = [
+        repo.create_cardset_info(
+            "cuteseal",
+            CardsetInfoSpec(title, "description", CardsStatus.PRESENT)
+        )
+        for title in ["b", "a"]
+    ]
+    cards = [
+        repo.create_card(
+            cardset_infos[0].id,
+            CardSpec(term, "description", CardsStatus.PRESENT)
+        )
+        for term in ["b", "a", "c"]
+    ]
+    time.sleep(0.01)
+    modified_after = datetime.datetime.now()
+    time.sleep(0.01)
+    repo.modify_card(cards[0].id, CardSpec("d", None, None))
+    repo.modify_cardset_info(
+        cardset_infos[1].id, CardsetInfoSpec("c", None, None)
+    )
+
+    page = repo.get_cards(
+        cardset_id=cardset_infos[0].id,
+        sort=CardsSort.MODIFIED_AT,
+        order=SortOrder.DESC,
+    )
+    assert page[0].term == "d"
+    page = repo.get_cards(
+        cardset_id=cardset_infos[0].id,
+        sort=CardsSort.CREATED_AT,
+    )
+    keys = [(card.created_at, card.id) for card in page]
+    assert keys == sorted(keys)
+
+    page = repo.get_cards(
+        cardset_id=cardset_infos[0].id, modified_after=modified_after
+    )
+    assert [card.term for card in page] == ["d"]
+    page = repo.get_cards(
+        cardset_id=cardset_infos[0].id, modified_before=modified_after
+    )
+    assert [card.term for card in page] == ["a", "c"]
+
+    page = repo.get_cardset_infos(
+        user_id="cuteseal",
+        sort=CardsetsSort.MODIFIED_AT,
+        order=SortOrder.DESC,
+    )
+    assert [info.title for info in page] == ["c", "b"]
+    page = repo.get_cardset_infos(
+        user_id="cuteseal", modified_before=modified_after
+    )
+    assert [info.title for info in page] == ["b"]
+
+    repo.close()
+    db_hander.delete_database_file()
+
+
+def test_unit_of_work_shares_connection_and_rolls_back():
+    db_hander = SqliteDbHandler(db_path)
+    db_hander.initialize_db()
+
+    repo = CardsetRepository(db_path)
+    connections = []
+    connect = repo.pool._connect
+
+    def counting_connect():
+        connections.append(connect())
+        return connections[-1]
+
+    repo.pool._connect = counting_connect
+
+    with repo.unit_of_work(write=True):
+        cardset_info = repo.create_cardset_info(
+            "cuteseal",
+            CardsetInfoSpec("title", "description", CardsStatus.PRESENT)
+        )
+        repo.create_card(
+            cardset_info.id,
+            CardSpec("term", "description", CardsStatus.PRESENT)
+        )
+    assert len(connections) == 1
+
+    try:
+        with repo.unit_of_work(write=True):
+            repo.create_card(
+                cardset_info.id,
+                CardSpec("rolled back", "description", CardsStatus.PRESENT)
+            )
+            raise RuntimeError()
+    except RuntimeError:
+        pass
+
+    cards = repo.get_cards(cardset_id=cardset_info.id)
+    assert [card.term for card in cards] == ["term"]
+
+    repo.close()
+    db_hander.delete_database_file()
@@ -0,0 +1,69 @@
+import sqlite3
+import datetime
+
+from cards import (
+    SqliteDbHandler,
+    CardsetRepository,
+    CardsetInfoSpec,
+    CardsStatus,
+    CardSpec
+)
+
+db_path = 'test_changes.db'
+
+
+def test_changes_since_token():
+    db_hander = SqliteDbHandler(db_path)
+    db_hander.initialize_db()
+
+    repo = CardsetRepository(db_path)
+    cardset = repo.create_cardset_info(
+        "cuteseal",
+        CardsetInfoSpec("title", "description", CardsStatus.PRESENT)
+    )
+    cards = [
+        repo.create_card(
+            cardset.id,
+            CardSpec(f"term{index}", "description", CardsStatus.PRESENT),
+        )
+        for index in range(3)
+    ]
+    repo.create_cardset_info(
+        "walrus01",
+        CardsetInfoSpec("other", "description", CardsStatus.PRESENT)
+    )
+
+    first_page = repo.get_changes("cuteseal", limit=2)
+    assert [info.id for info in first_page.cardsets] == [cardset.id]
+    assert [card.id for card in first_page.cards] == [cards[0].id]
+    assert first_page.has_more
+
+    second_page = repo.get_changes("cuteseal", since=first_page.next_since)
+    assert [card.id for card in second_page.cards] \
+        == [cards[1].id, cards[2].id]
+    assert not second_page.has_more
+
+    repo.modify_card(
+        cards[0].id, CardSpec(None, None, CardsStatus.ABSENT)
+    )
+    changes = repo.get_changes("cuteseal", since=second_page.next_since)
+    assert changes.cardsets == []
+    assert [card.id for card in changes.cards] == [cards[0].id]
+    assert changes.cards[0].status == CardsStatus.ABSENT
+    assert changes.next_since > second_page.next_since
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("UPDATE Card SET modified_at = 0 WHERE id = ?", [cards[0].id])
+    conn.commit()
+    conn.close()
+    db_hander.purge_absent(
+        older_than=datetime.timedelta(days=1),
+        archive=False,
+    )
+
+    changes = repo.get_changes("cuteseal", since=changes.next_since)
+    assert changes.cards == []
+    assert changes.deleted_card_ids == [cards[0].id]
+
+    repo.close()
+    db_hander.delete_database_file()
@@ -0,0 +1,46 @@
+from cards import SqliteDbHandler
+from cards.sqlite_data import connection_pool
+from cards.sqlite_data.connection_pool import SqliteConnectionPool
+
+db_path = 'test_connection_pool.db'
+
+
+def test_pool_reuses_connections():
+    db_handler = SqliteDbHandler(db_path)
+    db_handler.initialize_db()
+
+    pool = SqliteConnectionPool(db_path, size=1)
+    with pool.connection() as first:
+        first.execute("BEGIN")
+        first.execute("DELETE FROM Cardset")
+    assert not first.in_transaction
+
+    with pool.connection() as second:
+        assert second is first
+        with pool.connection() as third:
+            assert third is not first
+
+    pool.close()
+    db_handler.delete_database_file()
+
+
+def test_pool_opens_new_connections_after_fork(monkeypatch):
+    db_handler = SqliteDbHandler(db_path)
+    db_handler.initialize_db()
+
+    pool = SqliteConnectionPool(db_path)
+    with pool.connection() as parent_connection:
+        pass
+
+    parent_pid = connection_pool.os.getpid()
+    monkeypatch.setattr(
+        connection_pool.os, "getpid", lambda: parent_pid + 1
+    )
+    with pool.connection() as child_connection:
+        assert child_connection is not parent_connection
+        child_connection.execute("SELECT 1 FROM Cardset")
+
+    pool.close()
+    monkeypatch.undo()
+    parent_connection.close()
+    db_handler.delete_database_file()
@@ -0,0 +1,86 @@
+import sqlite3
+import concurrent.futures
+
+import pytest
+
+from cards import (
+    SqliteDbHandler,
+    CardsetRepository,
+    CardsetService,
+    CardsetSpec,
+    CardSpec,
+    CardsStatus,
+    CardsPermissionDenied,
+)
+from cards.sqlite_data.group_commit import GroupCommitWriter
+
+db_path = 'test_group_commit.db'
+
+
+def insert_status(code, status):
+    def operation(connection):
+        connection.execute(
+            "INSERT INTO CardsStatus (code, status) VALUES (?, ?)",
+            [code, status],
+        )
+        return status
+    return operation
+
+
+def test_writer_isolates_failed_operations():
+    db_handler = SqliteDbHandler(db_path)
+    db_handler.initialize_db()
+
+    writer = GroupCommitWriter(db_path, max_delay=0.05)
+    futures = [
+        writer.submit(insert_status(10, "one")),
+        writer.submit(insert_status(11, "present")),
+        writer.submit(insert_status(12, "two")),
+    ]
+    assert futures[0].result() == "one"
+    with pytest.raises(sqlite3.IntegrityError):
+        futures[1].result()
+    assert futures[2].result() == "two"
+    writer.close()
+
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute("SELECT status FROM CardsStatus")
+    statuses = {row[0] for row in rows}
+    conn.close()
+    assert statuses == {"present", "absent", "one", "two"}
+
+    db_handler.delete_database_file()
+
+
+def test_service_writes_are_group_committed():
+    db_handler = SqliteDbHandler(db_path)
+    db_handler.initialize_db()
+
+    repo = CardsetRepository(db_path, group_commit=True)
+    service = CardsetService(repo)
+    cardset_info = service.create_cardset(
+        "cuteseal",
+        "cuteseal",
+        CardsetSpec("title", "description", CardsStatus.PRESENT, []),
+    )
+
+    def create_card(index):
+        requester_id = "cuteseal" if index else "walrus01"
+        return service.create_card(
+            requester_id,
+            cardset_info.id,
+            CardSpec(f"term{index:02}", "description", CardsStatus.PRESENT),
+        )
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=16) as executor:
+        futures = [executor.submit(create_card, index) for index in range(32)]
+
+    with pytest.raises(CardsPermissionDenied):
+        futures[0].result()
+    created = [future.result().term for future in futures[1:]]
+
+    cards = repo.get_cards(cardset_id=cardset_info.id, limit=100)
+    assert sorted(card.term for card in cards) == sorted(created)
+
+    repo.close()
+    db_handler.delete_database_file()
@@ -0,0 +1,204 @@
+import os
+import time
+import sqlite3
+
+import pytest
+
+from cards import (
+    SqliteDbHandler,
+    CardsetRepository,
+    CardsetInfoSpec,
+    CardsStatus,
+    CardSpec
+)
+from cards.sqlite_data import MaintenanceScheduler, SqliteMaintainer
+from cards.sqlite_data.cli import main
+
+db_path = 'test_maintenance.db'
+
+
+def pragma(name):
+    conn = sqlite3.connect(db_path)
+    value = conn.execute(f"PRAGMA {name}").fetchone()[0]
+    conn.close()
+    return value
+
+
+def fill_and_clear(db_handler):
+    repo = CardsetRepository(db_path)
+    cardset = repo.create_cardset_info(
+        "cuteseal",
+        CardsetInfoSpec("title", "description", CardsStatus.PRESENT)
+    )
+    for index in range(100):
+        repo.create_card(
+            cardset.id,
+            CardSpec(f"term {index}", "x" * 2000, CardsStatus.PRESENT),
+        )
+    repo.close()
+    db_handler.clear_database_data()
+
+
+def test_new_database_returns_free_pages_incrementally():
+    db_handler = SqliteDbHandler(db_path)
+    db_handler.ensure_db()
+    assert pragma("auto_vacuum") == 2
+    assert pragma("journal_mode") == "wal"
+
+    fill_and_clear(db_handler)
+    db_handler.checkpoint("truncate")
+    free_pages = pragma("freelist_count")
+    assert free_pages > 10
+
+    assert db_handler.incremental_vacuum(max_pages=5) == 5
+    assert pragma("freelist_count") == free_pages - 5
+    assert db_handler.incremental_vacuum() == free_pages - 5
+    assert pragma("freelist_count") == 0
+
+    [result] = db_handler.checkpoint("truncate")
+    assert not result.busy
+    assert result.checkpointed_pages == result.log_pages
+    with pytest.raises(ValueError):
+        db_handler.checkpoint("sometimes")
+
+    db_handler.delete_database_file()
+
+
+def test_enable_incremental_vacuum_on_existing_database():
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE Legacy (value TEXT)")
+    conn.close()
+    maintainer = SqliteMaintainer(db_path)
+    assert pragma("auto_vacuum") == 0
+    assert maintainer.incremental_vacuum() == 0
+
+    assert maintainer.enable_incremental_vacuum()
+    assert pragma("auto_vacuum") == 2
+    assert not maintainer.enable_incremental_vacuum()
+
+    os.remove(db_path)
+
+
+def test_analyze_and_integrity_check():
+    db_handler = SqliteDbHandler(db_path)
+    db_handler.initialize_db()
+    repo = CardsetRepository(db_path)
+    cardset = repo.create_cardset_info(
+        "cuteseal",
+        CardsetInfoSpec("title", "description", CardsStatus.PRESENT)
+    )
+    repo.create_card(
+        cardset.id, CardSpec("term", "description", CardsStatus.PRESENT)
+    )
+    repo.close()
+
+    db_handler.analyze()
+    db_handler.analyze(full=True)
+    conn = sqlite3.connect(db_path)
+    analyzed = {row[0] for row in conn.execute("SELECT tbl FROM sqlite_stat1")}
+    assert {"Card", "Cardset"} <= analyzed
+
+    assert db_handler.integrity_check() == {}
+    assert db_handler.integrity_check(quick=True) == {}
+
+    conn.execute(
+        """
+        INSERT INTO Card (
+            id, term, description, created_at, modified_at, status,
+            owner_id, cardset_id
+        ) VALUES ('orphan', 'term', '', 0, 0, 0, 'cuteseal', 'missing')
+        """
+    )
+    conn.commit()
+    conn.close()
+    [problems] = db_handler.integrity_check().values()
+    assert problems == ["foreign key violation: Card rowid None -> Cardset"]
+
+    db_handler.delete_database_file()
+
+
+def test_maintenance_skips_steps_while_database_is_locked():
+    db_handler = SqliteDbHandler(db_path)
+    db_handler.ensure_db()
+    fill_and_clear(db_handler)
+
+    writer = sqlite3.connect(db_path, isolation_level=None)
+    writer.execute("BEGIN IMMEDIATE")
+    [result] = db_handler.maintain()
+    assert "incremental_vacuum" in result.skipped
+    writer.execute("ROLLBACK")
+    writer.close()
+
+    [result] = db_handler.maintain()
+    assert result.skipped == []
+    assert result.analyzed
+    assert result.vacuumed_pages > 10
+    assert pragma("freelist_count") == 0
+
+    db_handler.delete_database_file()
+
+
+def test_scheduler_waits_while_busy():
+    db_handler = SqliteDbHandler(db_path)
+    db_handler.ensure_db()
+
+    busy = True
+    scheduler = MaintenanceScheduler(
+        db_handler.db_paths,
+        interval=0.01,
+        is_busy=lambda: busy,
+        retry_delay=0.01,
+    )
+    scheduler.start()
+    time.sleep(0.1)
+    assert scheduler.last_results == []
+
+    busy = False
+    deadline = time.monotonic() + 5
+    while not scheduler.last_results and time.monotonic() < deadline:
+        time.sleep(0.01)
+    scheduler.close()
+    assert scheduler.last_results[0].db_path == db_path
+
+    db_handler.delete_database_file()
+
+
+def test_cli_maintenance_commands(capsys):
+    db_handler = SqliteDbHandler(db_path)
+    db_handler.ensure_db()
+
+    main(["--db-path", db_path, "integrity-check"])
+    main(["--db-path", db_path, "maintain"])
+    main(["--db-path", db_path, "checkpoint", "--mode", "truncate"])
+    output = capsys.readouterr().out
+    assert output.startswith("ok\n")
+    assert "vacuumed pages: 0" in output
+    assert "busy: False" in output
+
+    db_handler.delete_database_file()
+
+
+def test_scheduler_keeps_running_after_error(caplog):
+    db_handler = SqliteDbHandler(db_path)
+    db_handler.ensure_db()
+    broken_path = "test_maintenance_broken.db"
+    with open(broken_path, "wb") as broken:
+        broken.write(b"not a database" * 100)
+
+    scheduler = MaintenanceScheduler([broken_path, db_path], interval=0.01)
+    scheduler.start()
+    for _ in range(2):
+        scheduler.last_results = []
+        deadline = time.monotonic() + 5
+        while not scheduler.last_results and time.monotonic() < deadline:
+            time.sleep(0.01)
+    scheduler.close()
+
+    broken_result, result = scheduler.last_results
+    assert "not a database" in broken_result.error
+    assert result.error is None
+    assert result.analyzed
+    assert "test_maintenance_broken.db" in caplog.text
+
+    os.remove(broken_path)
+    db_handler.delete_database_file()
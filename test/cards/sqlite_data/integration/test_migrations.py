@@ -0,0 +1,153 @@
+import sqlite3
+import datetime
+import concurrent.futures
+
+from cards import (
+    SqliteDbHandler,
+    CardsetRepository,
+    CardsetInfoSpec,
+    CardsStatus,
+    CardSpec,
+)
+from cards.sqlite_data.utils import SCHEMA_VERSION
+
+db_path = 'test_migrations.db'
+
+LEGACY_DB_QUERY = """
+    CREATE TABLE CardsStatus (
+        status TEXT,
+        CONSTRAINT status_check CHECK (status IN ('present', 'absent'))
+    );
+
+    INSERT INTO CardsStatus (status) VALUES ('present'), ('absent');
+
+    CREATE TABLE Cardset (
+        id TEXT PRIMARY KEY,
+        title TEXT NOT NULL,
+        description TEXT,
+        created_at DATETIME NOT NULL,
+        modified_at DATETIME NOT NULL,
+        addressed_at DATETIME,
+        status TEXT NOT NULL,
+        owner_id TEXT NOT NULL,
+        FOREIGN KEY (status) REFERENCES CardsStatus(status)
+    );
+
+    CREATE TABLE Card (
+        id TEXT PRIMARY KEY,
+        term TEXT NOT NULL,
+        description TEXT,
+        created_at DATETIME NOT NULL,
+        modified_at DATETIME NOT NULL,
+        addressed_at DATETIME,
+        status TEXT NOT NULL,
+        owner_id TEXT NOT NULL,
+        cardset_id TEXT NOT NULL,
+        FOREIGN KEY (status) REFERENCES CardsStatus(status),
+        FOREIGN KEY (cardset_id) REFERENCES Cardset(id) ON DELETE CASCADE
+    );
+
+    INSERT INTO Cardset VALUES (
+        'cardset1', 'title', 'description', '2024-04-01 10:00:00',
+        '2024-04-02 11:30:00.250000', '2024-04-01 10:00:00', 'present',
+        'cuteseal'
+    );
+
+    INSERT INTO Card VALUES (
+        'card0001', 'term', 'description', '2024-04-01 10:00:00',
+        '2024-04-01 10:00:00', '2024-04-01 10:00:00', 'absent',
+        'cuteseal', 'cardset1'
+    );
+"""
+
+
+def test_migrate_legacy_layout():
+    conn = sqlite3.connect(db_path)
+    conn.executescript(LEGACY_DB_QUERY)
+    conn.close()
+
+    db_hander = SqliteDbHandler(db_path)
+    assert db_hander.migrate_db() == SCHEMA_VERSION
+
+    repo = CardsetRepository(db_path)
+    cardset_info = repo.get_cardset_infos("cardset1")[0]
+    assert cardset_info.title == "title"
+    assert cardset_info.status == CardsStatus.PRESENT
+    assert cardset_info.created_at == datetime.datetime(2024, 4, 1, 10)
+    assert cardset_info.modified_at == datetime.datetime(
+        2024, 4, 2, 11, 30, 0, 250000
+    )
+
+    assert repo.get_cards("card0001") == []
+    card = repo.get_cards("card0001", include_deleted=True)[0]
+    assert card.status == CardsStatus.ABSENT
+    assert card.position == "d0000"
+
+    conn = sqlite3.connect(db_path)
+    row = conn.execute("SELECT status, created_at FROM Card").fetchone()
+    conn.close()
+    assert row == (1, 1711965600000)
+
+    changes = repo.get_changes("cuteseal")
+    assert [info.id for info in changes.cardsets] == ["cardset1"]
+    assert [card.id for card in changes.cards] == ["card0001"]
+
+    assert db_hander.migrate_db() == SCHEMA_VERSION
+
+    new_card = repo.create_card(
+        "cardset1", CardSpec("new", "description", CardsStatus.PRESENT)
+    )
+    assert new_card.position > card.position
+
+    db_hander.delete_database_file()
+
+
+def test_ensure_db_from_concurrent_workers():
+    handler = SqliteDbHandler(db_path)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+        versions = list(executor.map(lambda _: handler.ensure_db(), range(4)))
+    assert versions == [SCHEMA_VERSION] * 4
+
+    repo = CardsetRepository(db_path)
+    repo.create_cardset_info(
+        "cuteseal", CardsetInfoSpec("title", "", CardsStatus.PRESENT)
+    )
+    handler.ensure_db()
+    assert len(repo.get_cardset_infos(user_id="cuteseal")) == 1
+
+    repo.close()
+    handler.delete_database_file()
+
+
+def test_migrate_version_times_to_milliseconds():
+    db_hander = SqliteDbHandler(db_path)
+    db_hander.initialize_db()
+    repo = CardsetRepository(db_path)
+    cardset = repo.create_cardset_info(
+        "cuteseal",
+        CardsetInfoSpec("title", "description", CardsStatus.PRESENT)
+    )
+    repo.close()
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("UPDATE ResourceVersion SET modified_at = 1711965600")
+    conn.execute("PRAGMA user_version = 5")
+    conn.commit()
+    conn.close()
+
+    assert db_hander.migrate_db() == SCHEMA_VERSION
+    repo = CardsetRepository(db_path)
+    version = repo.get_cardset_infos_version(cardset_id=cardset.id)
+    assert version.modified_at == datetime.datetime(
+        2024, 4, 1, 10, tzinfo=datetime.timezone.utc
+    )
+
+    repo.create_card(
+        cardset.id, CardSpec("term", "description", CardsStatus.PRESENT)
+    )
+    version = repo.get_cardset_infos_version(cardset_id=cardset.id)
+    now = datetime.datetime.now(datetime.timezone.utc)
+    assert abs(now - version.modified_at) < datetime.timedelta(seconds=5)
+    repo.close()
+
+    db_hander.delete_database_file()
@@ -0,0 +1,102 @@
+import sqlite3
+import datetime
+
+from cards import (
+    SqliteDbHandler,
+    CardsetRepository,
+    CardsetInfoSpec,
+    CardsStatus,
+    CardSpec
+)
+
+db_path = 'test_purge.db'
+
+
+def backdate(table, id):
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        f"UPDATE {table} SET modified_at = ? WHERE id = ?",
+        [946684800000, id],
+    )
+    conn.commit()
+    conn.close()
+
+
+def count_rows(table):
+    conn = sqlite3.connect(db_path)
+    count = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    conn.close()
+    return count
+
+
+def test_purge_archives_long_absent_rows():
+    db_hander = SqliteDbHandler(db_path)
+    db_hander.initialize_db()
+
+    repo = CardsetRepository(db_path)
+    live = repo.create_cardset_info(
+        "cuteseal",
+        CardsetInfoSpec("live", "description", CardsStatus.PRESENT)
+    )
+    live_card = repo.create_card(
+        live.id, CardSpec("term", "description", CardsStatus.PRESENT)
+    )
+    absent_card = repo.create_card(
+        live.id, CardSpec("term", "description", CardsStatus.ABSENT)
+    )
+    fresh_absent_card = repo.create_card(
+        live.id, CardSpec("term", "description", CardsStatus.ABSENT)
+    )
+    dead = repo.create_cardset_info(
+        "cuteseal",
+        CardsetInfoSpec("dead", "description", CardsStatus.PRESENT)
+    )
+    for _ in range(3):
+        repo.create_card(
+            dead.id, CardSpec("term", "description", CardsStatus.PRESENT)
+        )
+    repo.modify_cardset_info(
+        dead.id, CardsetInfoSpec(None, None, CardsStatus.ABSENT)
+    )
+    backdate("Card", absent_card.id)
+    backdate("Cardset", dead.id)
+
+    result = db_hander.purge_absent(
+        older_than=datetime.timedelta(days=1),
+        batch_size=2,
+    )
+
+    assert result.cards == 4
+    assert result.cardsets == 1
+    assert count_rows("Cardset") == 1
+    assert count_rows("CardsetArchive") == 1
+    assert count_rows("CardArchive") == 4
+    remaining = repo.get_cards(cardset_id=live.id, include_deleted=True)
+    assert {card.id for card in remaining} == {
+        live_card.id, fresh_absent_card.id
+    }
+
+    db_hander.delete_database_file()
+
+
+def test_purge_hard_delete_skips_archive():
+    db_hander = SqliteDbHandler(db_path)
+    db_hander.initialize_db()
+
+    repo = CardsetRepository(db_path)
+    cardset = repo.create_cardset_info(
+        "cuteseal",
+        CardsetInfoSpec("title", "description", CardsStatus.ABSENT)
+    )
+    backdate("Cardset", cardset.id)
+
+    result = db_hander.purge_absent(
+        older_than=datetime.timedelta(days=1),
+        archive=False,
+    )
+
+    assert result.cardsets == 1
+    assert count_rows("Cardset") == 0
+    assert "CardsetArchive" not in db_hander.list_tables()
+
+    db_hander.delete_database_file()
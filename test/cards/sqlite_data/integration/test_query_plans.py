@@ -0,0 +1,197 @@
+import re
+import datetime
+import itertools
+
+from cards import (
+    SqliteDbHandler,
+    CardsetRepository,
+    CardsetInfoSpec,
+    CardsStatus,
+    CardSpec,
+    CardsSort,
+    CardsetsSort,
+    SortOrder,
+    CardField,
+    CardsetInfoField,
+)
+from cards.sqlite_data.query_plans import record_query_plans
+
+db_path = 'test_query_plans.db'
+
+# Намеренные исключения: регулярное выражение для нормализованного
+# запроса и шаги плана, которые для него допустимы.
+ALLOWED_PLAN_PROBLEMS = [
+    # Фильтр по времени изменения с другим порядком: сортируются только
+    # строки из диапазона индекса по времени изменения.
+    (
+        r"modified_at [<>] \? (AND modified_at < \? )?"
+        r"ORDER BY (?!modified_at)",
+        ("USE TEMP B-TREE FOR ORDER BY",),
+    ),
+    # Случайный порядок нельзя получить из индекса.
+    (r"ORDER BY RANDOM\(\)", ("USE TEMP B-TREE FOR ORDER BY",)),
+]
+
+
+# Проекции живых объектов на id и ключ сортировки, которые читаются
+# только из индекса.
+COVERED_PROJECTION = (
+    r"SELECT id, (term|position|title), owner_id FROM \w+ "
+    r"WHERE \?=\? AND (cardset_id|owner_id) = \? AND status = \? "
+    r"ORDER BY \1 "
+)
+
+
+def is_allowed(query, problem):
+    return any(
+        re.search(pattern, query) and problem.startswith(allowed)
+        for pattern, allowed in ALLOWED_PLAN_PROBLEMS
+    )
+
+
+def populate(repo):
+    cardset_infos = []
+    for index in range(20):
+        owner_id = "cuteseal" if index % 2 else "walrus01"
+        spec = CardsetInfoSpec(
+            f"title{index}", "description", CardsStatus.PRESENT
+        )
+        cardset_info = repo.create_cardset_info(owner_id, spec)
+        for card_index in range(10):
+            status = CardsStatus.ABSENT if card_index % 3 == 0 \
+                else CardsStatus.PRESENT
+            repo.create_card(
+                cardset_info.id,
+                CardSpec(f"term{card_index}", "description", status),
+            )
+        if index % 5 == 0:
+            spec.status = CardsStatus.ABSENT
+            repo.modify_cardset_info(cardset_info.id, spec)
+        cardset_infos.append(cardset_info)
+    return cardset_infos
+
+
+def test_hot_queries_use_indexes():
+    db_handler = SqliteDbHandler(db_path)
+    db_handler.initialize_db()
+    repo = CardsetRepository(db_path)
+    cardset_info = populate(repo)[1]
+    card = repo.get_cards(cardset_id=cardset_info.id)[0]
+
+    with record_query_plans(repo.pool) as plans:
+        for cardset_id, user_id, include_deleted in itertools.product(
+            [None, cardset_info.id], [None, "cuteseal"], [False, True],
+        ):
+            # Выборки без фильтра по набору или владельцу сервис
+            # отклоняет.
+            if cardset_id is None and user_id is None:
+                continue
+            repo.get_cardset_infos(
+                cardset_id=cardset_id,
+                user_id=user_id,
+                include_deleted=include_deleted,
+            )
+            repo.get_cardset_infos_version(
+                cardset_id=cardset_id, user_id=user_id
+            )
+
+        for card_id, cardset_id, include_deleted, mixed in itertools.product(
+            [None, card.id], [None, cardset_info.id], [False, True],
+            [False, True],
+        ):
+            if card_id is None and cardset_id is None:
+                continue
+            repo.get_cards(
+                card_id=card_id,
+                cardset_id=cardset_id,
+                include_deleted=include_deleted,
+                mixed=mixed,
+            )
+            repo.get_cards_version(card_id=card_id, cardset_id=cardset_id)
+
+        now = datetime.datetime.now()
+        since = now - datetime.timedelta(days=1)
+        until = now + datetime.timedelta(days=1)
+        # Проекция на id и ключ сортировки читается из индекса без
+        # обращения к таблице.
+        for (
+            sort, order, include_deleted, modified_after, modified_before,
+            projected,
+        ) in itertools.product(
+            list(CardsSort), list(SortOrder), [False, True], [None, since],
+            [None, until], [False, True],
+        ):
+            repo.get_cards(
+                cardset_id=cardset_info.id,
+                include_deleted=include_deleted,
+                sort=sort,
+                order=order,
+                fields=[CardField.ID, CardField(sort.value)]
+                if projected else None,
+                modified_after=modified_after,
+                modified_before=modified_before,
+            )
+        for (
+            sort, order, include_deleted, modified_after, modified_before,
+            projected,
+        ) in itertools.product(
+            list(CardsetsSort), list(SortOrder), [False, True],
+            [None, since], [None, until], [False, True],
+        ):
+            repo.get_cardset_infos(
+                user_id="cuteseal",
+                include_deleted=include_deleted,
+                sort=sort,
+                order=order,
+                fields=[CardsetInfoField.ID, CardsetInfoField(sort.value)]
+                if projected else None,
+                modified_after=modified_after,
+                modified_before=modified_before,
+            )
+
+        for include_deleted in [False, True]:
+            repo.get_cardset(cardset_info.id, include_deleted)
+
+        for since in [0, 100]:
+            repo.get_changes("cuteseal", since=since, limit=10)
+
+        repo.create_card(
+            cardset_info.id,
+            CardSpec("term", "description", CardsStatus.PRESENT),
+        )
+        repo.modify_card(
+            card.id,
+            CardSpec("term", "description", CardsStatus.ABSENT),
+        )
+        repo.modify_cardset_info(
+            cardset_info.id,
+            CardsetInfoSpec("title", "description", CardsStatus.PRESENT),
+        )
+        other = repo.get_cards(cardset_id=cardset_info.id)[-1]
+        repo.move_card(card.id, before_id=other.id)
+        repo.move_card(card.id, after_id=other.id)
+        repo.move_card(card.id)
+        repo.rebalance_card_positions(cardset_info.id)
+        repo.delete_card(card.id)
+        repo.delete_cardset_cards(cardset_info.id, limit=5)
+        repo.delete_cardset(cardset_info.id)
+
+    assert len(plans) > 20
+    violations = [
+        f"{plan.query}: {problem}"
+        for plan in plans.values()
+        for problem in plan.problems
+        if not is_allowed(plan.query, problem)
+    ]
+    assert violations == []
+
+    projections = [
+        plan for plan in plans.values()
+        if re.match(COVERED_PROJECTION, plan.query)
+    ]
+    assert len(projections) == 6
+    for plan in projections:
+        assert any("COVERING INDEX" in detail for detail in plan.details)
+
+    repo.close()
+    db_handler.delete_database_file()
@@ -0,0 +1,148 @@
+from cards import (
+    SqliteDbHandler,
+    ShardedCardsetRepository,
+    CardsetInfoSpec,
+    CardsStatus,
+    CardSpec,
+    CardsSort,
+    CardsetsSort,
+    SortOrder,
+    CardField,
+)
+from cards.sqlite_data.sharding import (
+    bucket_for_owner,
+    bucket_prefix,
+    rebalance_shards,
+)
+
+db_path = 'test_sharded.db'
+owners = ["cuteseal", "cutewalrus", "cuteotter", "cutepenguin", "cuteorca"]
+
+
+def create_cardsets(repo):
+    cardsets = {}
+    for owner_id in owners:
+        cardset = repo.create_cardset_info(
+            owner_id,
+            CardsetInfoSpec(owner_id, "description", CardsStatus.PRESENT)
+        )
+        repo.create_card(
+            cardset.id,
+            CardSpec("term " + owner_id, "description", CardsStatus.PRESENT)
+        )
+        cardsets[owner_id] = cardset
+    return cardsets
+
+
+def test_sharded_repository_routes_by_owner():
+    db_handler = SqliteDbHandler(db_path, shard_count=2)
+    db_handler.initialize_db()
+
+    repo = ShardedCardsetRepository(db_path, 2)
+    cardsets = create_cardsets(repo)
+
+    for owner_id, cardset in cardsets.items():
+        assert cardset.id[0] == bucket_prefix(bucket_for_owner(owner_id))
+        assert repo.shard_for_owner(owner_id) is repo.shard_for_id(cardset.id)
+
+        infos = repo.get_cardset_infos(user_id=owner_id)
+        assert [info.id for info in infos] == [cardset.id]
+
+        cards = repo.get_cards(cardset_id=cardset.id)
+        assert len(cards) == 1
+        assert cards[0].id[0] == cardset.id[0]
+        assert repo.get_cards(card_id=cards[0].id)[0].term == cards[0].term
+
+    titles = [info.title for info in repo.get_cardset_infos(limit=10)]
+    assert titles == sorted(owners)
+    assert len(repo.get_cardset_infos(offset=1, limit=2)) == 2
+
+    terms = [card.term for card in repo.get_cards(limit=10)]
+    assert terms == sorted(terms)
+    assert len(terms) == len(owners)
+
+    infos = repo.get_cardset_infos(
+        limit=10, sort=CardsetsSort.CREATED_AT, order=SortOrder.DESC
+    )
+    keys = [(info.created_at, info.id) for info in infos]
+    assert keys == sorted(keys, reverse=True)
+    assert len(keys) == len(owners)
+
+    cards = repo.get_cards(
+        limit=10,
+        sort=CardsSort.CREATED_AT,
+        fields=[CardField.ID, CardField.CREATED_AT],
+    )
+    keys = [(card.created_at, card.id) for card in cards]
+    assert keys == sorted(keys)
+    assert len(keys) == len(owners)
+    assert all(card.term is None for card in cards)
+
+    cardset = cardsets[owners[0]]
+    card = repo.create_card(
+        cardset.id, CardSpec("z", "description", CardsStatus.PRESENT)
+    )
+    repo.move_card(card.id, before_id=repo.get_cards(
+        cardset_id=cardset.id, sort=CardsSort.POSITION
+    )[0].id)
+    deck = repo.get_cardset(cardset.id)
+    assert [deck_card.id for deck_card in deck.cards][0] == card.id
+    assert len(deck.cards) == 2
+
+    db_handler.delete_database_file()
+
+
+def test_rebalance_keeps_data_reachable():
+    db_handler = SqliteDbHandler(db_path, shard_count=2)
+    db_handler.initialize_db()
+
+    repo = ShardedCardsetRepository(db_path, 2)
+    cardsets = create_cardsets(repo)
+    deleted_card_ids = {}
+    sinces = {}
+    for owner_id, cardset in cardsets.items():
+        sinces[owner_id] = repo.get_changes(owner_id).next_since
+        card = repo.create_card(
+            cardset.id,
+            CardSpec("deleted", "description", CardsStatus.PRESENT)
+        )
+        repo.delete_card(card.id)
+        deleted_card_ids[owner_id] = card.id
+    versions = {
+        owner_id: repo.get_cardset_infos_version(user_id=owner_id).version
+        for owner_id in owners
+    }
+
+    moved = rebalance_shards(db_path, shard_count=2, target_shard_count=3)
+    assert sum(moved.values()) > 0
+
+    repo = ShardedCardsetRepository(db_path, 3)
+    for owner_id, cardset in cardsets.items():
+        infos = repo.get_cardset_infos(user_id=owner_id)
+        assert [info.id for info in infos] == [cardset.id]
+        assert len(repo.get_cards(cardset_id=cardset.id)) == 1
+        version = repo.get_cardset_infos_version(user_id=owner_id)
+        assert version.version >= versions[owner_id]
+        changes = repo.get_changes(owner_id, since=sinces[owner_id])
+        assert changes.deleted_card_ids == [deleted_card_ids[owner_id]]
+
+    assert len(repo.get_cardset_infos(limit=10)) == len(owners)
+
+    SqliteDbHandler(db_path, shard_count=3).delete_database_file()
+
+
+def test_unknown_id_prefix_finds_nothing():
+    db_handler = SqliteDbHandler(db_path, shard_count=2)
+    db_handler.initialize_db()
+
+    repo = ShardedCardsetRepository(db_path, 2)
+    create_cardsets(repo)
+    unknown_id = "!" * 8
+
+    assert repo.get_cards(cardset_id=unknown_id) == []
+    assert repo.get_cards(card_id=unknown_id) == []
+    assert repo.get_cardset(cardset_id=unknown_id) is None
+    assert repo.get_cardset_infos(cardset_id=unknown_id) == []
+    assert repo.get_cards_version(cardset_id=unknown_id) is None
+
+    db_handler.delete_database_file()
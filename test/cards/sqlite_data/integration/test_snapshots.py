@@ -0,0 +1,102 @@
+import os
+import time
+
+from cards import (
+    SqliteDbHandler,
+    CardsetRepository,
+    CardsetService,
+    CardsetSpec,
+    CardsStatus,
+)
+from cards.sqlite_data import SnapshotRefresher
+
+db_path = 'test_snapshots.db'
+snapshot_path = 'test_snapshots_read.db'
+
+
+def create_cardset(service, owner_id, title):
+    return service.create_cardset(
+        owner_id,
+        owner_id,
+        CardsetSpec(title, "description", CardsStatus.PRESENT, []),
+    )
+
+
+def get_titles(service, owner_id):
+    cardset_infos = service.get_cardset_infos(owner_id, user_id=owner_id)
+    return sorted(cardset_info.title for cardset_info in cardset_infos)
+
+
+def get_snapshot_titles(repo, owner_id):
+    # Чтение без пользователя всегда обслуживает снимок.
+    cardset_infos = repo.get_cardset_infos(user_id=owner_id)
+    return sorted(cardset_info.title for cardset_info in cardset_infos)
+
+
+def test_reads_are_served_from_snapshot():
+    db_handler = SqliteDbHandler(db_path)
+    db_handler.initialize_db()
+    refresher = SnapshotRefresher(db_path, snapshot_path)
+
+    repo = CardsetRepository(db_path, snapshot_path=snapshot_path)
+    service = CardsetService(repo)
+
+    create_cardset(service, "cuteseal", "first")
+    refresher.refresh()
+    assert os.path.exists(snapshot_path)
+
+    # Запись выполнена другим репозиторием (рабочим процессом): снимок о
+    # ней не знает, но пользователь, выполнивший ее, видит ее до
+    # обновления снимка.
+    writer_service = CardsetService(CardsetRepository(db_path))
+    create_cardset(writer_service, "cuteseal", "second")
+    assert get_snapshot_titles(repo, "cuteseal") == ["first"]
+    assert get_titles(service, "cuteseal") == ["first", "second"]
+
+    refresher.refresh()
+    assert get_snapshot_titles(repo, "cuteseal") == ["first", "second"]
+    assert get_titles(service, "cuteseal") == ["first", "second"]
+
+    create_cardset(service, "cuteseal", "third")
+    assert get_titles(service, "cuteseal") == ["first", "second", "third"]
+
+    create_cardset(writer_service, "walrus01", "other")
+    assert get_snapshot_titles(repo, "walrus01") == []
+
+    # Слишком старый снимок не используется.
+    taken_at = time.time() - 60
+    os.utime(snapshot_path, (taken_at, taken_at))
+    assert get_snapshot_titles(repo, "walrus01") == ["other"]
+
+    repo.close()
+    db_handler.delete_database_file()
+    os.remove(snapshot_path)
+
+
+def test_snapshot_is_refreshed_by_one_process():
+    db_handler = SqliteDbHandler(db_path)
+    db_handler.initialize_db()
+
+    leader = SnapshotRefresher(db_path, snapshot_path, interval=0.01)
+    leader.start()
+    assert os.path.exists(snapshot_path)
+
+    follower = SnapshotRefresher(db_path, snapshot_path, interval=0.01)
+    refreshed = []
+    follower.refresh = lambda: refreshed.append(time.time())
+    follower.start()
+    time.sleep(0.1)
+    assert refreshed == []
+
+    # После остановки владельца блокировки обновление продолжает
+    # другой процесс.
+    leader.close()
+    deadline = time.monotonic() + 5
+    while not refreshed and time.monotonic() < deadline:
+        time.sleep(0.01)
+    follower.close()
+    assert refreshed
+
+    db_handler.delete_database_file()
+    os.remove(snapshot_path)
+    os.remove(f"{snapshot_path}.lock")
@@ -0,0 +1,54 @@
+import os
+import sys
+import json
+import subprocess
+
+import cards
+
+src_path = os.path.dirname(os.path.dirname(cards.__file__))
+
+# Запас по времени с учетом медленных CI-машин; без веб-стека импорт
+# занимает десятки миллисекунд, с FastAPI - сотни.
+IMPORT_BUDGET_SECONDS = 0.25
+
+
+def run_python(code):
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        [src_path, env.get("PYTHONPATH", "")]
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output)
+
+
+def test_core_and_sqlite_data_do_not_import_web_stack():
+    loaded = run_python(
+        "import sys, json\n"
+        "import time\n"
+        "start = time.perf_counter()\n"
+        "from cards import CardsetService, CardsetRepository\n"
+        "import cards.core, cards.sqlite_data, cards.memory_data\n"
+        "elapsed = time.perf_counter() - start\n"
+        "web_stack = ('fastapi', 'pydantic', 'starlette', 'cards.api')\n"
+        "web = [name for name in sys.modules if name.startswith(web_stack)]\n"
+        "print(json.dumps({'web': web, 'elapsed': elapsed}))\n"
+    )
+    assert loaded["web"] == []
+    assert loaded["elapsed"] < IMPORT_BUDGET_SECONDS
+
+
+def test_api_is_imported_on_first_access():
+    loaded = run_python(
+        "import sys, json, cards\n"
+        "before = 'cards.api' in sys.modules\n"
+        "builder = cards.ApiAppBuilder\n"
+        "print(json.dumps([before, 'cards.api' in sys.modules,\n"
+        "                  builder.__module__]))\n"
+    )
+    assert loaded == [False, True, "cards.api.app_builder"]